@@ -0,0 +1,114 @@
+-- Migration Prisma: SQL compagnon (prisma/online-migrations/stats-rollups.sql) puis backfill calculé.
+-- À déployer avant les routes qui lisent les agrégats (npx prisma migrate deploy).
+-- PostgreSQL
+-- Agrégats journaliers par tenant des tableaux de bord (générés par scripts/generate-rollups.py)
+--
+-- Tables "BeautyAppointmentDailyRollup" et "RollupDirtyDay", livrées par la migration
+-- prisma/migrations/*_stats_daily_rollups (npx prisma migrate deploy). Rejouable à la main:
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f prisma/online-migrations/stats-rollups.sql
+--
+-- Chaque écriture sur une table source marque (tenant, jour) dans "RollupDirtyDay"
+-- (trigger par ligne, ON CONFLICT DO NOTHING). kairo_refresh_daily_rollups(lot, tenant)
+-- recalcule au plus `lot` jours marqués par agrégat (DELETE + INSERT ... GROUP BY
+-- du seul jour) et retourne le nombre de jours traités. Rejouable.
+
+SET lock_timeout = '5s';
+
+CREATE TABLE IF NOT EXISTS "RollupDirtyDay" (
+  "rollup" TEXT NOT NULL,
+  "tenantId" TEXT NOT NULL,
+  "day" DATE NOT NULL,
+  "markedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT "RollupDirtyDay_pkey" PRIMARY KEY ("rollup", "tenantId", "day")
+);
+
+-- === BeautyAppointmentDailyRollup: BeautyAppointment par tenant et jour de "date" ===
+-- Routes servies: GET src/app/api/admin/stats-beaute/route.ts
+
+CREATE TABLE IF NOT EXISTS "BeautyAppointmentDailyRollup" (
+  "id" BIGSERIAL NOT NULL,
+  "tenantId" TEXT NOT NULL,
+  "day" DATE NOT NULL,
+  "status" "AppointmentStatus" NOT NULL,
+  "treatmentId" TEXT NOT NULL,
+  "professionalId" TEXT,
+  "count" INTEGER NOT NULL,
+  "updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT "BeautyAppointmentDailyRollup_pkey" PRIMARY KEY ("id")
+);
+CREATE INDEX IF NOT EXISTS "BeautyAppointmentDailyRollup_tenantId_day_idx" ON "BeautyAppointmentDailyRollup"("tenantId", "day");
+
+CREATE OR REPLACE FUNCTION "kairo_mark_BeautyAppointmentDailyRollup"() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP <> 'INSERT' AND OLD."tenantId" IS NOT NULL AND OLD."date" IS NOT NULL THEN
+    INSERT INTO "RollupDirtyDay" ("rollup", "tenantId", "day")
+    VALUES ('BeautyAppointmentDailyRollup', OLD."tenantId"::text, OLD."date"::date)
+    ON CONFLICT DO NOTHING;
+  END IF;
+  IF TG_OP <> 'DELETE' AND NEW."tenantId" IS NOT NULL AND NEW."date" IS NOT NULL THEN
+    INSERT INTO "RollupDirtyDay" ("rollup", "tenantId", "day")
+    VALUES ('BeautyAppointmentDailyRollup', NEW."tenantId"::text, NEW."date"::date)
+    ON CONFLICT DO NOTHING;
+  END IF;
+  RETURN NULL;
+END $$;
+
+DROP TRIGGER IF EXISTS "BeautyAppointmentDailyRollup_mark" ON "BeautyAppointment";
+CREATE TRIGGER "BeautyAppointmentDailyRollup_mark"
+AFTER INSERT OR DELETE OR UPDATE OF "tenantId", "date", "status", "treatmentId", "professionalId" ON "BeautyAppointment"
+FOR EACH ROW EXECUTE FUNCTION "kairo_mark_BeautyAppointmentDailyRollup"();
+
+CREATE OR REPLACE FUNCTION "kairo_refresh_BeautyAppointmentDailyRollup"(batch_size integer, only_tenant text)
+RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+  tenants text[];
+  days date[];
+BEGIN
+  -- Jours réclamés (SKIP LOCKED: deux rafraîchissements concurrents se partagent le travail).
+  -- Une écriture pendant le calcul re-marque son jour pour le passage suivant.
+  WITH claimed AS (
+    DELETE FROM "RollupDirtyDay" dirty
+    USING (
+      SELECT "tenantId", "day" FROM "RollupDirtyDay"
+      WHERE "rollup" = 'BeautyAppointmentDailyRollup' AND (only_tenant IS NULL OR "tenantId" = only_tenant)
+      LIMIT batch_size
+      FOR UPDATE SKIP LOCKED
+    ) picked
+    WHERE dirty."rollup" = 'BeautyAppointmentDailyRollup' AND dirty."tenantId" = picked."tenantId" AND dirty."day" = picked."day"
+    RETURNING dirty."tenantId", dirty."day"
+  )
+  SELECT array_agg("tenantId"), array_agg("day") INTO tenants, days FROM claimed;
+  IF tenants IS NULL THEN
+    RETURN 0;
+  END IF;
+
+  DELETE FROM "BeautyAppointmentDailyRollup" r
+  USING unnest(tenants, days) AS c("tenantId", "day")
+  WHERE r."tenantId" = c."tenantId"::TEXT AND r."day" = c."day";
+
+  INSERT INTO "BeautyAppointmentDailyRollup" ("tenantId", "day", "status", "treatmentId", "professionalId", "count", "updatedAt")
+  SELECT s."tenantId", c."day", s."status", s."treatmentId", s."professionalId", count(*)::integer, now()
+  FROM unnest(tenants, days) AS c("tenantId", "day")
+  JOIN "BeautyAppointment" s
+    ON s."tenantId" = c."tenantId"::TEXT AND s."date" >= c."day" AND s."date" < c."day" + 1
+  GROUP BY s."tenantId", c."day", s."status", s."treatmentId", s."professionalId";
+
+  RETURN cardinality(tenants);
+END $$;
+
+-- Backfill: tous les jours existants à calculer (vidés par kairo_refresh_daily_rollups)
+INSERT INTO "RollupDirtyDay" ("rollup", "tenantId", "day")
+SELECT DISTINCT 'BeautyAppointmentDailyRollup', "tenantId"::text, "date"::date FROM "BeautyAppointment"
+WHERE "tenantId" IS NOT NULL AND "date" IS NOT NULL
+ON CONFLICT DO NOTHING;
+
+-- Point d'entrée du job (src/lib/stats-rollups.ts): jours recalculés, tous agrégats confondus
+CREATE OR REPLACE FUNCTION kairo_refresh_daily_rollups(batch_size integer DEFAULT 500, only_tenant text DEFAULT NULL)
+RETURNS integer LANGUAGE plpgsql AS $$
+BEGIN
+  RETURN "kairo_refresh_BeautyAppointmentDailyRollup"(batch_size, only_tenant);
+END $$;
+
+-- Backfill calculé ici: les agrégats sont complets dès la fin de la migration
+SELECT kairo_refresh_daily_rollups(2147483647);
@@ -3,12 +3,26 @@
 Script CORRIGÉ pour ajouter l'architecture multi-tenant au schema Prisma
 Auteur: KAIRO Digital
 Date: 23 Octobre 2025
-Version: 2.0 (Fix duplication bug)
+Version: 2.5 (AST prisma_schema + index de pagination par curseur + suppression des index redondants + migration SQL en ligne
+         + partitionnement optionnel par tenantId + clés UUID natives optionnelles)
 """
 
+import argparse
+import json
+import os
 import re
 import sys
 
+from api_codemods.cursor_pagination import add_cursor_indexes
+from include_fanout import RowStats
+from online_migration import plan_tenant_columns, render_online_migration
+from prisma_schema import parse_schema
+from route_analysis import API_ROOT
+from schema_indexes import prune_redundant_indexes
+from stats_rollups import existing_rollups
+from tenant_partitioning import DEFAULT_PARTITIONS, STRATEGIES, plan_partitions, render_partitioning
+from uuid_keys import KEY_TYPES, apply_uuid_keys, estimate_savings, plan_uuid_keys, render_uuid_migration
+
 # Modèles qui doivent recevoir tenantId
 MODELS_TO_ADD_TENANT_ID = [
     'BeautyTreatment',
@@ -136,63 +150,56 @@ enum TenantUserRole {
 
 '''
 
-def add_tenant_id_to_model_safe(model_text, model_name):
+TENANT_ID_LINE = '  tenantId    String'
+TENANT_RELATION_LINE = '  tenant      Tenant @relation(fields: [tenantId], references: [id], onDelete: Cascade)'
+TENANT_INDEX_LINE = '  @@index([tenantId])'
+
+def add_tenant_id_to_model_safe(model, model_name):
     """
-    Ajoute tenantId à un modèle de manière sûre
+    Ajoute tenantId à un modèle (noeud de l'AST) de manière sûre
     EVITE LES DUPLICATIONS
     """
-    lines = model_text.split('\n')
-    
     # Vérifier si tenantId existe déjà
-    if any('tenantId' in line for line in lines):
+    if any('tenantId' in member.raw for member in model.members):
         print(f'⚠️  {model_name} a déjà tenantId, skip')
-        return model_text
+        return model
     
-    result_lines = []
-    tenant_id_added = False
-    relation_added = False
-    index_added = False
+    # Ajouter tenantId après l'id
+    id_field = next(
+        (f for f in model.fields if f.name == 'id' and f.has_attribute('id')),
+        None
+    )
+    if id_field is not None:
+        model.insert_after(id_field, TENANT_ID_LINE)
+        print(f'    + tenantId ajouté')
     
-    for i, line in enumerate(lines):
-        result_lines.append(line)
-        
-        # Ajouter tenantId après l'id
-        if '  id ' in line and '@id' in line and not tenant_id_added:
-            result_lines.append('  tenantId    String')
-            tenant_id_added = True
-            print(f'    + tenantId ajouté')
-        
+    indexes = model.indexes
+    if indexes:
         # Ajouter relation Tenant avant le premier @@index
-        if line.strip().startswith('@@index') and not relation_added:
-            result_lines.insert(-1, '  ')
-            result_lines.insert(-1, '  tenant      Tenant @relation(fields: [tenantId], references: [id], onDelete: Cascade)')
-            relation_added = True
-            print(f'    + relation Tenant ajoutée')
+        model.insert_before(indexes[0], '  ', TENANT_RELATION_LINE)
+        print(f'    + relation Tenant ajoutée')
         
-    # Ajouter l'index tenantId à la fin si pas déjà là
-    if not index_added and '@@index([tenantId])' not in model_text:
-        # Trouver le dernier @@index
-        last_index_line = -1
-        for i in range(len(result_lines) - 1, -1, -1):
-            if '@@index' in result_lines[i]:
-                last_index_line = i
-                break
-        
-        if last_index_line >= 0:
-            result_lines.insert(last_index_line + 1, '  @@index([tenantId])')
-            print(f'    + index tenantId ajouté')
+        # Ajouter l'index tenantId après le dernier @@index
+        model.insert_after(indexes[-1], TENANT_INDEX_LINE)
+        print(f'    + index tenantId ajouté')
     
-    return '\n'.join(result_lines)
+    return model
 
-def process_schema_safe(schema_content):
-    """Traite le schema complet de manière sûre"""
+def _replace_in_member(model, member, pattern, replacement):
+    """Remplace `pattern` dans une seule ligne du modèle (indentation conservée)"""
+    model.replace(member, re.sub(pattern, replacement, member.raw, count=1))
+
+def transform_schema(schema, routes_root=None):
+    """
+    Applique toutes les modifications multi-tenant à l'AST (en place).
+    Avec `routes_root`, ajoute aussi les index des listes paginées par curseur.
+    """
     
     print('\n📋 ÉTAPE 1: Ajout des nouveaux modèles...')
     # 1. Ajouter les nouveaux modèles après TemplateCategory enum
-    template_category_pos = schema_content.find('enum TemplateCategory {')
-    if template_category_pos > 0:
-        end_pos = schema_content.find('}', template_category_pos) + 1
-        schema_content = schema_content[:end_pos] + '\n' + NEW_MODELS + '\n' + schema_content[end_pos:]
+    template_category = schema.enum('TemplateCategory')
+    if template_category is not None:
+        schema.insert_after(template_category, ['\n'] + parse_schema(NEW_MODELS).items + ['\n'])
         print('✅ Nouveaux modèles ajoutés (SuperAdmin, Tenant, TenantUser)')
     
     print('\n📋 ÉTAPE 2: Modification des modèles existants...')
@@ -200,9 +207,7 @@ def process_schema_safe(schema_content):
     for model_name in MODELS_TO_ADD_TENANT_ID:
         print(f'\n🔧 Traitement de {model_name}...')
         
-        # Pattern pour capturer le modèle complet
-        pattern = rf'(model {model_name} \{{.*?\n\}})'
-        matches = list(re.finditer(pattern, schema_content, re.DOTALL))
+        matches = schema.find_all('model', model_name)
         
         if not matches:
             print(f'❌ Modèle {model_name} non trouvé')
@@ -212,65 +217,139 @@ def process_schema_safe(schema_content):
             print(f'⚠️  ATTENTION: {len(matches)} occurrences de {model_name} trouvées')
         
         # Ne traiter que la PREMIÈRE occurrence
-        match = matches[0]
-        old_model = match.group(1)
-        new_model = add_tenant_id_to_model_safe(old_model, model_name)
-        
-        # Remplacer UNIQUEMENT la première occurrence
-        schema_content = schema_content[:match.start()] + new_model + schema_content[match.end():]
+        add_tenant_id_to_model_safe(matches[0], model_name)
         print(f'✅ {model_name} modifié')
     
     print('\n📋 ÉTAPE 3: Modification de SiteTemplate...')
     # 3. Modifier SiteTemplate
-    schema_content = re.sub(
-        r'(model SiteTemplate \{.*?)(siteId\s+String\s+@default\("main"\)\s+@unique)',
-        r'\1tenantId    String   @unique',
-        schema_content,
-        count=1,  # UNE SEULE FOIS
-        flags=re.DOTALL
-    )
-    print('✅ SiteTemplate modifié (siteId → tenantId)')
-    
-    # Ajouter relation Tenant dans SiteTemplate
-    schema_content = schema_content.replace(
-        'model SiteTemplate {',
-        'model SiteTemplate {\n  // MODIFIED: Multi-tenant architecture',
-        1  # UNE SEULE FOIS
-    )
-    
-    # Ajouter relation tenant dans SiteTemplate si elle n'existe pas
-    sitetemplate_pattern = r'(model SiteTemplate \{.*?)(template\s+Template\s+@relation)'
-    if re.search(sitetemplate_pattern, schema_content, re.DOTALL):
-        schema_content = re.sub(
-            sitetemplate_pattern,
-            r'\1tenant      Tenant   @relation(fields: [tenantId], references: [id], onDelete: Cascade)\n  \2',
-            schema_content,
-            count=1,
-            flags=re.DOTALL
+    site_template = schema.model('SiteTemplate')
+    if site_template is not None:
+        site_id = site_template.field('siteId')
+        if site_id is not None and re.search(r'siteId\s+String\s+@default\("main"\)\s+@unique', site_id.raw):
+            _replace_in_member(
+                site_template, site_id,
+                r'siteId\s+String\s+@default\("main"\)\s+@unique',
+                'tenantId    String   @unique'
+            )
+        print('✅ SiteTemplate modifié (siteId → tenantId)')
+        
+        site_template.insert(1, '  // MODIFIED: Multi-tenant architecture')
+        
+        # Ajouter relation tenant dans SiteTemplate si elle n'existe pas
+        template_relation = next(
+            (f for f in site_template.fields
+             if f.name == 'template' and f.type == 'Template' and f.relation is not None),
+            None
         )
-        print('✅ Relation Tenant ajoutée à SiteTemplate')
+        if template_relation is not None:
+            site_template.insert_before(
+                template_relation,
+                template_relation.indent + 'tenant      Tenant   @relation(fields: [tenantId], references: [id], onDelete: Cascade)'
+            )
+            print('✅ Relation Tenant ajoutée à SiteTemplate')
     
     print('\n📋 ÉTAPE 4: Modification de TemplateCustomization...')
     # 4. Modifier TemplateCustomization
-    schema_content = re.sub(
-        r'(model TemplateCustomization \{.*?)(siteId\s+String\s+@default\("main"\))',
-        r'\1tenantId    String',
-        schema_content,
-        count=1,
-        flags=re.DOTALL
-    )
+    customization = schema.model('TemplateCustomization')
+    if customization is not None:
+        site_id = customization.field('siteId')
+        if site_id is not None and re.search(r'siteId\s+String\s+@default\("main"\)', site_id.raw):
+            _replace_in_member(
+                customization, site_id,
+                r'siteId\s+String\s+@default\("main"\)',
+                'tenantId    String'
+            )
+        
+        for unique in customization.uniques:
+            if unique.fields == ['templateId', 'siteId']:
+                _replace_in_member(
+                    customization, unique,
+                    r'@@unique\(\[templateId, siteId\]\)',
+                    '@@unique([templateId, tenantId])'
+                )
+                break
+        print('✅ TemplateCustomization modifié (siteId → tenantId)')
     
-    schema_content = re.sub(
-        r'@@unique\(\[templateId, siteId\]\)',
-        r'@@unique([templateId, tenantId])',
-        schema_content,
-        count=1
-    )
-    print('✅ TemplateCustomization modifié (siteId → tenantId)')
+    if routes_root is not None:
+        print('\n📋 ÉTAPE 5: Index de pagination par curseur...')
+        # 5. (tenantId, tri, id) pour chaque liste paginée par la passe cursor-pagination
+        added = add_cursor_indexes(schema, routes_root)
+        for model_name, index in added:
+            print(f'    + {model_name}: {index}')
+        print(f'✅ {len(added)} index de pagination ajouté(s)')
+    
+    print('\n📋 ÉTAPE 6: Suppression des index redondants...')
+    # 6. Index déjà servis par une contrainte unique ou un composite (préfixe gauche)
+    pruned = prune_redundant_indexes(schema)
+    for model_name, index, cover in pruned:
+        print(f'    - {model_name}: {index} (couvert par {cover})')
+    print(f'✅ {len(pruned)} index redondant(s) supprimé(s)')
     
-    return schema_content
+    return schema
+
+def process_schema_safe(schema_content):
+    """Traite le schema complet : un seul parsing, une seule sérialisation"""
+    schema = parse_schema(schema_content)
+    return transform_schema(schema).render()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Transformation multi-tenant du schema Prisma")
+    parser.add_argument('--sql-output', default='prisma/online-migrations/multi-tenant.sql',
+                        help='migration SQL en ligne (ajout nullable, backfill par lots, index CONCURRENTLY)')
+    parser.add_argument('--batch-size', type=int, default=5000, help='lignes mises à jour par lot de backfill')
+    parser.add_argument('--sleep-ms', type=int, default=100, help='pause entre deux lots (ms)')
+    parser.add_argument('--tenant-slug', default='default',
+                        help='slug du tenant qui reçoit les données existantes')
+    parser.add_argument('--lock-timeout', default='5s', help='lock_timeout des DDL de la migration')
+    parser.add_argument('--routes-root', default=API_ROOT,
+                        help='route.ts analysés pour les index de pagination par curseur')
+    parser.add_argument('--no-cursor-indexes', dest='cursor_indexes', action='store_false',
+                        help="ne pas ajouter les index (tenantId, tri, id) des listes paginées")
+    parser.add_argument('--partition', metavar='MODELES',
+                        help='modèles à partitionner par tenantId, séparés par des virgules (ex: Order,BeautyAppointment)')
+    parser.add_argument('--partition-strategy', choices=STRATEGIES, default='hash',
+                        help='hash: MODULUS fixe; list: une partition par tenant (défaut: hash)')
+    parser.add_argument('--partitions', type=int, default=DEFAULT_PARTITIONS,
+                        help=f'nombre de partitions hash (défaut: {DEFAULT_PARTITIONS})')
+    parser.add_argument('--partition-sql', default='prisma/online-migrations/tenant-partitioning.sql',
+                        help='SQL de partitionnement (à exécuter après la migration multi-tenant)')
+    parser.add_argument('--key-type', choices=KEY_TYPES, default='text',
+                        help='uuid: @db.Uuid sur id, tenantId et clés étrangères (16 octets au lieu de 37) '
+                             '(défaut: text)')
+    parser.add_argument('--key-sql', default='prisma/online-migrations/uuid-keys.sql',
+                        help='SQL de conversion TEXT → UUID (à exécuter après la migration multi-tenant)')
+    parser.add_argument('--row-counts',
+                        help="lignes par modèle pour le rapport d'empreinte (JSON, cf. estimate-include-fanout.py "
+                             "--save-stats)")
+    parser.add_argument('--key-report', help="exporter le rapport d'empreinte des clés en JSON")
+    return parser.parse_args(argv)
 
-def main():
+def _size(value):
+    for unit in ('o', 'Ko', 'Mo', 'Go'):
+        if value < 1024 or unit == 'Go':
+            return f'{value:,.0f} {unit}' if unit == 'o' else f'{value:,.1f} {unit}'
+        value /= 1024
+
+def print_key_report(report, stats, top=15):
+    """Rapport d'empreinte: gain estimé (tas + index) par modèle"""
+    print('\n' + '='*60)
+    print(f'📊 EMPREINTE DES CLÉS (TEXT → UUID), {len(report)} modèle(s)')
+    for savings in report[:top]:
+        estimated = '' if stats.known(savings.model) else ' (lignes par défaut)'
+        print(f'\n  {savings.model}: ~{savings.rows:,} ligne(s){estimated}, {", ".join(savings.columns)}')
+        print(f'      tas   -{_size(savings.heap_bytes)}')
+        if savings.indexes:
+            print(f'      index -{_size(savings.index_bytes)} '
+                  f'({_size(savings.index_before)} → {_size(savings.index_after)})')
+        for index, before, after in savings.indexes:
+            print(f'        {index}: {before} → {after} o/entrée')
+    heap = sum(savings.heap_bytes for savings in report)
+    index = sum(savings.index_bytes for savings in report)
+    print(f'\n  Total: tas -{_size(heap)}, index -{_size(index)}')
+    print('='*60)
+
+def main(argv=None):
+    args = parse_args(argv)
     schema_path = 'prisma/schema.prisma'
     output_path = 'prisma/schema-multi-tenant.prisma'
     
@@ -286,7 +365,84 @@ def main():
         sys.exit(1)
     
     # Traiter le schema
-    new_schema = process_schema_safe(schema_content)
+    schema = transform_schema(parse_schema(schema_content), args.routes_root if args.cursor_indexes else None)
+    
+    # Migration en ligne: diff entre le schema source et le schema transformé
+    # (clés encore TEXT: la conversion UUID est une migration distincte, après celle-ci)
+    plans = plan_tenant_columns(parse_schema(schema_content), schema)
+    
+    # Clés UUID natives optionnelles: schema converti + SQL compagnon + rapport d'empreinte
+    key_plans = []
+    if args.key_type == 'uuid':
+        print('\n📋 ÉTAPE 7: Clés UUID natives (@db.Uuid)...')
+        text_schema = parse_schema(schema.render())
+        converted = apply_uuid_keys(schema)
+        print(f'✅ {len(converted)} colonne(s) converties ({len({model for model, _ in converted})} modèles)')
+        try:
+            key_plans = plan_uuid_keys(text_schema, schema)
+        except ValueError as e:
+            print(f'❌ Conversion UUID impossible: {e}')
+            sys.exit(1)
+        key_sql = render_uuid_migration(
+            key_plans,
+            batch_size=args.batch_size,
+            sleep_ms=args.sleep_ms,
+            lock_timeout=args.lock_timeout,
+            path=args.key_sql,
+            rollups=existing_rollups(schema),
+        )
+        stats = RowStats.load(args.row_counts) if args.row_counts else RowStats()
+        key_report = estimate_savings(schema, converted, stats)
+        print_key_report(key_report, stats)
+        if args.key_report:
+            with open(args.key_report, 'w', encoding='utf-8') as f:
+                json.dump([
+                    {
+                        'model': savings.model,
+                        'table': savings.table,
+                        'rows': savings.rows,
+                        'defaultRows': not stats.known(savings.model),
+                        'columns': savings.columns,
+                        'heapBytes': round(savings.heap_bytes),
+                        'indexBytes': round(savings.index_bytes),
+                        'indexes': [
+                            {'index': index, 'textEntry': before, 'uuidEntry': after}
+                            for index, before, after in savings.indexes
+                        ],
+                    } for savings in key_report
+                ], f, indent=2, ensure_ascii=False)
+            print(f'💾 Rapport exporté: {args.key_report}')
+    new_schema = schema.render()
+    migration_sql = render_online_migration(
+        plans,
+        batch_size=args.batch_size,
+        sleep_ms=args.sleep_ms,
+        tenant_slug=args.tenant_slug,
+        lock_timeout=args.lock_timeout,
+        path=args.sql_output,
+    )
+    
+    # Partitionnement optionnel: SQL compagnon, le schema Prisma ne change pas
+    partition_plans = []
+    if args.partition:
+        try:
+            partition_plans = plan_partitions(
+                schema,
+                [name.strip() for name in args.partition.split(',') if name.strip()],
+                strategy=args.partition_strategy,
+                partitions=args.partitions,
+            )
+        except ValueError as e:
+            print(f'❌ Partitionnement impossible: {e}')
+            sys.exit(1)
+        partition_sql = render_partitioning(
+            partition_plans,
+            batch_size=args.batch_size,
+            sleep_ms=args.sleep_ms,
+            lock_timeout=args.lock_timeout,
+            path=args.partition_sql,
+            rollups=existing_rollups(schema),
+        )
     
     # Sauvegarder le nouveau schema
     try:
@@ -294,15 +450,53 @@ def main():
             f.write(new_schema)
         print(f'\n✅ Nouveau schema créé: {output_path}')
         print(f'📊 Taille: {len(new_schema)} caractères')
+        
+        sql_dir = os.path.dirname(args.sql_output)
+        if sql_dir:
+            os.makedirs(sql_dir, exist_ok=True)
+        with open(args.sql_output, 'w', encoding='utf-8') as f:
+            f.write(migration_sql)
+        print(f'✅ Migration SQL en ligne: {args.sql_output} ({len(plans)} tables, '
+              f'lots de {args.batch_size}, pause {args.sleep_ms} ms)')
+        
+        if key_plans:
+            key_dir = os.path.dirname(args.key_sql)
+            if key_dir:
+                os.makedirs(key_dir, exist_ok=True)
+            with open(args.key_sql, 'w', encoding='utf-8') as f:
+                f.write(key_sql)
+            print(f'✅ Conversion des clés en UUID: {args.key_sql} ({len(key_plans)} tables, '
+                  f'{sum(len(plan.columns) for plan in key_plans)} colonnes)')
+        
+        if partition_plans:
+            partition_dir = os.path.dirname(args.partition_sql)
+            if partition_dir:
+                os.makedirs(partition_dir, exist_ok=True)
+            with open(args.partition_sql, 'w', encoding='utf-8') as f:
+                f.write(partition_sql)
+            print(f'✅ Partitionnement {args.partition_strategy}: {args.partition_sql}')
+            for plan in partition_plans:
+                detail = f'{plan.partitions} partitions' if plan.strategy == 'hash' else 'une partition par tenant'
+                print(f'    + {plan.table}: {detail}, {len(plan.indexes)} index, '
+                      f'{len(plan.incoming)} clé(s) étrangère(s) entrante(s)')
+                for unique in plan.widened:
+                    print(f'    ⚠️  {plan.table}: unique ({unique}) devient unique par tenant')
+        
         print(f'\n✨ SUCCÈS: Schema multi-tenant prêt !')
-        print(f'\nPour appliquer:')
+        print(f'\nPour appliquer en production (sans interruption):')
+        print(f'  # prérequis: tables Tenant/TenantUser/SuperAdmin + tenant "{args.tenant_slug}" (voir l\'en-tête SQL)')
+        print(f'  psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f {args.sql_output}')
+        if key_plans:
+            print(f'  psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f {args.key_sql}')
+        if partition_plans:
+            print(f'  psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f {args.partition_sql}')
         print(f'  cp prisma/schema-multi-tenant.prisma prisma/schema.prisma')
-        print(f'  npx prisma db push --accept-data-loss')
         print(f'  npx prisma generate')
+        print(f'\nEn développement (base jetable uniquement):')
+        print(f'  npx prisma db push --accept-data-loss')
     except Exception as e:
         print(f'❌ Erreur écriture schema: {e}')
         sys.exit(1)
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Conseiller d'index composites multi-tenant
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Croise le schema Prisma avec les formes `where` / `orderBy` relevées dans
+src/app/api/**/route.ts. Un `@@index([tenantId])` seul oblige Postgres à trier
+(ou à refiltrer) chaque liste ; on propose des index composites ordonnés
+égalité → tri → intervalle, par ex. `@@index([tenantId, orderIndex])`,
+classés par nombre de routes servies.
+
+Usage:
+    python3 scripts/advise-composite-indexes.py
+    python3 scripts/advise-composite-indexes.py --schema prisma/schema-multi-tenant.prisma --write
+"""
+
+import argparse
+import json
+import sys
+
+from prisma_schema import load_schema
+from query_shapes import extract_query_shapes
+from route_analysis import API_ROOT, discover_routes
+from schema_indexes import IndexKey, model_index_keys, prune_redundant_indexes, unique_keys
+
+SCHEMA_PATH = 'prisma/schema.prisma'
+TENANT_FIELD = 'tenantId'
+MAX_COLUMNS = 4
+# Types non indexables par un B-tree Prisma classique
+UNINDEXABLE_TYPES = {'Json', 'Bytes'}
+
+
+class Proposal:
+    """Index composite proposé pour un modèle, avec les routes qu'il sert"""
+
+    def __init__(self, model, columns):
+        self.model = model
+        self.columns = columns      # [(champ, 'asc' | 'desc' | None)]
+        self.endpoints = set()
+        self.shapes = 0
+
+    @property
+    def names(self):
+        return tuple(name for name, _ in self.columns)
+
+    def render(self):
+        parts = [name + ('(sort: Desc)' if sort == 'desc' else '') for name, sort in self.columns]
+        return f"@@index([{', '.join(parts)}])"
+
+    def serves(self, other):
+        """Vrai si cet index sert aussi les requêtes de `other` (préfixe)"""
+        return self.names[:len(other.names)] == other.names
+
+
+def _indexable(schema, model, name):
+    field = model.field(name)
+    if field is None or field.is_list or field.type in UNINDEXABLE_TYPES:
+        return False
+    return field.is_scalar or field.type in schema.enums
+
+
+def index_columns(schema, model, shape):
+    """Colonnes de l'index servant `shape` : tenant, égalités, tri, sinon intervalle"""
+    columns = [(TENANT_FIELD, None)]
+    seen = {TENANT_FIELD}
+
+    def add(name, sort=None):
+        if name not in seen and _indexable(schema, model, name):
+            seen.add(name)
+            columns.append((name, sort))
+
+    for name in shape.equals:
+        add(name)
+    order = [(name, direction) for name, direction in shape.order if _indexable(schema, model, name)]
+    if order:
+        # Directions mixtes: l'index doit les porter, sinon un parcours inverse suffit
+        mixed = len({direction for _, direction in order}) > 1
+        for name, direction in order:
+            add(name, direction if mixed else None)
+    else:
+        for name in shape.ranges:
+            if _indexable(schema, model, name):
+                add(name)
+                break
+    return columns[:MAX_COLUMNS]
+
+
+def advise(schema, shapes):
+    """Propositions classées + statistiques de l'analyse"""
+    models = {name[0].lower() + name[1:]: model for name, model in schema.models.items()}
+    stats = {'shapes': len(shapes), 'tenant_scoped': 0, 'unresolved': 0, 'unknown_model': 0, 'covered': 0}
+    candidates = {}
+
+    for shape in shapes:
+        if shape.unresolved:
+            stats['unresolved'] += 1
+            continue
+        model = models.get(shape.delegate)
+        if model is None:
+            stats['unknown_model'] += 1
+            continue
+        if not shape.tenant or not model.has_field(TENANT_FIELD):
+            continue
+        stats['tenant_scoped'] += 1
+        # Égalité (ou `in`) sur une clé unique: quelques lignes, déjà servies par son index
+        filtered = set(shape.equals) | {TENANT_FIELD}
+        keys = unique_keys(model)
+        if any(set(key) <= filtered or key[0] in shape.ranges and len(key) == 1 for key in keys):
+            stats['covered'] += 1
+            continue
+        columns = index_columns(schema, model, shape)
+        if len(columns) < 2:
+            continue
+        wanted = IndexKey('index', [(name, sort or 'asc') for name, sort in columns], None)
+        if any(key.covers(wanted) for key in model_index_keys(model)):
+            stats['covered'] += 1
+            continue
+        proposal = candidates.setdefault((model.name, tuple(columns)), Proposal(model.name, columns))
+        proposal.endpoints.add(shape.endpoint)
+        proposal.shapes += 1
+
+    # Un index dont les colonnes prolongent celles d'un autre le remplace
+    kept = []
+    for proposal in sorted(candidates.values(), key=lambda p: -len(p.columns)):
+        wider = next((k for k in kept if k.model == proposal.model and k.serves(proposal)), None)
+        if wider is None:
+            kept.append(proposal)
+        else:
+            wider.endpoints |= proposal.endpoints
+            wider.shapes += proposal.shapes
+    kept.sort(key=lambda p: (-len(p.endpoints), p.model, p.names))
+    return kept, stats
+
+
+def write_indexes(schema, proposals):
+    """Ajoute les index proposés au schema (après le dernier @@index du modèle)"""
+    written = 0
+    for proposal in proposals:
+        model = schema.model(proposal.model)
+        attributes = model.block_attributes()
+        indent = attributes[-1].indent if attributes else '  '
+        line = f'{indent}{proposal.render()}'
+        if attributes:
+            model.insert_after(attributes[-1], line)
+        else:
+            model.append(line)
+        written += 1
+    return written
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Propose des index composites multi-tenant à partir des routes API")
+    parser.add_argument("--schema", default=SCHEMA_PATH, help=f"schema Prisma analysé (défaut: {SCHEMA_PATH})")
+    parser.add_argument("--root", default=API_ROOT, help="racine des route.ts")
+    parser.add_argument("--min-routes", type=int, default=1,
+                        help="n'afficher/écrire que les index servant au moins N routes")
+    parser.add_argument("--write", action="store_true", help="écrire les index proposés dans le schema")
+    parser.add_argument("--output", help="fichier de sortie pour --write (défaut: le schema lui-même)")
+    parser.add_argument("--json", dest="json_path", help="exporter les propositions en JSON")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("🔍 Analyse des requêtes Prisma des routes API...\n")
+
+    schema = load_schema(args.schema)
+    shapes = []
+    routes = discover_routes(args.root)
+    for path in routes:
+        with open(path, 'r', encoding='utf-8') as f:
+            shapes.extend(extract_query_shapes(f.read(), path))
+
+    proposals, stats = advise(schema, shapes)
+    proposals = [p for p in proposals if len(p.endpoints) >= args.min_routes]
+
+    print(f"📋 {len(routes)} route.ts, {stats['shapes']} requêtes filtrantes, "
+          f"{stats['tenant_scoped']} scopées par tenant")
+    if stats['unresolved']:
+        print(f"⚠️  {stats['unresolved']} where dynamique(s) non résolu(s)")
+    if stats['covered']:
+        print(f"✅ {stats['covered']} requête(s) déjà servie(s) par un index existant")
+
+    print("\n" + "="*60)
+    print(f"📊 INDEX COMPOSITES PROPOSÉS: {len(proposals)}")
+    for rank, proposal in enumerate(proposals, 1):
+        print(f"\n{rank:3}. {proposal.model} {proposal.render()}")
+        print(f"     {len(proposal.endpoints)} route(s), {proposal.shapes} requête(s)")
+        for endpoint in sorted(proposal.endpoints):
+            print(f"       - {endpoint}")
+    print("="*60)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump([
+                {
+                    'model': p.model,
+                    'index': p.render(),
+                    'columns': list(p.names),
+                    'routes': sorted(p.endpoints),
+                    'queries': p.shapes,
+                } for p in proposals
+            ], f, indent=2, ensure_ascii=False)
+        print(f"💾 Propositions exportées: {args.json_path}")
+
+    if args.write and proposals:
+        written = write_indexes(schema, proposals)
+        # Les @@index([tenantId]) seuls deviennent des préfixes des nouveaux composites
+        pruned = prune_redundant_indexes(schema, {p.model for p in proposals})
+        output = args.output or args.schema
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(schema.render())
+        print(f"✅ {written} index ajouté(s) dans {output}")
+        for model_name, index, cover in pruned:
+            print(f"   - {model_name}: {index} supprimé (couvert par {cover})")
+        print("\n📋 Prochaine étape:")
+        print("   npx prisma format && npx prisma migrate dev --name composite-tenant-indexes")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
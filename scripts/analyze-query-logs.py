@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Analyse des journaux de requêtes Prisma / PostgreSQL
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Lit en flux (mémoire constante, .gz acceptés) les événements `query` de
+Prisma et/ou les journaux PostgreSQL (log_min_duration_statement), réduit
+chaque requête à une empreinte et rapporte appels, temps total et
+p50/p95/p99 :
+
+    - par empreinte (modèle Prisma déduit de la table) ;
+    - par route, via l'index route → modèle des route.ts ;
+    - par tenant (valeur du filtre tenantId).
+
+Activer les journaux :
+
+    PRISMA_QUERY_EVENTS=true npm run start > prisma-queries.log
+    ALTER SYSTEM SET log_min_duration_statement = 0;  -- ou un seuil en ms
+    SELECT pg_reload_conf();
+
+Usage:
+    python3 scripts/analyze-query-logs.py prisma-queries.log
+    python3 scripts/analyze-query-logs.py /var/log/postgresql/*.log.gz --top 30 --json .cache/query-log.json
+    docker compose logs db --no-log-prefix | python3 scripts/analyze-query-logs.py -
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from prisma_schema import load_schema
+from query_log import LogAnalysis, RouteIndex, display_sql, open_log, read_entries
+from query_shapes import extract_query_shapes
+from route_analysis import API_ROOT, discover_routes
+
+SCHEMA_PATH = 'prisma/schema.prisma'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Points chauds des requêtes par empreinte, route et tenant")
+    parser.add_argument("logs", nargs='+', help="journaux Prisma / PostgreSQL (.gz acceptés, - pour stdin)")
+    parser.add_argument("--schema", default=SCHEMA_PATH, help=f"schema Prisma (défaut: {SCHEMA_PATH})")
+    parser.add_argument("--root", default=API_ROOT, help="racine des route.ts")
+    parser.add_argument("--tenant-column", default='tenantId', help="colonne tenant des requêtes")
+    parser.add_argument("--min-ms", type=float, default=0.0, help="ignorer les requêtes plus rapides")
+    parser.add_argument("--top", type=int, default=20, help="lignes par section du rapport")
+    parser.add_argument("--json", dest="json_path", help="exporter les agrégats en JSON")
+    return parser.parse_args(argv)
+
+
+def build_route_index(schema, root):
+    index = RouteIndex(schema)
+    routes = discover_routes(root)
+    for path in routes:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        index.add_route(content, path, extract_query_shapes(content, path))
+    return index, len(routes)
+
+
+def _row(label, summary):
+    return (f"   {summary['calls']:>9,} appels  {summary['total_ms'] / 1000:>9.2f} s  "
+            f"p50 {summary['p50_ms']:>8.2f}  p95 {summary['p95_ms']:>8.2f}  "
+            f"p99 {summary['p99_ms']:>8.2f} ms  {label}").rstrip()
+
+
+def report(analysis, index, routes, top):
+    total_ms = sum(stats.latency.total_ms for stats in analysis.queries.values()) or 1.0
+    queries = sorted(analysis.queries.values(), key=lambda stats: -stats.latency.total_ms)
+
+    print("\n" + "="*60)
+    print(f"📊 EMPREINTES: {len(queries)} (top {min(top, len(queries))} par temps total)")
+    for stats in queries[:top]:
+        summary = stats.latency.summary()
+        model = index.model(stats.shape) or '?'
+        share = stats.latency.total_ms / total_ms * 100
+        tenants = f"{len(stats.tenants)}{'+' if stats.tenants_overflow else ''} tenant(s)"
+        print(f"\n🔍 {stats.key}  {model}  {share:.1f} % du temps, {tenants}")
+        print(_row('', summary))
+        print(f"     {display_sql(stats.text)}")
+        for endpoint in index.endpoints(stats.shape)[:5]:
+            print(f"       - {endpoint}")
+
+    print("\n" + "="*60)
+    print(f"📊 ROUTES: {len(routes)} (une empreinte partagée compte pour chaque route candidate)")
+    for endpoint, (histogram, keys) in sorted(routes.items(), key=lambda item: -item[1][0].total_ms)[:top]:
+        print(_row(f"{endpoint} ({len(keys)} empreinte(s))", histogram.summary()))
+
+    print("\n" + "="*60)
+    print(f"📊 TENANTS: {len(analysis.tenants)}")
+    for tenant, histogram in sorted(analysis.tenants.items(), key=lambda item: -item[1].total_ms)[:top]:
+        print(_row(tenant, histogram.summary()))
+    print("="*60)
+
+
+def export(analysis, index, routes, path):
+    data = {
+        'queries': [
+            dict(
+                stats.latency.summary(),
+                fingerprint=stats.key,
+                sql=stats.text,
+                model=index.model(stats.shape),
+                routes=index.endpoints(stats.shape),
+                tenants=len(stats.tenants),
+            )
+            for stats in sorted(analysis.queries.values(), key=lambda stats: -stats.latency.total_ms)
+        ],
+        'routes': [
+            dict(histogram.summary(), route=endpoint, fingerprints=keys)
+            for endpoint, (histogram, keys) in sorted(routes.items(), key=lambda item: -item[1][0].total_ms)
+        ],
+        'tenants': [
+            dict(histogram.summary(), tenant=tenant)
+            for tenant, histogram in sorted(analysis.tenants.items(), key=lambda item: -item[1].total_ms)
+        ],
+    }
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("🔍 Analyse des journaux de requêtes...\n")
+
+    index, route_count = build_route_index(load_schema(args.schema), args.root)
+    print(f"📋 Index route → modèle: {route_count} route.ts, {len(index.calls)} couple(s) modèle/verbe")
+
+    analysis = LogAnalysis(args.tenant_column, args.min_ms)
+    started = time.perf_counter()
+    for path in args.logs:
+        try:
+            with open_log(path) as lines:
+                for entry in read_entries(lines):
+                    analysis.add(entry)
+        except OSError as e:
+            print(f"❌ Lecture impossible: {path} ({e})")
+            return 1
+    elapsed = time.perf_counter() - started
+    print(f"📋 {analysis.entries:,} requête(s) lue(s) en {elapsed:.1f} s"
+          + (f", {analysis.skipped:,} sous --min-ms" if analysis.skipped else ''))
+    if not analysis.entries:
+        print("⚠️  Aucune requête avec durée trouvée (PRISMA_QUERY_EVENTS=true ou log_min_duration_statement)")
+        return 1
+
+    routes = analysis.routes(index)
+    report(analysis, index, routes, args.top)
+    if args.json_path:
+        export(analysis, index, routes, args.json_path)
+        print(f"💾 Agrégats exportés: {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,27 @@
+"""
+Passes de codemod optionnelles de migrate-apis-multi-tenant.py (--pass NOM)
+
+Chaque module expose:
+    NAME        nom de la passe sur la ligne de commande
+    DESCRIPTION aide affichée par --help
+    MARKERS     motifs binaires: un fichier sans aucun d'eux est ignoré
+    apply(content, file_path) -> (nouveau contenu, Counter du rapport)
+    summarize(reports) -> lignes du rapport final ([(file_path, Counter)])
+
+Une passe réversible expose aussi strip(content, file_path) -> (contenu, Counter),
+appelé à la place de apply avec --strip. Une passe qui lit d'autres fichiers
+que le schema Prisma et la route (pages client...) expose
+input_digest(routes_root) -> hash de ces fichiers, inclus dans la version du
+manifest de migrate-apis-multi-tenant.py.
+"""
+
+from . import (
+    batch_lookups, conditional_get, cursor_pagination, instrument, lean_select, parallel_awaits, read_cache,
+    rollup_reads, scoped_writes, tenant_scope,
+)
+
+PASSES = {
+    module.NAME: module
+    for module in (tenant_scope, scoped_writes, batch_lookups, parallel_awaits, cursor_pagination,
+                   lean_select, rollup_reads, read_cache, conditional_get, instrument)
+}
@@ -0,0 +1,238 @@
+"""
+Passe batch-lookups: une requête par boucle au lieu d'une par élément (N+1)
+
+Dans une boucle `for (const item of items)` ou `items.map(async (item) => ...)`,
+
+    const treatment = await prisma.beautyTreatment.findFirst({
+      where: { id: item.treatmentId, ...tenantFilter },
+    });
+
+devient une lecture dans une Map remplie AVANT la boucle par un seul appel :
+
+    const treatmentById = new Map(
+      (await prisma.beautyTreatment.findMany({
+        where: { id: { in: items.map((item) => item.treatmentId) }, ...tenantFilter },
+      })).map((row) => [row.id, row] as const)
+    );
+    ...
+    const treatment = treatmentById.get(item.treatmentId) ?? null;
+
+Un `count({ where: { clientId: item.id } })` par élément devient de même un
+`groupBy({ by: ["clientId"], _count })`. Seuls les cas mécaniques sont
+réécrits : clé unique (@id / @unique) pour findFirst/findUnique, aucun autre
+argument du where ne dépend de l'élément, collection = identifiant simple.
+Le reste est signalé par scripts/detect-n-plus-one.py.
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+
+from loop_queries import find_loops
+from route_analysis import find_handlers, line_indent, match_bracket, object_entries, statement_start
+
+from .common import delegate_model, report_lines
+
+NAME = 'batch-lookups'
+DESCRIPTION = "remplace les findFirst/findUnique/count exécutés par élément d'une boucle par un findMany/groupBy `in` + Map"
+MARKERS = (b'.map(async', b'for (const', b'for (let')
+
+_LOOKUP_RE = re.compile(r'\bawait\s+(?P<client>prisma|tx)\.(?P<delegate>\w+)\.(?P<op>findFirst|findUnique|count)\(')
+_COLLECTION_RE = re.compile(r'[\w$]+(?:\.[\w$]+)*')
+_LOOKUP_ARGUMENTS = {'where', 'select', 'include'}
+
+LOOKUP_TEMPLATE = '''{indent}// ⚡ Une seule requête pour toute la boucle (au lieu d'une par élément)
+{indent}const {name} = new Map(
+{indent}  (await {client}.{delegate}.findMany({{
+{arguments}
+{indent}  }})).map((row) => [row.{key}, row] as const)
+{indent});
+
+'''
+COUNT_TEMPLATE = '''{indent}// ⚡ Un seul groupBy pour toute la boucle (au lieu d'un count par élément)
+{indent}const {name} = new Map(
+{indent}  (await {client}.{delegate}.groupBy({{
+{indent}    by: ["{key}"],
+{arguments}
+{indent}    _count: {{ _all: true }},
+{indent}  }})).map((row) => [row.{key}, row._count._all] as const)
+{indent});
+
+'''
+
+
+@lru_cache(maxsize=None)
+def _unique_fields(delegate):
+    """Champs uniques (une colonne) du modèle derrière `prisma.<delegate>`"""
+    model = delegate_model(delegate)
+    if model is None:
+        return frozenset({'id'})
+    return frozenset(
+        field.name for field in model.fields
+        if field.has_attribute('id') or field.has_attribute('unique')
+    )
+
+
+def _references(text, variable):
+    return re.search(r'(?<![\w$.])' + re.escape(variable) + r'\b', text) is not None
+
+
+def _split_where(arguments, variable):
+    """(clé, expression de l'élément, autres entrées du where) ou None si non mécanique"""
+    where = dict(object_entries(arguments)).get('where')
+    if where is None or not where.startswith('{'):
+        return None
+    key = element = None
+    others = []
+    for entry_key, value in object_entries(where):
+        if entry_key is not None and re.fullmatch(re.escape(variable) + r'(?:\.\w+)*', value):
+            if key is not None:
+                return None
+            key, element = entry_key, value
+        elif _references(value, variable) or (entry_key is not None and entry_key == variable):
+            return None
+        else:
+            others.append(f'...{value}' if entry_key is None else f'{entry_key}: {value}')
+    if key is None:
+        return None
+    return key, element, others
+
+
+def _unique_name(body, base, used):
+    name = base
+    suffix = 2
+    while name in used or re.search(r'\b' + re.escape(name) + r'\b', body):
+        name = f'{base}{suffix}'
+        suffix += 1
+    used.add(name)
+    return name
+
+
+def _rewrite_lookup(body, loop, call, report, used):
+    """(insertion avant l'instruction de la boucle, remplacement de l'appel) ou None"""
+    args_open = call.end() - 1
+    args_close = match_bracket(body, args_open)
+    if args_close < 0:
+        return None
+    arguments = body[args_open + 1:args_close].strip()
+    split = _split_where(arguments, loop.variable)
+    if split is None:
+        report['skipped_not_mechanical'] += 1
+        return None
+    key, element, others = split
+    op = call.group('op')
+    before = body[max(0, call.start() - 200):call.start()]
+    entries = object_entries(arguments)
+    extra = [(k, v) for k, v in entries if k != 'where']
+
+    if op == 'count':
+        if extra:
+            report['skipped_not_mechanical'] += 1
+            return None
+        template = COUNT_TEMPLATE
+        fallback = '0'
+        base = f"{call.group('delegate')}CountBy{key[0].upper()}{key[1:]}"
+    else:
+        if key not in _unique_fields(call.group('delegate')):
+            report['skipped_not_unique'] += 1
+            return None
+        if any(k not in _LOOKUP_ARGUMENTS or _references(v, loop.variable) for k, v in extra):
+            report['skipped_not_mechanical'] += 1
+            return None
+        select = dict(extra).get('select')
+        if select is not None and key not in dict(object_entries(select)):
+            report['skipped_not_mechanical'] += 1
+            return None
+        template = LOOKUP_TEMPLATE
+        fallback = 'null'
+        assigned = re.search(r'\b(?:const|let)\s+(\w+)\s*=\s*$', before)
+        base = (assigned.group(1) if assigned else call.group('delegate')) + f'By{key[0].upper()}{key[1:]}'
+
+    name = _unique_name(body, base, used)
+    if element == loop.variable:
+        values = loop.collection
+    else:
+        values = f'{loop.collection}.map(({loop.variable}) => {element})'
+    start = statement_start(body, loop.start)
+    indent = line_indent(body, start)
+    inner = indent + '    '
+    lines = [f'{inner}where: {{ {key}: {{ in: {values} }}' + ''.join(f', {o}' for o in others) + ' },']
+    lines += [f'{inner}{k}: {v},' for k, v in extra]
+    insertion = template.format(
+        indent=indent,
+        name=name,
+        client=call.group('client'),
+        delegate=call.group('delegate'),
+        key=key,
+        arguments='\n'.join(lines),
+    )
+    lookup = f'{name}.get({element}) ?? {fallback}'
+    if not re.search(r'=\s*$', before):
+        lookup = f'({lookup})'
+    report[f'{op}_batched'] += 1
+    line_start = body.rfind('\n', 0, start) + 1
+    return (line_start, insertion), (call.start(), args_close + 1, lookup)
+
+
+def _rewrite_handler(body, report):
+    loops = find_loops(body)
+    if not loops:
+        return body
+    insertions = []
+    replacements = []
+    used = set()
+    for call in _LOOKUP_RE.finditer(body):
+        enclosing = [loop for loop in loops if loop.contains(call.start())]
+        if not enclosing:
+            continue
+        if len(enclosing) > 1:
+            # Boucles imbriquées: la collection interne dépend souvent de l'élément externe
+            report['skipped_nested'] += 1
+            continue
+        loop = enclosing[0]
+        if not (loop.variable and loop.collection and _COLLECTION_RE.fullmatch(loop.collection)):
+            report['skipped_not_mechanical'] += 1
+            continue
+        rewrite = _rewrite_lookup(body, loop, call, report, used)
+        if rewrite is not None:
+            insertions.append(rewrite[0])
+            replacements.append(rewrite[1])
+    if not replacements:
+        return body
+
+    # Application de la fin vers le début pour garder les positions valides
+    edits = [(start, start, text) for start, text in insertions] + replacements
+    for start, end, text in sorted(edits, key=lambda edit: (edit[0], edit[1]), reverse=True):
+        body = body[:start] + text + body[end:]
+    report['handlers'] += 1
+    return body
+
+
+def apply(content, file_path):
+    report = Counter()
+    chunks = []
+    position = 0
+    for handler in find_handlers(content):
+        body = handler.body(content)
+        new_body = _rewrite_handler(body, report)
+        if new_body == body:
+            continue
+        chunks.append(content[position:handler.body_start])
+        chunks.append(new_body)
+        position = handler.body_end
+    if not chunks:
+        return content, report
+    chunks.append(content[position:])
+    return ''.join(chunks), report
+
+
+def summarize(reports):
+    lines, total = report_lines(reports, hidden='handlers')
+    batched = sum(count for name, count in total.items() if name.endswith('_batched'))
+    skipped = sum(count for name, count in total.items() if name.startswith('skipped_'))
+    if total:
+        lines.append(
+            f"   Total: {batched} requête(s) par élément regroupée(s) en une requête par boucle, "
+            f"{skipped} laissée(s) telle(s) quelle(s) (non mécanique)"
+        )
+    return lines
@@ -0,0 +1,232 @@
+"""
+Motifs TypeScript partagés par les passes de codemod
+"""
+
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+
+from prisma_schema import load_schema
+from route_analysis import match_bracket
+
+SCHEMA_PATH = 'prisma/schema.prisma'
+
+# const authResult = await ensureAuthenticated(request);
+# if (authResult instanceof NextResponse) return authResult;
+AUTH_RE = re.compile(
+    r'const (?P<var>\w+) = await ensureAuthenticated\(request\);\s*'
+    r'if \((?P=var) instanceof NextResponse\) return (?P=var);'
+)
+
+TENANT_FILTER_RE = re.compile(
+    r'const \{[^}]*\btenantFilter\b[^}]*\} = await '
+    r'(?:getTenantFilter|getTenantScope|requireTenantScope)\('
+)
+
+# $transaction(operations): des PrismaPromise ont pu être rangées dans un tableau
+TRANSACTION_VARIABLE_RE = re.compile(r'\$transaction\(\s*[\w$]+\s*[,)]')
+
+_WRAPPER_CALL_RE = re.compile(r'\s*[\w$.]+\s*\(')
+_ARROW_RE = re.compile(r'\s*(?:async\b|\()')
+_TRANSACTION_ARRAY_RE = re.compile(r'\$transaction\(\s*\[')
+_ROUTE_URL_RE = re.compile(r'(?P<src>.*?)/app(?P<url>/api/.*)/route\.tsx?$')
+_IMPORT_RE = re.compile(r'^import\b[^;]*?;[ \t]*\n', re.MULTILINE | re.DOTALL)
+
+
+def auth_variable(body, end=None):
+    """Variable retournée par ensureAuthenticated avant `end` (None si absente)"""
+    match = AUTH_RE.search(body, 0, len(body) if end is None else end)
+    return match.group('var') if match else None
+
+
+def comment_start(text, position):
+    """Début de la ligne `// ...` qui précède immédiatement `position` (sinon `position`)"""
+    line_start = text.rfind('\n', 0, position) + 1
+    if line_start <= 0:
+        return position
+    previous_start = text.rfind('\n', 0, line_start - 1) + 1
+    if text[previous_start:line_start].strip().startswith('//'):
+        return previous_start
+    return position
+
+
+def in_comment(content, position):
+    """`position` est sur une ligne de commentaire (après `//`, ou ligne `*` / `/*`)"""
+    line = content[content.rfind('\n', 0, position) + 1:position]
+    return '//' in line or line.lstrip().startswith(('*', '/*'))
+
+
+def transaction_spans(content):
+    """Intervalles (début, fin) des tableaux `$transaction([...])`: des PrismaPromise, pas des Promise"""
+    spans = []
+    for match in _TRANSACTION_ARRAY_RE.finditer(content):
+        close = match_bracket(content, match.end() - 1)
+        if close > 0:
+            spans.append((match.end(), close))
+    return spans
+
+
+def remove_statement(text, start, end):
+    """Supprime text[start:end] sans laisser deux lignes vides consécutives"""
+    before, after = text[:start], text[end:]
+    if before.endswith('\n\n') and after.startswith('\n'):
+        after = after[1:]
+    return before + after
+
+
+def update_named_import(content, module, add=(), drop_unused=()):
+    """
+    Ajoute des noms à `import { ... } from "module";` et retire ceux de
+    `drop_unused` qui ne sont plus appelés ailleurs dans le fichier
+    """
+    pattern = re.compile(r'import \{(?P<names>[^}]*)\} from "' + re.escape(module) + r'";')
+    match = pattern.search(content)
+    rest = content if match is None else content[:match.start()] + content[match.end():]
+    wanted = [name for name in add if re.search(r'\b' + re.escape(name) + r'\b', rest)]
+    if match is None:
+        if not wanted:
+            return content
+        return add_import(content, f'import {{ {", ".join(wanted)} }} from "{module}";')
+    names = [n.strip() for n in match.group('names').split(',') if n.strip()]
+    names += [name for name in wanted if name not in names]
+    names = [
+        n for n in names
+        if n not in drop_unused or re.search(r'\b' + re.escape(n) + r'\b', rest)
+    ]
+    if not names:
+        return remove_statement(content, match.start(), match.end() + 1)
+    statement = f'import {{ {", ".join(names)} }} from "{module}";'
+    return content[:match.start()] + statement + content[match.end():]
+
+
+def add_import(content, statement):
+    """Ajoute une ligne d'import après le dernier import du fichier"""
+    last = None
+    for last in _IMPORT_RE.finditer(content):
+        pass
+    if last is None:
+        return statement + '\n' + content
+    return content[:last.end()] + statement + '\n' + content[last.end():]
+
+
+def route_url(file_path):
+    """(dossier src, URL de la route) d'un `src/app/api/**/route.ts`, None sinon"""
+    match = _ROUTE_URL_RE.match(file_path.replace(os.sep, '/'))
+    if match is None:
+        return None
+    url = re.sub(r'/\([^/)]*\)', '', match.group('url'))  # groupes de routes `(admin)`
+    return match.group('src') or '.', url
+
+
+def wrap_handler_edits(content, handler, opening):
+    """
+    Éditions (début, fin, texte) qui passent un handler exporté à un wrapper,
+    `opening` = `wrapper(arguments, ` ; [] si déjà enveloppé, None si la
+    forme n'est pas reconnue :
+
+        export async function GET(...) { ... }  → export const GET = wrapper(..., async function GET(...) { ... });
+        export const GET = safeHandler(...);    → export const GET = wrapper(..., safeHandler(...));
+        export const GET = async (...) => { };  → export const GET = wrapper(..., async (...) => { });
+    """
+    header = content[handler.start:content.find('(', handler.start)]
+    if 'function' in header:
+        return [
+            (handler.body_end + 1, handler.body_end + 1, ');'),
+            (handler.start, handler.start + len('export '), f'export const {handler.method} = {opening}'),
+        ]
+    equals = content.index('=', handler.start) + 1
+    expression = content[equals:]
+    if expression.lstrip().startswith(opening.split('(', 1)[0] + '('):
+        return []
+    if _WRAPPER_CALL_RE.match(expression) and not _ARROW_RE.match(expression):
+        end = match_bracket(content, handler.params_start) + 1
+    elif _ARROW_RE.match(expression):
+        end = handler.body_end + 1
+    else:
+        return None
+    if end <= 0:
+        return None
+    spaces = len(expression) - len(expression.lstrip())
+    return [(end, end, ')'), (equals + spaces, equals + spaces, opening)]
+
+
+def delegate_name(model_name):
+    """Propriété Prisma Client d'un modèle (BeautyTreatment → prisma.beautyTreatment)"""
+    return model_name[0].lower() + model_name[1:]
+
+
+@lru_cache(maxsize=None)
+def _load_models(schema_path):
+    if not os.path.exists(schema_path):
+        return {}
+    return {delegate_name(name): model for name, model in load_schema(schema_path).models.items()}
+
+
+def delegate_model(delegate, schema_path=SCHEMA_PATH):
+    """Modèle du schema derrière `prisma.<delegate>` (None si schema ou modèle absent)"""
+    return _load_models(schema_path).get(delegate)
+
+
+def top_level_key(arguments, key):
+    """Match de `key:` au premier niveau de l'objet `{ ... }` (pas dans un include imbriqué)"""
+    pattern = re.compile(r'\b' + re.escape(key) + r'\s*:\s*|[{(\[]')
+    position = arguments.find('{') + 1
+    while True:
+        match = pattern.search(arguments, position)
+        if match is None:
+            return None
+        if match.group() not in ('{', '(', '['):
+            return match
+        close = match_bracket(arguments, match.start())
+        if close < 0:
+            return None
+        position = close + 1
+
+
+def inline_entry(text):
+    """Entrée multi-ligne ramenée sur une ligne (commentaires `//` retirés)"""
+    return re.sub(r'\s*\n\s*', ' ', re.sub(r'[ \t]*//[^\n]*', '', text)).strip()
+
+
+def reindent(text, indent):
+    """Lignes suivantes de `text` décalées de `indent` (la première reste en place)"""
+    return text.replace('\n', '\n' + indent)
+
+
+def append_object_entries(arguments, additions):
+    """
+    Texte `{ ... }` avec les entrées `additions` ajoutées en fin d'objet. Une
+    entrée multi-ligne est indentée relativement à la ligne de l'entrée.
+    """
+    close = arguments.rstrip().rfind('}')
+    head = arguments[:close].rstrip()
+    closing_line = arguments.rfind('\n', 0, close)
+    if closing_line < 0 or arguments[closing_line:close].strip():
+        # `{ where, orderBy }` ou accolade fermante sur la ligne du dernier argument
+        separator = '' if head.endswith(('{', ',')) else ','
+        inline = ', '.join(inline_entry(addition) for addition in additions)
+        return f"{head}{separator} {inline} }}{arguments[close + 1:]}"
+    indent = re.match(r'[ \t]*', arguments[closing_line + 1:]).group() + '  '
+    separator = '' if head.endswith(',') else ','
+    lines = ''.join(f'\n{indent}{reindent(addition, indent)},' for addition in additions)
+    return f'{head}{separator}{lines}{arguments[closing_line:]}'
+
+
+def report_lines(reports, hidden='files', describe=None, key=None):
+    """
+    Lignes par fichier du rapport final et Counter total: summarize()
+    n'ajoute que sa ligne Total. Détail par défaut `compteur: n, ...` (sans
+    le compteur `hidden`), ou `describe(report)` ; ordre des chemins, ou
+    `key((chemin, report))`
+    """
+    lines = []
+    total = Counter()
+    for file_path, report in sorted(reports, key=key):
+        total.update(report)
+        if describe is None:
+            details = ', '.join(f'{name}: {count}' for name, count in sorted(report.items()) if name != hidden)
+        else:
+            details = describe(report)
+        lines.append(f"   {file_path}: {details}")
+    return lines, total
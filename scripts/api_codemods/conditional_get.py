@@ -0,0 +1,207 @@
+"""
+Passe conditional-get: ETag / Last-Modified / 304 sur les routes de contenu
+
+Les GET de /api/public/** et /api/content/** sont enveloppés par
+conditionalGet (src/lib/conditional-get.ts) avec un validateur déclaré à
+côté du handler :
+
+    // ⚡ GET conditionnel: validateur depuis DesignGlobalSettings, SiteTheme
+    const GET_VALIDATION: ConditionalGetOptions = {
+      route: "/api/public/design",
+      visibility: "public",
+      sources: () => [
+        modelVersion(prisma.designGlobalSettings, { category: "colors", isActive: true }),
+        modelVersion(prisma.siteTheme, { isDefault: true, isActive: true }),
+      ],
+    };
+
+    export const GET = conditionalGet(GET_VALIDATION, async function GET() {
+      ...
+    });
+
+Sources d'un GET public, lues dans le schema et le handler :
+    - chaque lecture Prisma: updatedAt max + nombre de lignes du modèle
+      (where repris s'il est constant, modèle entier sinon), et des
+      relations de son include / select ;
+    - les services fichier connus (FILE_SOURCES): date du fichier JSON.
+Un modèle sans champ @updatedAt ou un await inconnu (fetch, autre service)
+rend les sources incomplètes: l'ETag est alors le hash du corps.
+
+Un GET authentifié (cookies, session, ensure*) est "private" : le handler
+s'exécute toujours (contrôle d'accès d'abord), seul l'envoi du corps est
+évité, et la réponse n'est jamais mise en cache partagé.
+"""
+
+import re
+from collections import Counter
+
+from route_analysis import find_handlers, match_bracket, object_entries
+
+from .common import (
+    comment_start, delegate_model, delegate_name, inline_entry, report_lines, route_url, update_named_import,
+    wrap_handler_edits,
+)
+
+NAME = 'conditional-get'
+DESCRIPTION = 'ajoute ETag / Last-Modified / 304 et Cache-Control aux GET de contenu public'
+MARKERS = (b'export async function GET', b'export const GET')
+
+ROUTE_PREFIXES = ('/api/public', '/api/content')
+HELPER_MODULE = '@/lib/conditional-get'
+# Services de contenu sur fichier: chemin relatif à la racine du projet
+FILE_SOURCES = {
+    'JSONContentService': 'src/config/content.json',
+    'ContentStore': 'src/config/content.json',
+}
+COMPANY_SOURCE = ('JSONContentService.loadCompany(', 'src/config/company.json')
+UPDATED_AT = 'updatedAt'
+
+_READ_RE = re.compile(
+    r'(?<![\w$.])prisma\.(?P<delegate>\w+)\.'
+    r'(?P<op>findMany|findFirst|findUnique|findFirstOrThrow|findUniqueOrThrow|count|aggregate|groupBy)\('
+)
+_PRIVATE_RE = re.compile(
+    r'\b(?:cookies|ensure\w+|getServerSession|getAuthenticatedUser|auth)\(|\bsession\b|authorization',
+    re.IGNORECASE,
+)
+_AWAIT_RE = re.compile(r'\bawait\s+(?P<target>[\w$.]+)')
+_KNOWN_AWAITS = ('prisma.', 'params', 'request.', 'Promise.all', 'cookies', 'modelVersion', 'fileVersion')
+_STRING_RE = re.compile(r'''"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*\'''')
+_KEY_RE = re.compile(r'\b\w+\s*:')
+_CONSTANTS = {'true', 'false', 'null', 'undefined'}
+
+
+def is_constant(literal):
+    """Objet littéral sans variable (seulement clés, chaînes, nombres, booléens)"""
+    code = _KEY_RE.sub('', _STRING_RE.sub('', literal))
+    return not (set(re.findall(r'[A-Za-z_$][\w$]*', code)) - _CONSTANTS)
+
+
+def _relation_sources(model, literal, sources):
+    """Relations lues par un include / select (récursif), modèle entier"""
+    for key, value in object_entries(literal):
+        field = model.field(key) if key else None
+        related = delegate_model(delegate_name(field.type)) if field is not None else None
+        if related is None:
+            continue
+        sources[related.name] = None
+        for nested_key, nested in object_entries(value):
+            if nested_key in ('include', 'select'):
+                _relation_sources(related, nested, sources)
+
+
+def read_sources(body):
+    """
+    {modèle: where constant ou None (modèle entier)} des lectures d'un
+    handler, None si un modèle lu n'a pas de champ @updatedAt
+    """
+    sources = {}
+    for read in _READ_RE.finditer(body):
+        model = delegate_model(read.group('delegate'))
+        if model is None:
+            return None
+        close = match_bracket(body, read.end() - 1)
+        entries = dict(object_entries(body[read.end():close])) if close > 0 else {}
+        where = entries.get('where')
+        constant = inline_entry(where) if where and where.startswith('{') and is_constant(where) else None
+        if model.name in sources and sources[model.name] != constant:
+            sources[model.name] = None          # plusieurs filtres: modèle entier
+        else:
+            sources.setdefault(model.name, constant)
+        for key in ('include', 'select'):
+            if key in entries:
+                _relation_sources(model, entries[key], sources)
+    for name in sources:
+        model = delegate_model(delegate_name(name))
+        if model is None or not model.has_field(UPDATED_AT) or \
+                not model.field(UPDATED_AT).has_attribute('updatedAt'):
+            return None
+    return sources
+
+
+def handler_sources(body):
+    """[(libellé, expression SourceVersion)] du handler, None si les sources sont incomplètes"""
+    for match in _AWAIT_RE.finditer(body):
+        target = match.group('target')
+        if not target.startswith(_KNOWN_AWAITS + tuple(FILE_SOURCES)):
+            return None
+    models = read_sources(body)
+    if models is None:
+        return None
+    sources = [
+        (name, f'modelVersion(prisma.{delegate_name(name)}{", " + where if where else ""})')
+        for name, where in models.items()
+    ]
+    files = [path for service, path in FILE_SOURCES.items() if f'{service}.' in body]
+    if COMPANY_SOURCE[0] in body:
+        files.append(COMPANY_SOURCE[1])
+    sources += [(path, f'fileVersion("{path}")') for path in dict.fromkeys(files)]
+    return sources or None
+
+
+def render_validation(route, visibility, sources, comment):
+    lines = [
+        f'// ⚡ GET conditionnel: {comment}',
+        'const GET_VALIDATION: ConditionalGetOptions = {',
+        f'  route: "{route}",',
+        f'  visibility: "{visibility}",',
+    ]
+    if sources:
+        lines.append('  sources: () => [')
+        lines += [f'    {expression},' for _, expression in sources]
+        lines.append('  ],')
+    lines.append('};')
+    return '\n'.join(lines) + '\n\n'
+
+
+def apply(content, file_path):
+    report = Counter()
+    located = route_url(file_path)
+    if located is None or not located[1].startswith(ROUTE_PREFIXES) or 'GET_VALIDATION' in content:
+        return content, report
+    handler = next((handler for handler in find_handlers(content) if handler.method == 'GET'), None)
+    if handler is None:
+        return content, report
+    wrap = wrap_handler_edits(content, handler, 'conditionalGet(GET_VALIDATION, ')
+    if not wrap:
+        report['skipped_handlers'] += 1
+        return content, report
+
+    body = handler.body(content)
+    visibility = 'private' if _PRIVATE_RE.search(body) else 'public'
+    sources = handler_sources(body) if visibility == 'public' else None
+    if visibility == 'private':
+        comment = 'route authentifiée, ETag du corps après contrôle d\'accès'
+        report['private'] += 1
+    elif sources:
+        comment = 'validateur depuis ' + ', '.join(label for label, _ in sources)
+        report['public_validated'] += 1
+        report['sources'] += len(sources)
+    else:
+        comment = 'sources non reconnues, ETag du corps'
+        report['public_body_hash'] += 1
+
+    for start, end, text in sorted(wrap, reverse=True):
+        content = content[:start] + text + content[end:]
+    declaration = comment_start(content, handler.start)
+    content = content[:declaration] + render_validation(located[1], visibility, sources, comment) + \
+        content[declaration:]
+    names = ['conditionalGet', 'ConditionalGetOptions']
+    if sources:
+        names += [
+            helper for helper in ('modelVersion', 'fileVersion')
+            if any(expression.startswith(helper) for _, expression in sources)
+        ]
+    report['files'] += 1
+    return update_named_import(content, HELPER_MODULE, add=names), report
+
+
+def summarize(reports):
+    lines, total = report_lines(reports)
+    if total:
+        lines.append(
+            f"   Total: {total['public_validated']} GET public(s) validé(s) avant exécution "
+            f"({total['sources']} source(s)), {total['public_body_hash']} par hash du corps, "
+            f"{total['private']} privé(s)"
+        )
+    return lines
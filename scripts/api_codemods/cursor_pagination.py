@@ -0,0 +1,277 @@
+"""
+Passe cursor-pagination: listes paginées par curseur au lieu de toutes les lignes
+
+Le `findMany({ where: tenantFilter, orderBy })` d'un GET renvoie toutes les
+lignes du tenant (commandes, rendez-vous, galerie...). Quand son résultat
+n'est utilisé que comme `data` de la réponse :
+
+    const orders = await prisma.order.findMany({
+      where,
+      orderBy: { createdAt: "desc" },
+    });
+    return NextResponse.json({ success: true, data: orders });
+
+devient (voir src/lib/pagination.ts)
+
+    const cursorPage = parseCursorParams(request); // ?limit=&cursor=
+    const orders = await prisma.order.findMany({
+      where,
+      orderBy: [{ createdAt: "desc" }, { id: "desc" }],
+      ...cursorArgs(cursorPage),
+    });
+    return NextResponse.json({ success: true, ...paginate(orders, cursorPage.take) });
+
+La pagination est opt-in: sans `?limit=` ni `?cursor=`, `parseCursorParams`
+ne borne rien et la réponse garde la liste complète (les pages clientes qui
+ne lisent pas `nextCursor` ne perdent pas de lignes). Les routes de contenu
+public (PUBLIC_ROUTE_PREFIXES, ex. les blocs d'une page) ne sont pas
+paginées.
+
+`id` est ajouté au tri (départage stable) et sert de curseur. L'index
+`(tenantId, <tri>, id)` correspondant est émis par le transformateur de
+schema (add-multi-tenant-to-schema-v2.py, voir cursor_index_columns).
+"""
+
+import re
+from collections import Counter
+
+from query_shapes import extract_query_shapes
+from route_analysis import API_ROOT, array_items, discover_routes, find_handlers, match_bracket, object_entries
+from schema_indexes import add_index
+
+from .common import (
+    append_object_entries, delegate_model, delegate_name, report_lines, route_url, top_level_key,
+    update_named_import,
+)
+
+NAME = 'cursor-pagination'
+DESCRIPTION = 'pagine par curseur (take + cursor sur id) les findMany non bornés renvoyés par les GET'
+MARKERS = (b'.findMany(',)
+
+PAGINATION_MODULE = '@/lib/pagination'
+PAGE_VARIABLE = 'cursorPage'
+# Contenu public lu en entier par le site (blocs de page, avis...): jamais paginé
+PUBLIC_ROUTE_PREFIXES = ('/api/public', '/api/content', '/api/frontend')
+
+_LIST_RE = re.compile(
+    r'^(?P<indent>[ \t]*)const (?P<var>\w+) = await (?P<call>prisma\.(?P<delegate>\w+)\.findMany\()',
+    re.MULTILINE,
+)
+_DIRECTION_RE = re.compile(r'''["'](asc|desc)["']$''')
+# Arguments qui bornent déjà la requête (ou qu'on ne sait pas combiner)
+_BOUNDED_ARGUMENTS = {'take', 'skip', 'cursor', 'distinct'}
+
+
+class ListQuery:
+    """findMany d'un GET dont le résultat est renvoyé tel quel"""
+
+    def __init__(self, variable, delegate, start, args_open, args_close, order, response):
+        self.variable = variable
+        self.delegate = delegate
+        self.start = start                  # début de la ligne `const x = await ...`
+        self.args_open = args_open          # `(` de findMany
+        self.args_close = args_close
+        self.order = order                  # [(champ, 'asc' | 'desc')]
+        self.response = response            # match de `data: x` dans la réponse
+
+    @property
+    def cursor_order(self):
+        return cursor_order(self.order)
+
+
+def cursor_order(order):
+    """Tri complété par `id` (départage stable, requis par le curseur)"""
+    if any(name == 'id' for name, _ in order):
+        return list(order)
+    direction = order[-1][1] if order else 'asc'
+    return list(order) + [('id', direction)]
+
+
+def cursor_index_columns(order, tenant_field='tenantId'):
+    """
+    Colonnes de l'index qui sert la page: (tenantId, tri..., id). Un tri
+    entièrement descendant est servi par un parcours arrière de l'index
+    ascendant: les directions ne sont gardées que si elles sont mixtes.
+    """
+    columns = cursor_order(order)
+    if all(direction == 'desc' for _, direction in columns):
+        columns = [(name, 'asc') for name, _ in columns]
+    return [(tenant_field, 'asc')] + columns
+
+
+def is_public_route(file_path):
+    located = route_url(file_path)
+    return located is not None and located[1].startswith(PUBLIC_ROUTE_PREFIXES)
+
+
+def add_cursor_indexes(schema, routes_root=API_ROOT, tenant_field='tenantId'):
+    """
+    Ajoute au schema (AST) l'index de chaque liste que la passe pagine:
+    `@@index([tenantId, <tri>, id])`, sauf si une clé existante le couvre.
+    Retourne [(modèle, index ajouté)].
+    """
+    models = {delegate_name(model.name): model for model in schema.blocks('model')}
+    added = []
+    for path in discover_routes(routes_root):
+        if is_public_route(path):
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        for handler in find_handlers(content):
+            if handler.method != 'GET':
+                continue
+            for delegate, order in cursor_orders(handler.body(content)):
+                model = models.get(delegate)
+                if model is None or not model.has_field(tenant_field):
+                    continue
+                # Tri sur une relation: pas d'index possible sur ce modèle
+                if any(not model.has_field(name) or model.field(name).type in schema.models
+                       for name, _ in order):
+                    continue
+                rendered = add_index(model, cursor_index_columns(order, tenant_field))
+                if rendered is not None:
+                    added.append((model.name, rendered))
+    return added
+
+
+def _parse_order(value):
+    """[(champ, direction)] d'un orderBy littéral simple, None sinon"""
+    items = array_items(value) if value.startswith('[') else [value]
+    order = []
+    for item in items:
+        entries = object_entries(item)
+        if len(entries) != 1 or entries[0][0] is None:
+            return None
+        key, direction = entries[0]
+        match = _DIRECTION_RE.match(direction)
+        if match is None:
+            return None
+        order.append((key, match.group(1)))
+    return order or None
+
+
+def find_list_queries(body):
+    """Candidats d'un corps de handler GET (au plus un: un seul curseur par requête HTTP)"""
+    found = []
+    for match in _LIST_RE.finditer(body):
+        args_open = match.end() - 1
+        args_close = match_bracket(body, args_open)
+        if args_close < 0 or not re.match(r'\s*;', body[args_close + 1:]):
+            continue
+        entries = object_entries(body[args_open + 1:args_close].strip())
+        keys = {key for key, _ in entries}
+        if not entries or None in keys or keys & _BOUNDED_ARGUMENTS:
+            continue
+        arguments = dict(entries)
+        select = arguments.get('select')
+        if select is not None and 'id' not in dict(object_entries(select)):
+            continue
+        order = []
+        if 'orderBy' in arguments:
+            order = _parse_order(arguments['orderBy'])
+            if order is None:
+                continue
+        variable = match.group('var')
+        rest = body[args_close:]
+        references = re.findall(r'(?<![\w$.])' + re.escape(variable) + r'\b', rest)
+        response = re.compile(r'\bdata:\s*' + re.escape(variable) + r'\b(?!\s*[.\[(?])').search(body, args_close)
+        if response is None or len(references) != 1:
+            continue
+        found.append(ListQuery(variable, match.group('delegate'), match.start(), args_open, args_close,
+                               order, response))
+    return found if len(found) == 1 else []
+
+
+def cursor_orders(body):
+    """
+    [(delegate, tri)] des listes d'un corps de handler GET paginées par la
+    passe, ou qu'elle paginerait (schema transformé avant les routes)
+    """
+    orders = [(query.delegate, query.order) for query in find_list_queries(body)]
+    for match in _LIST_RE.finditer(body):
+        args_close = match_bracket(body, match.end() - 1)
+        if args_close < 0:
+            continue
+        entries = object_entries(body[match.end():args_close].strip())
+        if (None, f'cursorArgs({PAGE_VARIABLE})') not in entries:
+            continue
+        order = _parse_order(dict(entries).get('orderBy', '')) or []
+        orders.append((match.group('delegate'), order))
+    return orders
+
+
+def _rewrite_arguments(arguments, order):
+    """Texte `{ ... }` des arguments avec orderBy complété et `...cursorArgs(cursorPage)`"""
+    rendered = ', '.join(f'{{ {name}: "{direction}" }}' for name, direction in order)
+    order_text = f'[{rendered}]' if len(order) > 1 else rendered
+    spread = f'...cursorArgs({PAGE_VARIABLE})'
+
+    entry = top_level_key(arguments, 'orderBy')
+    if entry is not None:
+        value_end = match_bracket(arguments, entry.end())
+        arguments = arguments[:entry.end()] + order_text + arguments[value_end + 1:]
+        additions = [spread]
+    else:
+        additions = [f'orderBy: {order_text}', spread]
+
+    return append_object_entries(arguments, additions)
+
+
+def _request_variable(content, handler):
+    match = re.match(r'\(\s*(\w+)', content[handler.params_start:handler.body_start])
+    return match.group(1) if match else None
+
+
+def apply(content, file_path):
+    report = Counter()
+    if is_public_route(file_path):
+        return content, report
+    tenant_calls = {
+        shape.position for shape in extract_query_shapes(content, file_path)
+        if shape.operation == 'findMany' and shape.tenant
+    }
+    edits = []
+    for handler in find_handlers(content):
+        if handler.method != 'GET':
+            continue
+        body = handler.body(content)
+        request = _request_variable(content, handler)
+        for query in find_list_queries(body):
+            call_position = handler.body_start + body.index('prisma.', query.start)
+            if call_position not in tenant_calls:
+                report['skipped_not_tenant_scoped'] += 1
+                continue
+            model = delegate_model(query.delegate)
+            if model is not None and (model.id_field is None or model.id_field.type != 'String'):
+                report['skipped_non_string_id'] += 1
+                continue
+            if request is None or re.search(r'\b' + PAGE_VARIABLE + r'\b', body):
+                report['skipped_not_mechanical'] += 1
+                continue
+            indent = re.match(r'[ \t]*', body[query.start:]).group()
+            base = handler.body_start
+            arguments = body[query.args_open + 1:query.args_close]
+            edits.append((base + query.response.start(), base + query.response.end(),
+                          f'...paginate({query.variable}, {PAGE_VARIABLE}.take)'))
+            edits.append((base + query.args_open + 1, base + query.args_close,
+                          _rewrite_arguments(arguments, query.cursor_order)))
+            edits.append((base + query.start, base + query.start,
+                          f'{indent}const {PAGE_VARIABLE} = parseCursorParams({request}); // ?limit=&cursor=\n'))
+            report['lists_paginated'] += 1
+    if not edits:
+        return content, report
+    for start, end, text in sorted(edits, reverse=True):
+        content = content[:start] + text + content[end:]
+    content = update_named_import(content, PAGINATION_MODULE, add=('cursorArgs', 'paginate', 'parseCursorParams'))
+    report['files'] += 1
+    return content, report
+
+
+def summarize(reports):
+    lines, total = report_lines(reports)
+    if total:
+        lines.append(
+            f"   Total: {total['lists_paginated']} liste(s) paginée(s) par curseur "
+            f"(opt-in ?limit=&cursor=, réponse + nextCursor)"
+        )
+    return lines
@@ -0,0 +1,175 @@
+"""
+Passe instrument: durées par route et par appel Prisma (réversible)
+
+Chaque handler exporté est enveloppé, chaque appel Prisma mesuré :
+
+    export async function GET(request: NextRequest) {
+      const orders = await prisma.order.findMany({ where });
+      ...
+    }
+
+devient
+
+    export const GET = instrumentRoute("/api/admin/commandes", "GET", async function GET(request: NextRequest) {
+      const orders = await instrumentQuery("Order", "findMany", prisma.order.findMany({ where }));
+      ...
+    });
+
+instrumentRoute / instrumentQuery (src/lib/monitoring/metrics.ts) alimentent
+les histogrammes route_handler_duration_seconds{route, method, status} et
+route_query_duration_seconds{route, method, model, operation} exposés par
+/api/metrics ; la route et la méthode d'un appel Prisma viennent du contexte
+du handler en cours (AsyncLocalStorage).
+
+Les deux helpers sont la marque du code généré : `--pass instrument --strip`
+retire toute enveloppe instrumentRoute(...) / instrumentQuery(...) et leur
+import, et rend le fichier d'origine à l'octet près. À lancer en dernier (ou
+stripper avant) : les autres passes ne reconnaissent pas `instrumentQuery(`.
+
+Non instrumentés : les appels d'un `$transaction([...])` (il attend des
+PrismaPromise ; avec `$transaction(operations)`, seuls les appels `await`és
+directement sont enveloppés), les appels chaînés (`findUnique(...).posts()`), les routes
+Edge (`runtime = "edge"`, pas d'async_hooks) et /api/metrics.
+"""
+
+import re
+from collections import Counter
+
+from route_analysis import find_handlers, match_bracket
+
+from .common import (
+    TRANSACTION_VARIABLE_RE, delegate_model, in_comment, report_lines, route_url, transaction_spans,
+    update_named_import, wrap_handler_edits,
+)
+
+NAME = 'instrument'
+DESCRIPTION = ('enveloppe handlers et appels Prisma dans des mesures Prometheus par route/modèle '
+               '(réversible avec --strip)')
+MARKERS = (b'export ', b'prisma.', b'instrumentRoute(', b'instrumentQuery(')
+
+METRICS_MODULE = '@/lib/monitoring/metrics'
+HELPERS = ('instrumentRoute', 'instrumentQuery')
+EXCLUDED_ROUTES = {'/api/metrics'}
+
+OPERATIONS = (
+    'findMany', 'findFirst', 'findUnique', 'findFirstOrThrow', 'findUniqueOrThrow',
+    'count', 'aggregate', 'groupBy',
+    'create', 'createMany', 'createManyAndReturn', 'update', 'updateMany', 'upsert', 'delete', 'deleteMany',
+)
+
+_CALL_RE = re.compile(r'(?<![\w$.])prisma\.(?P<delegate>\w+)\.(?P<op>' + '|'.join(OPERATIONS) + r')\(')
+_EDGE_RUNTIME_RE = re.compile(r'''^export const runtime = ['"]edge['"]''', re.MULTILINE)
+_WRAPPED_QUERY_RE = re.compile(r'instrumentQuery\("\w+", "\w+", ')
+_ALREADY_WRAPPED_RE = re.compile(r'instrumentQuery\("\w+", "\w+", $')
+_WRAPPED_ROUTE_RE = re.compile(r'^export const (?P<method>\w+) = instrumentRoute\("[^"\n]*", "\w+", ', re.MULTILINE)
+_FUNCTION_RE = re.compile(r'(?:async\s+)?function\b')
+# Suite chaînée qui reste valable sur la Promise de instrumentQuery
+_PROMISE_CHAIN = ('.then(', '.catch(', '.finally(')
+
+
+def model_label(delegate):
+    """Nom du modèle Prisma (label `model`, comme le middleware de monitoring)"""
+    model = delegate_model(delegate)
+    return model.name if model is not None else delegate[0].upper() + delegate[1:]
+
+
+def _query_edits(content, report):
+    """Insertions (position, texte) qui enveloppent les appels Prisma"""
+    transactions = transaction_spans(content)
+    awaited_only = TRANSACTION_VARIABLE_RE.search(content) is not None
+    edits = []
+    for call in _CALL_RE.finditer(content):
+        start = call.start()
+        if in_comment(content, start) or _ALREADY_WRAPPED_RE.search(content, max(0, start - 120), start):
+            continue
+        if any(open_ < start < close for open_, close in transactions) or \
+                awaited_only and not content[:start].rstrip().endswith('await'):
+            report['skipped_transaction'] += 1
+            continue
+        close = match_bracket(content, call.end() - 1)
+        if close < 0:
+            continue
+        following = content[close + 1:close + 12]
+        if following.startswith('.') and not following.startswith(_PROMISE_CHAIN):
+            report['skipped_chained'] += 1
+            continue
+        label = f'instrumentQuery("{model_label(call.group("delegate"))}", "{call.group("op")}", '
+        edits.append((close + 1, ')'))
+        edits.append((start, label))
+        report['queries'] += 1
+    return edits
+
+
+def _handler_edits(content, route, report):
+    """Insertions / remplacements (début, fin, texte) qui enveloppent les handlers"""
+    edits = []
+    for handler in find_handlers(content):
+        wrap = wrap_handler_edits(content, handler, f'instrumentRoute("{route}", "{handler.method}", ')
+        if wrap is None:
+            report['skipped_handlers'] += 1
+        elif wrap:
+            edits += wrap
+            report['handlers'] += 1
+    return edits
+
+
+def apply(content, file_path):
+    report = Counter()
+    located = route_url(file_path)
+    if located is None or located[1] in EXCLUDED_ROUTES:
+        return content, report
+    if _EDGE_RUNTIME_RE.search(content):
+        report['skipped_edge'] += 1
+        return content, report
+
+    for position, text in sorted(_query_edits(content, report), key=lambda edit: edit[0], reverse=True):
+        content = content[:position] + text + content[position:]
+    for start, end, text in sorted(_handler_edits(content, located[1], report), reverse=True):
+        content = content[:start] + text + content[end:]
+    if not report['queries'] and not report['handlers']:
+        return content, report
+    report['files'] += 1
+    return update_named_import(content, METRICS_MODULE, add=HELPERS), report
+
+
+def strip(content, file_path):
+    """Retire les enveloppes instrumentRoute / instrumentQuery et leur import"""
+    report = Counter()
+    for match in reversed(list(_WRAPPED_ROUTE_RE.finditer(content))):
+        close = match_bracket(content, match.start() + match.group().index('('))
+        if close < 0:
+            continue
+        inner = content[match.end():close]
+        if _FUNCTION_RE.match(inner):
+            end = close + 2 if content.startswith(');', close) else close + 1
+            content = content[:match.start()] + 'export ' + inner + content[end:]
+        else:
+            content = content[:match.start()] + f'export const {match.group("method")} = ' + inner + \
+                content[close + 1:]
+        report['stripped_handlers'] += 1
+    for match in reversed(list(_WRAPPED_QUERY_RE.finditer(content))):
+        close = match_bracket(content, match.start() + len('instrumentQuery'))
+        if close < 0:
+            continue
+        content = content[:match.start()] + content[match.end():close] + content[close + 1:]
+        report['stripped_queries'] += 1
+    if not report:
+        return content, report
+    report['files'] += 1
+    return update_named_import(content, METRICS_MODULE, drop_unused=HELPERS), report
+
+
+def summarize(reports):
+    lines, total = report_lines(reports)
+    if total['stripped_handlers'] or total['stripped_queries']:
+        lines.append(
+            f"   Total retiré: {total['stripped_handlers']} handler(s), {total['stripped_queries']} appel(s) "
+            f"Prisma dans {total['files']} fichier(s)"
+        )
+    elif total:
+        lines.append(
+            f"   Total: {total['handlers']} handler(s), {total['queries']} appel(s) Prisma dans "
+            f"{total['files']} fichier(s); non instrumentés: {total['skipped_transaction']} dans "
+            f"$transaction([...]), {total['skipped_chained']} chaîné(s), {total['skipped_edge']} route(s) Edge"
+        )
+    return lines
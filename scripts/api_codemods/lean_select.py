@@ -0,0 +1,248 @@
+"""
+Passe lean-select: les listes ne chargent plus les colonnes lourdes
+
+Un `findMany` de GET sans `select` lit la ligne entière, y compris les gros
+champs du schema (corps d'article, `Json` de configuration, contenus de
+section...). Sur une route de liste (dernier segment non dynamique) :
+
+    const articles = await prisma.article.findMany({
+      include: { author: true },
+      orderBy: { createdAt: "desc" },
+    });
+
+devient une projection explicite des colonnes légères :
+
+    const articles = await prisma.article.findMany({
+      select: {
+        // ⚡ Projection légère: sans content (détail: /api/admin/articles/[id])
+        id: true,
+        title: true,
+        ...
+        author: true,
+      },
+      orderBy: { createdAt: "desc" },
+    });
+
+Les entrées de l'`include` passent dans le `select` (même syntaxe Prisma).
+Les routes de détail (`[id]/route.ts`) gardent la ligne complète. Un champ
+lourd reste sélectionné s'il est lu par le handler ou cité par une page qui
+appelle l'URL de la route (src/ hors api/).
+
+Champ lourd (voir heavy_fields): Json, Bytes, String @db.Text, ou String
+dont le nom désigne un contenu long (content, body, html...).
+"""
+
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+
+from codemod_cache import content_digest
+from route_analysis import find_handlers, line_indent, match_bracket, object_entries
+
+from .common import (
+    append_object_entries, delegate_model, delegate_name, inline_entry, reindent, report_lines, route_url,
+    top_level_key,
+)
+
+NAME = 'lean-select'
+DESCRIPTION = 'remplace la ligne complète des findMany de liste par un select sans les colonnes lourdes'
+MARKERS = (b'.findMany(',)
+
+HEAVY_TYPES = {'Json': 'json', 'Bytes': 'bytes'}
+HEAVY_NATIVE_TYPES = {'db.Text', 'db.LongText', 'db.MediumText', 'db.Xml'}
+# Textes longs par nature, quel que soit le type natif (String = TEXT sous PostgreSQL)
+HEAVY_NAME_RE = re.compile(r'^(?:content\w*|\w*Content|body|html|\w*Html|markdown|robotsTxt|termsConditions)$')
+
+_FIND_MANY_RE = re.compile(r'\bprisma\.(?P<delegate>\w+)\.findMany\(')
+_CLIENT_EXTENSIONS = ('.ts', '.tsx')
+
+
+def heavy_fields(model):
+    """{champ: raison} des colonnes lourdes d'un modèle (AST prisma_schema)"""
+    heavy = {}
+    for field in model.fields:
+        native = field.native_type
+        if field.type in HEAVY_TYPES:
+            heavy[field.name] = HEAVY_TYPES[field.type]
+        elif field.type == 'String' and native is not None and native.name in HEAVY_NATIVE_TYPES:
+            heavy[field.name] = native.name
+        elif field.type == 'String' and HEAVY_NAME_RE.match(field.name):
+            heavy[field.name] = 'long_text'
+    return heavy
+
+
+def column_fields(model):
+    """Champs stockés en colonne (scalaires et enums), dans l'ordre du schema"""
+    return [
+        field for field in model.fields
+        if not field.type.startswith('Unsupported(')
+        and (field.is_scalar or delegate_model(delegate_name(field.type)) is None)
+    ]
+
+
+def is_detail_route(url):
+    """Dernier segment dynamique (`/articles/[id]`): la ligne complète reste servie"""
+    return url.rstrip('/').rsplit('/', 1)[-1].startswith('[')
+
+
+@lru_cache(maxsize=None)
+def _client_sources(src_root):
+    """Textes des fichiers client (.ts/.tsx de src/ hors app/api)"""
+    api_root = os.path.join(src_root, 'app', 'api')
+    sources = []
+    for directory, subdirectories, files in os.walk(src_root):
+        if directory == api_root:
+            subdirectories[:] = []
+            continue
+        for name in files:
+            if name.endswith(_CLIENT_EXTENSIONS):
+                with open(os.path.join(directory, name), 'r', encoding='utf-8', errors='replace') as f:
+                    sources.append(f.read())
+    return tuple(sources)
+
+
+def input_digest(routes_root):
+    """Hash des fichiers client lus par la passe (src/ de `routes_root` = src/app/api)"""
+    src_root = os.path.dirname(os.path.dirname(os.path.normpath(routes_root)))
+    return content_digest('\0'.join(_client_sources(src_root)).encode())
+
+
+@lru_cache(maxsize=None)
+def client_references(src_root, url):
+    """Textes client qui appellent exactement `url` (pas ses sous-routes)"""
+    segments = [
+        r'(?:\$\{[^}]*\}|[^/"\'`?]+)' if segment.startswith('[') else re.escape(segment)
+        for segment in url.split('/')
+    ]
+    pattern = re.compile('/'.join(segments) + r'(?=["\'`?])')
+    return tuple(source for source in _client_sources(src_root) if pattern.search(source))
+
+
+def _is_referenced(name, texts):
+    pattern = re.compile(r'(?<![\w$])' + re.escape(name) + r'\b')
+    return any(pattern.search(text) for text in texts)
+
+
+def _relative(value, indent):
+    """Valeur multi-ligne ramenée à une indentation relative à son entrée"""
+    return re.sub(r'\n' + re.escape(indent), '\n', value)
+
+
+def render_select(columns, relations, comment):
+    """Texte `select: { ... }` multi-ligne (indentation relative à l'entrée)"""
+    lines = ['select: {', f'  // {comment}']
+    lines += [f'  {name}: true,' for name in columns]
+    lines += [f'  {key}: {reindent(value, "  ")},' for key, value in relations]
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def _rewrite_arguments(arguments, select):
+    """Texte `{ ... }` avec le select à la place de l'include (ou en fin d'objet)"""
+    entry = top_level_key(arguments, 'include')
+    if entry is None:
+        return append_object_entries(arguments, [select])
+    value_end = match_bracket(arguments, entry.end())
+    if '\n' not in arguments.strip():
+        select = inline_entry(select)
+    else:
+        select = reindent(select, line_indent(arguments, entry.start()))
+    return arguments[:entry.start()] + select + arguments[value_end + 1:]
+
+
+def _lean_call(body, match, references, detail_url, report):
+    """(début, fin, nouveaux arguments) d'un findMany de liste, None s'il reste tel quel"""
+    model = delegate_model(match.group('delegate'))
+    if model is None:
+        return None
+    heavy = heavy_fields(model)
+    if not heavy:
+        return None
+    args_open = match.end() - 1
+    args_close = match_bracket(body, args_open)
+    if args_close < 0:
+        return None
+    arguments = body[args_open + 1:args_close]
+    entries = object_entries(arguments.strip())
+    keys = {key for key, _ in entries}
+    if not entries or None in keys or keys & {'select', 'omit'}:
+        report['skipped_not_mechanical'] += 1
+        return None
+    include = dict(entries).get('include')
+    if include is not None and not include.startswith('{'):
+        report['skipped_not_mechanical'] += 1
+        return None
+
+    # Lus ailleurs dans le handler ou par une page cliente: on les garde
+    rest = body[:match.start()] + body[args_close + 1:]
+    dropped = [name for name in heavy if not _is_referenced(name, (rest,) + references)]
+    if len(dropped) < len(heavy):
+        report['kept_referenced'] += len(heavy) - len(dropped)
+    if not dropped:
+        return None
+
+    columns = [field.name for field in column_fields(model) if field.name not in dropped]
+    relations = []
+    if include is not None:
+        # Indentation des entrées de l'include d'origine
+        entry_line = re.search(r'\n([ \t]*)\S', include)
+        indent = entry_line.group(1) if entry_line else ''
+        relations = [(key, _relative(value, indent)) for key, value in object_entries(include)]
+        if any(key is None for key, _ in relations):
+            report['skipped_not_mechanical'] += 1
+            return None
+    comment = f"⚡ Projection légère: sans {', '.join(dropped)}"
+    if detail_url:
+        comment += f' (détail: {detail_url})'
+    report['lists_projected'] += 1
+    report['heavy_fields_dropped'] += len(dropped)
+    return args_open + 1, args_close, _rewrite_arguments(arguments, render_select(columns, relations, comment))
+
+
+def _detail_url(file_path, url):
+    """URL de la route de détail voisine (`[id]/route.ts`), None si absente"""
+    directory = os.path.dirname(file_path)
+    if not os.path.isdir(directory):
+        return None
+    for name in sorted(os.listdir(directory)):
+        if name.startswith('[') and os.path.exists(os.path.join(directory, name, 'route.ts')):
+            return f'{url}/{name}'
+    return None
+
+
+def apply(content, file_path):
+    report = Counter()
+    located = route_url(file_path)
+    if located is None or is_detail_route(located[1]):
+        return content, report
+    src_root, url = located
+    references = client_references(src_root, url)
+    detail_url = _detail_url(file_path, url)
+    edits = []
+    for handler in find_handlers(content):
+        if handler.method != 'GET':
+            continue
+        body = handler.body(content)
+        for match in _FIND_MANY_RE.finditer(body):
+            edit = _lean_call(body, match, references, detail_url, report)
+            if edit is not None:
+                start, end, text = edit
+                edits.append((handler.body_start + start, handler.body_start + end, text))
+    if not edits:
+        return content, report
+    for start, end, text in sorted(edits, reverse=True):
+        content = content[:start] + text + content[end:]
+    report['files'] += 1
+    return content, report
+
+
+def summarize(reports):
+    lines, total = report_lines(reports)
+    if total:
+        lines.append(
+            f"   Total: {total['lists_projected']} liste(s) en select explicite, "
+            f"{total['heavy_fields_dropped']} colonne(s) lourde(s) retirée(s), "
+            f"{total['kept_referenced']} gardée(s) car lue(s) par le handler ou le client"
+        )
+    return lines
@@ -0,0 +1,263 @@
+"""
+Passe parallel-awaits: requêtes Prisma indépendantes en un seul aller-retour
+
+Dans chaque bloc d'un handler (corps, try, if...), les instructions
+
+    const tenants = await prisma.tenant.count();
+    const users = await prisma.tenantUser.count({ where: { tenantId } });
+
+qui ne dépendent pas l'une de l'autre (graphe def-use sur les identifiants
+déclarés / modifiés / utilisés) sont regroupées à la position de la première :
+
+    const [tenants, users] = await Promise.all([
+      prisma.tenant.count(),
+      prisma.tenantUser.count({ where: { tenantId } }),
+    ]);
+
+Une lecture peut remonter au-dessus d'une garde `if (...) return` ou d'une
+instruction synchrone qui ne définit rien de ce qu'elle utilise (au pire une
+requête inutile sur le chemin d'erreur). Une écriture n'est regroupée que si
+elle suit directement le membre précédent, sans rien entre les deux ; le
+groupe devient alors un `prisma.$transaction([...])` : un seul aller-retour,
+ordre d'exécution conservé et atomicité. Les `*OrThrow` ne remontent pas au-dessus d'une garde.
+
+Le rapport donne, par route, le chemin critique avant / après : nombre d'await
+Prisma (ou Promise.all) exécutés l'un après l'autre dans les handlers.
+"""
+
+import re
+from collections import Counter
+
+from route_analysis import (
+    block_statements, code_start, control_blocks, find_handlers, line_indent, match_bracket, strip_comments,
+)
+
+from .common import report_lines
+
+NAME = 'parallel-awaits'
+DESCRIPTION = 'regroupe les await Prisma indépendants d\'un bloc en Promise.all ($transaction si écriture)'
+MARKERS = (b'await prisma.',)
+
+READ_OPS = {
+    'findMany', 'findFirst', 'findUnique', 'findFirstOrThrow', 'findUniqueOrThrow',
+    'count', 'aggregate', 'groupBy',
+}
+WRITE_OPS = {'create', 'createMany', 'update', 'updateMany', 'upsert', 'delete', 'deleteMany'}
+
+_PRISMA_STATEMENT_RE = re.compile(
+    r'(?:const\s+(?P<target>[\w$]+|\{[^{}]*\}|\[[^\[\]]*\])\s*=\s*)?'
+    r'await\s+(?P<call>prisma\.(?P<delegate>\w+)\.(?P<op>\w+)\()'
+)
+_IDENTIFIER_RE = re.compile(r'(?<![\w$.])[A-Za-z_$][\w$]*')
+_DECLARATION_RE = re.compile(r'\b(?:const|let|var)\s+(?P<target>[\w$]+|\{[^}]*\}|\[[^\]]*\])')
+_MUTATION_RE = re.compile(
+    r'(?<![\w$.])(?P<name>[A-Za-z_$][\w$]*)(?:\.[\w$]+|\[[^\]]*\])*\s*(?:[-+*/%|&]?=(?![=>])|\+\+|--)'
+    r'|(?<![\w$.])(?P<receiver>[A-Za-z_$][\w$]*)\.(?:push|pop|shift|unshift|splice|sort|reverse|fill|set\w*|add|delete|clear)\('
+)
+_STRING_RE = re.compile(r'''"(?:[^"\\\n]|\\.)*"|'(?:[^'\\\n]|\\.)*\'''')
+_AWAIT_RE = re.compile(r'\bawait\b')
+_CRITICAL_AWAIT_RE = re.compile(r'\bawait\s+(?:(?:prisma|tx)\.|Promise\.all\()')
+_KEYWORDS = {
+    'await', 'const', 'let', 'var', 'new', 'return', 'typeof', 'instanceof', 'null', 'undefined',
+    'true', 'false', 'if', 'else', 'async', 'function', 'this', 'in', 'of', 'as',
+}
+
+
+class Statement:
+    """Instruction de premier niveau d'un bloc, avec ses identifiants définis et utilisés"""
+
+    def __init__(self, body, start, end):
+        self.start = start
+        self.end = end
+        # Commentaires en tête: conservés au-dessus de l'élément du tableau
+        self.code_start = code_start(body, start, end)
+        raw = body[self.code_start:end].rstrip()
+        code = strip_comments(raw).strip()
+        self.code = code
+        self.call = None
+        self.target = None
+        match = _PRISMA_STATEMENT_RE.match(raw)
+        if match is not None:
+            call_open = match.end() - 1
+            call_close = match_bracket(raw, call_open)
+            tail = re.fullmatch(r'\s*;?[ \t]*(?P<comment>//[^\n]*)?', raw[call_close + 1:]) if call_close >= 0 else None
+            if tail is not None:
+                # Texte d'origine: les commentaires internes à l'appel sont conservés
+                self.call = raw[match.start('call'):call_close + 1]
+                self.target = match.group('target')
+                self.delegate = match.group('delegate')
+                self.op = match.group('op')
+                self.trailing = tail.group('comment')
+        scanned = _STRING_RE.sub('""', code)
+        self.defines = set()
+        for declaration in _DECLARATION_RE.finditer(scanned):
+            self.defines |= _identifiers(declaration.group('target'))
+        for mutation in _MUTATION_RE.finditer(scanned):
+            self.defines.add(mutation.group('name') or mutation.group('receiver'))
+        self.uses = _identifiers(
+            _STRING_RE.sub('""', strip_comments(self.call)) if self.call is not None else scanned
+        )
+
+    @property
+    def is_read(self):
+        return self.call is not None and self.op in READ_OPS
+
+    @property
+    def is_write(self):
+        return self.call is not None and self.op in WRITE_OPS
+
+    @property
+    def has_await(self):
+        return _AWAIT_RE.search(self.code) is not None
+
+    @property
+    def comments(self):
+        return self.code_start > self.start
+
+
+def _identifiers(text):
+    return {name for name in _IDENTIFIER_RE.findall(text) if name not in _KEYWORDS}
+
+
+def _is_movable_over(statement):
+    """Une lecture peut-elle remonter au-dessus de cette instruction ?"""
+    if statement.has_await:
+        return False
+    return not re.match(r'(?:for|while|do|switch|try|return|throw|function)\b', statement.code)
+
+
+def _groups(statements):
+    """Groupes de membres indépendants [Statement, ...] d'une suite d'instructions"""
+    groups = []
+    consumed = set()
+    index = 0
+    while index < len(statements):
+        first = statements[index]
+        if index in consumed or first.call is None or not (first.is_read or first.is_write):
+            index += 1
+            continue
+        members = [first]
+        consumed.add(index)
+        defined = set(first.defines)
+        # Utilisés par les instructions laissées en place (un membre remonté ne doit pas les modifier)
+        skipped_uses = set()
+        # has_gap: une instruction non regroupée sépare déjà les membres
+        has_gap = False
+        for position in range(index + 1, len(statements)):
+            if position in consumed:
+                continue
+            statement = statements[position]
+            independent = (
+                statement.call is not None
+                and not (statement.uses & defined)
+                and not (statement.defines & skipped_uses)
+            )
+            if independent and (
+                (statement.is_write and not has_gap)
+                or (statement.is_read and not (has_gap and statement.op.endswith('OrThrow')))
+            ):
+                members.append(statement)
+                consumed.add(position)
+                defined |= statement.defines
+                continue
+            if statement.is_read:
+                # Lecture dépendante: reste en place, peut démarrer un groupe suivant
+                defined |= statement.defines
+                skipped_uses |= statement.uses
+                has_gap = True
+                continue
+            if statement.call is not None or not _is_movable_over(statement):
+                break
+            defined |= statement.defines
+            skipped_uses |= statement.uses
+            has_gap = True
+        if len(members) > 1:
+            groups.append(members)
+        index += 1
+    return groups
+
+
+def _reindent(text, extra):
+    return text.replace('\n', '\n' + extra)
+
+
+def _render_group(body, members, indent):
+    transaction = any(member.is_write for member in members)
+    targets = [member.target or '' for member in members]
+    while targets and not targets[-1]:
+        targets.pop()
+    head = 'await prisma.$transaction([' if transaction else 'await Promise.all(['
+    if targets:
+        head = f"const [{', '.join(targets)}] = {head}"
+    lines = [head]
+    inner = indent + '  '
+    for member in members:
+        if member.comments:
+            for comment in body[member.start:member.code_start].strip().splitlines():
+                lines.append(f'{inner}{comment.strip()}')
+        trailing = f' {member.trailing}' if member.trailing else ''
+        lines.append(f'{inner}{_reindent(member.call, "  ")},{trailing}')
+    lines.append(f'{indent}]);')
+    return '\n'.join(lines)
+
+
+def _rewrite_handler(body, report):
+    edits = []
+    saved = 0
+    for start, end in control_blocks(body, 0, len(body)):
+        statements = [Statement(body, s, e) for s, e in block_statements(body, start, end)]
+        for members in _groups(statements):
+            first = members[0]
+            indent = line_indent(body, first.start)
+            edits.append((first.start, first.end, _render_group(body, members, indent)))
+            for member in members[1:]:
+                # Du bout de l'instruction précédente à la fin du membre: ni ligne vide orpheline
+                # avant un `}`, ni double ligne vide
+                edits.append((len(body[:member.start].rstrip()), member.end, ''))
+            saved += len(members) - 1
+            report['transaction' if any(m.is_write for m in members) else 'promise_all'] += 1
+    before = len(_CRITICAL_AWAIT_RE.findall(body))
+    report['critical_path_before'] += before
+    report['critical_path_after'] += before - saved
+    if not edits:
+        return body
+    for start, end, text in sorted(edits, reverse=True):
+        body = body[:start] + text + body[end:]
+    report['handlers'] += 1
+    return body
+
+
+def apply(content, file_path):
+    report = Counter()
+    chunks = []
+    position = 0
+    for handler in find_handlers(content):
+        body = handler.body(content)
+        new_body = _rewrite_handler(body, report)
+        if new_body == body:
+            continue
+        chunks.append(content[position:handler.body_start])
+        chunks.append(new_body)
+        position = handler.body_end
+    if not report['handlers']:
+        # Rien de regroupé: pas de rapport (le chemin critique seul n'est pas un changement)
+        return content, Counter()
+    chunks.append(content[position:])
+    return ''.join(chunks), report
+
+
+def _describe(report):
+    return (
+        f"chemin critique {report['critical_path_before']} → {report['critical_path_after']} "
+        f"await séquentiel(s) ({report['promise_all']} Promise.all, {report['transaction']} $transaction)"
+    )
+
+
+def summarize(reports):
+    lines, total = report_lines(reports, describe=_describe)
+    if total:
+        lines.append(
+            f"   Total: {total['critical_path_before'] - total['critical_path_after']} await Prisma "
+            f"séquentiel(s) en moins ({total['critical_path_before']} → {total['critical_path_after']})"
+        )
+    return lines
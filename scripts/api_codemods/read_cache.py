@@ -0,0 +1,357 @@
+"""
+Passe read-cache: lectures des GET à travers contentCache, invalidées par les écritures
+
+Dans un GET scopé par tenant (tenantFilter / tenantId résolus par le
+middleware tenant), chaque lecture Prisma au niveau instruction (ou membre
+direct d'un `await Promise.all([...])`) passe par le cache en lecture :
+
+    const orders = await prisma.order.findMany({ where, orderBy });
+
+devient
+
+    const orders = await contentCache.read(tenantCacheKey(tenantFilter, "Order", "findMany", 0, request.url), () => prisma.order.findMany({ where, orderBy }));
+
+La clé porte le tenant, le modèle, l'appel et l'URL complète (chemin, donc
+params, et query string) : deux requêtes du même tenant sur la même URL
+partagent le résultat. Le tenant est la variable du handler : tenantFilter,
+tenantId (requireTenant, getTenantContext()) ou sessionData.tenantId. Seul
+un GET sans paramètre ni authentification (contenu public, qui ne voit
+donc pas la requête) est mis en cache tous tenants (`null`).
+
+Chaque écriture Prisma des autres handlers (POST/PUT/PATCH/DELETE, de ce
+fichier comme des routes [id]) invalide les lectures du même modèle pour
+son tenant :
+
+    const order = await contentCache.invalidateAfter(tenantId, "Order", prisma.order.create({ ... }));
+
+Une $transaction (tableau de PrismaPromise, tableau rangé dans une variable
+ou callback `tx`) est enveloppée en entier et invalide tous les modèles
+qu'elle écrit, une fois validée :
+
+    await contentCache.invalidateAfter(tenantId, ["Order", "Payment"], prisma.$transaction([ ... ]));
+
+Le modèle vient de l'appel lui-même (prisma.<délégué>), plus précis que
+infer_model du fichier. Un modèle dont une écriture d'une route de
+src/app/api n'a pas pu être enveloppée (hors handler exporté, appel non
+reconnu) n'est jamais mis en cache. Non mis en cache non plus : GET qui
+écrivent, lectures dont les arguments dépendent de l'utilisateur (session,
+authResult, userId...), appels dans une boucle ou un callback, GET qui
+reçoivent la requête sans scope tenant reconnu (verifyAuth, session... :
+l'URL seule ne distingue pas les tenants).
+Les écritures hors routes (services, autres instances) ne sont pas vues :
+la TTL de lecture (60 s, content-cache.ts) borne l'obsolescence, tout comme
+pour les lectures via include d'un modèle modifié.
+"""
+
+import os
+import re
+from collections import Counter
+from functools import lru_cache
+
+from codemod_cache import content_digest
+from route_analysis import block_statements, code_start, control_blocks, discover_routes, find_handlers, match_bracket
+
+from .common import (
+    TENANT_FILTER_RE, TRANSACTION_VARIABLE_RE, in_comment, report_lines, route_url, update_named_import,
+)
+from .instrument import model_label
+
+NAME = 'read-cache'
+DESCRIPTION = ('met en cache (tenant + URL) les lectures Prisma des GET et invalide le modèle '
+               'à chaque écriture des autres handlers')
+MARKERS = (b'prisma.',)
+
+CACHE_MODULE = '@/lib/content-cache'
+HELPERS = ('contentCache', 'tenantCacheKey')
+
+READ_OPS = (
+    'findMany', 'findFirst', 'findUnique', 'findFirstOrThrow', 'findUniqueOrThrow', 'count', 'aggregate', 'groupBy',
+)
+WRITE_OPS = (
+    'create', 'createMany', 'createManyAndReturn', 'update', 'updateMany', 'upsert', 'delete', 'deleteMany',
+)
+
+_READ_RE = re.compile(r'prisma\.(?P<delegate>\w+)\.(?P<op>' + '|'.join(READ_OPS) + r')\(')
+_WRITE_RE = re.compile(r'(?<![\w$.])prisma\.(?P<delegate>\w+)\.(?P<op>' + '|'.join(WRITE_OPS) + r')\(')
+_TRANSACTION_CALL_RE = re.compile(r'(?<![\w$.])prisma\.\$transaction\(')
+# Dans une $transaction: prisma.<délégué> (tableau) ou tx.<délégué> (callback)
+_TRANSACTION_WRITE_RE = re.compile(
+    r'(?<![\w$.])[A-Za-z_$][\w$]*\.(?P<delegate>\w+)\.(?P<op>' + '|'.join(WRITE_OPS) + r')\('
+)
+# `const x = await`, `x = await`, `return await` ou `await` seul
+_AWAITED_RE = re.compile(
+    r'(?:(?:const|let|var)\s+(?:[\w$]+|\{[^{}]*\}|\[[^\[\]]*\])\s*=\s*|[\w$.]+\s*=\s*|return\s+)?await\s+'
+)
+_PROMISE_ALL_RE = re.compile(r'Promise\.all\(\s*\[')
+_ITEM_START_RE = re.compile(r'[\[,]\s*$')
+_TENANT_ID_RE = re.compile(
+    r'const \{[^}]*\btenantId\b[^}]*\} = await (?:requireTenant|requireTenantScope|getTenantScope)\('
+    r'|const tenantId = (?:getTenantContext\(\)|sessionData\.tenantId);'
+)
+# const sessionData = sessionResult.data; → les lectures citent sessionData.tenantId
+_SESSION_DATA_RE = re.compile(r'const sessionData = [^;]*;')
+_EXISTING_TENANT_RE = re.compile(r'verifyTenantAccess\(\w+, existing\.tenantId\)')
+# Variables issues de l'authentification: une lecture qui les cite dépend de l'utilisateur
+_AUTH_VARIABLE_RE = re.compile(
+    r'const (?P<var>\w+) = await (?:ensure\w+|verify\w+|getServerSession|getAuthenticatedUser|auth)\('
+)
+_USER_DEPENDENT_RE = re.compile(r'\b(?:session\w*|user|userId|currentUser)\b|\.headers\b|\bcookies\(')
+_REQUEST_DEPENDENT_RE = re.compile(
+    r'\b(?:ensure\w+|verify\w+|getServerSession|getAuthenticatedUser|getTenantContext|auth|cookies|headers)\('
+    r'|\.headers\b|\bsession\w*\b'
+)
+_PARAMETER_RE = re.compile(r'\(\s*(?P<name>[A-Za-z_$][\w$]*)?')
+# `(...) =>` ou `(...): Type =>` d'une fonction fléchée, `(...)` en fin de signature d'une fonction
+_PARAMETERS_END_RE = re.compile(r'\s*(?::[^=]*?)?(?:=>\s*)?$|\s*(?::[^=]*?)?=>')
+_WRAPPED_READ_RE = re.compile(r'\(\) => $')
+_WRAPPED_WRITE_RE = re.compile(r'invalidateAfter\([^\n]*, (?:"\w+"|\[[^\]\n]*\]), $')
+
+
+def request_parameter(signature):
+    """
+    Premier paramètre du handler (`request`), '' s'il n'en prend aucun, None
+    si la liste de paramètres n'est pas reconnue. `signature` va du `(` de
+    l'export au corps : pour `safeHandler(async (request) => {`, c'est la
+    liste de la fonction fléchée, pas l'appel du wrapper.
+    """
+    for match in re.finditer(r'\(', signature):
+        close = match_bracket(signature, match.start())
+        if close < 0 or not _PARAMETERS_END_RE.match(signature, close + 1):
+            continue
+        parameter = _PARAMETER_RE.match(signature, match.start())
+        if parameter.group('name'):
+            return parameter.group('name')
+        return '' if signature[parameter.end():close].strip() == '' else None
+    return None
+
+
+def read_scope(body, public=False):
+    """
+    (expression tenant, position à partir de laquelle elle est définie) pour
+    les lectures d'un GET ; ('null', 0) si le GET est public (`public`: il
+    ne reçoit pas la requête et n'authentifie pas), None s'il ne peut pas
+    être mis en cache
+    """
+    candidates = [
+        (match.start(), expression, match.end())
+        for pattern, expression in (
+            (TENANT_FILTER_RE, 'tenantFilter'), (_TENANT_ID_RE, 'tenantId'), (_SESSION_DATA_RE, 'sessionData.tenantId'),
+        )
+        for match in [pattern.search(body)] if match is not None
+    ]
+    if candidates:
+        _, expression, end = min(candidates)
+        return expression, end
+    if public and _REQUEST_DEPENDENT_RE.search(body) is None:
+        return 'null', 0
+    return None
+
+
+def write_scope(body, position):
+    """Tenant des écritures à `position` (null: invalidation tous tenants)"""
+    candidates = [
+        (match.end(), expression)
+        for pattern, expression in (
+            (TENANT_FILTER_RE, 'tenantFilter'), (_TENANT_ID_RE, 'tenantId'), (_EXISTING_TENANT_RE, 'existing.tenantId'),
+            (_SESSION_DATA_RE, 'sessionData.tenantId'),
+        )
+        for match in pattern.finditer(body, 0, position)
+    ]
+    return max(candidates)[1] if candidates else 'null'
+
+
+def _statement_reads(body, start, end):
+    """Lectures Prisma attendues directement par l'instruction body[start:end]"""
+    position = code_start(body, start, end)
+    awaited = _AWAITED_RE.match(body, position)
+    if awaited is None:
+        return []
+    read = _READ_RE.match(body, awaited.end())
+    if read is not None:
+        return [read]
+    batch = _PROMISE_ALL_RE.match(body, awaited.end())
+    if batch is None:
+        return []
+    close = match_bracket(body, batch.end() - 1)
+    return [
+        read for read in _READ_RE.finditer(body, batch.end() - 1, close)
+        if _ITEM_START_RE.search(body, batch.end() - 1, read.start())
+    ]
+
+
+def _read_edits(body, url, report, public=False, unwrapped=frozenset()):
+    scope = read_scope(body, public)
+    if scope is None:
+        report['skipped_unscoped_get'] += 1
+        return []
+    expression, scope_end = scope
+    user_variables = {match.group('var') for match in _AUTH_VARIABLE_RE.finditer(body)}
+    edits = []
+    ordinal = 0
+    for block_start, block_end in control_blocks(body, 0, len(body)):
+        for start, end in block_statements(body, block_start, block_end):
+            for read in _statement_reads(body, start, end):
+                if read.start() < scope_end or _WRAPPED_READ_RE.search(body, max(0, read.start() - 8), read.start()):
+                    continue
+                close = match_bracket(body, read.end() - 1)
+                if close < 0:
+                    continue
+                model = model_label(read.group('delegate'))
+                if model in unwrapped:
+                    report['skipped_unwrapped_model'] += 1
+                    continue
+                # Le tenant de la clé peut figurer dans les arguments (sessionData.tenantId)
+                arguments = body[read.end():close].replace(expression, '')
+                if _USER_DEPENDENT_RE.search(arguments) or any(
+                    re.search(r'\b' + re.escape(name) + r'\b', arguments) for name in user_variables
+                ):
+                    report['skipped_user_dependent'] += 1
+                    continue
+                key = (f'tenantCacheKey({expression}, "{model}", '
+                       f'"{read.group("op")}", {ordinal}, {url})')
+                edits.append((close + 1, ')'))
+                edits.append((read.start(), f'contentCache.read({key}, () => '))
+                ordinal += 1
+                report['reads_cached'] += 1
+    return edits
+
+
+def _models_label(models):
+    """`"Order"` ou `["Order", "Payment"]`"""
+    labels = [f'"{model}"' for model in sorted(models)]
+    return labels[0] if len(labels) == 1 else f'[{", ".join(labels)}]'
+
+
+def _write_edits(body, report, unwrapped):
+    """
+    Insertions qui invalident le modèle après chaque écriture, et tous les
+    modèles écrits après chaque $transaction ; les modèles des écritures
+    non enveloppées sont ajoutés à `unwrapped`
+    """
+    calls = []
+    for call in _TRANSACTION_CALL_RE.finditer(body):
+        close = match_bracket(body, call.end() - 1)
+        if close > 0 and not in_comment(body, call.start()):
+            calls.append((call.start(), close))
+    # $transaction(operations): les écritures non attendues sont rangées dans le tableau
+    awaited_only = TRANSACTION_VARIABLE_RE.search(body) is not None
+    queued = set()
+    edits = []
+    for write in _WRITE_RE.finditer(body):
+        start = write.start()
+        if in_comment(body, start) or _WRAPPED_WRITE_RE.search(body, max(0, start - 120), start) or \
+                any(open_ < start < close for open_, close in calls):
+            continue
+        model = model_label(write.group('delegate'))
+        if awaited_only and not body[:start].rstrip().endswith('await'):
+            queued.add(model)
+            continue
+        close = match_bracket(body, write.end() - 1)
+        if close < 0:
+            unwrapped.add(model)
+            report['skipped_unwrapped_write'] += 1
+            continue
+        edits.append((close + 1, ')'))
+        edits.append((start, f'contentCache.invalidateAfter({write_scope(body, start)}, "{model}", '))
+        report['writes_invalidating'] += 1
+    for start, close in calls:
+        if TRANSACTION_VARIABLE_RE.match(body, start + len('prisma.')):
+            models, queued = queued, set()
+        else:
+            models = {
+                model_label(write.group('delegate')) for write in _TRANSACTION_WRITE_RE.finditer(body, start, close)
+                if not in_comment(body, write.start())
+            }
+        if not models or _WRAPPED_WRITE_RE.search(body, max(0, start - 120), start):
+            continue
+        edits.append((close + 1, ')'))
+        edits.append((start, f'contentCache.invalidateAfter({write_scope(body, start)}, {_models_label(models)}, '))
+        report['transactions_invalidating'] += 1
+    if queued:
+        unwrapped.update(queued)
+        report['skipped_unwrapped_write'] += len(queued)
+    return edits
+
+
+def _unwrapped_models(content):
+    """Modèles dont une écriture du fichier ne peut pas être enveloppée"""
+    unwrapped = set()
+    handlers = find_handlers(content)
+    for handler in handlers:
+        _write_edits(handler.body(content), Counter(), unwrapped)
+    for write in _TRANSACTION_WRITE_RE.finditer(content):
+        start = write.start()
+        if not any(handler.body_start <= start < handler.body_end for handler in handlers) and \
+                not in_comment(content, start):
+            unwrapped.add(model_label(write.group('delegate')))
+    return unwrapped
+
+
+@lru_cache(maxsize=None)
+def _route_unwrapped_models(routes_root):
+    """Modèles écrits sans invalidation possible par une route de `routes_root`"""
+    unwrapped = set()
+    for path in discover_routes(routes_root):
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            unwrapped |= _unwrapped_models(f.read())
+    return frozenset(unwrapped)
+
+
+def input_digest(routes_root):
+    """Hash des modèles jamais mis en cache (écritures non enveloppées des routes)"""
+    return content_digest(','.join(sorted(_route_unwrapped_models(os.path.normpath(routes_root)))).encode())
+
+
+def apply(content, file_path):
+    report = Counter()
+    located = route_url(file_path)
+    if located is None:
+        return content, report
+    src_root, route = located
+    routes_root = os.path.normpath(os.path.join(src_root, 'app', 'api'))
+    unwrapped = set(_route_unwrapped_models(routes_root)) if os.path.isdir(routes_root) else set()
+    unwrapped |= _unwrapped_models(content)
+    chunks = []
+    position = 0
+    for handler in find_handlers(content):
+        body = handler.body(content)
+        writes = _write_edits(body, report, set())
+        edits = list(writes)
+        if handler.method == 'GET':
+            if writes:
+                report['skipped_writing_get'] += 1
+            else:
+                parameter = request_parameter(handler.signature(content))
+                if parameter is None:
+                    report['skipped_unscoped_get'] += 1
+                else:
+                    # Sans paramètre, le handler ne lit ni params ni query: la route suffit
+                    url = f'{parameter}.url' if parameter else f'"{route}"'
+                    edits += _read_edits(body, url, report, public=parameter == '', unwrapped=unwrapped)
+        if not edits:
+            continue
+        for offset, text in sorted(edits, key=lambda edit: edit[0], reverse=True):
+            body = body[:offset] + text + body[offset:]
+        chunks.append(content[position:handler.body_start])
+        chunks.append(body)
+        position = handler.body_end
+        report['handlers'] += 1
+    if not chunks:
+        return content, report
+    chunks.append(content[position:])
+    report['files'] += 1
+    return update_named_import(''.join(chunks), CACHE_MODULE, add=HELPERS), report
+
+
+def summarize(reports):
+    lines, total = report_lines(reports)
+    if total:
+        lines.append(
+            f"   Total: {total['reads_cached']} lecture(s) en cache, {total['writes_invalidating']} écriture(s) "
+            f"et {total['transactions_invalidating']} $transaction qui invalident; ignorés: "
+            f"{total['skipped_unscoped_get']} GET sans scope tenant, {total['skipped_writing_get']} GET qui écrivent, "
+            f"{total['skipped_user_dependent']} lecture(s) liée(s) à l'utilisateur, "
+            f"{total['skipped_unwrapped_model']} lecture(s) d'un modèle aux écritures non enveloppées "
+            f"({total['skipped_unwrapped_write']} écriture(s))"
+        )
+    return lines
@@ -0,0 +1,264 @@
+"""
+Passe rollup-reads: agrégats sur une période lus dans les modèles *DailyRollup
+
+Pour un modèle source qui a un agrégat journalier généré par
+scripts/generate-rollups.py (`// Source: BeautyAppointment.date`), les
+groupBy / count scopés par tenant et filtrés par intervalle sur le champ
+date lisent les lignes (tenant, jour, dimensions) au lieu des lignes brutes :
+
+    prisma.beautyAppointment.groupBy({
+      by: ["status"],
+      where: { ...tenantFilter, date: { gte: dateFrom, lte: dateTo } },
+      _count: { status: true },
+    })
+
+devient
+
+    prisma.beautyAppointmentDailyRollup.groupBy({
+      by: ["status"],
+      where: { ...tenantFilter, day: rollupDays(dateFrom, dateTo) },
+      _sum: { count: true },
+    }).then((rows) => rows.map((row) => ({ ...row, _count: { status: row._sum.count ?? 0 } })))
+
+Le résultat garde la forme du groupBy d'origine (`_count.<champ>`), le reste
+du handler ne change pas. Un count devient un aggregate `_sum.count`. Le
+handler recalcule d'abord les jours modifiés de son tenant
+(`await refreshDailyRollups(tenantFilter)`, lot borné).
+
+Non réécrits : filtres sur un champ qui n'est pas une dimension de
+l'agrégat, intervalles en gt / lt (la granularité est le jour UTC), autres
+agrégations (_avg, _min, _max, having), appels d'un $transaction([...]).
+"""
+
+import re
+from collections import Counter
+
+from route_analysis import array_items, find_handlers, match_bracket, object_entries
+from stats_rollups import COUNT_FIELD, DAY_FIELD, ROLLUP_SUFFIX, rollup_source
+
+from .common import (
+    SCHEMA_PATH, TENANT_FILTER_RE, append_object_entries, delegate_model, in_comment, report_lines, route_url,
+    top_level_key, transaction_spans, update_named_import,
+)
+
+NAME = 'rollup-reads'
+DESCRIPTION = ('lit les groupBy / count par période dans les agrégats journaliers par tenant '
+               '(générés par generate-rollups.py)')
+MARKERS = (b'.groupBy(', b'.count(')
+
+HELPER_MODULE = '@/lib/stats-rollups'
+REFRESH_CALL = 'refreshDailyRollups'
+
+_CALL_RE = re.compile(r'(?<![\w$.])prisma\.(?P<delegate>\w+)\.(?P<op>groupBy|count)\(')
+_QUOTED_RE = re.compile(r'''^["'](\w+)["']$''')
+_DATE_KEYS = {'gte', 'lte'}
+_GROUP_BY_KEYS = {'by', 'where', '_count', 'orderBy', 'take', 'skip'}
+_FIXED_FIELDS = {'id', 'tenantId', DAY_FIELD, COUNT_FIELD, 'updatedAt'}
+_SUM = f'row._sum.{COUNT_FIELD} ?? 0'
+
+
+def rollup_for(delegate, schema_path=SCHEMA_PATH):
+    """(modèle d'agrégats, champ date source) de `prisma.<delegate>`, ou None"""
+    rollup = delegate_model(delegate + ROLLUP_SUFFIX, schema_path)
+    source = rollup_source(rollup) if rollup is not None else None
+    if source is None or delegate_model(delegate, schema_path) is None:
+        return None
+    return rollup, source[1]
+
+
+def _replace_entry(literal, key, text):
+    """`literal` avec l'entrée de premier niveau `key: valeur` remplacée par `text`"""
+    match = top_level_key(literal, key)
+    value = literal[match.end():]
+    length = len(value) - len(value.lstrip())
+    if value.lstrip()[:1] in '{[':
+        end = match_bracket(literal, match.end() + length) + 1
+    else:
+        end = match.end() + len(re.match(r'[^,\n}]*', value).group().rstrip())
+    return literal[:match.start()] + text + literal[end:]
+
+
+def _day_range(value):
+    bounds = dict(object_entries(value))
+    if not bounds or set(bounds) - _DATE_KEYS:
+        return None
+    if 'lte' not in bounds:
+        return f'rollupDays({bounds["gte"]})'
+    return f'rollupDays({bounds.get("gte", "undefined")}, {bounds["lte"]})'
+
+
+def _where(rollup, date_field, where, report):
+    """where réécrit sur l'agrégat, None si la requête n'est pas concernée ou non réécrivable"""
+    entries = object_entries(where)
+    date = dict((key, value) for key, value in entries if key).get(date_field)
+    if date is None or not date.startswith('{'):
+        return None
+    days = _day_range(date)
+    if days is None:
+        report['skipped_range'] += 1
+        return None
+    tenant = False
+    for key, value in entries:
+        if key is None:
+            tenant = tenant or value.endswith('tenantFilter')
+            if not value.endswith('tenantFilter'):
+                report['skipped_filter'] += 1
+                return None
+        elif key == 'tenantId':
+            tenant = True
+        elif key != date_field and (key in _FIXED_FIELDS or rollup.field(key) is None):
+            report['skipped_filter'] += 1
+            return None
+    if not tenant:
+        report['skipped_unscoped'] += 1
+        return None
+    return _replace_entry(where, date_field, f'{DAY_FIELD}: {days}')
+
+
+def _count_mapping(source, rollup, grouped, value):
+    """Expression `_count` reconstruite depuis row._sum.count, None si impossible"""
+    if value == 'true':
+        return _SUM
+    entries = object_entries(value)
+    if len(entries) != 1 or entries[0][1] != 'true':
+        return None
+    name = entries[0][0]
+    if name == '_all':
+        return f'{{ _all: {_SUM} }}'
+    field = source.field(name)
+    if field is None:
+        return None
+    if name in grouped:
+        # _count d'un champ nullable: 0 pour le groupe NULL, comme Prisma
+        counted = f'row.{name} === null ? 0 : {_SUM}' if rollup.field(name).is_optional else _SUM
+    elif not field.is_optional:
+        counted = _SUM
+    else:
+        return None
+    return f'{{ {name}: {counted} }}'
+
+
+def _rewrite_group_by(source, rollup, arguments, where, report):
+    entries = dict(object_entries(arguments))
+    if set(entries) - _GROUP_BY_KEYS:
+        report['skipped_aggregate'] += 1
+        return None
+    grouped = [_QUOTED_RE.match(item.strip()) for item in array_items(entries.get('by', ''))]
+    if not grouped or not all(grouped) or any(rollup.field(m.group(1)) is None for m in grouped):
+        report['skipped_filter'] += 1
+        return None
+    grouped = [match.group(1) for match in grouped]
+    arguments = _replace_entry(arguments, 'where', f'where: {where}')
+    suffix = ''
+    if '_count' in entries:
+        counted = _count_mapping(source, rollup, grouped, entries['_count'])
+        if counted is None:
+            report['skipped_aggregate'] += 1
+            return None
+        arguments = _replace_entry(arguments, '_count', f'_sum: {{ {COUNT_FIELD}: true }}')
+        suffix = f'.then((rows) => rows.map((row) => ({{ ...row, _count: {counted} }})))'
+    order = entries.get('orderBy', '')
+    if '_count' in dict(object_entries(order)):
+        directions = [value for _, value in object_entries(dict(object_entries(order))['_count'])]
+        if len(directions) != 1:
+            report['skipped_aggregate'] += 1
+            return None
+        order = _replace_entry(order, '_count', f'_sum: {{ {COUNT_FIELD}: {directions[0]} }}')
+        arguments = _replace_entry(arguments, 'orderBy', f'orderBy: {order}')
+    return arguments, 'groupBy', suffix
+
+
+def _rewrite_count(arguments, where, report):
+    if set(dict(object_entries(arguments))) != {'where'}:
+        report['skipped_aggregate'] += 1
+        return None
+    arguments = _replace_entry(arguments, 'where', f'where: {where}')
+    arguments = append_object_entries(arguments, [f'_sum: {{ {COUNT_FIELD}: true }}'])
+    return arguments, 'aggregate', f'.then((result) => result._sum.{COUNT_FIELD} ?? 0)'
+
+
+def _handler_edits(body, report, schema_path):
+    transactions = transaction_spans(body)
+    edits = []
+    for call in _CALL_RE.finditer(body):
+        if in_comment(body, call.start()) or any(open_ < call.start() < close for open_, close in transactions):
+            continue
+        target = rollup_for(call.group('delegate'), schema_path)
+        close = match_bracket(body, call.end() - 1)
+        if target is None or close < 0:
+            continue
+        rollup, date_field = target
+        arguments = body[call.end():close]
+        where = dict(object_entries(arguments)).get('where', '')
+        if not where.startswith('{'):
+            continue
+        where = _where(rollup, date_field, where, report)
+        if where is None:
+            continue
+        if call.group('op') == 'groupBy':
+            source = delegate_model(call.group('delegate'), schema_path)
+            rewritten = _rewrite_group_by(source, rollup, arguments, where, report)
+        else:
+            rewritten = _rewrite_count(arguments, where, report)
+        if rewritten is None:
+            continue
+        arguments, operation, suffix = rewritten
+        delegate = call.group('delegate') + ROLLUP_SUFFIX
+        edits.append((call.start(), close + 1, f'prisma.{delegate}.{operation}({arguments}){suffix}'))
+        report[f'{call.group("op")}_rewritten'] += 1
+    return edits
+
+
+def _refresh_edit(body):
+    """Insertion du rafraîchissement des jours modifiés après la résolution du tenant"""
+    scope = TENANT_FILTER_RE.search(body)
+    if scope is None or f'{REFRESH_CALL}(' in body:
+        return None
+    close = match_bracket(body, scope.end() - 1)
+    end = close + 2 if body.startswith(');', close) else close + 1
+    indent = re.match(r'[ \t]*', body[body.rfind('\n', 0, scope.start()) + 1:]).group()
+    return (end, end, (
+        f'\n\n{indent}// ⚡ Jours modifiés de ce tenant recalculés avant lecture des agrégats (lot borné)\n'
+        f'{indent}await {REFRESH_CALL}(tenantFilter);'
+    ))
+
+
+def apply(content, file_path, schema_path=SCHEMA_PATH):
+    report = Counter()
+    if route_url(file_path) is None:
+        return content, report
+    chunks = []
+    position = 0
+    helpers = {'rollupDays'}
+    for handler in find_handlers(content):
+        body = handler.body(content)
+        edits = _handler_edits(body, report, schema_path)
+        if not edits:
+            continue
+        refresh = _refresh_edit(body)
+        if refresh is not None:
+            edits.append(refresh)
+            helpers.add(REFRESH_CALL)
+        for start, end, text in sorted(edits, reverse=True):
+            body = body[:start] + text + body[end:]
+        chunks.append(content[position:handler.body_start])
+        chunks.append(body)
+        position = handler.body_end
+        report['handlers'] += 1
+    if not chunks:
+        return content, report
+    chunks.append(content[position:])
+    report['files'] += 1
+    return update_named_import(''.join(chunks), HELPER_MODULE, add=sorted(helpers)), report
+
+
+def summarize(reports):
+    lines, total = report_lines(reports)
+    if total:
+        lines.append(
+            f"   Total: {total['groupBy_rewritten']} groupBy et {total['count_rewritten']} count lus dans les "
+            f"agrégats; ignorés: {total['skipped_filter']} filtre(s) hors dimensions, {total['skipped_range']} "
+            f"intervalle(s) gt/lt, {total['skipped_aggregate']} agrégation(s) non reproductible(s), "
+            f"{total['skipped_unscoped']} sans scope tenant"
+        )
+    return lines
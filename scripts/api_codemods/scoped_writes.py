@@ -0,0 +1,214 @@
+"""
+Passe scoped-writes: lecture/écriture par id scopée par tenant en un seul aller-retour
+
+Le bloc injecté par migrate_api_file
+
+    const existing = await prisma.MODEL.findUnique({ where: { id: (await params).id } });
+    if (!existing) { ...404 }
+    const hasAccess = await verifyTenantAccess(request, existing.tenantId);
+    if (!hasAccess) { ...403 }
+
+est supprimé et la requête principale du handler porte le filtre tenant:
+
+    - delete            → deleteMany({ where: { id, ...tenantFilter } }) + 404 si count === 0
+    - update non lu     → updateMany(...) + 404 si count === 0
+    - update lu         → update({ where: { id, ...tenantFilter } }).catch(nullIfNotFound) + 404
+    - findUnique        → findUnique({ where: { id, ...tenantFilter } }) (le 404 existant suffit)
+
+Une ressource d'un autre tenant répond 404 (et non plus 403): son existence
+n'est pas divulguée et aucune requête supplémentaire n'est nécessaire. Un
+handler qui relit `existing` après la vérification garde son bloc.
+"""
+
+import re
+from collections import Counter
+
+from route_analysis import find_handlers, line_indent, match_bracket
+
+from .common import (
+    TENANT_FILTER_RE,
+    auth_variable,
+    comment_start,
+    remove_statement,
+    report_lines,
+    update_named_import,
+)
+
+NAME = 'scoped-writes'
+DESCRIPTION = 'remplace findUnique + verifyTenantAccess par une écriture scopée par tenant (1 requête)'
+MARKERS = (b'verifyTenantAccess(request, existing', b'tenantFilter')
+
+VERIFY_BLOCK_RE = re.compile(
+    r'[ \t]*const existing = await prisma\.(?P<model>\w+)\.findUnique\(\{\s*'
+    r'where: \{ id: (?:[\w.]+|\(await \w+\)\.\w+) \},?\s*\}\);\s*'
+    r'if \(!existing\) \{\s*return NextResponse\.json\([^;]*\);\s*\}\s*'
+    r'const hasAccess = await verifyTenantAccess\(request, existing\.tenantId\);\s*'
+    r'if \(!hasAccess\) \{\s*return NextResponse\.json\([^;]*\);\s*\}[ \t]*\n'
+)
+CALL_RE = re.compile(r'prisma\.(?P<model>\w+)\.(?P<op>findUnique|update|delete)\(')
+WHERE_ID_RE = re.compile(r'where:\s*\{\s*id(?:\s*:\s*(?P<expr>[\w.]+))?\s*,?\s*\}')
+STATEMENT_HEAD_RE = re.compile(r'(?:(?P<decl>const|let) (?P<var>\w+) = )?await $')
+
+WRITE_METHODS = ('PUT', 'PATCH', 'DELETE')
+
+NOT_FOUND = '''{indent}if ({condition}) {{
+{indent}  return NextResponse.json(
+{indent}    {{ success: false, error: "Ressource introuvable" }},
+{indent}    {{ status: 404 }}
+{indent}  );
+{indent}}}
+'''
+
+
+def _scoped_where(match):
+    expr = match.group('expr')
+    key = 'id' if expr in (None, 'id') else f'id: {expr}'
+    return f'where: {{ {key}, ...tenantFilter }}'
+
+
+def _rewrite_call(body, call, report):
+    """Réécrit un appel prisma.X.op({ where: { id } ... }), retourne le nouveau corps ou None"""
+    args_open = call.end() - 1
+    args_close = match_bracket(body, args_open)
+    if args_close < 0:
+        return None
+    args = body[args_open + 1:args_close]
+    where = WHERE_ID_RE.search(args)
+    if where is None:
+        return None
+    scoped_args = args[:where.start()] + _scoped_where(where) + args[where.end():]
+
+    model, op = call.group('model'), call.group('op')
+    line_start = body.rfind('\n', 0, call.start()) + 1
+    head = STATEMENT_HEAD_RE.search(body, line_start, call.start())
+    statement_end = args_close + 1
+    # Seules les instructions autonomes (`[const x = ]await prisma...;`) sont restructurées
+    if head is not None and (body[line_start:head.start()].strip() or not body.startswith(';', statement_end)):
+        head = None
+
+    if op == 'findUnique' or head is None:
+        # Lecture (ou appel imbriqué): le filtre tenant dans le where suffit
+        report[f'{op}_scoped'] += 1
+        return body[:args_open + 1] + scoped_args + body[args_close:]
+
+    indent = line_indent(body, call.start())
+    var = head.group('var')
+    used = var is not None and len(re.findall(r'\b' + re.escape(var) + r'\b', body)) > 1
+    projects = re.search(r'\b(?:include|select)\s*:', args) is not None
+    statement_start = head.start()
+
+    if used or (op == 'update' and projects):
+        # Le résultat est lu: update/delete unique scopé, P2025 → 404
+        replacement = (
+            f'{head.group()}prisma.{model}.{op}({scoped_args}).catch(nullIfNotFound);\n'
+            + NOT_FOUND.format(indent=indent, condition=f'!{var}')
+        )
+        report[f'{op}_not_found'] += 1
+    else:
+        affected = 'affected'
+        while re.search(r'\b' + affected + r'\b', body):
+            affected += '_'
+        replacement = (
+            f'const {{ count: {affected} }} = await prisma.{model}.{op}Many({scoped_args});\n'
+            + NOT_FOUND.format(indent=indent, condition=f'{affected} === 0')
+        )
+        report[f'{op}_many'] += 1
+
+    end = statement_end + 1
+    if body.startswith('\n', end):
+        end += 1
+    elif not replacement.endswith('\n'):
+        replacement = replacement.rstrip('\n')
+    return body[:statement_start] + replacement + body[end:]
+
+
+def _rewrite_handler(method, body, report):
+    verify = VERIFY_BLOCK_RE.search(body)
+    tenant_filter = TENANT_FILTER_RE.search(body)
+    has_filter = tenant_filter is not None
+    if verify is None and not (has_filter and method in WRITE_METHODS):
+        return body
+    if verify is not None and re.search(r'(?<![\w$.])existing\b', body[verify.end():]):
+        # La ligne lue par la vérification sert encore: bloc conservé
+        report['skipped_existing_used'] += 1
+        return body
+
+    # tenantFilter doit être déclaré avant l'appel réécrit
+    scope_end = tenant_filter.end() if has_filter else verify.end()
+    new_body = body
+    calls = [
+        c for c in CALL_RE.finditer(body)
+        if c.start() > scope_end and (verify is None or c.start() > verify.end())
+    ]
+    changed = False
+    for call in reversed(calls):
+        if call.group('op') != 'findUnique' and method not in WRITE_METHODS:
+            continue
+        rewritten = _rewrite_call(new_body, call, report)
+        if rewritten is not None:
+            new_body = rewritten
+            changed = True
+
+    if not changed:
+        return body
+
+    if verify is not None:
+        start = comment_start(new_body, verify.start())
+        if has_filter:
+            new_body = remove_statement(new_body, start, verify.end())
+        else:
+            user_var = auth_variable(new_body, verify.start())
+            arguments = f'request, {user_var}' if user_var else 'request'
+            indent = line_indent(new_body, verify.start())
+            new_body = (
+                new_body[:start]
+                + f'{indent}// 🔒 Isolation multi-tenant\n'
+                + f'{indent}const {{ tenantFilter }} = await getTenantScope({arguments});\n'
+                + new_body[verify.end():]
+            )
+        report['verify_blocks_removed'] += 1
+        if verify.group('model') == 'MODELNAME':
+            report['placeholders_removed'] += 1
+
+    report['handlers'] += 1
+    return new_body
+
+
+def apply(content, file_path):
+    report = Counter()
+    chunks = []
+    position = 0
+    for handler in find_handlers(content):
+        body = handler.body(content)
+        new_body = _rewrite_handler(handler.method, body, report)
+        if new_body == body:
+            continue
+        chunks.append(content[position:handler.body_start])
+        chunks.append(new_body)
+        position = handler.body_end
+    if not chunks:
+        return content, report
+    chunks.append(content[position:])
+    content = update_named_import(
+        ''.join(chunks), '@/middleware/tenant-context',
+        add=('getTenantScope',),
+        drop_unused=('verifyTenantAccess',),
+    )
+    content = update_named_import(content, '@/lib/prisma-error-sanitizer', add=('nullIfNotFound',))
+    return content, report
+
+
+def _describe(report):
+    details = ', '.join(f'{name}: {count}' for name, count in sorted(report.items()) if name != 'handlers')
+    return f"{report['handlers']} handler(s) ({details})"
+
+
+def summarize(reports):
+    lines, total = report_lines(reports, describe=_describe)
+    if total:
+        lines.append(
+            f"   Total: {total['verify_blocks_removed']} vérification(s) supprimée(s) "
+            f"(= {total['verify_blocks_removed']} aller(s)-retour(s) base en moins), "
+            f"{total['placeholders_removed']} placeholder(s) MODELNAME retiré(s)"
+        )
+    return lines
@@ -0,0 +1,148 @@
+"""
+Passe tenant-scope: une seule résolution du contexte tenant par handler
+
+    const authResult = await ensureAuthenticated(request);
+    if (authResult instanceof NextResponse) return authResult;
+    const { tenantId } = await requireTenant(request);
+    const { tenantFilter } = await getTenantFilter(request);
+
+devient
+
+    const authResult = await ensureAuthenticated(request);
+    if (authResult instanceof NextResponse) return authResult;
+    const { tenantId, tenantFilter } = await requireTenantScope(request, authResult);
+
+requireTenant relit la session une fois, getTenantFilter deux fois
+(getAuthenticatedUser + getTenantContext). Avec l'utilisateur déjà retourné
+par ensureAuthenticated, la version fusionnée n'en relit aucune. Seuls les
+appels d'un même bloc sont fusionnés (un appel dans un try ou un if reste
+dans son bloc).
+"""
+
+import re
+from collections import Counter
+
+from route_analysis import block_statements, code_start, control_blocks, find_handlers
+
+from .common import auth_variable, comment_start, remove_statement, report_lines, update_named_import
+
+NAME = 'tenant-scope'
+DESCRIPTION = 'fusionne requireTenant + getTenantFilter en une seule résolution du tenant'
+MARKERS = (b'requireTenant(', b'getTenantFilter(')
+
+# Lectures de session faites par chaque helper
+SESSION_LOOKUPS = {'requireTenant': 1, 'getTenantFilter': 2}
+
+CALL_LINE_RE = re.compile(
+    r'(?P<indent>[ \t]*)const \{ (?P<names>[\w, ]+?) \} = await '
+    r'(?P<fn>requireTenant|getTenantFilter)\(request\);[ \t]*(?://[^\n]*)?\n'
+)
+
+
+def _call_groups(body):
+    """
+    Appels groupés par bloc d'instructions: seuls ceux d'un même bloc, au
+    premier niveau, sont fusionnés (jamais à travers un try, un if...)
+    """
+    groups = {}
+    calls = list(CALL_LINE_RE.finditer(body))
+    if not calls:
+        return []
+    blocks = control_blocks(body, 0, len(body))
+    for call in calls:
+        block = max((b for b in blocks if b[0] <= call.start() < b[1]), key=lambda b: b[0])
+        statements = {code_start(body, start, end) for start, end in block_statements(body, *block)}
+        if call.start() + len(call.group('indent')) in statements:
+            groups.setdefault(block, []).append(call)
+    return [groups[block] for block in sorted(groups)]
+
+
+def _merge(body, calls):
+    """Éditions (début, fin, texte | None = suppression) d'un groupe, (awaits supprimés, lookups évités)"""
+    user_var = auth_variable(body, calls[0].start())
+    if len(calls) == 1 and user_var is None:
+        return [], 0, 0
+
+    names = []
+    for call in calls:
+        for name in (n.strip() for n in call.group('names').split(',')):
+            if name and name not in names:
+                names.append(name)
+
+    required = any(call.group('fn') == 'requireTenant' for call in calls)
+    helper = 'requireTenantScope' if required else 'getTenantScope'
+    arguments = f'request, {user_var}' if user_var else 'request'
+    first = calls[0]
+    indent = first.group('indent')
+    merged = (
+        f"{indent}// 🔒 Contexte tenant (résolu une seule fois)\n"
+        f"{indent}const {{ {', '.join(names)} }} = await {helper}({arguments});\n"
+    )
+
+    lookups_before = sum(SESSION_LOOKUPS[call.group('fn')] for call in calls)
+    lookups_after = 0 if user_var else 1
+
+    edits = [(comment_start(body, first.start()), first.end(), merged)]
+    edits += [(comment_start(body, call.start()), call.end(), None) for call in calls[1:]]
+    return edits, len(calls) - 1, lookups_before - lookups_after
+
+
+def _rewrite_handler(body):
+    """Réécrit le corps d'un handler, retourne (corps, awaits supprimés, lookups évités)"""
+    edits = []
+    removed = lookups = 0
+    for calls in _call_groups(body):
+        group_edits, group_removed, group_lookups = _merge(body, calls)
+        edits += group_edits
+        removed += group_removed
+        lookups += group_lookups
+    for start, end, text in sorted(edits, key=lambda edit: edit[0], reverse=True):
+        if text is None:
+            # Ligne vide orpheline laissée par l'appel supprimé
+            body = remove_statement(body, start, end)
+        else:
+            body = body[:start] + text + body[end:]
+    return body, removed, lookups
+
+
+def apply(content, file_path):
+    report = Counter()
+    chunks = []
+    position = 0
+    for handler in find_handlers(content):
+        body = handler.body(content)
+        new_body, removed, lookups = _rewrite_handler(body)
+        if new_body == body:
+            continue
+        chunks.append(content[position:handler.body_start])
+        chunks.append(new_body)
+        position = handler.body_end
+        report['handlers'] += 1
+        report['awaits_removed'] += removed
+        report['session_lookups_avoided'] += lookups
+    if not report:
+        return content, report
+    chunks.append(content[position:])
+    content = update_named_import(
+        ''.join(chunks), '@/middleware/tenant-context',
+        add=('getTenantScope', 'requireTenantScope'),
+        drop_unused=('getTenantFilter', 'requireTenant'),
+    )
+    return content, report
+
+
+def _describe(report):
+    return (
+        f"{report['handlers']} handler(s), {report['awaits_removed']} await(s) supprimé(s), "
+        f"{report['session_lookups_avoided']} lecture(s) de session évitée(s)"
+    )
+
+
+def summarize(reports):
+    lines, total = report_lines(reports, describe=_describe, key=lambda item: -item[1]['session_lookups_avoided'])
+    if total:
+        lines.append(
+            f"   Total: {total['awaits_removed']} await(s) supprimé(s), "
+            f"{total['session_lookups_avoided']} lecture(s) de session évitée(s) par requête"
+        )
+    return lines
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Benchmark de montée en charge des codemods (schema Prisma + routes API)
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Génère des schemas synthétiques (100 à 5 000 modèles) et des arbres de
+routes synthétiques (100 à 10 000 handlers) calqués sur les vrais fichiers,
+exécute les deux transformations et mesure pour chaque taille :
+
+    - le temps par étape (parse / transform / render... et discover /
+      prefilter / transform / passes...), meilleur de N répétitions ;
+    - le pic de mémoire (RSS) : chaque cas tourne dans un process neuf ;
+    - l'exposant de croissance entre la plus petite et la plus grande
+      taille (1.0 = linéaire, 2.0 = quadratique).
+
+Les résultats sont comparés à un baseline JSON ; le script sort en erreur
+si un temps ou un pic mémoire dépasse le baseline au-delà du seuil, ou si
+une étape croît plus vite que --max-exponent.
+
+Usage:
+    python3 scripts/benchmark-codemods.py
+    python3 scripts/benchmark-codemods.py --update-baseline
+    python3 scripts/benchmark-codemods.py --schema-sizes 100,1000 --route-sizes 100,1000 --repeat 1
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import math
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = 'scripts/benchmarks/codemods-baseline.json'
+SCHEMA_SIZES = (100, 500, 1000, 5000)
+ROUTE_SIZES = (100, 1000, 10000)
+THRESHOLD = 1.25        # +25 % de temps ou de RSS = régression
+MAX_EXPONENT = 1.3      # au-delà, la croissance n'est plus linéaire
+# En dessous, le bruit de mesure domine: pas de comparaison
+MIN_COMPARABLE_SECONDS = 0.02
+
+
+def _load_script(name, filename):
+    """Importe un script à tiret (add-multi-tenant-..., migrate-apis-...)"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StageTimer:
+    """Chronométrage cumulé par étape"""
+
+    def __init__(self):
+        self.stages = {}
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+
+
+def _peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: Ko, macOS: octets
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def bench_schema(size):
+    """process_schema_safe découpé en étapes, sur un schema de `size` modèles"""
+    from codemod_fixtures import synthetic_schema
+    from online_migration import plan_tenant_columns, render_online_migration
+    from prisma_schema import parse_schema
+
+    transformer = _load_script('add_multi_tenant_v2', 'add-multi-tenant-to-schema-v2.py')
+    text = synthetic_schema(size)
+    timer = StageTimer()
+    with contextlib.redirect_stdout(io.StringIO()):
+        with timer.stage('parse'):
+            schema = parse_schema(text)
+        with timer.stage('transform'):
+            transformer.transform_schema(schema)
+        with timer.stage('render'):
+            rendered = schema.render()
+        with timer.stage('online_migration'):
+            render_online_migration(plan_tenant_columns(parse_schema(text), schema))
+    return timer.stages, {'models': size, 'lines': text.count('\n'), 'output_bytes': len(rendered)}
+
+
+def bench_routes(size):
+    """migrate_api_file (sans écriture) + passes, sur `size` handlers synthétiques"""
+    from api_codemods import PASSES
+    from codemod_fixtures import synthetic_api_root, synthetic_routes
+    from query_shapes import extract_query_shapes
+    from route_analysis import discover_routes
+
+    migrator = _load_script('migrate_apis_multi_tenant', 'migrate-apis-multi-tenant.py')
+    root = tempfile.mkdtemp(prefix='bench-routes-')
+    try:
+        _, handlers = synthetic_routes(root, size)
+        routes_root = synthetic_api_root(root)
+        timer = StageTimer()
+        with timer.stage('discover'):
+            paths = discover_routes(routes_root)
+        contents = {}
+        with timer.stage('read'):
+            for path in paths:
+                with open(path, 'rb') as f:
+                    contents[path] = f.read()
+        with timer.stage('prefilter'):
+            for path in paths:
+                migrator.prefilter_api_file(path, contents[path])
+        migrated = {}
+        with timer.stage('transform'):
+            for path in paths:
+                content = contents[path].decode('utf-8')
+                api_name = migrator.api_name_from_path(path, routes_root)
+                migrated[path] = migrator.transform_api_content(content, path, api_name)
+        for name, module in sorted(PASSES.items()):
+            with timer.stage(f'pass:{name}'):
+                for path in paths:
+                    module.apply(migrated[path], path)
+        with timer.stage('query_shapes'):
+            for path in paths:
+                extract_query_shapes(migrated[path], path)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return timer.stages, {'handlers': handlers, 'files': len(paths)}
+
+
+def _run_case(kind, size, repeat):
+    """Un cas (process neuf): meilleur temps par étape sur `repeat` exécutions"""
+    sys.path.insert(0, SCRIPTS_DIR)
+    bench = bench_schema if kind == 'schema' else bench_routes
+    best = {}
+    info = {}
+    for _ in range(repeat):
+        stages, info = bench(size)
+        for name, seconds in stages.items():
+            best[name] = min(best.get(name, seconds), seconds)
+    return {
+        'size': size,
+        'stages': best,
+        'total': sum(best.values()),
+        'peak_rss_mb': _peak_rss_mb(),
+        **info,
+    }
+
+
+def run_case(kind, size, repeat):
+    # spawn: pic RSS propre au cas, sans l'héritage du process parent
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_run_case, kind, size, repeat).result()
+
+
+def growth_exponents(cases):
+    """Exposant log(t2/t1) / log(n2/n1) par étape entre la plus petite et la plus grande taille"""
+    if len(cases) < 2:
+        return {}
+    first, last = cases[0], cases[-1]
+    ratio = math.log(last['size'] / first['size'])
+    exponents = {}
+    for name in last['stages']:
+        before = first['stages'].get(name, 0.0)
+        after = last['stages'][name]
+        if before >= MIN_COMPARABLE_SECONDS / 10 and after >= MIN_COMPARABLE_SECONDS:
+            exponents[name] = math.log(after / before) / ratio
+    return exponents
+
+
+def compare(results, baseline, threshold, max_exponent):
+    """Liste des régressions (texte) par rapport au baseline et à la croissance max"""
+    problems = []
+    for kind, suite in results['suites'].items():
+        for name, exponent in suite['exponents'].items():
+            if exponent > max_exponent:
+                problems.append(f'{kind} {name}: croissance en n^{exponent:.2f} (max {max_exponent})')
+        reference = {case['size']: case for case in (baseline or {}).get('suites', {}).get(kind, {}).get('cases', [])}
+        for case in suite['cases']:
+            old = reference.get(case['size'])
+            if old is None:
+                continue
+            for name, seconds in case['stages'].items():
+                before = old['stages'].get(name)
+                if before and seconds >= MIN_COMPARABLE_SECONDS and seconds > before * threshold:
+                    problems.append(
+                        f'{kind}[{case["size"]}] {name}: {seconds * 1000:.1f} ms '
+                        f'(baseline {before * 1000:.1f} ms, x{seconds / before:.2f})'
+                    )
+            if old.get('peak_rss_mb') and case['peak_rss_mb'] > old['peak_rss_mb'] * threshold:
+                problems.append(
+                    f'{kind}[{case["size"]}] RSS: {case["peak_rss_mb"]:.0f} Mo '
+                    f'(baseline {old["peak_rss_mb"]:.0f} Mo)'
+                )
+    return problems
+
+
+def _sizes(value):
+    return tuple(sorted(int(size) for size in value.split(',') if size.strip()))
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de montée en charge des codemods")
+    parser.add_argument("--schema-sizes", type=_sizes, default=SCHEMA_SIZES,
+                        help="nombres de modèles, séparés par des virgules")
+    parser.add_argument("--route-sizes", type=_sizes, default=ROUTE_SIZES,
+                        help="nombres de handlers, séparés par des virgules")
+    parser.add_argument("--repeat", type=int, default=3, help="répétitions par cas (meilleur temps retenu)")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="fichier baseline JSON")
+    parser.add_argument("--update-baseline", action="store_true", help="enregistrer les résultats comme baseline")
+    parser.add_argument("--output", help="écrire aussi les résultats bruts dans ce fichier JSON")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="ratio toléré par rapport au baseline (temps et RSS)")
+    parser.add_argument("--max-exponent", type=float, default=MAX_EXPONENT,
+                        help="exposant de croissance maximal toléré par étape")
+    return parser.parse_args(argv)
+
+
+def _print_suite(kind, suite):
+    print(f"\n📊 {kind.upper()}")
+    for case in suite['cases']:
+        stages = ', '.join(f"{name} {seconds * 1000:.1f}" for name, seconds in case['stages'].items())
+        print(f"   n={case['size']:>6}: {case['total'] * 1000:9.1f} ms | "
+              f"RSS {case['peak_rss_mb']:6.1f} Mo | {stages}")
+    if suite['exponents']:
+        exponents = ', '.join(f"{name} n^{value:.2f}" for name, value in suite['exponents'].items())
+        print(f"   📈 Croissance: {exponents}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("⏱️  Benchmark des codemods (schema + routes)\n")
+
+    results = {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'repeat': args.repeat,
+        'suites': {},
+    }
+    for kind, sizes in (('schema', args.schema_sizes), ('routes', args.route_sizes)):
+        cases = []
+        for size in sizes:
+            print(f"🔧 {kind} n={size}...")
+            cases.append(run_case(kind, size, args.repeat))
+        results['suites'][kind] = {'cases': cases, 'exponents': growth_exponents(cases)}
+
+    print("\n" + "="*60)
+    for kind, suite in results['suites'].items():
+        _print_suite(kind, suite)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    problems = compare(results, baseline, args.threshold, args.max_exponent)
+    print("\n" + "="*60)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Résultats: {args.output}")
+
+    if args.update_baseline:
+        directory = os.path.dirname(args.baseline)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Baseline mis à jour: {args.baseline}")
+    elif baseline is None:
+        print(f"⚠️  Pas de baseline ({args.baseline}): lancez --update-baseline pour en créer un")
+
+    if problems:
+        print(f"\n❌ {len(problems)} régression(s):")
+        for problem in problems:
+            print(f"   - {problem}")
+        return 1
+    print("\n✅ Aucune régression détectée")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Catalogue routes → modèles → index: construction et requêtes
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Indexe src/app/api/**/route.ts et le schema Prisma dans
+.cache/code-catalog.sqlite (mise à jour incrémentale avant chaque requête)
+puis répond aux questions courantes en quelques millisecondes :
+
+    python3 scripts/code-catalog.py build
+    python3 scripts/code-catalog.py routes Order
+    python3 scripts/code-catalog.py unscoped Order --check      # CI: code 1 si non vide
+    python3 scripts/code-catalog.py unindexed-order
+    python3 scripts/code-catalog.py indexes Order
+    python3 scripts/code-catalog.py tenant-models
+    python3 scripts/code-catalog.py sql "SELECT model, count(*) FROM indexes GROUP BY model"
+
+Les autres scripts passent par code_catalog.Catalog (même fichier).
+"""
+
+import argparse
+import json
+import sqlite3
+import sys
+import time
+
+from code_catalog import CATALOG_PATH, SCHEMA_PATH, Catalog
+from route_analysis import API_ROOT
+
+QUERIES = {
+    'routes': ('routes qui appellent le modèle', lambda catalog, args: catalog.routes_for_model(args.argument)),
+    'models': ('modèles appelés par un route.ts', lambda catalog, args: catalog.models_for_route(args.argument)),
+    'unscoped': ('appels sans filtre tenant sur un modèle à tenantId',
+                 lambda catalog, args: catalog.unscoped_calls(args.argument)),
+    'unindexed-order': ('tris sans index utilisable', lambda catalog, args: catalog.unindexed_orders(args.argument)),
+    'indexes': ('index du modèle', lambda catalog, args: catalog.model_indexes(args.argument)),
+    'tenant-models': ('modèles avec tenantId', lambda catalog, args: catalog.tenant_models()),
+    'sql': ('requête SQL libre sur le catalogue', lambda catalog, args: catalog.query(args.argument)),
+}
+REQUIRED_ARGUMENT = {'models', 'indexes', 'sql'}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Catalogue persistant routes → modèles → index")
+    parser.add_argument("command", choices=['build'] + list(QUERIES),
+                        help="build, ou une requête: " + ', '.join(QUERIES))
+    parser.add_argument("argument", nargs='?', help="modèle, chemin de route.ts ou SQL selon la commande")
+    parser.add_argument("--db", default=CATALOG_PATH, help=f"fichier SQLite (défaut: {CATALOG_PATH})")
+    parser.add_argument("--schema", default=SCHEMA_PATH, help=f"schema Prisma (défaut: {SCHEMA_PATH})")
+    parser.add_argument("--root", default=API_ROOT, help="racine des route.ts")
+    parser.add_argument("--no-refresh", dest="refresh", action="store_false",
+                        help="interroger le catalogue sans relire les fichiers modifiés")
+    parser.add_argument("--json", action="store_true", help="résultat en JSON sur stdout")
+    parser.add_argument("--check", action="store_true", help="code de sortie 1 si le résultat n'est pas vide (CI)")
+    args = parser.parse_args(argv)
+    if args.command in REQUIRED_ARGUMENT and not args.argument:
+        parser.error(f"{args.command}: argument requis")
+    return args
+
+
+def print_rows(rows):
+    if not rows:
+        print("✅ Aucun résultat")
+        return
+    columns = list(rows[0])
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print('   ' + '  '.join(column.ljust(widths[column]) for column in columns).rstrip())
+    for row in rows:
+        print('   ' + '  '.join(str(row[column]).ljust(widths[column]) for column in columns).rstrip())
+    print(f"\n📊 {len(rows)} ligne(s)")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # --json: seul le résultat sort sur stdout
+    log = sys.stderr if args.json else sys.stdout
+
+    with Catalog.open(args.db) as catalog:
+        if args.refresh or args.command == 'build':
+            started = time.perf_counter()
+            try:
+                stats = catalog.refresh(args.root, args.schema)
+            except FileNotFoundError as e:
+                print(f"❌ Fichier introuvable: {e.filename}", file=log)
+                return 2
+            elapsed = (time.perf_counter() - started) * 1000
+            schema = ', schema réindexé' if stats['schema'] else ''
+            print(f"🔧 Catalogue à jour en {elapsed:.0f} ms: {stats['routes']} route.ts réindexé(s), "
+                  f"{stats['removed']} supprimé(s){schema}", file=log)
+        if args.command == 'build':
+            counts = catalog.query(
+                'SELECT (SELECT count(*) FROM routes) AS handlers, (SELECT count(*) FROM calls) AS calls, '
+                '(SELECT count(*) FROM models) AS models, (SELECT count(*) FROM indexes) AS indexes'
+            )[0]
+            print(f"💾 {args.db}: {counts['handlers']} handlers, {counts['calls']} appels Prisma, "
+                  f"{counts['models']} modèles, {counts['indexes']} index", file=log)
+            return 0
+
+        description, run = QUERIES[args.command]
+        started = time.perf_counter()
+        try:
+            rows = run(catalog, args)
+        except sqlite3.Error as e:
+            print(f"❌ Erreur SQL: {e}", file=log)
+            return 2
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"📋 {description}{' (' + args.argument + ')' if args.argument else ''}: {elapsed:.1f} ms\n", file=log)
+        if args.json:
+            json.dump(rows, sys.stdout, indent=2, ensure_ascii=False)
+            print()
+        else:
+            print_rows(rows)
+    return 1 if args.check and rows else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
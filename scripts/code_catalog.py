@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Catalogue persistant routes → modèles → index (SQLite)
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Les scripts (conseiller d'index, explain-regression, analyse des journaux,
+passes de migrate-apis...) relisent tous les route.ts et le schema Prisma
+pour en tirer les mêmes faits. Le catalogue les indexe une fois dans
+.cache/code-catalog.sqlite :
+
+    routes         handlers HTTP exportés (fichier, méthode)
+    calls          appels prisma.<modèle>.<opération>() de chaque handler,
+                   filtre tenant, where non résolu
+    call_columns   colonnes en égalité / intervalle / tri de chaque appel
+                   (formes de query_shapes)
+    models         modèles du schema, table SQL, présence de tenantId
+    indexes        @id / @unique / @@index, colonnes ordonnées
+
+La mise à jour est incrémentale : seuls les fichiers dont (taille, mtime)
+a changé sont relus, et un contenu identique n'est pas réanalysé. Un
+changement des analyseurs (route_analysis, query_shapes, ce module)
+reconstruit tout.
+
+Usage:
+    from code_catalog import Catalog
+
+    with Catalog.open() as catalog:
+        catalog.refresh()
+        for row in catalog.unscoped_calls('Order'):
+            print(row['endpoint'], row['operation'])
+"""
+
+import os
+import re
+import sqlite3
+
+from codemod_cache import content_digest, stat_key, transform_version
+from online_migration import TENANT_COLUMN, table_name
+from prisma_schema import parse_schema
+from query_log import OPERATION_VERBS
+from query_shapes import FILTER_OPERATIONS, extract_query_shapes
+from route_analysis import API_ROOT, discover_routes, find_handlers, match_bracket
+from schema_indexes import model_index_keys
+
+CATALOG_PATH = '.cache/code-catalog.sqlite'
+SCHEMA_PATH = 'prisma/schema.prisma'
+CATALOG_FORMAT = 1
+
+_SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+_CALL_RE = re.compile(r'\b(?:prisma|tx)\.(?P<delegate>\w+)\.(?P<op>' + '|'.join(OPERATION_VERBS) + r')\(')
+_TENANT_ARGUMENT_RE = re.compile(r'\b(?:' + TENANT_COLUMN + r'|(?:\w+\.)*tenantFilter)\b')
+
+_DDL = '''
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS files (
+  path TEXT PRIMARY KEY, kind TEXT NOT NULL, size INTEGER, mtime_ns INTEGER, digest TEXT
+);
+CREATE TABLE IF NOT EXISTS routes (
+  path TEXT NOT NULL, method TEXT NOT NULL, PRIMARY KEY (path, method)
+);
+CREATE TABLE IF NOT EXISTS calls (
+  id INTEGER PRIMARY KEY, path TEXT NOT NULL, method TEXT NOT NULL, position INTEGER NOT NULL,
+  delegate TEXT NOT NULL, operation TEXT NOT NULL,
+  tenant INTEGER NOT NULL, unresolved INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS calls_delegate ON calls (delegate, operation);
+CREATE INDEX IF NOT EXISTS calls_path ON calls (path);
+CREATE TABLE IF NOT EXISTS call_columns (
+  call_id INTEGER NOT NULL, role TEXT NOT NULL, position INTEGER NOT NULL,
+  name TEXT NOT NULL, direction TEXT
+);
+CREATE INDEX IF NOT EXISTS call_columns_call ON call_columns (call_id, role);
+CREATE TABLE IF NOT EXISTS models (
+  name TEXT PRIMARY KEY, delegate TEXT NOT NULL, table_name TEXT NOT NULL, has_tenant INTEGER NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS models_delegate ON models (delegate);
+CREATE TABLE IF NOT EXISTS indexes (
+  id INTEGER PRIMARY KEY, model TEXT NOT NULL, kind TEXT NOT NULL, index_type TEXT, definition TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS indexes_model ON indexes (model);
+CREATE TABLE IF NOT EXISTS index_columns (
+  index_id INTEGER NOT NULL, position INTEGER NOT NULL, name TEXT NOT NULL, direction TEXT NOT NULL,
+  PRIMARY KEY (index_id, position)
+);
+'''
+
+_CALLS_VIEW = '''
+SELECT c.id, c.method || ' ' || c.path AS endpoint, c.path, c.method, c.position,
+       m.name AS model, c.delegate, c.operation, c.tenant, c.unresolved
+FROM calls c JOIN models m ON m.delegate = c.delegate
+'''
+
+
+def catalog_version():
+    """Version des analyseurs: un changement reconstruit tout le catalogue"""
+    return transform_version(
+        *(os.path.join(_SCRIPTS_DIR, name) for name in ('route_analysis.py', 'query_shapes.py', 'code_catalog.py')),
+        extra=str(CATALOG_FORMAT),
+    )
+
+
+def _delegate(model_name):
+    return model_name[0].lower() + model_name[1:]
+
+
+class Catalog:
+    """Connexion au catalogue SQLite, mise à jour et requêtes nommées"""
+
+    def __init__(self, connection, path):
+        self.connection = connection
+        self.path = path
+
+    @classmethod
+    def open(cls, path=CATALOG_PATH):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        connection = sqlite3.connect(path)
+        connection.row_factory = sqlite3.Row
+        connection.executescript(_DDL)
+        return cls(connection, path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.connection.close()
+
+    # --- Mise à jour -----------------------------------------------------
+
+    def _meta(self, key):
+        row = self.connection.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row['value'] if row else None
+
+    def _set_meta(self, key, value):
+        self.connection.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    def _known(self, kind):
+        return {
+            row['path']: row for row in
+            self.connection.execute('SELECT path, size, mtime_ns, digest FROM files WHERE kind = ?', (kind,))
+        }
+
+    def _changed(self, path, known):
+        """Contenu à réanalyser (None si inchangé); met à jour (taille, mtime)"""
+        size, mtime_ns = stat_key(path)
+        row = known.get(path)
+        if row is not None and (row['size'], row['mtime_ns']) == (size, mtime_ns):
+            return None
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = content_digest(data)
+        kind = 'schema' if path.endswith('.prisma') else 'route'
+        self.connection.execute(
+            'INSERT OR REPLACE INTO files (path, kind, size, mtime_ns, digest) VALUES (?, ?, ?, ?, ?)',
+            (path, kind, size, mtime_ns, digest),
+        )
+        if row is not None and row['digest'] == digest:
+            return None
+        return data.decode('utf-8', errors='replace')
+
+    def refresh(self, root=API_ROOT, schema_path=SCHEMA_PATH):
+        """Réindexe ce qui a changé; {'routes': n relus, 'removed': n, 'schema': bool}"""
+        stats = {'routes': 0, 'removed': 0, 'schema': False}
+        with self.connection:
+            version = catalog_version()
+            if self._meta('version') != version or self._meta('schema_path') != schema_path:
+                for table in ('files', 'routes', 'calls', 'call_columns', 'models', 'indexes', 'index_columns'):
+                    self.connection.execute(f'DELETE FROM {table}')
+                self._set_meta('version', version)
+                self._set_meta('schema_path', schema_path)
+
+            content = self._changed(schema_path, self._known('schema'))
+            if content is not None:
+                self._index_schema(content)
+                stats['schema'] = True
+
+            known = self._known('route')
+            routes = discover_routes(root)
+            for path in routes:
+                content = self._changed(path, known)
+                if content is not None:
+                    self._index_route(path, content)
+                    stats['routes'] += 1
+            for path in set(known) - set(routes):
+                self._forget_route(path)
+                self.connection.execute('DELETE FROM files WHERE path = ?', (path,))
+                stats['removed'] += 1
+        return stats
+
+    def _index_schema(self, content):
+        schema = parse_schema(content)
+        for table in ('models', 'indexes', 'index_columns'):
+            self.connection.execute(f'DELETE FROM {table}')
+        for model in schema.models.values():
+            self.connection.execute(
+                'INSERT INTO models (name, delegate, table_name, has_tenant) VALUES (?, ?, ?, ?)',
+                (model.name, _delegate(model.name), table_name(model), int(model.has_field(TENANT_COLUMN))),
+            )
+            for key in model_index_keys(model):
+                cursor = self.connection.execute(
+                    'INSERT INTO indexes (model, kind, index_type, definition) VALUES (?, ?, ?, ?)',
+                    (model.name, key.kind, key.index_type, ' '.join(key.member.raw.split())),
+                )
+                self.connection.executemany(
+                    'INSERT INTO index_columns (index_id, position, name, direction) VALUES (?, ?, ?, ?)',
+                    [(cursor.lastrowid, position, name, direction)
+                     for position, (name, direction) in enumerate(key.columns or ())],
+                )
+
+    def _forget_route(self, path):
+        self.connection.execute(
+            'DELETE FROM call_columns WHERE call_id IN (SELECT id FROM calls WHERE path = ?)', (path,)
+        )
+        self.connection.execute('DELETE FROM calls WHERE path = ?', (path,))
+        self.connection.execute('DELETE FROM routes WHERE path = ?', (path,))
+
+    def _index_route(self, path, content):
+        self._forget_route(path)
+        shapes = {shape.position: shape for shape in extract_query_shapes(content, path)}
+        for handler in find_handlers(content):
+            self.connection.execute('INSERT OR IGNORE INTO routes (path, method) VALUES (?, ?)', (path, handler.method))
+            body = handler.body(content)
+            for call in _CALL_RE.finditer(body):
+                position = handler.body_start + call.start()
+                shape = shapes.get(position)
+                if shape is not None:
+                    tenant, unresolved = shape.tenant, shape.unresolved
+                else:
+                    # Opérations hors query_shapes (findUnique, create, update...): arguments bruts
+                    args_close = match_bracket(body, call.end() - 1)
+                    unresolved = args_close < 0
+                    tenant = not unresolved and _TENANT_ARGUMENT_RE.search(body[call.end():args_close]) is not None
+                cursor = self.connection.execute(
+                    'INSERT INTO calls (path, method, position, delegate, operation, tenant, unresolved) '
+                    'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                    (path, handler.method, position, call.group('delegate'), call.group('op'),
+                     int(tenant), int(unresolved)),
+                )
+                if shape is None:
+                    continue
+                columns = [('equals', name, None) for name in shape.equals]
+                if shape.tenant:
+                    columns.append(('equals', TENANT_COLUMN, None))
+                columns += [('range', name, None) for name in shape.ranges]
+                columns += [('order', name, direction) for name, direction in shape.order]
+                self.connection.executemany(
+                    'INSERT INTO call_columns (call_id, role, position, name, direction) VALUES (?, ?, ?, ?, ?)',
+                    [(cursor.lastrowid, role, position, name, direction)
+                     for position, (role, name, direction) in enumerate(columns)],
+                )
+
+    # --- Requêtes ----------------------------------------------------------
+
+    def query(self, sql, params=()):
+        return [dict(row) for row in self.connection.execute(sql, params)]
+
+    def routes_for_model(self, model):
+        """Endpoints qui appellent `model`, avec leurs opérations"""
+        return self.query(
+            f'SELECT endpoint, group_concat(DISTINCT operation) AS operations, count(*) AS calls '
+            f'FROM ({_CALLS_VIEW}) WHERE model = ? GROUP BY endpoint ORDER BY endpoint',
+            (model,),
+        )
+
+    def models_for_route(self, path):
+        return self.query(
+            f'SELECT method, model, operation, tenant FROM ({_CALLS_VIEW}) WHERE path = ? ORDER BY position',
+            (path,),
+        )
+
+    def tenant_models(self, has_tenant=True):
+        return self.query(
+            'SELECT name, table_name FROM models WHERE has_tenant = ? ORDER BY name', (int(has_tenant),)
+        )
+
+    def model_indexes(self, model):
+        return self.query(
+            "SELECT i.kind, i.index_type, i.definition, group_concat(c.name, ', ') AS columns "
+            'FROM indexes i LEFT JOIN index_columns c ON c.index_id = i.id '
+            'WHERE i.model = ? GROUP BY i.id ORDER BY i.id',
+            (model,),
+        )
+
+    def unscoped_calls(self, model=None):
+        """Appels sur un modèle à tenantId sans filtre tenant (where non résolu inclus)"""
+        sql = (
+            f'SELECT v.endpoint, v.model, v.operation, v.position, v.unresolved FROM ({_CALLS_VIEW}) v '
+            'JOIN models m ON m.name = v.model WHERE m.has_tenant = 1 AND v.tenant = 0'
+        )
+        params = ()
+        if model:
+            sql += ' AND v.model = ?'
+            params = (model,)
+        return self.query(sql + ' ORDER BY v.model, v.endpoint, v.position', params)
+
+    def unindexed_orders(self, model=None):
+        """
+        Tris sans index utilisable: aucun B-tree ne contient la colonne de
+        tri précédée uniquement de colonnes filtrées en égalité par l'appel
+        """
+        operations = ', '.join(f"'{operation}'" for operation in FILTER_OPERATIONS)
+        sql = f'''
+            SELECT v.model, o.name AS order_by, o.direction, v.endpoint, v.operation, v.position
+            FROM ({_CALLS_VIEW}) v
+            JOIN call_columns o ON o.call_id = v.id AND o.role = 'order'
+            WHERE v.operation IN ({operations})
+              AND o.position = (SELECT min(position) FROM call_columns WHERE call_id = v.id AND role = 'order')
+              AND NOT EXISTS (
+                SELECT 1 FROM indexes i JOIN index_columns ic ON ic.index_id = i.id
+                WHERE i.model = v.model AND i.index_type IS NULL AND ic.name = o.name
+                  AND NOT EXISTS (
+                    SELECT 1 FROM index_columns prev
+                    WHERE prev.index_id = i.id AND prev.position < ic.position
+                      AND prev.name NOT IN (
+                        SELECT name FROM call_columns WHERE call_id = v.id AND role = 'equals'
+                      )
+                  )
+              )
+        '''
+        params = ()
+        if model:
+            sql += ' AND v.model = ?'
+            params = (model,)
+        return self.query(sql + ' ORDER BY v.model, o.name, v.endpoint', params)
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Cache incrémental des codemods (manifest chemin → hash du contenu)
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Chaque entrée mémorise la taille, le mtime, le hash du fichier APRÈS le
+dernier passage et la version des règles de transformation. Un fichier dont
+le stat (ou à défaut le hash) et la version n'ont pas bougé est ignoré sans
+relancer les regex. Changer le code des règles (ou d'un module local
+qu'elles importent, ou des données qu'elles lisent : schema Prisma, pages
+client) change la version et invalide tout le manifest.
+"""
+
+import ast
+import hashlib
+import json
+import os
+
+MANIFEST_FORMAT = 1
+
+
+def content_digest(data):
+    """Hash court du contenu binaire d'un fichier"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _module_file(directory, dotted):
+    """Fichier d'un module local (`a.b` → a/b.py ou a/b/__init__.py), None sinon"""
+    base = os.path.join(directory, *dotted.split('.'))
+    for candidate in (base + '.py', os.path.join(base, '__init__.py')):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def _local_imports(path, root):
+    """Modules locaux importés par un fichier source (relatifs à root ou à son paquet)"""
+    with open(path, 'rb') as f:
+        tree = ast.parse(f.read(), filename=path)
+    found = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            found += [_module_file(root, alias.name) for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            directory = root
+            if node.level:
+                directory = os.path.dirname(path)
+                for _ in range(node.level - 1):
+                    directory = os.path.dirname(directory)
+            module = node.module or ''
+            package = os.path.join(directory, *module.split('.')) if module else directory
+            if module:
+                found.append(_module_file(directory, module))
+            # `from paquet import module`
+            found += [_module_file(package, alias.name) for alias in node.names]
+    return [found_path for found_path in found if found_path is not None]
+
+
+def imported_sources(*source_paths, root=None, shallow=()):
+    """
+    Fichiers source donnés et, récursivement, les modules locaux (sous
+    `root`, par défaut le dossier du premier fichier) qu'ils importent.
+    Les imports d'un fichier de `shallow` (registre qui importe toutes les
+    passes) ne sont pas suivis.
+    """
+    root = root or os.path.dirname(os.path.abspath(source_paths[0]))
+    shallow = {os.path.abspath(path) for path in shallow}
+    seen = []
+    pending = [os.path.abspath(path) for path in source_paths]
+    while pending:
+        path = pending.pop(0)
+        if path in seen:
+            continue
+        seen.append(path)
+        if path not in shallow:
+            pending += [os.path.abspath(found) for found in _local_imports(path, root)]
+    return sorted(seen)
+
+
+def transform_version(*source_paths, extra='', inputs=()):
+    """
+    Version des règles: hash des fichiers source qui les définissent et des
+    fichiers de données qu'elles lisent (`inputs`, absents compris)
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(str(MANIFEST_FORMAT).encode())
+    for path in source_paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    for path in inputs:
+        digest.update(path.encode())
+        if os.path.isfile(path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+    digest.update(extra.encode())
+    return digest.hexdigest()
+
+
+def stat_key(path):
+    st = os.stat(path)
+    return st.st_size, st.st_mtime_ns
+
+
+class CodemodManifest:
+    """Manifest JSON persistant, chargé et sauvegardé par le process principal"""
+
+    def __init__(self, path, version):
+        self.path = path
+        self.version = version
+        self.entries = {}
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path, version):
+        manifest = cls(path, version)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+        # Règles modifiées: on repart de zéro
+        if data.get('version') == version:
+            manifest.entries = data.get('files', {})
+        else:
+            manifest.dirty = True
+        return manifest
+
+    def get(self, file_path):
+        return self.entries.get(file_path)
+
+    def update(self, file_path, entry):
+        if entry is None:
+            if self.entries.pop(file_path, None) is not None:
+                self.dirty = True
+        elif self.entries.get(file_path) != entry:
+            self.entries[file_path] = entry
+            self.dirty = True
+
+    def save(self):
+        if not self.dirty:
+            return False
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': self.version, 'files': self.entries}, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+        return True
+
+
+def cached_result(file_path, entry, version):
+    """
+    Résultat mémorisé si le fichier n'a pas changé depuis le dernier passage.
+    Retourne (hit, entrée à jour, contenu binaire lu ou None).
+    """
+    if entry is None or entry.get('version') != version:
+        return False, None, None
+    size, mtime_ns = stat_key(file_path)
+    if entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+        return True, entry, None
+    with open(file_path, 'rb') as f:
+        data = f.read()
+    if entry['size'] == len(data) and content_digest(data) == entry['hash']:
+        # Fichier touché mais contenu identique: on rafraîchit seulement le stat
+        return True, dict(entry, mtime_ns=mtime_ns), data
+    return False, None, data
+
+
+def make_entry(file_path, result, version, data=None):
+    """Entrée de manifest pour l'état actuel du fichier"""
+    if data is None:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    size, mtime_ns = stat_key(file_path)
+    return {
+        'size': size,
+        'mtime_ns': mtime_ns,
+        'hash': content_digest(data),
+        'version': version,
+        'result': result,
+    }
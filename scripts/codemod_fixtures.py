@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Fixtures synthétiques pour mesurer les codemods à grande échelle
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Les fixtures sont calquées sur les vrais fichiers du dépôt :
+
+    - schema : les modèles de prisma/schema.prisma sont recopiés par
+      "tours" (Product, Product2, Product3...), relations renommées dans
+      chaque tour pour garder un schema cohérent ;
+    - routes : les route.ts de src/app/api sont recopiés sous
+      <racine>/src/app/api/c1/, c2/... jusqu'au nombre de handlers demandé
+      (les passes qui ont besoin de l'URL de la route la retrouvent).
+
+Usage:
+    from codemod_fixtures import synthetic_schema, synthetic_routes
+
+    text = synthetic_schema(1000)
+    files, handlers = synthetic_routes('/tmp/routes', 5000)   # /tmp/routes/src/app/api/c1/...
+"""
+
+import os
+
+from prisma_schema import Block, Schema, load_schema, parse_member
+from route_analysis import API_ROOT, discover_routes, find_handlers
+
+SCHEMA_PATH = 'prisma/schema.prisma'
+
+
+def _renamed_model(model, suffix, model_names):
+    """Copie d'un modèle avec son nom et ses types de relation suffixés"""
+    members = []
+    for member in model.members:
+        if member.kind == 'field' and member.type in model_names:
+            member = member.with_type(member.type + suffix)
+        members.append(parse_member(member.render(), 'model'))
+    header = model.header.replace(model.name, model.name + suffix, 1)
+    return Block('model', model.name + suffix, header, members, model.footer)
+
+
+def synthetic_schema(models, template_path=SCHEMA_PATH):
+    """Schema de `models` modèles construit à partir du schema réel"""
+    template = load_schema(template_path)
+    real_models = template.blocks('model')
+    model_names = {model.name for model in real_models}
+
+    items = []
+    for item in template.items:
+        # Trivia, datasource, generator et enums conservés tels quels
+        if isinstance(item, str) or item.kind != 'model':
+            items.append(item)
+    count = 0
+    round_number = 1
+    while count < models:
+        suffix = '' if round_number == 1 else str(round_number)
+        for model in real_models:
+            if count >= models:
+                break
+            block = model if not suffix else _renamed_model(model, suffix, model_names)
+            items.extend([block, '\n\n'])
+            count += 1
+        round_number += 1
+    return Schema(items).render()
+
+
+def synthetic_api_root(root):
+    """Racine des route.ts synthétiques de `root` (même chemin que src/app/api)"""
+    return os.path.join(root, 'src', 'app', 'api')
+
+
+def synthetic_routes(root, handlers, template_root=API_ROOT):
+    """
+    Recopie les route.ts réels sous `root`/src/app/api jusqu'à `handlers`
+    handlers. Retourne (liste des fichiers écrits, nombre de handlers).
+    """
+    templates = []
+    for path in discover_routes(template_root):
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        count = len(find_handlers(content))
+        if count:
+            templates.append((os.path.relpath(path, template_root), content, count))
+    if not templates:
+        raise ValueError(f'Aucun handler modèle sous {template_root}')
+
+    files = []
+    total = 0
+    round_number = 1
+    while total < handlers:
+        for relative, content, count in templates:
+            if total >= handlers:
+                break
+            path = os.path.join(synthetic_api_root(root), f'c{round_number}', relative)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(content)
+            files.append(path.replace(os.sep, '/'))
+            total += count
+        round_number += 1
+    return files, total
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Détecteur de requêtes N+1 dans les routes API
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Repère les appels Prisma exécutés dans une boucle (for, while, `.map(async`)
+de src/app/api/**/route.ts et les classe par nombre de requêtes estimé par
+appel du handler : fan-out de la boucle × appels dans le corps, compté
+double quand les await sont séquentiels (latence cumulée).
+
+Avec --fix, les cas mécaniques (lookup par clé unique ou count par élément)
+sont réécrits par la passe batch-lookups : un findMany/groupBy `in` avant
+la boucle + une Map. Les upserts, les boucles while et les where qui
+dépendent de l'élément au-delà de la clé restent signalés, sans réécriture.
+
+Usage:
+    python3 scripts/detect-n-plus-one.py
+    python3 scripts/detect-n-plus-one.py --json n-plus-one.json
+    python3 scripts/detect-n-plus-one.py --fix
+"""
+
+import argparse
+import json
+import sys
+
+from api_codemods import batch_lookups
+from loop_queries import find_loop_queries
+from route_analysis import API_ROOT, discover_routes
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Détecte les requêtes Prisma exécutées dans une boucle (N+1)")
+    parser.add_argument("--root", default=API_ROOT, help="racine des route.ts")
+    parser.add_argument("--json", dest="json_path", help="exporter les détections en JSON")
+    parser.add_argument("--fix", action="store_true",
+                        help="réécrire les cas mécaniques (passe batch-lookups)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("🔍 Recherche des requêtes Prisma dans des boucles...\n")
+
+    findings = []
+    routes = discover_routes(args.root)
+    for path in routes:
+        with open(path, 'r', encoding='utf-8') as f:
+            findings.extend(find_loop_queries(f.read(), path))
+    findings.sort(key=lambda finding: (-finding.score, finding.route, finding.line))
+
+    print(f"📋 {len(routes)} route.ts analysé(s)")
+    print("\n" + "="*60)
+    print(f"📊 BOUCLES AVEC REQUÊTES: {len(findings)}")
+    for rank, finding in enumerate(findings, 1):
+        loop = finding.loop
+        mode = 'séquentiel' if loop.sequential else 'parallèle'
+        print(f"\n{rank:3}. {finding.route}:{finding.line} ({finding.method})")
+        print(f"     {loop.kind} sur {loop.collection or '?'} → fan-out {finding.fan_out_label} "
+              f"({finding.fan_out_source}), {mode}, score {finding.score}")
+        for delegate, op in finding.calls:
+            print(f"       - prisma.{delegate}.{op}")
+    print("="*60)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump([
+                {
+                    'route': finding.route,
+                    'method': finding.method,
+                    'line': finding.line,
+                    'loop': finding.loop.kind,
+                    'collection': finding.collection,
+                    'fan_out': finding.fan_out,
+                    'fan_out_source': finding.fan_out_source,
+                    'sequential': finding.loop.sequential,
+                    'calls': [f'{delegate}.{op}' for delegate, op in finding.calls],
+                    'score': finding.score,
+                } for finding in findings
+            ], f, indent=2, ensure_ascii=False)
+        print(f"💾 Détections exportées: {args.json_path}")
+
+    if args.fix and findings:
+        reports = []
+        for path in sorted({finding.route for finding in findings}):
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            new_content, report = batch_lookups.apply(content, path)
+            if report:
+                reports.append((path, report))
+            if new_content != content:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(new_content)
+        print("\n🔧 Passe batch-lookups:")
+        for line in batch_lookups.summarize(reports) or ["   Aucune boucle réécrivable"]:
+            print(line)
+        print("\n📋 Prochaine étape:")
+        print("   npx tsc --noEmit && relire le diff (git diff src/app/api)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
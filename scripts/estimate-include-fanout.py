@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Estimateur de fan-out des include Prisma et du volume chargé par route
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Lit l'arbre include / select de chaque appel Prisma des route.ts, le
+résout sur les cardinalités de relation du schema et estime, par requête
+HTTP, les lignes et les octets chargés (voir scripts/include_fanout.py).
+Les routes les plus lourdes sont classées avec leurs suggestions : select
+sans colonnes lourdes, take, requête séparée pour un to-many imbriqué,
+_count quand seule la taille est lue.
+
+Statistiques de table, par ordre de préférence :
+    --from-db            pg_class.reltuples + pg_stats.avg_width (psql)
+    --row-counts FICHIER JSON {modèle: lignes} ou celui écrit par --save-stats
+    défaut               lignes du jeu synthétique (synthetic_dataset)
+
+Usage:
+    python3 scripts/estimate-include-fanout.py
+    python3 scripts/estimate-include-fanout.py --from-db --save-stats .cache/table-stats.json
+    python3 scripts/estimate-include-fanout.py --row-counts .cache/table-stats.json --check
+"""
+
+import argparse
+import json
+import sys
+from collections import defaultdict
+
+from include_fanout import RowStats, estimate_calls, render_tree
+from prisma_schema import load_schema
+from query_plans import PSQL_COMMAND
+from route_analysis import API_ROOT, discover_routes
+from synthetic_dataset import DEFAULT_ROWS, DEFAULT_TENANTS
+
+SCHEMA_PATH = 'prisma/schema.prisma'
+MAX_BYTES = 1024 * 1024
+MAX_ROWS = 10000
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Estime le fan-out des include Prisma et le volume chargé par route")
+    parser.add_argument('--schema', default=SCHEMA_PATH, help=f'schema Prisma (défaut: {SCHEMA_PATH})')
+    parser.add_argument('--root', default=API_ROOT, help=f'racine des route.ts (défaut: {API_ROOT})')
+    parser.add_argument('--row-counts', help='statistiques JSON {modèle: lignes} ou {modèle: {rows, columns}}')
+    parser.add_argument('--from-db', action='store_true', help='lire reltuples / avg_width dans la base (psql)')
+    parser.add_argument('--psql', default=PSQL_COMMAND, help=f'commande psql (défaut: {PSQL_COMMAND})')
+    parser.add_argument('--save-stats', help='enregistrer les statistiques lues par --from-db')
+    parser.add_argument('--rows', type=int, default=DEFAULT_ROWS,
+                        help=f'lignes d\'un modèle sans statistique (défaut: {DEFAULT_ROWS})')
+    parser.add_argument('--tenants', type=int, default=DEFAULT_TENANTS,
+                        help=f'tenants si Tenant n\'a pas de statistique (défaut: {DEFAULT_TENANTS})')
+    parser.add_argument('--max-bytes', type=int, default=MAX_BYTES,
+                        help=f'octets par requête au-delà desquels une route est signalée (défaut: {MAX_BYTES})')
+    parser.add_argument('--max-rows', type=int, default=MAX_ROWS,
+                        help=f'lignes par requête au-delà desquelles une route est signalée (défaut: {MAX_ROWS})')
+    parser.add_argument('--top', type=int, default=15, help='routes affichées (défaut: 15)')
+    parser.add_argument('--json', dest='json_path', help='exporter les estimations en JSON')
+    parser.add_argument('--check', action='store_true', help='code de sortie 1 si une route est signalée')
+    return parser.parse_args(argv)
+
+
+def _size(value):
+    for unit in ('o', 'Ko', 'Mo', 'Go'):
+        if value < 1024 or unit == 'Go':
+            return f'{value:,.0f} {unit}' if unit == 'o' else f'{value:,.1f} {unit}'
+        value /= 1024
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    schema = load_schema(args.schema)
+    defaults = {'default_rows': args.rows, 'default_tenants': args.tenants}
+    if args.from_db:
+        print("🔍 Lecture des statistiques de table (pg_class, pg_stats)...")
+        stats = RowStats.from_database(schema, args.psql, **defaults)
+        if args.save_stats:
+            stats.save(args.save_stats)
+            print(f"💾 Statistiques enregistrées: {args.save_stats}")
+    elif args.row_counts:
+        stats = RowStats.load(args.row_counts, **defaults)
+    else:
+        stats = RowStats(**defaults)
+    print(f"📋 {len(stats.row_counts)} modèle(s) avec statistiques, {stats.tenants:,} tenant(s)\n")
+
+    endpoints = defaultdict(list)
+    routes = discover_routes(args.root)
+    for path in routes:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        for call in estimate_calls(schema, stats, content, path):
+            endpoints[call.endpoint].append(call)
+
+    ranked = sorted(
+        endpoints.items(),
+        key=lambda item: -sum(call.bytes for call in item[1]),
+    )
+    flagged = [
+        (endpoint, calls) for endpoint, calls in ranked
+        if sum(call.bytes for call in calls) > args.max_bytes or sum(call.rows for call in calls) > args.max_rows
+    ]
+    nested = sum(1 for calls in endpoints.values() for call in calls if call.tree.children)
+    print(f"📋 {len(routes)} route.ts, {sum(map(len, endpoints.values()))} appel(s) qui renvoient des lignes, "
+          f"{nested} avec include / select de relation")
+
+    print("\n" + "="*60)
+    print(f"📊 ROUTES LES PLUS LOURDES (par requête HTTP), {len(flagged)} signalée(s)")
+    for rank, (endpoint, calls) in enumerate(ranked[:args.top], 1):
+        total_rows = sum(call.rows for call in calls)
+        total_bytes = sum(call.bytes for call in calls)
+        marker = '❌' if (endpoint, calls) in flagged else '  '
+        estimated = ' (statistiques par défaut)' if any(call.estimated for call in calls) else ''
+        print(f"\n{marker}{rank:3}. {endpoint}")
+        print(f"      ~{total_rows:,.0f} ligne(s), ~{_size(total_bytes)}{estimated}")
+        for call in sorted(calls, key=lambda c: -c.bytes):
+            if not call.tree.children and not call.suggestions:
+                continue
+            print(f"      {call.operation} ~{_size(call.bytes)}:")
+            for line in render_tree(call.tree, '        '):
+                print(line)
+            for advice in call.suggestions:
+                print(f"        💡 {advice}")
+    print("="*60)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump([
+                {
+                    'endpoint': endpoint,
+                    'rows': round(sum(call.rows for call in calls)),
+                    'bytes': round(sum(call.bytes for call in calls)),
+                    'flagged': (endpoint, calls) in flagged,
+                    'calls': [
+                        {
+                            'operation': call.operation,
+                            'model': call.tree.model.name,
+                            'rows': round(call.rows),
+                            'bytes': round(call.bytes),
+                            'depth': call.depth,
+                            'relations': [node.path for node in call.tree.walk() if node.parent is not None],
+                            'suggestions': call.suggestions,
+                            'defaultStats': call.estimated,
+                        } for call in calls
+                    ],
+                } for endpoint, calls in ranked
+            ], f, indent=2, ensure_ascii=False)
+        print(f"💾 Estimations exportées: {args.json_path}")
+
+    if args.check and flagged:
+        print(f"❌ {len(flagged)} route(s) au-delà de {_size(args.max_bytes)} ou {args.max_rows:,} lignes")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
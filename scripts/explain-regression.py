@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Suite de non-régression des plans de requêtes (EXPLAIN) multi-tenant
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Part du schema Prisma et des formes de requêtes des route.ts, charge un
+jeu de données multi-tenant synthétique dans la base du docker-compose
+(schéma isolé `explain_regression`, la base de dev n'est pas touchée) puis
+exécute `EXPLAIN (ANALYZE, BUFFERS)` sur le SQL équivalent de chaque
+requête chaude (lecture scopée par tenant).
+
+Échec (code de sortie 1) quand une requête :
+    - passe par un parcours séquentiel ;
+    - lit plus de --max-buffers pages ou dépasse --max-ms ;
+    - avec --baseline, lit plus de --buffer-growth fois les pages de la
+      référence enregistrée par --update-baseline.
+
+Tout tourne hors ligne contre la base locale :
+
+    docker compose up -d db
+    python3 scripts/explain-regression.py
+    python3 scripts/explain-regression.py --schema prisma/schema-multi-tenant.prisma --skip-load
+    python3 scripts/explain-regression.py --baseline .cache/explain-baseline.json --update-baseline
+    python3 scripts/explain-regression.py --dry-run > explain.sql
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from prisma_schema import load_schema
+from query_plans import PSQL_COMMAND, explain_queries, explain_script, hot_queries, run_psql
+from query_shapes import extract_query_shapes
+from route_analysis import API_ROOT, discover_routes
+from synthetic_dataset import DEFAULT_ROWS, DEFAULT_TENANTS, dataset_sql
+
+SCHEMA_PATH = 'prisma/schema.prisma'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Vérifie par EXPLAIN que les requêtes tenant restent indexées")
+    parser.add_argument("--schema", default=SCHEMA_PATH, help=f"schema Prisma (défaut: {SCHEMA_PATH})")
+    parser.add_argument("--root", default=API_ROOT, help="racine des route.ts")
+    parser.add_argument("--psql", default=PSQL_COMMAND, help=f"commande psql (défaut: {PSQL_COMMAND})")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS, help="lignes par table")
+    parser.add_argument("--tenants", type=int, default=DEFAULT_TENANTS, help="nombre de tenants")
+    parser.add_argument("--skip-load", action="store_true", help="réutiliser le jeu de données déjà chargé")
+    parser.add_argument("--max-buffers", type=int, default=1000, help="pages lues max par requête")
+    parser.add_argument("--max-ms", type=float, default=100.0, help="temps d'exécution max par requête (ms)")
+    parser.add_argument("--baseline", help="plans de référence (JSON) pour détecter les régressions")
+    parser.add_argument("--update-baseline", action="store_true", help="enregistrer les plans comme référence")
+    parser.add_argument("--buffer-growth", type=float, default=1.5,
+                        help="facteur de pages lues toléré par rapport à la référence")
+    parser.add_argument("--json", dest="json_path", help="exporter les plans résumés en JSON")
+    parser.add_argument("--dry-run", action="store_true", help="afficher le SQL sans l'exécuter")
+    return parser.parse_args(argv)
+
+
+def load_baseline(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return {entry['sql']: entry for entry in json.load(f)}
+
+
+def report_entries(queries, failures):
+    return [
+        {
+            'model': query.model,
+            'operation': query.operation,
+            'sql': query.sql,
+            'routes': sorted(query.endpoints),
+            'access_paths': query.summary.access_paths,
+            'buffers': query.summary.buffers,
+            'execution_ms': round(query.summary.execution_ms, 3),
+            'failures': failures.get(query.sql, []),
+        } for query in queries
+    ]
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    # --dry-run: seul le SQL sort sur stdout (redirigeable vers un fichier)
+    log = sys.stderr if args.dry_run else sys.stdout
+    print("🔍 Extraction des requêtes des routes API...\n", file=log)
+
+    schema = load_schema(args.schema)
+    shapes = []
+    routes = discover_routes(args.root)
+    for path in routes:
+        with open(path, 'r', encoding='utf-8') as f:
+            shapes.extend(extract_query_shapes(f.read(), path))
+    queries = hot_queries(schema, shapes, args.tenants)
+    models = sorted({query.model for query in queries})
+    print(f"📋 {len(routes)} route.ts, {len(shapes)} requêtes filtrantes, "
+          f"{len(queries)} requête(s) chaude(s) sur {len(models)} modèle(s)", file=log)
+
+    load = dataset_sql(schema, models, args.rows, args.tenants)
+    if args.dry_run:
+        print(load + explain_script(queries))
+        return 0
+
+    try:
+        if not args.skip_load:
+            print(f"🔧 Chargement: {len(models)} table(s) × {args.rows} lignes, {args.tenants} tenants...")
+            run_psql(args.psql, load)
+        print(f"🔧 EXPLAIN (ANALYZE, BUFFERS) de {len(queries)} requête(s)...")
+        explain_queries(args.psql, queries)
+    except FileNotFoundError as e:
+        print(f"❌ Commande psql introuvable ({e.filename}): docker compose up -d db, ou --psql")
+        return 2
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Erreur psql: {e.stderr.strip()}")
+        return 2
+
+    baseline = load_baseline(args.baseline)
+    failures = {}
+    for query in queries:
+        reasons = query.failures(args.max_buffers, args.max_ms)
+        reference = baseline.get(query.sql)
+        if reference and query.summary.buffers > reference['buffers'] * args.buffer_growth:
+            reasons.append(f"{query.summary.buffers} pages lues (référence: {reference['buffers']})")
+        if reasons:
+            failures[query.sql] = reasons
+
+    print("\n" + "="*60)
+    print(f"📊 PLANS: {len(queries) - len(failures)} OK, {len(failures)} en échec")
+    for query in queries:
+        summary = query.summary
+        status = '❌' if query.sql in failures else '✅'
+        print(f"\n{status} {query.model}.{query.operation}: {summary.buffers} pages, "
+              f"{summary.execution_ms:.2f} ms, {' → '.join(summary.access_paths) or 'aucune table lue'}")
+        print(f"     {query.sql}")
+        for reason in failures.get(query.sql, []):
+            print(f"     ⚠️  {reason}")
+        for endpoint in sorted(query.endpoints):
+            print(f"       - {endpoint}")
+    print("="*60)
+
+    entries = report_entries(queries, failures)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+        print(f"💾 Plans exportés: {args.json_path}")
+    if args.baseline and args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+        print(f"💾 Référence enregistrée: {args.baseline}")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Générateur d'agrégats journaliers par tenant pour les tableaux de bord
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Relève dans les routes /api/admin/stats* les groupBy / count / findMany
+scopés par tenant et filtrés par intervalle de dates, puis génère (voir
+scripts/stats_rollups.py) :
+
+    - les modèles Prisma `<Modèle>DailyRollup` et `RollupDirtyDay` ;
+    - le SQL compagnon (triggers de marquage, rafraîchissement incrémental
+      kairo_refresh_daily_rollups, backfill) et la migration Prisma qui le
+      livre (prisma/migrations/<horodatage>_stats_daily_rollups, backfill
+      calculé) : `prisma migrate deploy` AVANT de déployer les routes
+      réécrites, sinon elles lisent des tables absentes ;
+    - avec --rewrite, la réécriture des handlers (passe rollup-reads) :
+      les agrégats d'une période lisent les lignes (tenant, jour) au lieu
+      de toutes les lignes brutes.
+
+Usage:
+    python3 scripts/generate-rollups.py
+    python3 scripts/generate-rollups.py --write --rewrite
+    python3 scripts/generate-rollups.py --schema prisma/schema-multi-tenant.prisma --write
+"""
+
+import argparse
+import glob
+import json
+import os
+import sys
+from datetime import datetime, timezone
+
+from api_codemods import rollup_reads
+from prisma_schema import load_schema
+from route_analysis import API_ROOT, discover_routes
+from stats_rollups import (
+    MIGRATION_NAME, REFRESH_FUNCTION, add_rollup_models, discover_rollups, render_rollup_migration, render_rollup_sql,
+)
+
+SCHEMA_PATH = 'prisma/schema.prisma'
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Agrégats journaliers par tenant des routes de statistiques")
+    parser.add_argument('--schema', default=SCHEMA_PATH, help=f'schema Prisma (défaut: {SCHEMA_PATH})')
+    parser.add_argument('--output', help='schema écrit par --write (défaut: --schema)')
+    parser.add_argument('--routes-root', default=API_ROOT, help=f'racine des route.ts (défaut: {API_ROOT})')
+    parser.add_argument('--sql-output', default='prisma/online-migrations/stats-rollups.sql',
+                        help='SQL compagnon (tables, triggers, rafraîchissement, backfill)')
+    parser.add_argument('--migrations-dir', default='prisma/migrations',
+                        help='dossier des migrations Prisma (migration <horodatage>_stats_daily_rollups)')
+    parser.add_argument('--lock-timeout', default='5s', help='lock_timeout des DDL (CREATE TRIGGER sur les sources)')
+    parser.add_argument('--write', action='store_true', help='écrire les modèles dans le schema et le SQL')
+    parser.add_argument('--rewrite', action='store_true',
+                        help='réécrire les handlers de statistiques pour lire les agrégats (implique --write)')
+    parser.add_argument('--json', dest='json_path', help='exporter les agrégats proposés en JSON')
+    return parser.parse_args(argv)
+
+
+def write_migration(migrations_dir, sql):
+    """
+    Nouvelle migration Prisma si le SQL diffère de la dernière migration des
+    agrégats (une migration appliquée ne se modifie pas) ; chemin, ou None
+    """
+    existing = sorted(glob.glob(os.path.join(migrations_dir, f'*_{MIGRATION_NAME}', 'migration.sql')))
+    if existing:
+        with open(existing[-1], 'r', encoding='utf-8') as f:
+            if f.read() == sql:
+                return None
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+    path = os.path.join(migrations_dir, f'{stamp}_{MIGRATION_NAME}', 'migration.sql')
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(sql)
+    return path
+
+
+def rewrite_routes(routes, schema_path):
+    """Applique la passe rollup-reads aux routes servies; [(route, Counter)]"""
+    reports = []
+    for path in routes:
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        updated, report = rollup_reads.apply(content, path, schema_path)
+        if updated != content:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(updated)
+        if report:
+            reports.append((path, report))
+    return reports
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("🔍 Analyse des routes de statistiques...\n")
+
+    schema = load_schema(args.schema)
+    specs = list(discover_rollups(schema, discover_routes(args.routes_root)).values())
+    specs.sort(key=lambda spec: spec.name)
+
+    print("="*60)
+    print(f"📊 AGRÉGATS JOURNALIERS: {len(specs)}")
+    for spec in specs:
+        print(f"\n   {spec.name} ({spec.model.name}.{spec.date_field}, {spec.queries} requête(s))")
+        print(f"     dimensions: {', '.join(spec.dimensions) or '-'}")
+        if spec.sums:
+            print(f"     sommes: {', '.join(spec.sums)}")
+        for endpoint in sorted(spec.endpoints):
+            print(f"       - {endpoint}")
+    print("="*60)
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump([
+                {
+                    'rollup': spec.name,
+                    'model': spec.model.name,
+                    'dateField': spec.date_field,
+                    'dimensions': spec.dimensions,
+                    'sums': spec.sums,
+                    'routes': sorted(spec.endpoints),
+                } for spec in specs
+            ], f, indent=2, ensure_ascii=False)
+        print(f"💾 Agrégats exportés: {args.json_path}")
+
+    if not specs:
+        print("\n✅ Aucune requête de statistiques par période à agréger")
+        return 0
+    if not (args.write or args.rewrite):
+        print("\n📋 Relancer avec --write --rewrite pour générer modèles, SQL et handlers")
+        return 0
+
+    written = add_rollup_models(schema, specs)
+    output = args.output or args.schema
+    with open(output, 'w', encoding='utf-8') as f:
+        f.write(schema.render())
+    print(f"\n✅ {len(written)} modèle(s) écrit(s) dans {output}: {', '.join(written)}")
+
+    sql_dir = os.path.dirname(args.sql_output)
+    if sql_dir:
+        os.makedirs(sql_dir, exist_ok=True)
+    with open(args.sql_output, 'w', encoding='utf-8') as f:
+        f.write(render_rollup_sql(schema, specs, path=args.sql_output, lock_timeout=args.lock_timeout))
+    print(f"✅ SQL compagnon: {args.sql_output}")
+    migration = write_migration(args.migrations_dir, render_rollup_migration(
+        schema, specs, path=args.sql_output, lock_timeout=args.lock_timeout,
+    ))
+    print(f"✅ Migration Prisma: {migration}" if migration else "✅ Migration Prisma déjà à jour")
+
+    if args.rewrite:
+        routes = sorted({endpoint.split(' ', 1)[1] for spec in specs for endpoint in spec.endpoints})
+        lines = rollup_reads.summarize(rewrite_routes(routes, output))
+        print(f"\n🔧 Handlers réécrits (passe {rollup_reads.NAME}):")
+        for line in lines:
+            print(line)
+
+    print("\n📋 Prochaines étapes:")
+    print("   npx prisma format && npx prisma migrate deploy   # tables, triggers, backfill calculé")
+    print("   puis seulement déployer les routes réécrites")
+    print(f"   npm run rollups:refresh   # tâche planifiée ({REFRESH_FUNCTION}): jours marqués de tous les tenants")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Générateur de jeu de données multi-tenant volumineux (fichiers COPY)
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Lit le schema produit par add-multi-tenant-to-schema-v2.py et écrit, pour
+Tenant, TenantUser et les modèles de MODELS_TO_ADD_TENANT_ID (plus leurs
+parents obligatoires, ex. Template), un fichier au format COPY texte de
+PostgreSQL :
+
+    - des milliers de tenants, lignes réparties selon une loi de Zipf
+      (quelques gros tenants, une longue traîne de petits) ;
+    - clés étrangères cohérentes (Order → OrderItem, Tenant → TenantUser),
+      toujours vers une ligne du même tenant ;
+    - flux ligne à ligne, mémoire constante quel que soit le volume ;
+    - déterministe: même --seed, mêmes fichiers (un modèle par process
+      avec --jobs).
+
+Un load.sql charge les fichiers dans l'ordre des clés étrangères, dans une
+base créée par `prisma db push --schema prisma/schema-multi-tenant.prisma`.
+
+Usage:
+    python3 scripts/generate-tenant-dataset.py --tenants 5000 --rows 2000000 --jobs 8
+    cd .cache/tenant-dataset && psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f load.sql
+"""
+
+import argparse
+import gzip
+import importlib.util
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from online_migration import quote, table_name
+from prisma_schema import load_schema
+from synthetic_dataset import (
+    DEFAULT_GLOBAL_ROWS, DEFAULT_ZIPF, TENANT_MODEL, copy_columns, plan_dataset, stream_copy,
+)
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCHEMA_PATH = 'prisma/schema-multi-tenant.prisma'
+OUTPUT_DIR = '.cache/tenant-dataset'
+
+
+def _load_script(name, filename):
+    """Importe un script à tiret (add-multi-tenant-...)"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def default_models():
+    v2 = _load_script('add_multi_tenant_v2', 'add-multi-tenant-to-schema-v2.py')
+    return [TENANT_MODEL, 'TenantUser'] + list(v2.MODELS_TO_ADD_TENANT_ID)
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Génère des fichiers COPY multi-tenant (Zipf, FK cohérentes)")
+    parser.add_argument("--schema", default=SCHEMA_PATH, help=f"schema Prisma (défaut: {SCHEMA_PATH})")
+    parser.add_argument("--output", default=OUTPUT_DIR, help=f"dossier de sortie (défaut: {OUTPUT_DIR})")
+    parser.add_argument("--tenants", type=int, default=2000, help="nombre de tenants")
+    parser.add_argument("--rows", type=int, default=200000, help="lignes par modèle (tous tenants)")
+    parser.add_argument("--zipf", type=float, default=DEFAULT_ZIPF, help="exposant de la loi de Zipf")
+    parser.add_argument("--global-rows", type=int, default=DEFAULT_GLOBAL_ROWS,
+                        help="lignes des modèles sans tenant (Template...)")
+    parser.add_argument("--models", help="modèles à générer, séparés par des virgules (défaut: liste v2)")
+    parser.add_argument("--seed", type=int, default=42, help="graine (sortie reproductible)")
+    parser.add_argument("--gzip", action="store_true", help="fichiers .copy.gz (load.sql décompresse)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="process parallèles (un modèle par process)")
+    return parser.parse_args(argv)
+
+
+def _copy_path(output, plan, compress):
+    return os.path.join(output, f'{plan.name}.copy' + ('.gz' if compress else ''))
+
+
+def write_model(job):
+    """Génère le fichier COPY d'un modèle (exécuté dans un process du pool)"""
+    schema_path, settings, name, output, compress = job
+    schema = load_schema(schema_path)
+    plans = {plan.name: plan for plan in plan_dataset(schema, *settings)}
+    plan = plans[name]
+    path = _copy_path(output, plan, compress)
+    started = time.perf_counter()
+    opener = gzip.open if compress else open
+    with opener(path, 'wt', encoding='utf-8', newline='\n') as out:
+        rows = stream_copy(schema, plan, out, seed=settings[-1])
+    return name, rows, os.path.getsize(path), time.perf_counter() - started
+
+
+def render_load_sql(plans, args):
+    lines = [
+        f'-- Jeu de données synthétique: {args.tenants} tenants, Zipf {args.zipf:g}, seed {args.seed}',
+        '-- Généré par scripts/generate-tenant-dataset.py, ordre des clés étrangères',
+        '\\set ON_ERROR_STOP on',
+    ]
+    for plan in plans:
+        filename = os.path.basename(_copy_path('', plan, args.gzip))
+        source = f"PROGRAM 'gzip -dc {filename}'" if args.gzip else f"'{filename}'"
+        lines.append(f'\\copy {quote(table_name(plan.model))} ({copy_columns(plan)}) FROM {source}')
+    lines += [f'ANALYZE {quote(table_name(plan.model))};' for plan in plans]
+    return '\n'.join(lines) + '\n'
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    print("🔧 Génération du jeu de données multi-tenant...\n")
+
+    schema = load_schema(args.schema)
+    names = [name.strip() for name in args.models.split(',')] if args.models else default_models()
+    missing = [name for name in names if schema.model(name) is None]
+    if missing:
+        print(f"❌ Modèle(s) absent(s) de {args.schema}: {', '.join(missing)}")
+        print("   Générez d'abord le schema: python3 scripts/add-multi-tenant-to-schema-v2.py")
+        return 1
+
+    settings = (names, args.rows, args.tenants, args.zipf, args.global_rows, args.seed)
+    plans = plan_dataset(schema, *settings)
+    total = sum(plan.total for plan in plans)
+    largest = max(plan.counts[0] for plan in plans if plan.scoped and plan.name != TENANT_MODEL)
+    print(f"📋 {len(plans)} modèle(s), {args.tenants} tenants, {total:,} lignes prévues "
+          f"(plus gros tenant: {largest:,} lignes par modèle)")
+
+    os.makedirs(args.output, exist_ok=True)
+    jobs = [(args.schema, settings, plan.name, args.output, args.gzip) for plan in plans]
+    started = time.perf_counter()
+    if args.jobs > 1:
+        with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+            results = list(pool.map(write_model, jobs))
+    else:
+        results = [write_model(job) for job in jobs]
+    elapsed = time.perf_counter() - started
+
+    print("\n" + "="*60)
+    print("📊 FICHIERS COPY:")
+    for name, rows, size, seconds in results:
+        print(f"   {name:28} {rows:>12,} lignes  {size / 1e6:>9.1f} Mo  {seconds:6.1f} s")
+    written = sum(rows for _, rows, _, _ in results)
+    print(f"\n   Total: {written:,} lignes en {elapsed:.1f} s ({written / max(elapsed, 1e-9):,.0f} lignes/s)")
+    print("="*60)
+
+    load_path = os.path.join(args.output, 'load.sql')
+    with open(load_path, 'w', encoding='utf-8') as f:
+        f.write(render_load_sql(plans, args))
+    print(f"💾 Script de chargement: {load_path}")
+    print("\n📋 Prochaine étape:")
+    print(f'   cd {args.output} && psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f load.sql')
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+"""
+Estimation du fan-out des include / select Prisma et du volume chargé
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Chaque appel Prisma qui renvoie des lignes (findMany, findFirst, create...)
+est lu comme un arbre : le modèle racine puis, par `include` / `select`,
+les relations chargées avec leur projection (ligne complète ou champs
+sélectionnés), leur `take` et leurs `_count`. Le schema donne la
+cardinalité de chaque relation (liste = to-many) ; les statistiques de
+table (RowStats) donnent le nombre de lignes et la largeur des colonnes :
+
+    lignes racine   findMany: lignes du modèle / tenants si le modèle a
+                    tenantId et l'appel est scopé (avant autres filtres),
+                    bornées par take ; findFirst / findUnique / écritures: 1
+    fan-out         to-many: lignes enfant / lignes parent (moyenne par
+                    parent), borné par take ; to-one: 1
+    octets          lignes × largeur de la projection (pg_stats.avg_width
+                    si connue, sinon largeur par type)
+
+Les valeurs sont des ordres de grandeur pour classer les routes, pas des
+mesures : les filtres autres que le tenant ne sont pas pris en compte
+(borne haute).
+
+Usage:
+    from include_fanout import RowStats, estimate_calls
+
+    stats = RowStats.load('.cache/table-stats.json')
+    for call in estimate_calls(schema, stats, content, 'src/app/api/admin/commandes/route.ts'):
+        print(call.endpoint, call.rows, call.bytes, call.suggestions)
+"""
+
+import json
+import re
+
+from api_codemods.lean_select import heavy_fields
+from online_migration import column_name, table_name
+from query_plans import run_psql
+from query_shapes import _variable_literal
+from route_analysis import find_handlers, match_bracket, object_entries
+from synthetic_dataset import DEFAULT_ROWS, DEFAULT_TENANTS, TENANT_FIELD, TENANT_MODEL, column_fields
+
+# Opérations qui renvoient des lignes (et acceptent include / select)
+ROW_OPERATIONS = {
+    'findMany': 'many',
+    'findFirst': 'one',
+    'findFirstOrThrow': 'one',
+    'findUnique': 'one',
+    'findUniqueOrThrow': 'one',
+    'create': 'one',
+    'update': 'one',
+    'upsert': 'one',
+    'delete': 'one',
+}
+
+# Largeur moyenne (octets) d'une valeur sans statistique de colonne
+TYPE_WIDTHS = {
+    'String': 32, 'Int': 4, 'BigInt': 8, 'Float': 8, 'Decimal': 12, 'Boolean': 1,
+    'DateTime': 8, 'Json': 512, 'Bytes': 1024,
+}
+KEY_WIDTH = 36              # uuid / cuid en texte
+ENUM_WIDTH = 8
+HEAVY_WIDTH = 2048          # contenu long (lean_select.heavy_fields)
+LIST_ITEMS = 4
+COUNT_WIDTH = 8
+
+# Seuils des suggestions
+WIDE_ROW = 256              # octets: une projection plus large mérite un select
+FANOUT_TAKE = 50            # enfants par parent au-delà desquels on borne (take)
+SPLIT_ROWS = 1000           # lignes d'un to-many sous un to-many: requête séparée
+
+_CALL_RE = re.compile(
+    r'(?<![\w$.])(?:prisma|tx)\.(?P<delegate>\w+)\.(?P<op>' + '|'.join(ROW_OPERATIONS) + r')\('
+)
+_NUMBER_RE = re.compile(r'^\d+$')
+_STATS_QUERY = '''
+SELECT 'T', c.relname, GREATEST(c.reltuples, 0)::bigint
+FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = current_schema() AND c.relkind IN ('r', 'p');
+SELECT 'C', tablename, attname, avg_width FROM pg_stats WHERE schemaname = current_schema();
+'''
+
+
+class RowStats:
+    """Lignes par modèle et largeur moyenne par colonne (connues ou par défaut)"""
+
+    def __init__(self, rows=None, widths=None, default_rows=DEFAULT_ROWS, default_tenants=DEFAULT_TENANTS):
+        self.row_counts = rows or {}        # {modèle: lignes}
+        self.widths = widths or {}          # {modèle: {champ: octets}}
+        self.default_rows = default_rows
+        self.default_tenants = default_tenants
+
+    @classmethod
+    def load(cls, path, **defaults):
+        """
+        Fichier JSON {modèle: lignes} ou {modèle: {"rows": n, "columns": {champ: octets}}}
+        (celui écrit par save)
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        rows, widths = {}, {}
+        for model, value in data.items():
+            if isinstance(value, dict):
+                if 'rows' in value:
+                    rows[model] = int(value['rows'])
+                widths[model] = {name: int(width) for name, width in value.get('columns', {}).items()}
+            else:
+                rows[model] = int(value)
+        return cls(rows, widths, **defaults)
+
+    @classmethod
+    def from_database(cls, schema, command, **defaults):
+        """pg_class.reltuples et pg_stats.avg_width du schéma courant, via psql"""
+        models = {table_name(model): model for model in schema.models.values()}
+        rows, widths = {}, {}
+        for line in run_psql(command, _STATS_QUERY).splitlines():
+            parts = line.split('|')
+            model = models.get(parts[1]) if len(parts) > 2 else None
+            if model is None:
+                continue
+            if parts[0] == 'T':
+                rows[model.name] = int(parts[2])
+            elif parts[0] == 'C' and len(parts) == 4 and parts[3]:
+                field = next((f for f in model.fields if column_name(f) == parts[2]), None)
+                if field is not None:
+                    widths.setdefault(model.name, {})[field.name] = int(parts[3])
+        return cls(rows, widths, **defaults)
+
+    def save(self, path):
+        data = {
+            model: {'rows': self.row_counts.get(model), 'columns': self.widths.get(model, {})}
+            for model in sorted(set(self.row_counts) | set(self.widths))
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+    def known(self, model):
+        return model in self.row_counts
+
+    def rows(self, model):
+        if model in self.row_counts:
+            return self.row_counts[model]
+        return self.default_tenants if model == TENANT_MODEL else self.default_rows
+
+    @property
+    def tenants(self):
+        return max(self.rows(TENANT_MODEL), 1)
+
+    def width(self, schema, model, field):
+        known = self.widths.get(model.name, {}).get(field.name)
+        if known is not None:
+            return known
+        if field.name in heavy_fields(model):
+            width = HEAVY_WIDTH
+        elif field.type in schema.enums:
+            width = ENUM_WIDTH
+        elif field.type == 'String' and (field.name == 'id' or field.name.endswith('Id')):
+            width = KEY_WIDTH
+        else:
+            width = TYPE_WIDTHS.get(field.type, 16)
+        return width * LIST_ITEMS if field.is_list else width
+
+
+class IncludeNode:
+    """Modèle chargé par un appel : projection, relations incluses, _count"""
+
+    def __init__(self, model, relation=None, to_many=False, parent=None):
+        self.model = model
+        self.relation = relation        # champ relationnel du parent (None: racine)
+        self.to_many = to_many
+        self.parent = parent
+        self.fields = None              # None: ligne complète, sinon [champs]
+        self.children = []
+        self.counts = []
+        self.take = None
+        self.rows = 0.0                 # lignes chargées, tous parents confondus
+        self.fanout = 1.0
+        self.width = 0
+
+    @property
+    def path(self):
+        names = []
+        node = self
+        while node.parent is not None:
+            names.append(node.relation.name + ('[]' if node.to_many else ''))
+            node = node.parent
+        return '.'.join([node.model.name] + names[::-1])
+
+    @property
+    def many_ancestor(self):
+        node = self.parent
+        while node is not None:
+            if node.to_many:
+                return True
+            node = node.parent
+        return False
+
+    def walk(self):
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+def _literal(body, value, before):
+    """Objet littéral d'une valeur (identifiant résolu dans le handler), ou None"""
+    if value.startswith('{'):
+        return value
+    if re.fullmatch(r'[A-Za-z_$][\w$]*', value):
+        literal, _ = _variable_literal(body, value, before)
+        if literal and literal.startswith('{'):
+            return literal
+    return None
+
+
+def _take(entries):
+    value = entries.get('take', '')
+    return int(value) if _NUMBER_RE.match(value) else None
+
+
+def build_tree(schema, model, arguments, body='', before=0, relation=None, to_many=False, parent=None):
+    """Arbre include / select d'un appel (arguments: texte de l'objet `{ ... }`)"""
+    node = IncludeNode(model, relation, to_many, parent)
+    entries = dict(object_entries(arguments))
+    node.take = _take(entries)
+    for key in ('select', 'include'):
+        literal = _literal(body, entries.get(key, ''), before)
+        if literal is None:
+            continue
+        if key == 'select':
+            node.fields = []
+        for name, value in object_entries(literal):
+            field = model.field(name) if name else None
+            if name == '_count':
+                counted = _literal(body, value, before)
+                nested = dict(object_entries(counted or '')).get('select', '')
+                node.counts += [counted_name for counted_name, _ in object_entries(nested)] or ['*']
+                continue
+            if field is None or value == 'false':
+                continue
+            target = schema.model(field.type)
+            if target is None:
+                if node.fields is not None:
+                    node.fields.append(field)
+                continue
+            nested = _literal(body, value, before) or '{}'
+            node.children.append(build_tree(schema, target, nested, body, before, field, field.is_list, node))
+    return node
+
+
+def estimate_tree(schema, stats, root, root_rows):
+    """Renseigne lignes, fan-out et largeur de chaque nœud; retourne (lignes, octets)"""
+    total_rows = total_bytes = 0
+    for node in root.walk():
+        if node.parent is None:
+            node.rows = root_rows
+        else:
+            if node.to_many:
+                node.fanout = stats.rows(node.model.name) / max(stats.rows(node.parent.model.name), 1)
+                if node.take is not None:
+                    node.fanout = min(node.fanout, node.take)
+            node.rows = node.parent.rows * node.fanout
+        fields = node.fields if node.fields is not None else column_fields(schema, node.model)
+        node.width = sum(stats.width(schema, node.model, field) for field in fields)
+        node.width += COUNT_WIDTH * len(node.counts)
+        total_rows += node.rows
+        total_bytes += node.rows * node.width
+    return total_rows, total_bytes
+
+
+def _foreign_key(child, parent_model, relation):
+    """Champ clé étrangère de l'enfant vers le parent (relation to-many), ou None"""
+    name = relation.relation.argument('name', 0) if relation.relation else None
+    for field in child.fields:
+        if field.type != parent_model.name or not field.relation_fields:
+            continue
+        other = field.relation.argument('name', 0)
+        if name is None or other == name:
+            return field.relation_fields[0]
+    return None
+
+
+def suggestions(schema, root, body):
+    """Suggestions (select, take, requête séparée, _count) pour un arbre estimé"""
+    advice = []
+    for node in root.walk():
+        heavy = heavy_fields(node.model)
+        if node.fields is None and (heavy or node.width > WIDE_ROW):
+            dropped = f' (sans {", ".join(sorted(heavy))})' if heavy else ''
+            advice.append(f'select sur {node.path}: ligne complète ~{node.width} o{dropped}')
+        elif node.fields is not None and heavy:
+            selected = sorted(field.name for field in node.fields if field.name in heavy)
+            if selected:
+                advice.append(f'{node.path}: champs lourds sélectionnés ({", ".join(selected)})')
+        if not node.to_many:
+            continue
+        relation = node.relation.name
+        if not node.children and re.search(r'\.' + relation + r'\.length\b', body) and \
+                not re.search(r'\.' + relation + r'\b(?!\.length)', body):
+            advice.append(f'{node.path}: seule la taille est lue, `_count: {{ select: {{ {relation}: true }} }}`')
+        elif node.many_ancestor and node.rows > SPLIT_ROWS:
+            key = _foreign_key(node.model, node.parent.model, node.relation)
+            where = f'{{ {key}: {{ in: ids }} }}' if key else '{ ... in: ids }'
+            advice.append(
+                f'requête séparée pour {node.path} (~{node.rows:,.0f} lignes): '
+                f'prisma.{node.model.name[0].lower()}{node.model.name[1:]}.findMany({{ where: {where} }})'
+            )
+        elif node.take is None and node.fanout > FANOUT_TAKE:
+            advice.append(f'take / pagination sur {node.path} (~{node.fanout:,.0f} par {node.parent.model.name})')
+    return advice
+
+
+class CallEstimate:
+    """Estimation d'un appel Prisma d'un handler"""
+
+    def __init__(self, route, method, operation, tree, position):
+        self.route = route
+        self.method = method
+        self.operation = operation
+        self.tree = tree
+        self.position = position
+        self.rows = 0.0
+        self.bytes = 0.0
+        self.suggestions = []
+        self.estimated = False          # au moins un modèle sans statistique
+
+    @property
+    def endpoint(self):
+        return f'{self.method} {self.route}'
+
+    @property
+    def depth(self):
+        return max(len(node.path.split('.')) for node in self.tree.walk()) - 1
+
+
+def _tenant_scoped(body, entries, call_text, before):
+    """Filtre tenant dans l'appel ou dans le `where` passé par variable"""
+    where = entries.get('where', '')
+    if re.fullmatch(r'[A-Za-z_$][\w$]*', where):
+        literal, assignments = _variable_literal(body, where, before)
+        call_text += (literal or '') + ''.join(f'{key}: {value}' for key, value in assignments)
+    return re.search(r'\btenant(?:Filter|Id)\b', call_text) is not None
+
+
+def _root_rows(stats, model, operation, entries, scoped):
+    if ROW_OPERATIONS[operation] == 'one':
+        return 1
+    rows = stats.rows(model.name)
+    if model.has_field(TENANT_FIELD) and scoped:
+        rows /= stats.tenants
+    take = _take(entries)
+    return min(rows, take) if take is not None else rows
+
+
+def estimate_calls(schema, stats, content, route):
+    """Estimations des appels qui renvoient des lignes, pour tous les handlers d'un route.ts"""
+    estimates = []
+    for handler in find_handlers(content):
+        body = handler.body(content)
+        for call in _CALL_RE.finditer(body):
+            model = schema.model(call.group('delegate')[0].upper() + call.group('delegate')[1:])
+            close = match_bracket(body, call.end() - 1)
+            if model is None or close < 0:
+                continue
+            arguments = _literal(body, body[call.end():close].strip(), call.start()) or '{}'
+            tree = build_tree(schema, model, arguments, body, call.start())
+            estimate = CallEstimate(route, handler.method, call.group('op'), tree,
+                                    handler.body_start + call.start())
+            entries = dict(object_entries(arguments))
+            scoped = _tenant_scoped(body, entries, body[call.start():close], call.start())
+            root_rows = _root_rows(stats, model, call.group('op'), entries, scoped)
+            estimate.rows, estimate.bytes = estimate_tree(schema, stats, tree, root_rows)
+            estimate.estimated = any(not stats.known(node.model.name) for node in tree.walk())
+            estimate.suggestions = suggestions(schema, tree, body)
+            estimates.append(estimate)
+    return estimates
+
+
+def render_tree(node, indent='  '):
+    """Lignes `relation[] ~lignes × octets` de l'arbre, pour le rapport"""
+    name = node.model.name if node.parent is None else node.relation.name + ('[]' if node.to_many else '')
+    projection = 'ligne complète' if node.fields is None else f'{len(node.fields)} champ(s)'
+    lines = [f'{indent}{name} ~{node.rows:,.0f} × {node.width} o ({projection})']
+    for child in node.children:
+        lines += render_tree(child, indent + '  ')
+    return lines
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+"""
+Détection statique des requêtes Prisma exécutées dans une boucle (N+1)
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Repère dans chaque handler les boucles `for (... of X)`, `for (...;...;...)`,
+`while (...)` et les callbacks `X.map(async ...)` / `X.forEach(async ...)`,
+puis les appels `prisma.<delegate>.<op>(` de leur corps. Le fan-out (nombre
+d'itérations) est estimé à partir de la collection parcourue :
+
+    - tableau littéral        → sa taille
+    - résultat Prisma `take: N` → N
+    - findMany/groupBy sans take, corps de requête → non borné
+
+Usage:
+    from loop_queries import find_loop_queries
+
+    for finding in find_loop_queries(content, 'src/app/api/admin/stats-beaute/route.ts'):
+        print(finding.line, finding.collection, finding.fan_out_label, finding.calls)
+"""
+
+import re
+
+from route_analysis import array_items, find_handlers, match_bracket
+
+# Poids de classement quand le fan-out n'est pas connu
+UNBOUNDED_FAN_OUT = 100
+UNKNOWN_FAN_OUT = 10
+
+_PRISMA_CALL_RE = re.compile(r'\b(?:prisma|tx)\.(?P<delegate>\w+)\.(?P<op>\w+)\(')
+_FOR_RE = re.compile(r'\b(?P<keyword>for(?:\s+await)?|while)\s*\(')
+_CALLBACK_RE = re.compile(
+    r'(?P<collection>[\w$]+(?:\s*\.\s*[\w$]+)*)\s*\.\s*(?P<method>map|forEach|flatMap)\(\s*'
+    r'async\s*(?:\(\s*(?P<params>[^)]*)\)|(?P<param>\w+))\s*=>'
+)
+_FOR_OF_RE = re.compile(
+    r'^\s*(?:const|let|var)\s+(?P<var>\w+|\{[^}]*\}|\[[^\]]*\])\s+(?P<kind>of|in)\s+(?P<collection>.+?)\s*$',
+    re.DOTALL,
+)
+_TAKE_RE = re.compile(r'\btake\s*:\s*(?P<value>\d+)\b')
+
+
+class Loop:
+    """Boucle d'un handler : positions dans le corps, variable et collection"""
+
+    def __init__(self, kind, start, body_start, body_end, variable, collection, sequential):
+        self.kind = kind                # 'for-of' | 'for' | 'while' | 'map' | 'forEach' | 'flatMap'
+        self.start = start
+        self.body_start = body_start
+        self.body_end = body_end
+        self.variable = variable        # identifiant simple ou None (déstructuration)
+        self.collection = collection    # expression parcourue ou None
+        self.sequential = sequential    # await dans une boucle for: une requête après l'autre
+
+    def __repr__(self):
+        return f'Loop({self.kind} {self.variable} of {self.collection})'
+
+    def contains(self, position):
+        return self.body_start <= position < self.body_end
+
+
+class LoopQuery:
+    """Requêtes Prisma d'une boucle, avec le fan-out estimé"""
+
+    def __init__(self, route, method, line, loop, calls, fan_out, fan_out_source):
+        self.route = route
+        self.method = method
+        self.line = line
+        self.loop = loop
+        self.calls = calls              # [(delegate, op)]
+        self.fan_out = fan_out          # nombre d'itérations estimé, None si inconnu
+        self.fan_out_source = fan_out_source
+
+    def __repr__(self):
+        return f'LoopQuery({self.route}:{self.line}, {self.calls}, fan-out={self.fan_out_label})'
+
+    @property
+    def collection(self):
+        return self.loop.collection
+
+    @property
+    def fan_out_label(self):
+        if self.fan_out is not None:
+            return str(self.fan_out)
+        return '∞' if self.fan_out_source == 'unbounded' else '?'
+
+    @property
+    def score(self):
+        """Requêtes estimées par appel du handler (séquentiel = latence cumulée, compté double)"""
+        if self.fan_out is not None:
+            fan_out = self.fan_out
+        else:
+            fan_out = UNBOUNDED_FAN_OUT if self.fan_out_source == 'unbounded' else UNKNOWN_FAN_OUT
+        return fan_out * len(self.calls) * (2 if self.loop.sequential else 1)
+
+
+def _statement_body(body, position):
+    """(début, fin) du corps d'une boucle qui commence à `position` (bloc ou instruction)"""
+    match = re.compile(r'\s*').match(body, position)
+    start = match.end()
+    if body.startswith('{', start):
+        end = match_bracket(body, start)
+        return (start + 1, end) if end >= 0 else None
+    end = body.find(';', start)
+    return (start, end + 1) if end >= 0 else None
+
+
+def find_loops(body):
+    """Toutes les boucles d'un corps de handler, dans l'ordre du texte"""
+    loops = []
+    for match in _FOR_RE.finditer(body):
+        header_open = match.end() - 1
+        header_close = match_bracket(body, header_open)
+        if header_close < 0:
+            continue
+        span = _statement_body(body, header_close + 1)
+        if span is None:
+            continue
+        header = body[header_open + 1:header_close]
+        keyword = match.group('keyword')
+        variable = collection = None
+        kind = 'while' if keyword == 'while' else 'for'
+        for_of = _FOR_OF_RE.match(header) if kind == 'for' else None
+        if for_of is not None:
+            kind = f"for-{for_of.group('kind')}"
+            variable = for_of.group('var') if re.fullmatch(r'\w+', for_of.group('var')) else None
+            collection = for_of.group('collection')
+        loops.append(Loop(kind, match.start(), span[0], span[1], variable, collection, sequential=True))
+
+    for match in _CALLBACK_RE.finditer(body):
+        call_open = body.find('(', match.end('collection'))
+        call_close = match_bracket(body, call_open)
+        if call_close < 0:
+            continue
+        params = match.group('param') or (match.group('params') or '').split(',')[0].strip()
+        variable = params if re.fullmatch(r'\w+', params or '') else None
+        collection = re.sub(r'\s+', '', match.group('collection'))
+        loops.append(Loop(match.group('method'), match.start(), match.end(), call_close,
+                          variable, collection, sequential=False))
+    loops.sort(key=lambda loop: loop.start)
+    return loops
+
+
+def _promise_all_element(body, name, before):
+    """Expression qui alimente `name` dans `const [a, name] = await Promise.all([...])`"""
+    pattern = re.compile(r'\b(?:const|let)\s*\[(?P<names>[^\]]*)\]\s*=\s*await\s+Promise\.all\(\s*\[')
+    for match in pattern.finditer(body, 0, before):
+        names = [n.strip() for n in match.group('names').split(',')]
+        if name not in names:
+            continue
+        array_end = match_bracket(body, match.end() - 1)
+        if array_end < 0:
+            return None
+        items = array_items(body[match.end() - 1:array_end + 1])
+        position = names.index(name)
+        return items[position] if position < len(items) else None
+    return None
+
+
+def _declaration(body, name, before):
+    """Valeur affectée à `name` par sa dernière déclaration avant `before`"""
+    pattern = re.compile(r'\b(?:const|let|var)\s+' + re.escape(name) + r'\b(?:\s*:\s*[^=;\n]+)?\s*=\s*')
+    found = None
+    for found in pattern.finditer(body, 0, before):
+        pass
+    if found is None:
+        destructured = re.compile(
+            r'\b(?:const|let)\s*\{[^}]*\b' + re.escape(name) + r'\b[^}]*\}\s*=\s*(?P<value>[^;]+);'
+        )
+        for found in destructured.finditer(body, 0, before):
+            pass
+        return found.group('value').strip() if found else _promise_all_element(body, name, before)
+    start = found.end()
+    if body.startswith(('[', '{'), start):
+        end = match_bracket(body, start)
+        return body[start:end + 1] if end >= 0 else None
+    end = body.find(';', start)
+    return body[start:end if end >= 0 else len(body)].strip()
+
+
+def estimate_fan_out(body, collection, before):
+    """(nombre d'itérations ou None, source) pour la collection parcourue"""
+    if collection is None:
+        return None, 'unknown'
+    collection = collection.strip()
+    if collection.startswith('['):
+        return len(array_items(collection)), 'literal'
+    root = re.match(r'[\w$]+', collection)
+    if root is None:
+        return None, 'unknown'
+    value = _declaration(body, root.group(), before)
+    if value is None:
+        return None, 'unknown'
+    if value.startswith('['):
+        return len(array_items(value)), 'literal'
+    if re.search(r'request\.(?:json|formData)\(\)', value) or re.match(r'(?:body|data|payload)\b', value):
+        return None, 'unbounded'
+    prisma_call = _PRISMA_CALL_RE.search(value)
+    if prisma_call is not None:
+        take = _TAKE_RE.search(value)
+        if take is not None:
+            return int(take.group('value')), 'take'
+        if prisma_call.group('op') in ('findMany', 'groupBy'):
+            return None, 'unbounded'
+    return None, 'unknown'
+
+
+def find_loop_queries(content, route):
+    """Requêtes Prisma exécutées dans une boucle, par boucle la plus interne"""
+    findings = []
+    for handler in find_handlers(content):
+        body = handler.body(content)
+        loops = find_loops(body)
+        if not loops:
+            continue
+        grouped = {}
+        for call in _PRISMA_CALL_RE.finditer(body):
+            enclosing = [loop for loop in loops if loop.contains(call.start())]
+            if not enclosing:
+                continue
+            grouped.setdefault(id(enclosing[-1]), (enclosing, []))[1].append(
+                (call.group('delegate'), call.group('op'))
+            )
+        for enclosing, calls in grouped.values():
+            loop = enclosing[-1]
+            # Boucles imbriquées: les fan-outs se multiplient
+            fan_out, source = 1, 'literal'
+            for outer in enclosing:
+                count, outer_source = estimate_fan_out(body, outer.collection, outer.start)
+                if count is None:
+                    fan_out = None
+                    if source != 'unbounded':
+                        source = outer_source
+                elif fan_out is not None:
+                    fan_out *= count
+                    source = outer_source
+            line = content.count('\n', 0, handler.body_start + loop.start) + 1
+            findings.append(LoopQuery(route, handler.method, line, loop, calls, fan_out, source))
+    return findings
+
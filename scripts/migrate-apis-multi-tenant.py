@@ -5,10 +5,27 @@ Auteur: KAIRO Digital
 Date: 23 Octobre 2025
 """
 
+import argparse
 import os
 import re
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import api_codemods
+import route_analysis
+from api_codemods import PASSES
+from api_codemods.common import SCHEMA_PATH, delegate_model
+from codemod_cache import CodemodManifest, cached_result, imported_sources, make_entry, transform_version
+from rewrite_engine import RewriteEngine, Rule
+
+API_ROOT = "src/app/api"
+MANIFEST_PATH = ".cache/migrate-apis-multi-tenant.json"
+
+# Pré-filtre binaire: un handler sans ces motifs ne peut pas être migré
+MIGRATABLE_MARKERS = (b"ensureAdmin", b"prisma.")
+MIGRATED_MARKERS = ("Multi-tenant ready ✅".encode("utf-8"), b"ensureAuthenticated")
+
 # Liste des APIs à migrer
 APIS_TO_MIGRATE = [
     # Corporate
@@ -48,11 +65,202 @@ APIS_TO_MIGRATE = [
     ("src/app/api/admin/galerie/route.ts", "GALERIE"),
 ]
 
-def migrate_api_file(file_path, api_name):
+def api_name_from_path(file_path, root=API_ROOT):
+    """src/app/api/admin/projets/[id]/route.ts → ADMIN/PROJETS/[ID]"""
+    relative = os.path.relpath(os.path.dirname(file_path), root)
+    return relative.replace(os.sep, "/").upper()
+
+def prefilter_api_file(file_path, data=None):
+    """
+    Lecture binaire sans décodage: None si le fichier ne peut pas matcher,
+    True s'il est déjà migré, False s'il doit passer dans migrate_api_file
+    """
+    if data is None:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    if any(marker in data for marker in MIGRATED_MARKERS):
+        return True
+    if not any(marker in data for marker in MIGRATABLE_MARKERS):
+        return None
+    return False
+
+AUTH_BLOCK_PATTERN = r'const authResult = await ensure(?:Admin|Authenticated)\(request\);\s+if \(authResult instanceof NextResponse\) return authResult;'
+
+TENANT_FILTER_BLOCK = '\n\n    // 🔒 Isolation multi-tenant\n    const { tenantFilter } = await getTenantFilter(request);'
+REQUIRE_TENANT_BLOCK = '\n\n    // 🔒 Récupérer le tenantId\n    const { tenantId } = await requireTenant(request);'
+VERIFY_ACCESS_BLOCK = '''
+
+    // 🔒 Vérifier l'accès au tenant (params: Promise en Next 15, objet avant)
+    const existing = await prisma.{model}.findUnique({{
+      where: {{ id: (await params).id }},
+    }});
+
+    if (!existing) {{
+      return NextResponse.json(
+        {{ success: false, error: "Ressource introuvable" }},
+        {{ status: 404 }}
+      );
+    }}
+
+    const hasAccess = await verifyTenantAccess(request, existing.tenantId);
+    if (!hasAccess) {{
+      return NextResponse.json(
+        {{ success: false, error: "Accès refusé" }},
+        {{ status: 403 }}
+      );
+    }}'''
+
+# Modèle Prisma manipulé par un handler [id] (le plus fréquent dans update/delete/findUnique)
+PRISMA_BY_ID_RE = re.compile(r'prisma\.(\w+)\.(?:findUnique|update|delete)\(')
+
+def infer_model(content):
+    """Nom du délégué Prisma (ex: 'project') ciblé par le fichier, 'MODELNAME' à défaut"""
+    models = Counter(PRISMA_BY_ID_RE.findall(content))
+    models.pop('MODELNAME', None)
+    return models.most_common(1)[0][0] if models else 'MODELNAME'
+
+def _auth_block(match, ctx):
+    """Bloc d'authentification + isolation selon les handlers présents dans le fichier"""
+    block = match.group().replace('ensureAdmin(request)', 'ensureAuthenticated(request)')
+    if ctx['has_write'] and ctx['has_params']:
+        # Ajouter verifyTenantAccess dans PUT/DELETE
+        block += VERIFY_ACCESS_BLOCK.format(model=ctx['model'])
+    if ctx['has_post']:
+        # Ajouter requireTenant dans les POST
+        block += REQUIRE_TENANT_BLOCK
+    if ctx['has_get']:
+        # Ajouter getTenantFilter dans les GET (après authResult, avant la requête Prisma)
+        block += TENANT_FILTER_BLOCK
+    return block
+
+# `data: { ... }` sans tenantId au premier niveau (deux niveaux d'objets imbriqués sautés)
+_NESTED_OBJECT = r'\{(?:[^{}]|\{(?:[^{}]|\{[^{}]*\})*\})*\}'
+CREATE_DATA_OBJECT_PATTERN = (
+    r'(?P<delegate>\w+)\.create\(\{\s*data:\s*'
+    r'(?:\{(?!(?:[^{}]|' + _NESTED_OBJECT + r')*\btenantId\b)(?P<space>[ \t]*\n[ \t]*)?'
+    r'|(?P<variable>(?!tenantId\b)[\w$.]+)(?=\s*[,}]))'
+)
+
+def _create_data_object(match, ctx):
+    """
+    Ajoute tenantId aux `create({ data: ... })` d'un modèle multi-tenant:
+    objet littéral → `data: { tenantId, ... }`, variable → `data: { ...data, tenantId }`.
+    Un appel dont les données portent déjà tenantId n'est pas retouché.
+    """
+    model = delegate_model(match.group('delegate'))
+    if model is None or not model.has_field('tenantId'):
+        return match.group()
+    text = match.group()
+    if match.group('variable'):
+        head = text[:match.start('variable') - match.start()]
+        return f"{head}{{ ...{match.group('variable')}, tenantId }}"
+    space = match.group('space')
+    if space:
+        return f"{text[:-len(space)]}{space}tenantId, // 🔒 ISOLATION{space}"
+    return f"{text} tenantId,"
+
+def _console_error(match, ctx):
+    return f'console.error("❌ {match.group(1)} ' + ctx['file_path'].replace('src/app/', '/')
+
+AUTH_IMPORT_PATTERN = r'import \{ ensureAdmin \} from "@/lib/auth";'
+
+# Règles qui isolent réellement un handler: seules elles justifient l'en-tête
+# "Multi-tenant ready ✅" (qui exclut ensuite le fichier des migrations)
+TENANT_RULES = ('auth_block', 'where_tenant_filter', 'find_many_tenant_filter', 'create_data', 'create_data_object')
+
+def _tenant_auth(ctx):
+    # ensureAdmin de @/lib/require-admin vérifie la session admin (cookie), un
+    # autre mécanisme: seuls les fichiers dont l'import est réécrit migrent
+    return ctx['tenant_auth']
+
+# Table des règles: appliquées en UNE passe par fichier (voir rewrite_engine)
+API_RULES = RewriteEngine([
+    # Remplacer les imports
+    Rule(
+        'imports',
+        AUTH_IMPORT_PATTERN,
+        'import { ensureAuthenticated } from "@/lib/tenant-auth";\nimport { getTenantFilter, requireTenant, verifyTenantAccess } from "@/middleware/tenant-context";',
+    ),
+    Rule('auth_block', AUTH_BLOCK_PATTERN, _auth_block, when=_tenant_auth),
+    # Remplacer ensureAdmin par ensureAuthenticated (importé par la règle `imports`)
+    Rule('ensure_authenticated', r'ensureAdmin\(request\)', 'ensureAuthenticated(request)', when=_tenant_auth),
+    # Ajouter tenantFilter dans les where des GET
+    Rule(
+        'where_tenant_filter',
+        r'const where: any = \{\};',
+        'const where: any = { ...tenantFilter }; // 🔒 ISOLATION',
+        when=lambda ctx: ctx['has_get'] and ctx['tenant_auth'],
+    ),
+    # Pour findMany sans where explicite, ajouter where: tenantFilter
+    Rule(
+        'find_many_tenant_filter',
+        r'\.findMany\(\{\s*orderBy',
+        '.findMany({\n      where: tenantFilter, // 🔒 ISOLATION\n      orderBy',
+        when=lambda ctx: ctx['has_get'] and ctx['tenant_auth'],
+    ),
+    # Ajouter tenantId dans create: "create({ data })" → "create({ data: { ...data, tenantId } })"
+    Rule(
+        'create_data',
+        r'\.create\(\{ data \}\)',
+        '.create({\n      data: {\n        ...data,\n        tenantId, // 🔒 ISOLATION\n      },\n    })',
+        when=lambda ctx: ctx['has_post'] and ctx['tenant_auth'],
+    ),
+    Rule(
+        'create_data_object',
+        CREATE_DATA_OBJECT_PATTERN,
+        _create_data_object,
+        when=lambda ctx: ctx['has_post'] and ctx['has_tenant_id'] and ctx['tenant_auth'],
+    ),
+    # Remplacer les console.error
+    Rule('console_error', r'console\.error\("Erreur (GET|POST|PUT|DELETE)', _console_error),
+])
+
+def prefilter_passes(file_path, passes, data=None):
+    """None si aucune des passes demandées ne peut toucher le fichier"""
+    if data is None:
+        with open(file_path, 'rb') as f:
+            data = f.read()
+    for name in passes:
+        if any(marker in data for marker in PASSES[name].MARKERS):
+            return False
+    return None
+
+def transform_api_content(content, file_path, api_name, hits=None):
+    """Applique les règles multi-tenant au contenu d'un handler (sans I/O)"""
+    context = {
+        'file_path': file_path,
+        'has_get': 'export async function GET' in content,
+        'has_post': 'export async function POST' in content,
+        'has_write': 'export async function PUT' in content or 'export async function DELETE' in content,
+        'has_params': 'params' in content,
+        'model': infer_model(content),
+        'tenant_auth': re.search(AUTH_IMPORT_PATTERN, content) is not None,
+        # tenantId défini dans les handlers: requireTenant inséré avec le bloc d'auth, ou déjà présent
+        'has_tenant_id': re.search(AUTH_BLOCK_PATTERN, content) is not None or 'requireTenant(' in content,
+    }
+    content, rule_hits = API_RULES.rewrite(content, context)
+    
+    # Ajouter header (seulement si une règle a isolé le handler)
+    if '/**' not in content[:100] and any(rule_hits[name] for name in TENANT_RULES):
+        header = f'''/**
+ * API: {api_name}
+ * {'=' * len(f'API: {api_name}')}
+ * Multi-tenant ready ✅
+ */
+
+'''
+        content = header + content
+        rule_hits['header'] += 1
+    
+    if hits is not None:
+        hits.update(rule_hits)
+    return content
+
+def migrate_api_file(file_path, api_name, log=print, hits=None):
     """Migre un fichier API vers multi-tenant"""
     
     if not os.path.exists(file_path):
-        print(f"⚠️  {file_path} n'existe pas, skip")
+        log(f"⚠️  {file_path} n'existe pas, skip")
         return False
     
     try:
@@ -61,132 +269,189 @@ def migrate_api_file(file_path, api_name):
         
         # Vérifier si déjà migré
         if 'Multi-tenant ready ✅' in content or 'ensureAuthenticated' in content:
-            print(f"✅ {file_path} déjà migré, skip")
+            log(f"✅ {file_path} déjà migré, skip")
             return True
         
-        # Remplacer les imports
-        content = re.sub(
-            r'import \{ ensureAdmin \} from "@/lib/auth";',
-            'import { ensureAuthenticated } from "@/lib/tenant-auth";\nimport { getTenantFilter, requireTenant, verifyTenantAccess } from "@/middleware/tenant-context";',
-            content
-        )
-        
-        # Ajouter header
-        if '/**' not in content[:100]:
-            header = f'''/**
- * API: {api_name}
- * {'=' * len(f'API: {api_name}')}
- * Multi-tenant ready ✅
- */
-
-'''
-            content = header + content
+        new_content = transform_api_content(content, file_path, api_name, hits)
         
-        # Remplacer ensureAdmin par ensureAuthenticated
-        content = content.replace('ensureAdmin(request)', 'ensureAuthenticated(request)')
+        # Sauvegarder uniquement si le contenu a changé
+        if new_content == content:
+            log(f"✅ {file_path} inchangé")
+            return True
         
-        # Ajouter getTenantFilter dans les GET
-        # Pattern: après authResult, avant la requête Prisma
-        if 'export async function GET' in content:
-            # Trouver la position après authResult
-            pattern = r'(const authResult = await ensureAuthenticated\(request\);\s+if \(authResult instanceof NextResponse\) return authResult;)'
-            replacement = r'\1\n\n    // 🔒 Isolation multi-tenant\n    const { tenantFilter } = await getTenantFilter(request);'
-            content = re.sub(pattern, replacement, content)
-            
-            # Ajouter tenantFilter dans les where
-            # Remplacer "const where: any = {};" par "const where: any = { ...tenantFilter };"
-            content = re.sub(
-                r'const where: any = \{\};',
-                r'const where: any = { ...tenantFilter }; // 🔒 ISOLATION',
-                content
-            )
-            
-            # Pour findMany sans where explicite, ajouter where: tenantFilter
-            content = re.sub(
-                r'\.findMany\(\{\s*orderBy',
-                r'.findMany({\n      where: tenantFilter, // 🔒 ISOLATION\n      orderBy',
-                content
-            )
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(new_content)
         
-        # Ajouter requireTenant dans les POST
-        if 'export async function POST' in content:
-            pattern = r'(const authResult = await ensureAuthenticated\(request\);\s+if \(authResult instanceof NextResponse\) return authResult;)'
-            replacement = r'\1\n\n    // 🔒 Récupérer le tenantId\n    const { tenantId } = await requireTenant(request);'
-            content = re.sub(pattern, replacement, content)
-            
-            # Ajouter tenantId dans create
-            # Remplacer "create({ data })" ou "create({ data: {...} })" par "create({ data: { ...data, tenantId } })"
-            content = re.sub(
-                r'\.create\(\{ data \}\)',
-                r'.create({\n      data: {\n        ...data,\n        tenantId, // 🔒 ISOLATION\n      },\n    })',
-                content
-            )
-            
-            content = re.sub(
-                r'\.create\(\{\s*data:',
-                r'.create({\n      data: {\n        ...(',
-                content
-            )
+        log(f"✅ {file_path} migré")
+        return True
         
-        # Ajouter verifyTenantAccess dans PUT/DELETE
-        if 'export async function PUT' in content or 'export async function DELETE' in content:
-            # Ajouter vérification après authResult
-            pattern = r'(const authResult = await ensureAuthenticated\(request\);\s+if \(authResult instanceof NextResponse\) return authResult;)'
-            
-            # Vérifier si params existe (route avec [id])
-            if 'params' in content:
-                replacement = r'''\1
-
-    // 🔒 Vérifier l'accès au tenant
-    const existing = await prisma.MODELNAME.findUnique({
-      where: { id: params.id },
-    });
-
-    if (!existing) {
-      return NextResponse.json(
-        { success: false, error: "Ressource introuvable" },
-        { status: 404 }
-      );
-    }
+    except Exception as e:
+        log(f"❌ Erreur migration {file_path}: {e}")
+        return False
 
-    const hasAccess = await verifyTenantAccess(request, existing.tenantId);
-    if (!hasAccess) {
-      return NextResponse.json(
-        { success: false, error: "Accès refusé" },
-        { status: 403 }
-      );
-    }'''
-                content = re.sub(pattern, replacement, content)
+def apply_passes(file_path, passes, log=print, reports=None, strip=False):
+    """
+    Applique les passes optionnelles (--pass) à un handler, réécrit s'il a
+    changé. strip=True retire le code généré par les passes réversibles.
+    """
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
         
-        # Remplacer les console.error
-        content = re.sub(
-            r'console\.error\("Erreur (GET|POST|PUT|DELETE)',
-            r'console.error("❌ \1 ' + file_path.replace('src/app/', '/'),
-            content
-        )
+        new_content = content
+        for name in passes:
+            transform = PASSES[name].strip if strip else PASSES[name].apply
+            new_content, report = transform(new_content, file_path)
+            if report and reports is not None:
+                reports[name] = report
+        
+        if new_content == content:
+            log(f"✅ {file_path} inchangé")
+            return True
         
-        # Sauvegarder
         with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+            f.write(new_content)
         
-        print(f"✅ {file_path} migré")
+        log(f"✅ {file_path} réécrit ({', '.join(passes)}{' --strip' if strip else ''})")
         return True
         
     except Exception as e:
-        print(f"❌ Erreur migration {file_path}: {e}")
+        log(f"❌ Erreur passe {file_path}: {e}")
         return False
 
-def main():
+def _migrate_worker(job):
+    """
+    Exécuté dans un process du pool: retourne le résultat, les logs à afficher,
+    l'entrée de manifest à mémoriser (None = ne rien mémoriser), les hits par
+    règle et les rapports des passes optionnelles
+    """
+    file_path, api_name, entry, version, passes, strip = job
+    logs = [f"\n📝 Migration de {api_name}..."]
+    hits = Counter()
+    reports = {}
+    if not os.path.exists(file_path):
+        return file_path, migrate_api_file(file_path, api_name, log=logs.append), logs, None, hits, reports
+    
+    data = None
+    if version is not None:
+        hit, fresh_entry, data = cached_result(file_path, entry, version)
+        if hit:
+            logs.append(f"💾 {file_path} inchangé depuis le dernier passage, skip")
+            return file_path, fresh_entry['result'], logs, fresh_entry, hits, reports
+    
+    result = prefilter_api_file(file_path, data)
+    if result is None:
+        logs.append(f"⏭️  {file_path} sans ensureAdmin/prisma, skip")
+    elif result is True:
+        logs.append(f"✅ {file_path} déjà migré, skip")
+    else:
+        result = migrate_api_file(file_path, api_name, log=logs.append, hits=hits)
+        data = None
+    
+    # Passes optionnelles, sur le fichier migré (ou déjà migré)
+    if passes and result is not False:
+        if prefilter_passes(file_path, passes, data) is None:
+            logs.append(f"⏭️  {file_path} non concerné par {', '.join(passes)}")
+        else:
+            pass_result = apply_passes(file_path, passes, log=logs.append, reports=reports, strip=strip)
+            result = pass_result if pass_result is False else True
+    
+    # Les échecs ne sont pas mémorisés pour être retentés au prochain passage
+    new_entry = None
+    if version is not None and result is not False:
+        new_entry = make_entry(file_path, result, version)
+    return file_path, result, logs, new_entry, hits, reports
+
+def run_migrations(jobs, workers=None):
+    """Répartit les migrations sur un pool de process, résultats dans l'ordre des jobs"""
+    if workers == 1 or len(jobs) <= 1:
+        return [_migrate_worker(job) for job in jobs]
+    chunksize = max(1, len(jobs) // ((workers or os.cpu_count() or 1) * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(_migrate_worker, jobs, chunksize=chunksize))
+
+def _manifest_path(base, passes, strip=False):
+    """Un manifest par combinaison de passes (la migration de base garde `base`)"""
+    if not passes:
+        return base
+    root, ext = os.path.splitext(base)
+    return f"{root}.{'+'.join(passes)}{'.strip' if strip else ''}{ext}"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Migration automatique des APIs vers multi-tenant")
+    parser.add_argument("--all", action="store_true",
+                        help=f"découvrir tous les route.ts sous {API_ROOT} au lieu de APIS_TO_MIGRATE")
+    parser.add_argument("--root", default=API_ROOT, help="racine des handlers pour --all")
+    parser.add_argument("--jobs", "-j", type=int, default=None,
+                        help="nombre de process (défaut: nombre de CPU, 1 = séquentiel)")
+    parser.add_argument("--cache", default=MANIFEST_PATH,
+                        help="manifest des fichiers déjà traités (hash du contenu + version des règles)")
+    parser.add_argument("--no-cache", action="store_true", help="ignorer et ne pas mettre à jour le manifest")
+    parser.add_argument("--pass", dest="passes", action="append", choices=sorted(PASSES), default=[],
+                        help="passe optionnelle appliquée après la migration de chaque handler "
+                             "(répétable): " + "; ".join(f"{n}: {m.DESCRIPTION}" for n, m in sorted(PASSES.items())))
+    parser.add_argument("--strip", action="store_true",
+                        help="retire le code généré par les passes réversibles demandées (ex: --pass instrument --strip)")
+    args = parser.parse_args(argv)
+    if args.strip:
+        irreversible = [name for name in args.passes if not hasattr(PASSES[name], 'strip')]
+        if not args.passes:
+            parser.error("--strip: préciser la passe à retirer (--pass instrument)")
+        if irreversible:
+            parser.error(f"--strip: passe(s) non réversible(s): {', '.join(irreversible)}")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
     print("🚀 Début de la migration automatique des APIs vers multi-tenant\n")
     
-    total = len(APIS_TO_MIGRATE)
+    if args.all:
+        jobs = [(path, api_name_from_path(path, args.root)) for path in route_analysis.discover_routes(args.root)]
+        print(f"🔎 {len(jobs)} handlers découverts sous {args.root}")
+    else:
+        jobs = list(APIS_TO_MIGRATE)
+    
+    passes = tuple(args.passes)
+    # Données lues par les passes, avant que les process du pool ne réécrivent les fichiers
+    inputs = [
+        module.input_digest(args.root) for module in (PASSES[name] for name in passes)
+        if hasattr(module, 'input_digest')
+    ]
+    manifest = None
+    if not args.no_cache:
+        # Règles, modules locaux qu'elles importent, données qu'elles lisent
+        sources = imported_sources(
+            __file__, *[PASSES[name].__file__ for name in passes], shallow=[api_codemods.__file__]
+        )
+        manifest = CodemodManifest.load(
+            _manifest_path(args.cache, passes, args.strip),
+            transform_version(
+                *sources,
+                extra=','.join(passes + tuple(inputs)) + (':strip' if args.strip else ''),
+                inputs=[SCHEMA_PATH],
+            )
+        )
+    version = manifest.version if manifest else None
+    jobs = [
+        (path, api_name, manifest.get(path) if manifest else None, version, passes, args.strip)
+        for path, api_name in jobs
+    ]
+    
+    total = len(jobs)
     success = 0
     skipped = 0
     failed = 0
+    rule_hits = Counter()
+    pass_reports = {name: [] for name in passes}
     
-    for file_path, api_name in APIS_TO_MIGRATE:
-        print(f"\n📝 Migration de {api_name}...")
-        result = migrate_api_file(file_path, api_name)
+    for file_path, result, logs, entry, hits, reports in run_migrations(jobs, args.jobs):
+        for line in logs:
+            print(line)
+        rule_hits.update(hits)
+        for name, report in reports.items():
+            pass_reports[name].append((file_path, report))
+        if manifest is not None:
+            manifest.update(file_path, entry)
         
         if result is True:
             success += 1
@@ -201,8 +466,19 @@ def main():
     print(f"   ✅ Succès: {success}")
     print(f"   ⚠️  Skippées: {skipped}")
     print(f"   ❌ Échecs: {failed}")
+    if rule_hits:
+        print("   📊 Règles appliquées:")
+        for name, count in rule_hits.most_common():
+            print(f"      {name}: {count}")
+    for name in passes:
+        print(f"   🔧 Passe {name}:")
+        for line in PASSES[name].summarize(pass_reports[name]) or ["   (aucun changement)"]:
+            print(line)
     print("="*60)
     
+    if manifest is not None and manifest.save():
+        print(f"💾 Manifest mis à jour: {manifest.path}")
+    
     if failed > 0:
         print("\n⚠️  Certaines APIs n'ont pas pu être migrées automatiquement.")
         print("   Vérifiez-les manuellement et appliquez le pattern.")
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+"""
+Génération d'une migration SQL en ligne pour l'ajout de tenantId
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+`prisma db push` ajoute une colonne NOT NULL et ses index sous verrou
+ACCESS EXCLUSIVE. Sur des tables en production on procède par étapes :
+
+    1. ADD COLUMN nullable + DEFAULT de transition (métadonnées seules)
+    2. backfill par lots bornés, en keyset sur la clé primaire, COMMIT et
+       pause entre chaque lot
+    3. CREATE INDEX CONCURRENTLY
+    4. contraintes NOT VALID puis VALIDATE (verrou léger), SET NOT NULL
+       appuyé sur le CHECK validé (pas de scan sous verrou fort)
+
+Le fichier produit s'exécute avec psql, HORS transaction (les COMMIT du
+backfill et CREATE INDEX CONCURRENTLY l'exigent) :
+
+    psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f prisma/online-migrations/multi-tenant.sql
+
+Chaque étape est rejouable : une exécution interrompue peut être relancée.
+Un CREATE INDEX CONCURRENTLY interrompu laisse un index INVALID que
+IF NOT EXISTS sauterait : il est supprimé avant chaque construction, et un
+index unique n'est construit qu'après vérification de l'absence de doublons.
+"""
+
+from prisma_schema import parse_field_list
+from schema_indexes import model_index_keys
+
+TENANT_COLUMN = 'tenantId'
+TENANT_TABLE = 'Tenant'
+
+# Types Prisma → PostgreSQL (hors @db.*)
+_SQL_TYPES = {
+    'String': 'TEXT',
+    'Int': 'INTEGER',
+    'BigInt': 'BIGINT',
+    'Boolean': 'BOOLEAN',
+    'DateTime': 'TIMESTAMP(3)',
+    'Float': 'DOUBLE PRECISION',
+    'Decimal': 'DECIMAL(65,30)',
+}
+_NATIVE_TYPES = {
+    'db.Uuid': 'UUID',
+    'db.Text': 'TEXT',
+    'db.VarChar': 'VARCHAR',
+    'db.Char': 'CHAR',
+    'db.Integer': 'INTEGER',
+    'db.BigInt': 'BIGINT',
+}
+_REFERENTIAL_ACTIONS = {
+    'Cascade': 'CASCADE',
+    'Restrict': 'RESTRICT',
+    'NoAction': 'NO ACTION',
+    'SetNull': 'SET NULL',
+    'SetDefault': 'SET DEFAULT',
+}
+
+
+def quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def table_name(model):
+    """Nom SQL de la table (@@map éventuel)"""
+    for attribute in model.block_attributes('map'):
+        value = attribute.argument('name', 0)
+        if value:
+            return value.strip('"')
+    return model.name
+
+
+def column_name(field):
+    """Nom SQL de la colonne (@map éventuel)"""
+    attribute = field.attribute('map')
+    value = attribute.argument('name', 0) if attribute else None
+    return value.strip('"') if value else field.name
+
+
+def sql_type(field):
+    """Type PostgreSQL d'un champ scalaire"""
+    native = field.native_type
+    if native is not None and native.name in _NATIVE_TYPES:
+        base = _NATIVE_TYPES[native.name]
+        return f'{base}({native.args})' if native.args else base
+    return _SQL_TYPES.get(field.type, 'TEXT')
+
+
+class IndexPlan:
+    def __init__(self, name, columns, unique):
+        self.name = name
+        self.columns = columns      # [(colonne SQL, 'asc' | 'desc')]
+        self.unique = unique
+
+
+class ColumnPlan:
+    """Ajout en ligne d'une colonne tenant sur une table existante"""
+
+    def __init__(self, model, table, column, column_type, id_column, id_type):
+        self.model = model
+        self.table = table
+        self.column = column
+        self.column_type = column_type
+        self.id_column = id_column
+        self.id_type = id_type
+        self.not_null = True
+        self.foreign_key = None     # (table cible, colonne cible, ON DELETE)
+        self.indexes = []
+
+    def __repr__(self):
+        return f'ColumnPlan({self.table}.{self.column}, {len(self.indexes)} index)'
+
+
+def _index_name(table, columns, unique):
+    # Convention de nommage Prisma: Table_col1_col2_idx / _key
+    suffix = 'key' if unique else 'idx'
+    return '_'.join([table] + [column for column, _ in columns] + [suffix])
+
+
+def plan_tenant_columns(old_schema, new_schema, column=TENANT_COLUMN):
+    """Tables qui gagnent `column` entre les deux schemas, avec FK et index à créer"""
+    plans = []
+    for model in new_schema.blocks('model'):
+        field = model.field(column)
+        old_model = old_schema.model(model.name)
+        if field is None or old_model is None or old_model.has_field(column):
+            continue
+        id_field = model.id_field
+        if id_field is None:
+            raise ValueError(f'{model.name}: clé primaire simple requise pour le backfill par lots')
+
+        table = table_name(model)
+        plan = ColumnPlan(model.name, table, column_name(field), sql_type(field),
+                          column_name(id_field), sql_type(id_field))
+        plan.not_null = not field.is_optional
+
+        for relation in model.fields:
+            if relation.relation_fields == [column] and new_schema.model(relation.type) is not None:
+                target = new_schema.model(relation.type)
+                references = parse_field_list(relation.relation.argument('references') or '[id]')
+                target_field = target.field(references[0])
+                on_delete = relation.relation.argument('onDelete') or 'Restrict'
+                plan.foreign_key = (
+                    table_name(target),
+                    column_name(target_field) if target_field else references[0],
+                    _REFERENTIAL_ACTIONS.get(on_delete, 'RESTRICT'),
+                )
+                break
+
+        existing = {key.names for key in model_index_keys(old_model)}
+        for key in model_index_keys(model):
+            if key.kind == 'id' or key.columns is None or column not in key.names or key.names in existing:
+                continue
+            fields = [model.field(name) for name in key.names]
+            if None in fields:
+                continue
+            columns = [(column_name(f), direction) for f, (_, direction) in zip(fields, key.columns)]
+            name = None
+            if key.member.kind == 'block_attribute':
+                name = key.member.argument('map')
+            name = name.strip('"') if name else _index_name(table, columns, key.is_unique)
+            plan.indexes.append(IndexPlan(name, columns, key.is_unique))
+        plans.append(plan)
+    return plans
+
+
+# --- Rendu SQL -------------------------------------------------------------
+
+_HEADER = '''-- PostgreSQL
+-- Migration multi-tenant EN LIGNE (générée par scripts/add-multi-tenant-to-schema-v2.py)
+--
+-- À exécuter HORS transaction (COMMIT par lot, CREATE INDEX CONCURRENTLY):
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f {path}
+--
+-- Prérequis: les tables {tenant_table} / TenantUser / SuperAdmin existent (migration additive
+-- classique) et le tenant '{tenant_slug}' qui reçoit les données existantes est créé.
+-- Toutes les étapes sont rejouables (un index laissé INVALID par un échec est reconstruit).
+
+SET lock_timeout = '{lock_timeout}';
+
+-- Tenant cible du backfill (lu une fois pour toute la session)
+SELECT set_config('kairo.backfill_tenant_id', COALESCE((
+  SELECT {tenant_id}::text FROM {tenant} WHERE "slug" = '{tenant_slug}'
+), ''), false);
+
+DO $$
+BEGIN
+  IF current_setting('kairo.backfill_tenant_id') = '' THEN
+    RAISE EXCEPTION 'Tenant "{tenant_slug}" introuvable: créez-le avant la migration';
+  END IF;
+END $$;
+'''
+
+_BACKFILL = '''
+-- {table_label}: lots de {batch_size} lignes, pause {sleep_ms} ms
+DO $$
+DECLARE
+  tenant_value {column_type} := current_setting('kairo.backfill_tenant_id');
+  last_id {id_type};
+  batch_ids {id_type}[];
+  total BIGINT := 0;
+BEGIN
+  LOOP
+    SELECT array_agg(b.{id_column} ORDER BY b.{id_column}) INTO batch_ids
+    FROM (
+      SELECT {id_column} FROM {table}
+      WHERE {column} IS NULL AND (last_id IS NULL OR {id_column} > last_id)
+      ORDER BY {id_column}
+      LIMIT {batch_size}
+    ) b;
+    EXIT WHEN batch_ids IS NULL;
+
+    UPDATE {table} SET {column} = tenant_value
+    WHERE {id_column} = ANY(batch_ids) AND {column} IS NULL;
+
+    total := total + array_length(batch_ids, 1);
+    last_id := batch_ids[array_length(batch_ids, 1)];
+    COMMIT;
+    PERFORM pg_sleep({sleep_seconds});
+  END LOOP;
+  RAISE NOTICE '{table_label}: % ligne(s) backfillée(s)', total;
+END $$;
+'''
+
+
+def _transition_default(plan):
+    # Les lignes insérées par l'ancien code pendant le backfill reçoivent le tenant cible
+    return (
+        'DO $$ BEGIN\n'
+        f"  EXECUTE format('ALTER TABLE %I ALTER COLUMN %I SET DEFAULT %L', "
+        f"'{plan.table}', '{plan.column}', current_setting('kairo.backfill_tenant_id'));\n"
+        'END $$;\n'
+    )
+
+
+def _literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def drop_invalid_index(name):
+    """
+    Supprime (psql \\gexec) l'index laissé INVALID par un CREATE INDEX
+    CONCURRENTLY échoué ou interrompu : sans cela IF NOT EXISTS le garde tel
+    quel et il n'est jamais utilisé ni, s'il est unique, appliqué
+    """
+    return (
+        "SELECT format('DROP INDEX CONCURRENTLY IF EXISTS %I', index_class.relname)\n"
+        'FROM pg_index JOIN pg_class index_class ON index_class.oid = pg_index.indexrelid\n'
+        f'WHERE pg_index.indexrelid = to_regclass({_literal(quote(name))}) AND NOT pg_index.indisvalid\n'
+        '\\gexec\n'
+    )
+
+
+def check_unique_duplicates(table, columns, name):
+    """
+    Arrête la migration avant un index unique que les données violent (le
+    backfill donne le même tenant à toutes les lignes existantes) : l'échec
+    du CREATE UNIQUE INDEX CONCURRENTLY viendrait après un long scan
+    """
+    listed = ', '.join(quote(column) for column in columns)
+    present = ' AND '.join(f'{quote(column)} IS NOT NULL' for column in columns)
+    label = ', '.join(columns)
+    return (
+        'DO $$\n'
+        'DECLARE\n'
+        '  duplicates BIGINT;\n'
+        'BEGIN\n'
+        '  SELECT COUNT(*) INTO duplicates FROM (\n'
+        f'    SELECT 1 FROM {quote(table)} WHERE {present} GROUP BY {listed} HAVING COUNT(*) > 1\n'
+        '  ) d;\n'
+        '  IF duplicates > 0 THEN\n'
+        f"    RAISE EXCEPTION 'Index unique {name}: % valeur(s) de ({label}) en double dans {table}', duplicates\n"
+        "      USING HINT = 'Répartir ou dédoublonner ces lignes entre tenants, puis relancer la migration';\n"
+        '  END IF;\n'
+        'END $$;\n'
+    )
+
+
+def _index_statement(plan, index):
+    columns = ', '.join(
+        quote(column) + (' DESC' if direction == 'desc' else '') for column, direction in index.columns
+    )
+    unique = 'UNIQUE ' if index.unique else ''
+    chunks = [drop_invalid_index(index.name)]
+    if index.unique:
+        chunks.append(check_unique_duplicates(plan.table, [column for column, _ in index.columns], index.name))
+    chunks.append(
+        f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {quote(index.name)} '
+        f'ON {quote(plan.table)} ({columns});\n'
+    )
+    return ''.join(chunks)
+
+
+def render_online_migration(plans, batch_size=5000, sleep_ms=100, tenant_slug='default',
+                            lock_timeout='5s', path='prisma/online-migrations/multi-tenant.sql'):
+    """Script SQL complet (4 étapes) pour une liste de ColumnPlan"""
+    chunks = [_HEADER.format(
+        path=path,
+        tenant_table=TENANT_TABLE,
+        tenant=quote(TENANT_TABLE),
+        tenant_id=quote('id'),
+        tenant_slug=tenant_slug.replace("'", "''"),
+        lock_timeout=lock_timeout,
+    )]
+
+    chunks.append('\n-- ===== ÉTAPE 1: colonnes nullables (métadonnées seules, aucune réécriture) =====\n')
+    for plan in plans:
+        chunks.append(
+            f'ALTER TABLE {quote(plan.table)} ADD COLUMN IF NOT EXISTS {quote(plan.column)} {plan.column_type};\n'
+        )
+        chunks.append(_transition_default(plan))
+
+    chunks.append('\n-- ===== ÉTAPE 2: backfill par lots (keyset sur la clé primaire) =====\n')
+    for plan in plans:
+        chunks.append(_BACKFILL.format(
+            table=quote(plan.table),
+            table_label=plan.table,
+            column=quote(plan.column),
+            column_type=plan.column_type,
+            id_column=quote(plan.id_column),
+            id_type=plan.id_type,
+            batch_size=batch_size,
+            sleep_ms=sleep_ms,
+            sleep_seconds=f'{sleep_ms / 1000:g}',
+        ))
+
+    chunks.append('\n-- ===== ÉTAPE 3: index construits sans bloquer les écritures =====\n')
+    for plan in plans:
+        for index in plan.indexes:
+            chunks.append(_index_statement(plan, index))
+
+    chunks.append('\n-- ===== ÉTAPE 4: contraintes validées en ligne, puis NOT NULL =====\n')
+    for plan in plans:
+        table = quote(plan.table)
+        column = quote(plan.column)
+        chunks.append(f'\n-- {plan.table}\n')
+        chunks.append(f'ALTER TABLE {table} ALTER COLUMN {column} DROP DEFAULT;\n')
+        if plan.foreign_key is not None:
+            target_table, target_column, on_delete = plan.foreign_key
+            fkey = quote(f'{plan.table}_{plan.column}_fkey')
+            chunks.append(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {fkey};\n')
+            chunks.append(
+                f'ALTER TABLE {table} ADD CONSTRAINT {fkey} FOREIGN KEY ({column}) '
+                f'REFERENCES {quote(target_table)}({quote(target_column)}) '
+                f'ON DELETE {on_delete} ON UPDATE CASCADE NOT VALID;\n'
+            )
+            chunks.append(f'ALTER TABLE {table} VALIDATE CONSTRAINT {fkey};\n')
+        if plan.not_null:
+            check = quote(f'{plan.table}_{plan.column}_not_null')
+            chunks.append(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check};\n')
+            chunks.append(f'ALTER TABLE {table} ADD CONSTRAINT {check} CHECK ({column} IS NOT NULL) NOT VALID;\n')
+            chunks.append(f'ALTER TABLE {table} VALIDATE CONSTRAINT {check};\n')
+            # PostgreSQL 12+: le CHECK validé évite le scan complet sous ACCESS EXCLUSIVE
+            chunks.append(f'ALTER TABLE {table} ALTER COLUMN {column} SET NOT NULL;\n')
+            chunks.append(f'ALTER TABLE {table} DROP CONSTRAINT {check};\n')
+
+    chunks.append('\nRESET lock_timeout;\n')
+    return ''.join(chunks)
@@ -0,0 +1,614 @@
+#!/usr/bin/env python3
+"""
+Parseur et AST du schema Prisma (réutilisable par les autres scripts)
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Le schema est lu en UNE seule passe et découpé en blocs (model, enum, view,
+type, generator, datasource) puis en membres (champs, @@attributs, valeurs
+d'enum, commentaires). Chaque membre garde son texte d'origine : un schema
+non modifié est resérialisé à l'identique, octet pour octet.
+
+Usage:
+    from prisma_schema import load_schema
+
+    schema = load_schema('prisma/schema.prisma')
+    order = schema.model('Order')
+    order.field('status').type          # 'String'
+    [i.fields for i in order.indexes]   # [['status'], ['createdAt']]
+    schema.render()                     # texte complet
+"""
+
+import re
+
+BLOCK_KINDS = ('model', 'enum', 'view', 'type', 'generator', 'datasource')
+
+# Types scalaires natifs Prisma (tout le reste est un modèle, un enum ou un type composite)
+SCALAR_TYPES = {
+    'String', 'Boolean', 'Int', 'BigInt', 'Float', 'Decimal',
+    'DateTime', 'Json', 'Bytes', 'Unsupported',
+}
+
+_HEADER_RE = re.compile(
+    r'^[ \t]*(?P<kind>' + '|'.join(BLOCK_KINDS) + r')[ \t]+(?P<name>\w+)[ \t]*\{'
+)
+
+# Caractères structurels d'une ligne (chaînes et commentaires ignorés)
+_STRUCT_RE = re.compile(r'"(?:[^"\\\n]|\\.)*"|//[^\n]*|[{}()\[\]]')
+
+_FIELD_RE = re.compile(
+    r'(?P<indent>[ \t]*)(?P<name>\w+)(?P<gap>[ \t]+)'
+    r'(?P<type>Unsupported\("(?:[^"\\]|\\.)*"\)|\w+(?:\.\w+)?)'
+    r'(?P<modifier>\[\]\??|\?)?(?P<rest>.*)',
+    re.DOTALL,
+)
+_ASSIGNMENT_RE = re.compile(r'[ \t]*(?P<name>\w+)[ \t]*=[ \t]*(?P<value>.*?)[ \t]*(?://.*)?$', re.DOTALL)
+_ENUM_VALUE_RE = re.compile(r'(?P<indent>[ \t]*)(?P<name>\w+)(?P<rest>.*)', re.DOTALL)
+_BLOCK_ATTRIBUTE_RE = re.compile(r'(?P<indent>[ \t]*)@@(?P<rest>.*)', re.DOTALL)
+
+# Attributs: @name, @db.VarChar(255), @@index([a, b], map: "x") ...
+_ATTRIBUTE_TOKEN_RE = re.compile(r'"(?:[^"\\]|\\.)*"|//|@@?[\w.]+|[()]')
+
+
+class Attribute:
+    """Attribut de champ (@id, @default(...)) ou de bloc (@@index([...]))"""
+
+    def __init__(self, name, args=None, block=False):
+        self.name = name
+        self.args = args
+        self.block = block
+
+    def __repr__(self):
+        return f'Attribute({self.render()!r})'
+
+    def render(self):
+        prefix = '@@' if self.block else '@'
+        if self.args is None:
+            return f'{prefix}{self.name}'
+        return f'{prefix}{self.name}({self.args})'
+
+    def arguments(self):
+        """Retourne (positionnels, nommés) à partir des arguments bruts"""
+        positional, named = [], {}
+        for part in split_top_level(self.args or ''):
+            key, value = _split_named_argument(part)
+            if key is None:
+                positional.append(value)
+            else:
+                named[key] = value
+        return positional, named
+
+    def argument(self, key, position=None):
+        """Argument nommé `key`, ou positionnel à l'index `position` à défaut"""
+        positional, named = self.arguments()
+        if key in named:
+            return named[key]
+        if position is not None and position < len(positional):
+            return positional[position]
+        return None
+
+    @property
+    def fields(self):
+        """Champs référencés (@@index([a, b(sort: Desc)]) → ['a', 'b'])"""
+        value = self.argument('fields', 0)
+        return parse_field_list(value) if value else []
+
+
+class Member:
+    """Ligne logique d'un bloc (le texte d'origine est conservé)"""
+
+    kind = 'raw'
+
+    def __init__(self, raw):
+        self.raw = raw
+
+    def __repr__(self):
+        return f'{type(self).__name__}({self.raw!r})'
+
+    def render(self):
+        return self.raw
+
+
+class Blank(Member):
+    kind = 'blank'
+
+
+class Comment(Member):
+    kind = 'comment'
+
+    @property
+    def text(self):
+        return self.raw.strip()
+
+
+class Field(Member):
+    """Champ de modèle : `name Type[]? @attr(...) // commentaire`"""
+
+    kind = 'field'
+
+    def __init__(self, raw, match):
+        super().__init__(raw)
+        self.indent = match.group('indent')
+        self.name = match.group('name')
+        self.type = match.group('type')
+        modifier = match.group('modifier') or ''
+        self.is_list = modifier.startswith('[]')
+        self.is_optional = modifier.endswith('?')
+        self._rest_start = match.start('rest')
+        self.attributes, self.comment, self._comment_start = _parse_attributes(raw, self._rest_start)
+
+    def attribute(self, name):
+        for attribute in self.attributes:
+            if attribute.name == name:
+                return attribute
+        return None
+
+    def has_attribute(self, name):
+        return self.attribute(name) is not None
+
+    @property
+    def is_scalar(self):
+        return self.type in SCALAR_TYPES or self.type.startswith('Unsupported(')
+
+    @property
+    def relation(self):
+        return self.attribute('relation')
+
+    @property
+    def relation_fields(self):
+        """Champs scalaires porteurs de la clé étrangère (`fields: [...]`)"""
+        relation = self.relation
+        if relation is None:
+            return []
+        value = relation.argument('fields')
+        return parse_field_list(value) if value else []
+
+    @property
+    def native_type(self):
+        """Type natif éventuel (@db.Uuid, @db.VarChar(255)...)"""
+        for attribute in self.attributes:
+            if attribute.name.startswith('db.'):
+                return attribute
+        return None
+
+    def with_attribute(self, text):
+        """Nouveau champ avec l'attribut `text` ajouté avant le commentaire"""
+        end = self._comment_start if self._comment_start is not None else len(self.raw.rstrip())
+        head = self.raw[:end].rstrip()
+        tail = self.raw[end:]
+        separator = ' ' if tail else ''
+        return parse_member(f'{head} {text}{separator}{tail}', 'model')
+
+    def without_attribute(self, name):
+        """Nouveau champ sans l'attribut `name`"""
+        pattern = re.compile(r'[ \t]*@' + re.escape(name) + r'(?:\((?:[^()"]|"(?:[^"\\]|\\.)*"|\([^()]*\))*\))?(?![\w.])')
+        return parse_member(pattern.sub('', self.raw, count=1), 'model')
+
+    def with_type(self, type_text):
+        """Nouveau champ avec un autre type (modificateurs conservés)"""
+        match = _FIELD_RE.match(self.raw)
+        raw = self.raw[:match.start('type')] + type_text + self.raw[match.end('type'):]
+        return parse_member(raw, 'model')
+
+
+class BlockAttribute(Member):
+    """Attribut de bloc : @@index, @@unique, @@id, @@map..."""
+
+    kind = 'block_attribute'
+
+    def __init__(self, raw, match):
+        super().__init__(raw)
+        self.indent = match.group('indent')
+        attributes, self.comment, _ = _parse_attributes(raw, match.start('rest') - 2)
+        self.attribute = attributes[0] if attributes else Attribute('', None, block=True)
+        self.name = self.attribute.name
+
+    @property
+    def fields(self):
+        return self.attribute.fields
+
+    def argument(self, key, position=None):
+        return self.attribute.argument(key, position)
+
+
+class EnumValue(Member):
+    kind = 'enum_value'
+
+    def __init__(self, raw, match):
+        super().__init__(raw)
+        self.name = match.group('name')
+        self.attributes, self.comment, _ = _parse_attributes(raw, match.start('rest'))
+
+
+class Assignment(Member):
+    """Clé = valeur dans un bloc generator/datasource"""
+
+    kind = 'assignment'
+
+    def __init__(self, raw, match):
+        super().__init__(raw)
+        self.name = match.group('name')
+        self.value = match.group('value')
+
+
+class Block:
+    """Bloc de premier niveau (model, enum, view, type, generator, datasource)"""
+
+    def __init__(self, kind, name, header, members, footer='}'):
+        self.kind = kind
+        self.name = name
+        self.header = header
+        self.members = members
+        self.footer = footer
+
+    def __repr__(self):
+        return f'Block({self.kind} {self.name}, {len(self.members)} membres)'
+
+    def render(self):
+        return self.header + '\n'.join(member.render() for member in self.members) + self.footer
+
+    # --- Lecture ---------------------------------------------------------
+
+    @property
+    def fields(self):
+        return [m for m in self.members if m.kind == 'field']
+
+    def field(self, name):
+        for member in self.members:
+            if member.kind == 'field' and member.name == name:
+                return member
+        return None
+
+    def has_field(self, name):
+        return self.field(name) is not None
+
+    @property
+    def id_field(self):
+        for member in self.members:
+            if member.kind == 'field' and member.has_attribute('id'):
+                return member
+        return None
+
+    def block_attributes(self, name=None):
+        return [
+            m for m in self.members
+            if m.kind == 'block_attribute' and (name is None or m.name == name)
+        ]
+
+    @property
+    def indexes(self):
+        return self.block_attributes('index')
+
+    @property
+    def uniques(self):
+        return self.block_attributes('unique')
+
+    @property
+    def values(self):
+        return [m for m in self.members if m.kind == 'enum_value']
+
+    def index_of(self, member):
+        for position, candidate in enumerate(self.members):
+            if candidate is member:
+                return position
+        raise ValueError(f'{member!r} absent de {self!r}')
+
+    # --- Écriture --------------------------------------------------------
+
+    def insert(self, position, *members):
+        self.members[position:position] = [_as_member(m, self.kind) for m in members]
+
+    def insert_after(self, anchor, *members):
+        self.insert(self.index_of(anchor) + 1, *members)
+
+    def insert_before(self, anchor, *members):
+        self.insert(self.index_of(anchor), *members)
+
+    def append(self, *members):
+        """Ajoute des membres à la fin du bloc (avant la ligne du `}`)"""
+        position = len(self.members)
+        if position > 1 and self.members[-1].kind == 'blank' and not self.members[-1].raw.strip():
+            position -= 1
+        self.insert(position, *members)
+
+    def replace(self, old, new):
+        self.members[self.index_of(old)] = _as_member(new, self.kind)
+
+    def remove(self, member):
+        del self.members[self.index_of(member)]
+
+
+class Schema:
+    """Schema complet : alternance de texte libre (commentaires, lignes vides) et de blocs"""
+
+    def __init__(self, items):
+        self.items = items
+        self._reindex()
+
+    def __repr__(self):
+        return f'Schema({len(self.blocks())} blocs)'
+
+    def _reindex(self):
+        self._by_key = {}
+        for item in self.items:
+            if isinstance(item, Block):
+                self._by_key.setdefault((item.kind, item.name), []).append(item)
+
+    def render(self):
+        return ''.join(item if isinstance(item, str) else item.render() for item in self.items)
+
+    __str__ = render
+
+    def blocks(self, kind=None):
+        return [
+            item for item in self.items
+            if isinstance(item, Block) and (kind is None or item.kind == kind)
+        ]
+
+    def find_all(self, kind, name):
+        return list(self._by_key.get((kind, name), []))
+
+    def find(self, kind, name):
+        """Première occurrence du bloc `kind name`, ou None"""
+        matches = self._by_key.get((kind, name))
+        return matches[0] if matches else None
+
+    def model(self, name):
+        return self.find('model', name)
+
+    def enum(self, name):
+        return self.find('enum', name)
+
+    @property
+    def models(self):
+        """Modèles par nom (première occurrence), dans l'ordre du fichier"""
+        result = {}
+        for block in self.blocks('model'):
+            result.setdefault(block.name, block)
+        return result
+
+    @property
+    def enums(self):
+        result = {}
+        for block in self.blocks('enum'):
+            result.setdefault(block.name, block)
+        return result
+
+    @property
+    def datasource_provider(self):
+        for block in self.blocks('datasource'):
+            for member in block.members:
+                if member.kind == 'assignment' and member.name == 'provider':
+                    return member.value.strip('"')
+        return None
+
+    def relations(self, model):
+        """Champs relationnels d'un modèle : [(champ, modèle cible)]"""
+        if isinstance(model, str):
+            model = self.model(model)
+        return [
+            (field, self.model(field.type))
+            for field in model.fields
+            if self.model(field.type) is not None
+        ]
+
+    def insert_after(self, anchor, items):
+        """Insère des éléments (texte libre ou blocs) après le bloc `anchor`"""
+        if isinstance(items, Schema):
+            items = items.items
+        position = next(i for i, item in enumerate(self.items) if item is anchor) + 1
+        self.items[position:position] = list(items)
+        self._reindex()
+
+    def append(self, items):
+        if isinstance(items, Schema):
+            items = items.items
+        self.items.extend(items)
+        self._reindex()
+
+    def remove(self, block):
+        self.items = [item for item in self.items if item is not block]
+        self._reindex()
+
+
+# --- Parsing -------------------------------------------------------------
+
+def parse_member(raw, block_kind='model'):
+    """Parse une ligne logique de bloc en membre typé"""
+    if isinstance(raw, Member):
+        return raw
+    stripped = raw.strip()
+    if not stripped:
+        return Blank(raw)
+    if stripped.startswith('//'):
+        return Comment(raw)
+    if stripped.startswith('@@'):
+        return BlockAttribute(raw, _BLOCK_ATTRIBUTE_RE.match(raw))
+    if block_kind in ('generator', 'datasource'):
+        match = _ASSIGNMENT_RE.match(raw)
+        if match:
+            return Assignment(raw, match)
+    elif block_kind == 'enum':
+        match = _ENUM_VALUE_RE.match(raw)
+        if match:
+            return EnumValue(raw, match)
+    else:
+        match = _FIELD_RE.match(raw)
+        if match:
+            return Field(raw, match)
+    return Member(raw)
+
+
+_as_member = parse_member
+
+
+def parse_schema(text):
+    """Parse un schema Prisma complet en une seule passe linéaire"""
+    items = []
+    lines = text.split('\n')
+    trivia = []
+    index = 0
+    total = len(lines)
+
+    while index < total:
+        line = lines[index]
+        header = _HEADER_RE.match(line) if '{' in line else None
+        if header is None:
+            trivia.append(line)
+            index += 1
+            continue
+
+        # Fin du texte libre précédent (le '\n' qui le termine inclus)
+        if trivia:
+            items.append('\n'.join(trivia) + '\n')
+            trivia = []
+
+        kind, name = header.group('kind'), header.group('name')
+        header_text = line[:header.end()]
+        body = [line[header.end():]]
+        depth = 1
+        block_end = None
+        scan = body[0]
+        while True:
+            for token in _STRUCT_RE.finditer(scan):
+                char = token.group()
+                if char == '{':
+                    depth += 1
+                elif char == '}':
+                    depth -= 1
+                    if depth == 0:
+                        block_end = token.start()
+                        break
+            if block_end is not None:
+                break
+            index += 1
+            if index >= total:
+                raise ValueError(f'Bloc {kind} {name} non fermé')
+            scan = lines[index]
+            body.append(scan)
+
+        # La dernière ligne contient le '}' : ce qui suit redevient du texte libre
+        last = body.pop()
+        after = last[block_end + 1:]
+        body.append(last[:block_end])
+
+        members = [parse_member(raw, kind) for raw in _logical_lines(body)]
+        items.append(Block(kind, name, header_text, members))
+        index += 1
+        if index < total or after:
+            trivia.append(after)
+
+    if trivia:
+        items.append('\n'.join(trivia))
+    return Schema(items)
+
+
+def load_schema(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return parse_schema(f.read())
+
+
+def _logical_lines(lines):
+    """Regroupe les lignes dont les parenthèses/crochets ne sont pas refermés"""
+    if not any('(' in line or '[' in line for line in lines):
+        return lines
+    result = []
+    pending = None
+    depth = 0
+    for line in lines:
+        pending = line if pending is None else pending + '\n' + line
+        for token in _STRUCT_RE.finditer(line):
+            char = token.group()
+            if char in '([':
+                depth += 1
+            elif char in ')]':
+                depth -= 1
+        if depth <= 0:
+            result.append(pending)
+            pending = None
+            depth = 0
+    if pending is not None:
+        result.append(pending)
+    return result
+
+
+def _parse_attributes(raw, start):
+    """Extrait les attributs et le commentaire de fin de ligne à partir de `start`"""
+    attributes = []
+    comment = None
+    comment_start = None
+    current = None
+    args_start = None
+    depth = 0
+    for token in _ATTRIBUTE_TOKEN_RE.finditer(raw, start):
+        value = token.group()
+        if value == '//' and depth == 0:
+            comment_start = token.start()
+            comment = raw[comment_start:]
+            break
+        if value == '(':
+            if depth == 0 and current is not None and args_start is None \
+                    and not raw[current[1]:token.start()].strip():
+                args_start = token.end()
+            depth += 1
+        elif value == ')':
+            depth -= 1
+            if depth == 0 and args_start is not None:
+                current[2] = raw[args_start:token.start()]
+                args_start = None
+        elif value.startswith('@') and depth == 0:
+            block = value.startswith('@@')
+            current = [value.lstrip('@'), token.end(), None, block]
+            attributes.append(current)
+    return [Attribute(name, args, block) for name, _, args, block in attributes], comment, comment_start
+
+
+def split_top_level(text):
+    """Découpe `a, b(c, d), [e, f]` sur les virgules de premier niveau"""
+    parts = []
+    depth = 0
+    start = 0
+    in_string = False
+    escaped = False
+    for position, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in '([{':
+            depth += 1
+        elif char in ')]}':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            parts.append(text[start:position].strip())
+            start = position + 1
+    tail = text[start:].strip()
+    if tail:
+        parts.append(tail)
+    return parts
+
+
+def _split_named_argument(part):
+    match = re.match(r'(\w+)\s*:(?!:)\s*(.*)', part, re.DOTALL)
+    if match and not part.startswith('['):
+        return match.group(1), match.group(2).strip()
+    return None, part.strip()
+
+
+def parse_field_list(value):
+    """`[a, b(sort: Desc)]` → ['a', 'b']"""
+    value = value.strip()
+    if value.startswith('[') and value.endswith(']'):
+        value = value[1:-1]
+    names = []
+    for part in split_top_level(value):
+        match = re.match(r'\w+', part)
+        if match:
+            names.append(match.group())
+    return names
@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+Lecture des journaux de requêtes Prisma / PostgreSQL
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Formats reconnus, ligne à ligne (mémoire constante, .gz détecté) :
+
+    - événements `query` de Prisma, une ligne JSON par requête
+      (PRISMA_QUERY_EVENTS=true, voir src/lib/prisma.ts) :
+      {"prisma":"query","duration":12,"query":"SELECT ...","params":"[...]"}
+    - journal texte PostgreSQL avec log_min_duration_statement :
+      ... LOG:  duration: 12.345 ms  execute <unnamed>: SELECT ...
+      ... DETAIL:  parameters: $1 = 'tenant-1', $2 = '20'
+    - jsonlog PostgreSQL 15+ (champs message / detail).
+
+Chaque requête est réduite à une empreinte (littéraux et paramètres → ?,
+listes IN / VALUES repliées), rattachée à son modèle Prisma par le nom de
+table et à ses routes par l'index route → modèle construit depuis les
+route.ts (mêmes formes que les passes de migrate-apis). Les latences sont
+agrégées dans des histogrammes logarithmiques (p50/p95/p99 à ~3 % près,
+taille bornée quel que soit le volume).
+
+Usage:
+    from query_log import fingerprint, open_log, read_entries
+
+    with open_log('postgresql.log.gz') as lines:
+        for entry in read_entries(lines):
+            print(fingerprint(entry.sql), entry.duration_ms, entry.tenant())
+"""
+
+import gzip
+import hashlib
+import io
+import json
+import math
+import re
+import sys
+from contextlib import contextmanager
+
+from online_migration import TENANT_COLUMN, table_name
+from route_analysis import find_handlers
+
+# --- Lecture -----------------------------------------------------------------
+
+_GZIP_MAGIC = b'\x1f\x8b'
+
+
+@contextmanager
+def open_log(path):
+    """Lignes d'un journal (`-` = stdin), gzip détecté au contenu"""
+    if path == '-':
+        yield sys.stdin
+        return
+    raw = open(path, 'rb')
+    try:
+        stream = gzip.GzipFile(fileobj=raw) if raw.peek(2)[:2] == _GZIP_MAGIC else raw
+        yield io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+    finally:
+        raw.close()
+
+
+class LogEntry:
+    """Une requête exécutée: SQL, durée, paramètres liés"""
+
+    def __init__(self, sql, duration_ms, params=None, source='postgres'):
+        self.sql = sql
+        self.duration_ms = duration_ms
+        self.params = params or {}      # {1: valeur de $1, ...}
+        self.source = source
+
+    def __repr__(self):
+        return f'LogEntry({self.duration_ms:.3f} ms, {self.sql[:60]!r})'
+
+    def tenant(self, column=TENANT_COLUMN):
+        """Valeur du filtre `"tenantId" = $n` / `= 'littéral'`, ou colonne d'un INSERT (None si absent)"""
+        match = _tenant_re(column).search(self.sql)
+        if match is not None:
+            token = match.group('token')
+        else:
+            token = self._inserted(column)
+            if token is None:
+                return None
+        if token.startswith('$'):
+            value = self.params.get(int(token[1:]))
+            return None if value is None else str(value)
+        return token[1:-1].replace("''", "'")
+
+    def _inserted(self, column):
+        """Valeur (`$n` ou littéral) de `column` dans la première ligne d'un INSERT ... VALUES"""
+        match = _INSERT_RE.match(self.sql)
+        if match is None:
+            return None
+        columns = [name.strip().strip('"') for name in match.group('columns').split(',')]
+        values = _VALUE_TOKEN_RE.findall(match.group('values'))
+        if column not in columns or len(values) != len(columns):
+            return None
+        return values[columns.index(column)]
+
+
+_TENANT_RES = {}
+
+
+def _tenant_re(column):
+    if column not in _TENANT_RES:
+        _TENANT_RES[column] = re.compile(
+            r'"' + re.escape(column) + r'"\s*(?:=|IN\s*\()\s*'
+            r"(?P<token>\$\d+|'(?:[^']|'')*')"
+        )
+    return _TENANT_RES[column]
+
+
+_INSERT_RE = re.compile(
+    r'\s*INSERT INTO\s+\S+\s*\((?P<columns>[^)]*)\)\s*VALUES\s*\((?P<values>(?:[^()\']|\'(?:[^\']|\'\')*\')*)\)',
+    re.IGNORECASE,
+)
+_VALUE_TOKEN_RE = re.compile(r"\$\d+|'(?:[^']|'')*'|[^,\s][^,]*")
+
+
+# `execute` (protocole étendu) ou `statement` (simple): parse/bind ne sont pas comptés
+_PG_DURATION_RE = re.compile(
+    r'duration: (?P<ms>\d+(?:\.\d+)?) ms\s+(?:statement|execute [^:]*): (?P<sql>.*)'
+)
+_PG_PARAMETERS_RE = re.compile(r'(?:DETAIL:\s+)?parameters: (?P<params>.*)')
+_PG_PARAMETER_RE = re.compile(r"\$(?P<index>\d+) = (?:'(?P<value>(?:[^']|'')*)'|NULL)")
+
+
+def _pg_params(text):
+    return {
+        int(match.group('index')): None if match.group('value') is None else match.group('value').replace("''", "'")
+        for match in _PG_PARAMETER_RE.finditer(text)
+    }
+
+
+def _prisma_params(value):
+    """Paramètres d'un événement Prisma (chaîne JSON, parfois non JSON pour les dates)"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return {}
+    if not isinstance(value, list):
+        return {}
+    return {position: param for position, param in enumerate(value, start=1)}
+
+
+def _json_entry(record):
+    """LogEntry d'une ligne JSON (événement Prisma ou jsonlog PostgreSQL)"""
+    if 'query' in record and 'duration' in record:
+        try:
+            duration = float(record['duration'])
+        except (TypeError, ValueError):
+            return None
+        return LogEntry(record['query'], duration, _prisma_params(record.get('params')), 'prisma')
+    message = record.get('message')
+    if isinstance(message, str):
+        match = _PG_DURATION_RE.search(message)
+        if match:
+            detail = record.get('detail') or ''
+            return LogEntry(match.group('sql'), float(match.group('ms')), _pg_params(detail), 'postgres')
+    return None
+
+
+def read_entries(lines):
+    """LogEntry des lignes d'un journal (formats mélangés acceptés)"""
+    pending = None
+    for line in lines:
+        line = line.rstrip('\n')
+        # Suite d'une requête multi-ligne du journal texte (tabulation en tête)
+        if pending is not None and line[:1] in ('\t', ' ') and not line.lstrip().startswith('DETAIL:'):
+            pending.sql += '\n' + line.strip()
+            continue
+        if pending is not None:
+            match = _PG_PARAMETERS_RE.search(line)
+            if match and 'DETAIL:' in line:
+                pending.params = _pg_params(match.group('params'))
+                yield pending
+                pending = None
+                continue
+            yield pending
+            pending = None
+
+        brace = line.find('{')
+        if brace >= 0 and ('"query"' in line or '"message"' in line):
+            try:
+                record = json.loads(line[brace:])
+            except ValueError:
+                record = None
+            if isinstance(record, dict):
+                entry = _json_entry(record)
+                if entry is not None:
+                    yield entry
+                continue
+        match = _PG_DURATION_RE.search(line)
+        if match:
+            pending = LogEntry(match.group('sql'), float(match.group('ms')))
+    if pending is not None:
+        yield pending
+
+
+# --- Empreintes --------------------------------------------------------------
+
+_COMMENT_RE = re.compile(r'/\*.*?\*/|--[^\n]*', re.DOTALL)
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_PARAM_RE = re.compile(r'\$\d+')
+_NUMBER_RE = re.compile(r'(?<![\w"$.])-?\d+(?:\.\d+)?(?:[eE][-+]?\d+)?\b')
+_LIST_RE = re.compile(r'\(\s*\?(?:\s*,\s*\?)+\s*\)')
+_TUPLES_RE = re.compile(r'\(\.\.\.\)(?:\s*,\s*\((?:\.\.\.|\?)\))+')
+_SPACE_RE = re.compile(r'\s+')
+_SCHEMA_PREFIX_RE = re.compile(r'"public"\.')
+
+
+def normalize(sql):
+    """SQL sans littéraux ni paramètres (une liste IN de 3 ou 30 valeurs: même empreinte)"""
+    text = _COMMENT_RE.sub(' ', sql)
+    text = _STRING_RE.sub('?', text)
+    text = _PARAM_RE.sub('?', text)
+    text = _NUMBER_RE.sub('?', text)
+    text = _LIST_RE.sub('(...)', text)
+    text = _TUPLES_RE.sub('(...)', text)
+    return _SPACE_RE.sub(' ', text).strip().rstrip(';').strip()
+
+
+def fingerprint(sql):
+    """(identifiant court, SQL normalisé)"""
+    text = normalize(sql)
+    return hashlib.blake2b(text.encode(), digest_size=6).hexdigest(), text
+
+
+def display_sql(text, width=160):
+    """SQL normalisé abrégé pour les rapports (schéma public omis)"""
+    text = _SCHEMA_PREFIX_RE.sub('', text)
+    return text if len(text) <= width else text[:width - 1] + '…'
+
+
+_VERB_RE = re.compile(r'^\s*(?:WITH\b.*?\)\s*)?(?P<verb>SELECT|INSERT|UPDATE|DELETE)\b', re.IGNORECASE | re.DOTALL)
+_TABLE_RE = re.compile(r'\b(?:FROM|INTO|UPDATE)\s+(?:"[^"]+"\.)?"(?P<table>[^"]+)"', re.IGNORECASE)
+_FILTER_RE = re.compile(
+    r'"(?P<column>[^"]+)"\s*(?:=|<>|!=|>=|<=|<|>|\bIN\b|\bLIKE\b|\bILIKE\b|\bIS\b)', re.IGNORECASE
+)
+_ORDER_RE = re.compile(r'\bORDER BY\b(?P<order>.*?)(?:\bLIMIT\b|\bOFFSET\b|\)|$)', re.IGNORECASE | re.DOTALL)
+_ORDER_COLUMN_RE = re.compile(r'"(?P<column>[^"]+)"\s*(?:ASC|DESC)?\s*(?:,|$)', re.IGNORECASE)
+
+
+class SqlShape:
+    """Table, verbe et colonnes filtrées / triées d'une requête normalisée"""
+
+    def __init__(self, text):
+        verb = _VERB_RE.match(text)
+        self.verb = verb.group('verb').upper() if verb else None
+        table = _TABLE_RE.search(text)
+        self.table = table.group('table') if table else None
+        where = re.split(r'\bWHERE\b', text, maxsplit=1, flags=re.IGNORECASE)
+        self.filters = set()
+        if len(where) == 2:
+            self.filters = {match.group('column') for match in _FILTER_RE.finditer(where[1])}
+        order = _ORDER_RE.search(text)
+        self.order = [match.group('column') for match in _ORDER_COLUMN_RE.finditer(order.group('order'))] if order else []
+
+
+# --- Index route → modèle ----------------------------------------------------
+
+# Verbe SQL émis par chaque opération Prisma
+OPERATION_VERBS = {
+    'findMany': 'SELECT', 'findFirst': 'SELECT', 'findFirstOrThrow': 'SELECT',
+    'findUnique': 'SELECT', 'findUniqueOrThrow': 'SELECT', 'count': 'SELECT',
+    'aggregate': 'SELECT', 'groupBy': 'SELECT',
+    'create': 'INSERT', 'createMany': 'INSERT', 'upsert': 'INSERT',
+    'update': 'UPDATE', 'updateMany': 'UPDATE',
+    'delete': 'DELETE', 'deleteMany': 'DELETE',
+}
+_PRISMA_CALL_RE = re.compile(
+    r'\b(?:prisma|tx)\.(?P<delegate>\w+)\.(?P<op>' + '|'.join(OPERATION_VERBS) + r')\('
+)
+UNKNOWN_ROUTE = '(route inconnue)'
+
+
+class RouteIndex:
+    """
+    Routes susceptibles d'émettre une requête: appels Prisma de chaque
+    handler (modèle, verbe) affinés par les colonnes filtrées (query_shapes)
+    """
+
+    def __init__(self, schema):
+        self.models = {table_name(model): model.name for model in schema.models.values()}
+        self._delegates = {name[0].lower() + name[1:]: name for name in schema.models}
+        self.calls = {}         # (modèle, verbe) → {endpoint}
+        self.shapes = {}        # (modèle, verbe) → [(colonnes filtrées, endpoint)]
+        self._cache = {}
+
+    def add_route(self, content, route, shapes=()):
+        for handler in find_handlers(content):
+            endpoint = f'{handler.method} {route}'
+            for call in _PRISMA_CALL_RE.finditer(handler.body(content)):
+                model = self._delegates.get(call.group('delegate'))
+                if model is not None:
+                    self.calls.setdefault((model, OPERATION_VERBS[call.group('op')]), set()).add(endpoint)
+        for shape in shapes:
+            model = self._delegates.get(shape.delegate)
+            if model is None or shape.unresolved:
+                continue
+            columns = frozenset(shape.equals) | frozenset(shape.ranges) | frozenset(name for name, _ in shape.order)
+            if shape.tenant:
+                columns |= {TENANT_COLUMN}
+            verb = OPERATION_VERBS.get(shape.operation)
+            self.shapes.setdefault((model, verb), []).append((columns, shape.endpoint))
+
+    def model(self, sql_shape):
+        return self.models.get(sql_shape.table)
+
+    def endpoints(self, sql_shape):
+        """Routes candidates (les mieux appariées par colonnes), triées"""
+        model = self.model(sql_shape)
+        if model is None or sql_shape.verb is None:
+            return [UNKNOWN_ROUTE]
+        key = (model, sql_shape.verb, frozenset(sql_shape.filters), tuple(sql_shape.order))
+        if key not in self._cache:
+            columns = sql_shape.filters | set(sql_shape.order)
+            best, matches = 0, set()
+            for shape_columns, endpoint in self.shapes.get((model, sql_shape.verb), ()):
+                if not shape_columns or not shape_columns <= columns:
+                    continue
+                if len(shape_columns) > best:
+                    best, matches = len(shape_columns), {endpoint}
+                elif len(shape_columns) == best:
+                    matches.add(endpoint)
+            if not matches:
+                matches = self.calls.get((model, sql_shape.verb), set())
+            self._cache[key] = sorted(matches) or [UNKNOWN_ROUTE]
+        return self._cache[key]
+
+
+# --- Agrégats ----------------------------------------------------------------
+
+class LatencyHistogram:
+    """Histogramme logarithmique: quantiles à ~3 % près en mémoire bornée"""
+
+    RATIO = 2 ** (1 / 16)
+    FLOOR_MS = 0.001
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        bucket = math.floor(math.log(max(ms, self.FLOOR_MS)) / math.log(self.RATIO))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total_ms += other.total_ms
+        self.max_ms = max(self.max_ms, other.max_ms)
+        return self
+
+    def percentile(self, fraction):
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(fraction * self.count))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # Milieu géométrique du seau, borné par le maximum observé
+                return min(self.RATIO ** (bucket + 0.5), self.max_ms)
+        return self.max_ms
+
+    def summary(self):
+        return {
+            'calls': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.50), 3),
+            'p95_ms': round(self.percentile(0.95), 3),
+            'p99_ms': round(self.percentile(0.99), 3),
+            'max_ms': round(self.max_ms, 3),
+        }
+
+
+class QueryStats:
+    """Statistiques d'une empreinte"""
+
+    def __init__(self, key, text):
+        self.key = key
+        self.text = text
+        self.shape = SqlShape(text)
+        self.latency = LatencyHistogram()
+        self.tenants = set()
+        self.tenants_overflow = False
+
+
+class LogAnalysis:
+    """Agrégation en flux par empreinte et par tenant (routes déduites à la fin)"""
+
+    MAX_TENANTS_PER_QUERY = 1000
+
+    def __init__(self, tenant_column=TENANT_COLUMN, min_ms=0.0):
+        self.tenant_column = tenant_column
+        self.min_ms = min_ms
+        self.queries = {}
+        self.tenants = {}
+        self.entries = 0
+        self.skipped = 0
+        self._fingerprints = {}
+
+    def add(self, entry):
+        if entry.duration_ms < self.min_ms:
+            self.skipped += 1
+            return
+        self.entries += 1
+        # Les SQL Prisma se répètent à l'identique: normalisation une seule fois
+        cached = self._fingerprints.get(entry.sql)
+        if cached is None:
+            cached = fingerprint(entry.sql)
+            if len(self._fingerprints) < 100000:
+                self._fingerprints[entry.sql] = cached
+        key, text = cached
+        stats = self.queries.get(key)
+        if stats is None:
+            stats = self.queries[key] = QueryStats(key, text)
+        stats.latency.add(entry.duration_ms)
+
+        tenant = entry.tenant(self.tenant_column)
+        if tenant is not None:
+            self.tenants.setdefault(tenant, LatencyHistogram()).add(entry.duration_ms)
+            if len(stats.tenants) < self.MAX_TENANTS_PER_QUERY:
+                stats.tenants.add(tenant)
+            elif tenant not in stats.tenants:
+                stats.tenants_overflow = True
+
+    def routes(self, index):
+        """{endpoint: (histogramme fusionné, [empreintes])} via l'index route → modèle"""
+        routes = {}
+        for stats in self.queries.values():
+            for endpoint in index.endpoints(stats.shape):
+                histogram, keys = routes.setdefault(endpoint, (LatencyHistogram(), []))
+                histogram.merge(stats.latency)
+                keys.append(stats.key)
+        return routes
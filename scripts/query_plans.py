@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Plans d'exécution PostgreSQL des requêtes relevées dans les routes API
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Chaque forme de requête (query_shapes) devient son SQL équivalent sur le
+jeu de données synthétique (synthetic_dataset) : filtre tenant, égalités,
+intervalles et tri, avec des valeurs qui existent dans les données.
+`EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)` est exécuté par psql, en une
+seule session, et chaque plan est résumé : parcours séquentiels, pages
+lues (shared hit + read) et temps d'exécution.
+
+Usage:
+    from query_plans import explain_queries, hot_queries
+
+    queries = hot_queries(schema, shapes)
+    explain_queries(PSQL_COMMAND, queries)
+    for query in queries:
+        print(query.sql, query.summary.seq_scans, query.summary.buffers)
+"""
+
+import json
+import shlex
+import subprocess
+
+from online_migration import column_name, quote
+from synthetic_dataset import (
+    DATASET_NAMESPACE, DEFAULT_TENANTS, TENANT_FIELD, column_fields, qualified, value_sql,
+)
+
+# Base du docker-compose.yml (service db)
+PSQL_COMMAND = 'docker compose exec -T db psql -U postgres -d kairo'
+
+# Opérations de lecture (EXPLAIN ANALYZE exécute la requête: pas d'écriture)
+READ_OPERATIONS = {
+    'findMany': 'page',
+    'findFirst': 'first',
+    'findFirstOrThrow': 'first',
+    'count': 'count',
+    'aggregate': 'count',
+    'groupBy': 'count',
+}
+# Une page de src/lib/pagination.ts (DEFAULT_PAGE_SIZE + 1)
+PAGE_ROWS = 101
+# Intervalle [ligne 1, ligne RANGE_SPAN] pour les filtres gte/lte
+RANGE_SPAN = 10
+_UNFILTERABLE_TYPES = {'Json', 'Bytes'}
+_MARKER = '@@explain '
+
+
+class PlanSummary:
+    """Résumé d'un plan EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)"""
+
+    def __init__(self, explain):
+        root = explain[0]
+        self.plan = root['Plan']
+        self.execution_ms = root.get('Execution Time', 0.0)
+        # Les compteurs de buffers d'un nœud incluent ceux de ses enfants
+        self.buffers = self.plan.get('Shared Hit Blocks', 0) + self.plan.get('Shared Read Blocks', 0)
+        self.nodes = list(_walk(self.plan))
+
+    @property
+    def seq_scans(self):
+        return [node['Relation Name'] for node in self.nodes if node['Node Type'] == 'Seq Scan']
+
+    @property
+    def access_paths(self):
+        """`Index Scan using X`, `Seq Scan on Y`... des nœuds qui lisent une table"""
+        paths = []
+        for node in self.nodes:
+            if 'Index Name' in node:
+                paths.append(f"{node['Node Type']} using {node['Index Name']}")
+            elif 'Relation Name' in node:
+                paths.append(f"{node['Node Type']} on {node['Relation Name']}")
+        return paths
+
+
+def _walk(plan):
+    yield plan
+    for child in plan.get('Plans', ()):
+        yield from _walk(child)
+
+
+class PlanQuery:
+    """Requête SQL équivalente à une ou plusieurs formes Prisma"""
+
+    def __init__(self, model, operation, sql):
+        self.model = model
+        self.operation = operation
+        self.sql = sql
+        self.endpoints = set()
+        self.summary = None
+
+    def failures(self, max_buffers, max_ms):
+        """Raisons d'échec du plan au regard des budgets"""
+        summary = self.summary
+        reasons = []
+        if summary.seq_scans:
+            reasons.append(f"parcours séquentiel ({', '.join(summary.seq_scans)})")
+        if max_buffers is not None and summary.buffers > max_buffers:
+            reasons.append(f'{summary.buffers} pages lues > budget {max_buffers}')
+        if max_ms is not None and summary.execution_ms > max_ms:
+            reasons.append(f'{summary.execution_ms:.1f} ms > budget {max_ms:g} ms')
+        return reasons
+
+
+def shape_sql(schema, model, shape, tenants=DEFAULT_TENANTS, namespace=DATASET_NAMESPACE):
+    """SQL de lecture équivalent à `shape` (None si l'opération écrit)"""
+    kind = READ_OPERATIONS.get(shape.operation)
+    if kind is None:
+        return None
+    fields = {
+        field.name: field for field in column_fields(schema, model)
+        if not field.is_list and field.type not in _UNFILTERABLE_TYPES
+    }
+
+    def column(name):
+        return quote(column_name(fields[name]))
+
+    def value(name, g):
+        return value_sql(schema, model, fields[name], g, tenants)
+
+    conditions = [f'{column(TENANT_FIELD)} = {value(TENANT_FIELD, "1")}']
+    for name in shape.equals:
+        if name in fields and name != TENANT_FIELD:
+            conditions.append(f'{column(name)} = {value(name, "1")}')
+    for name in shape.ranges:
+        # Intervalle sans objet sur un booléen ou un enum
+        if name in fields and fields[name].type != 'Boolean' and fields[name].type not in schema.enums:
+            conditions.append(f'{column(name)} BETWEEN {value(name, "1")} AND {value(name, str(RANGE_SPAN))}')
+    where = ' AND '.join(conditions)
+
+    if kind == 'count':
+        return f'SELECT count(*) FROM {qualified(model, namespace)} WHERE {where}'
+    order = ', '.join(
+        column(name) + (' DESC' if direction == 'desc' else '')
+        for name, direction in shape.order if name in fields
+    )
+    sql = f'SELECT * FROM {qualified(model, namespace)} WHERE {where}'
+    if order:
+        sql += f' ORDER BY {order}'
+    return sql + f" LIMIT {1 if kind == 'first' else PAGE_ROWS}"
+
+
+def hot_queries(schema, shapes, tenants=DEFAULT_TENANTS, namespace=DATASET_NAMESPACE):
+    """
+    Requêtes chaudes: lectures scopées par tenant sur un modèle qui porte
+    tenantId, dédoublonnées par SQL (avec les routes qui les émettent)
+    """
+    models = {name[0].lower() + name[1:]: model for name, model in schema.models.items()}
+    queries = {}
+    for shape in shapes:
+        model = models.get(shape.delegate)
+        if shape.unresolved or not shape.tenant or model is None or not model.has_field(TENANT_FIELD):
+            continue
+        sql = shape_sql(schema, model, shape, tenants, namespace)
+        if sql is None:
+            continue
+        query = queries.setdefault(sql, PlanQuery(model.name, shape.operation, sql))
+        query.endpoints.add(shape.endpoint)
+    return sorted(queries.values(), key=lambda query: (query.model, query.sql))
+
+
+def run_psql(command, sql):
+    """Exécute un script par psql (sortie non alignée, arrêt à la première erreur)"""
+    result = subprocess.run(
+        shlex.split(command) + ['-X', '-q', '-A', '-t', '-v', 'ON_ERROR_STOP=1'],
+        input=sql, capture_output=True, text=True, check=True,
+    )
+    return result.stdout
+
+
+def explain_script(queries):
+    """Script psql: un EXPLAIN par requête, chacun précédé d'un marqueur"""
+    return ''.join(
+        f"\\echo '{_MARKER}{position}'\n"
+        f'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query.sql};\n'
+        for position, query in enumerate(queries)
+    )
+
+
+def explain_queries(command, queries):
+    """Exécute les EXPLAIN en une session psql et renseigne query.summary"""
+    chunks = {}
+    current = None
+    for line in run_psql(command, explain_script(queries)).splitlines():
+        if line.startswith(_MARKER):
+            current = int(line[len(_MARKER):])
+            chunks[current] = []
+        elif current is not None:
+            chunks[current].append(line)
+    for position, query in enumerate(queries):
+        query.summary = PlanSummary(json.loads('\n'.join(chunks[position])))
+    return queries
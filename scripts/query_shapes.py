@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Extraction des formes de requêtes Prisma des routes API
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Pour chaque appel `prisma.<delegate>.<op>({ where, orderBy })` d'un handler,
+on relève les champs filtrés par égalité, les champs filtrés par intervalle
+(gte/lte/in...), le tri et la présence du filtre tenant. Un `where` passé
+par variable est résolu dans le handler (`const where: any = { ... }` puis
+`where.status = status`).
+
+Usage:
+    from query_shapes import extract_query_shapes
+
+    for shape in extract_query_shapes(content, 'src/app/api/admin/commandes/route.ts'):
+        print(shape.delegate, shape.equals, shape.order)
+"""
+
+import re
+
+from route_analysis import array_items, find_handlers, match_bracket, object_entries
+
+# Opérations dont le where n'est pas servi par la clé primaire
+FILTER_OPERATIONS = (
+    'findMany', 'findFirst', 'findFirstOrThrow', 'count', 'aggregate', 'groupBy',
+    'updateMany', 'deleteMany',
+)
+
+_CALL_RE = re.compile(r'\b(?:prisma|tx)\.(?P<delegate>\w+)\.(?P<op>' + '|'.join(FILTER_OPERATIONS) + r')\(')
+_RANGE_KEYS = {'gt', 'gte', 'lt', 'lte', 'in', 'notIn'}
+_RELATION_KEYS = {'some', 'every', 'none', 'is', 'isNot'}
+_DIRECTION_RE = re.compile(r'''^['"](asc|desc)['"]$''')
+_STATEMENT_END_RE = re.compile(r'[;\n]')
+
+
+class QueryShape:
+    """Forme d'une requête : champs filtrés, tri, filtre tenant"""
+
+    def __init__(self, route, method, delegate, operation, position):
+        self.route = route
+        self.method = method
+        self.delegate = delegate
+        self.operation = operation
+        self.position = position    # offset de l'appel dans le fichier
+        self.tenant = False
+        self.equals = []
+        self.ranges = []
+        self.order = []             # [(champ, 'asc' | 'desc')]
+        self.unresolved = False     # where dynamique non résolu
+
+    def __repr__(self):
+        return (
+            f'QueryShape({self.delegate}.{self.operation}, tenant={self.tenant}, '
+            f'eq={self.equals}, range={self.ranges}, order={self.order})'
+        )
+
+    @property
+    def endpoint(self):
+        return f'{self.method} {self.route}'
+
+    def _add(self, bucket, name):
+        if name not in bucket:
+            bucket.append(name)
+
+
+def _variable_literal(body, name, before):
+    """Objet littéral affecté à `name` avant `before`, plus ses affectations `name.x = ...`"""
+    declaration = None
+    pattern = re.compile(r'\b(?:const|let|var)\s+' + re.escape(name) + r'\b(?:\s*:\s*[^=;\n]+)?\s*=\s*')
+    for match in pattern.finditer(body, 0, before):
+        declaration = match
+    if declaration is None:
+        return None, []
+    start = declaration.end()
+    if not body.startswith('{', start):
+        end = _STATEMENT_END_RE.search(body, start)
+        return body[start:end.start() if end else len(body)].strip(), []
+    end = match_bracket(body, start)
+    if end < 0:
+        return None, []
+    assignments = []
+    assignment_re = re.compile(r'\b' + re.escape(name) + r'\.(?P<key>\w+)\s*=(?!=)\s*')
+    for match in assignment_re.finditer(body, end, before):
+        value_start = match.end()
+        if body.startswith(('{', '['), value_start):
+            value_end = match_bracket(body, value_start) + 1
+        else:
+            value_end = _STATEMENT_END_RE.search(body, value_start)
+            value_end = value_end.start() if value_end else len(body)
+        assignments.append((match.group('key'), body[value_start:value_end].strip()))
+    return body[start:end + 1], assignments
+
+
+def _condition_kind(value):
+    """'eq', 'range' ou None (condition non indexable par un B-tree simple)"""
+    if value.startswith('{'):
+        keys = {key for key, _ in object_entries(value)}
+        if keys & _RELATION_KEYS:
+            return None
+        if keys & _RANGE_KEYS:
+            return 'range'
+        if 'equals' in keys:
+            return 'eq'
+        return None
+    if value.startswith('['):
+        return None
+    return 'eq'
+
+
+def _is_tenant_spread(value):
+    return re.fullmatch(r'(?:\w+\.)*tenantFilter', value) is not None
+
+
+def _collect_where(shape, entries):
+    for key, value in entries:
+        if key is None:
+            if _is_tenant_spread(value):
+                shape.tenant = True
+            elif value.startswith('{'):
+                _collect_where(shape, object_entries(value))
+        elif key == 'tenantId':
+            shape.tenant = True
+        elif key == 'AND':
+            for item in array_items(value) or [value]:
+                _collect_where(shape, object_entries(item))
+        elif key in ('OR', 'NOT'):
+            continue
+        else:
+            kind = _condition_kind(value)
+            if kind == 'eq':
+                shape._add(shape.equals, key)
+            elif kind == 'range':
+                shape._add(shape.ranges, key)
+
+
+def _collect_order(shape, value):
+    items = array_items(value) if value.startswith('[') else [value]
+    for item in items:
+        for key, direction in object_entries(item):
+            if key is None:
+                continue
+            match = _DIRECTION_RE.match(direction)
+            if match is None and direction.startswith('{'):
+                # { createdAt: { sort: 'desc', nulls: 'last' } }
+                sort = dict(object_entries(direction)).get('sort', '')
+                match = _DIRECTION_RE.match(sort)
+            if match:
+                shape.order.append((key, match.group(1)))
+
+
+def _resolve(body, value, before):
+    """Valeur littérale d'un argument (résolution d'un identifiant local)"""
+    if not re.fullmatch(r'\w+', value):
+        return value, []
+    return _variable_literal(body, value, before)
+
+
+def _shape_from_call(body, call, route, method):
+    shape = QueryShape(route, method, call.group('delegate'), call.group('op'), call.start())
+    args_open = call.end() - 1
+    args_close = match_bracket(body, args_open)
+    if args_close < 0:
+        shape.unresolved = True
+        return shape
+    arguments = dict(object_entries(body[args_open + 1:args_close].strip()))
+
+    where = arguments.get('where')
+    if where is not None:
+        if _is_tenant_spread(where):
+            shape.tenant = True
+        else:
+            literal, assignments = _resolve(body, where, call.start())
+            if literal is None:
+                shape.unresolved = True
+            elif _is_tenant_spread(literal):
+                shape.tenant = True
+            else:
+                _collect_where(shape, object_entries(literal) + assignments)
+
+    order = arguments.get('orderBy')
+    if order is not None:
+        literal, _ = _resolve(body, order, call.start())
+        if literal is not None:
+            _collect_order(shape, literal)
+    return shape
+
+
+def extract_query_shapes(content, route):
+    """Formes des requêtes filtrantes de tous les handlers d'un route.ts"""
+    shapes = []
+    for handler in find_handlers(content):
+        body = handler.body(content)
+        for call in _CALL_RE.finditer(body):
+            shape = _shape_from_call(body, call, route, handler.method)
+            shape.position += handler.body_start
+            shapes.append(shape)
+    return shapes
@@ -0,0 +1,29 @@
+/**
+ * Job de rafraîchissement des agrégats journaliers (modèles *DailyRollup)
+ * Auteur: KAIRO Digital
+ * Date: 18 Octobre 2026
+ *
+ * Recalcule tous les jours marqués par les triggers (voir
+ * scripts/generate-rollups.py). À lancer après le SQL compagnon (backfill)
+ * puis en tâche planifiée, par ex. toutes les 5 minutes :
+ *
+ *   npm run rollups:refresh
+ *   ROLLUP_BATCH_SIZE=2000 npm run rollups:refresh
+ */
+
+import { drainDailyRollups } from "../src/lib/stats-rollups";
+import { prisma } from "../src/lib/prisma";
+
+async function main() {
+  const batchSize = Number(process.env.ROLLUP_BATCH_SIZE) || 500;
+  const started = Date.now();
+  const refreshed = await drainDailyRollups(batchSize);
+  console.log(`✅ ${refreshed} jour(s) recalculé(s) en ${Date.now() - started} ms`);
+}
+
+main()
+  .catch((error) => {
+    console.error("❌ Rafraîchissement des agrégats:", error);
+    process.exitCode = 1;
+  })
+  .finally(() => prisma.$disconnect());
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Moteur de réécriture multi-règles (une seule passe par fichier)
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Les règles d'un codemod sont déclarées dans une table. Celles qui
+s'appliquent à un fichier sont fusionnées en UNE alternance compilée
+(mise en cache par combinaison de règles) : le fichier est parcouru une
+seule fois et le résultat est assemblé dans une seule liste de morceaux.
+
+Usage:
+    engine = RewriteEngine([
+        Rule('imports', r'import \\{ a \\} from "x";', 'import { b } from "y";'),
+        Rule('logs', r'console\\.log\\((\\w+)\\)', lambda m, ctx: f'logger.info({m.group(1)})',
+             when=lambda ctx: ctx['debug']),
+    ])
+    content, hits = engine.rewrite(content, {'debug': True})
+"""
+
+import re
+from collections import Counter
+from functools import lru_cache
+
+
+class Rule:
+    """
+    Règle de réécriture.
+
+    - pattern: regex de la règle (ses groupes restent accessibles au callback)
+    - replacement: texte littéral, ou callable(match, context) -> str (le
+      texte du match rendu tel quel: la règle ne s'applique pas à ce match)
+    - when: callable(context) -> bool, la règle est ignorée si False
+    """
+
+    def __init__(self, name, pattern, replacement, when=None, flags=0):
+        self.name = name
+        self.pattern = pattern
+        self.replacement = replacement
+        self.when = when
+        self.flags = flags
+        self.regex = re.compile(pattern, flags)
+        if self.regex.groups and not callable(replacement):
+            raise ValueError(f'Règle {name}: utiliser un callable pour exploiter les groupes')
+
+    def __repr__(self):
+        return f'Rule({self.name!r})'
+
+    def applies(self, context):
+        return self.when is None or self.when(context)
+
+    def render(self, content, position, context):
+        """Remplacement du match en `position` (rejoué sur le contenu entier: lookaheads compris)"""
+        if not callable(self.replacement):
+            return self.replacement
+        return self.replacement(self.regex.match(content, position), context)
+
+
+def _inline_flags(flags):
+    letters = ''
+    if flags & re.IGNORECASE:
+        letters += 'i'
+    if flags & re.MULTILINE:
+        letters += 'm'
+    if flags & re.DOTALL:
+        letters += 's'
+    return letters
+
+
+class RewriteEngine:
+    """Table de règles compilée en une alternance par combinaison de règles actives"""
+
+    def __init__(self, rules):
+        names = [rule.name for rule in rules]
+        if len(set(names)) != len(names):
+            raise ValueError('Noms de règles en double')
+        self.rules = list(rules)
+        self._compile = lru_cache(maxsize=None)(self._compile_uncached)
+
+    def _compile_uncached(self, enabled):
+        """Alternance nommée (?P<r3>...) des règles actives, dans l'ordre de la table"""
+        parts = []
+        by_group = {}
+        for index in enabled:
+            rule = self.rules[index]
+            # Le groupe englobant se ferme en dernier: match.lastgroup désigne la règle
+            body = rule.pattern
+            flags = _inline_flags(rule.flags)
+            if flags:
+                body = f'(?{flags}:{body})'
+            group = f'r{index}'
+            parts.append(f'(?P<{group}>{body})')
+            by_group[group] = rule
+        if not parts:
+            return None, by_group
+        return re.compile('|'.join(parts)), by_group
+
+    def rewrite(self, content, context=None):
+        """Applique les règles actives en une passe, retourne (contenu, Counter des hits)"""
+        context = {} if context is None else context
+        enabled = tuple(i for i, rule in enumerate(self.rules) if rule.applies(context))
+        regex, by_group = self._compile(enabled)
+        hits = Counter()
+        if regex is None:
+            return content, hits
+
+        chunks = []
+        position = 0
+        for match in regex.finditer(content):
+            rule = by_group[match.lastgroup]
+            replacement = rule.render(content, match.start(), context)
+            if replacement == match.group():
+                continue
+            chunks.append(content[position:match.start()])
+            chunks.append(replacement)
+            position = match.end()
+            hits[rule.name] += 1
+
+        if not hits:
+            return content, hits
+        chunks.append(content[position:])
+        return ''.join(chunks), hits
@@ -0,0 +1,391 @@
+#!/usr/bin/env python3
+"""
+Analyse statique des handlers Next.js (src/app/api/**/route.ts)
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Outils partagés par les codemods et analyseurs : découpage d'un route.ts en
+handlers exportés (GET, POST...), appariement d'accolades qui ignore
+chaînes, template literals et commentaires, lecture des objets littéraux.
+"""
+
+import os
+import re
+
+API_ROOT = 'src/app/api'
+HTTP_METHODS = ('GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS')
+
+# export async function GET(...) { / export const GET = wrapper(async (...) => {
+_HANDLER_RE = re.compile(
+    r'^export\s+(?:async\s+)?(?:function\s+(?P<fn>' + '|'.join(HTTP_METHODS) + r')\b'
+    r'|const\s+(?P<const>' + '|'.join(HTTP_METHODS) + r')\s*=)',
+    re.MULTILINE,
+)
+
+# Éléments à sauter en bloc lors de l'appariement
+_JS_TOKEN_RE = re.compile(
+    r'//[^\n]*'
+    r'|/\*.*?\*/'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r'|`'
+    r'|[{}()\[\]]',
+    re.DOTALL,
+)
+_TEMPLATE_RE = re.compile(r'\\.|`|\$\{', re.DOTALL)
+# Idem, avec les virgules (découpage d'arguments / d'objets littéraux)
+_SPLIT_TOKEN_RE = re.compile(
+    r'//[^\n]*'
+    r'|/\*.*?\*/'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r'|`'
+    r'|[{}()\[\],]',
+    re.DOTALL,
+)
+# Idem, avec les fins d'instruction
+_STATEMENT_TOKEN_RE = re.compile(
+    r'//[^\n]*'
+    r'|/\*.*?\*/'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r'|`'
+    r'|[{}()\[\];]',
+    re.DOTALL,
+)
+_ENTRY_RE = re.compile(r'''(?P<quote>['"]?)(?P<key>\w+)(?P=quote)\s*:\s*(?P<value>.*)''', re.DOTALL)
+
+_OPENERS = {'{': '}', '(': ')', '[': ']'}
+_CLOSERS = dict(_OPENERS, object='}')
+# export const GET = wrapper("...", async function GET(request) { ... }) (passe instrument)
+_FUNCTION_EXPRESSION_RE = re.compile(r'\bfunction\b\s*[\w$]*\s*\(')
+# `{` précédé de ces jetons: objet littéral (expression), pas un bloc
+_EXPRESSION_BEFORE_RE = re.compile(r'(?:[(,:=\[?|&!]|\breturn)\s*$')
+
+
+class Handler:
+    """Handler HTTP exporté : positions dans le contenu du fichier"""
+
+    def __init__(self, method, start, params_start, body_start, body_end):
+        self.method = method
+        self.start = start              # début du `export`
+        self.params_start = params_start
+        self.body_start = body_start    # juste après le `{` du corps
+        self.body_end = body_end        # position du `}` fermant le corps
+
+    def __repr__(self):
+        return f'Handler({self.method}, {self.body_start}:{self.body_end})'
+
+    def body(self, content):
+        return content[self.body_start:self.body_end]
+
+    def signature(self, content):
+        return content[self.params_start:self.body_start - 1]
+
+
+def discover_routes(root=API_ROOT):
+    """Tous les route.ts sous `root` (ordre stable, séparateurs /)"""
+    routes = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        if 'route.ts' in filenames:
+            routes.append(os.path.join(dirpath, 'route.ts').replace(os.sep, '/'))
+    return routes
+
+
+def match_bracket(content, open_pos):
+    """Position du délimiteur fermant celui ouvert en `open_pos` (ou -1)"""
+    stack = [_OPENERS[content[open_pos]]]
+    position = open_pos + 1
+    length = len(content)
+    while position < length:
+        token = _JS_TOKEN_RE.search(content, position)
+        if token is None:
+            return -1
+        value = token.group()
+        position = token.end()
+        if value == '`':
+            position = _skip_template(content, position)
+            if position < 0:
+                return -1
+        elif value in _OPENERS:
+            stack.append(_OPENERS[value])
+        elif value in ')]}':
+            if value != stack[-1]:
+                # Source mal formée ou regex littérale: on reste tolérant
+                continue
+            stack.pop()
+            if not stack:
+                return token.start()
+    return -1
+
+
+def _skip_template(content, position):
+    """Saute un template literal (position juste après le ` ouvrant)"""
+    while True:
+        token = _TEMPLATE_RE.search(content, position)
+        if token is None:
+            return -1
+        value = token.group()
+        if value == '`':
+            return token.end()
+        if value == '${':
+            end = match_bracket(content, token.end() - 1)
+            if end < 0:
+                return -1
+            position = end + 1
+        else:
+            position = token.end()
+
+
+def find_handlers(content):
+    """Handlers HTTP exportés d'un route.ts, dans l'ordre du fichier"""
+    handlers = []
+    for match in _HANDLER_RE.finditer(content):
+        method = match.group('fn') or match.group('const')
+        params_start = content.find('(', match.end())
+        if params_start < 0:
+            continue
+        if match.group('fn'):
+            params_end = match_bracket(content, params_start)
+            if params_end < 0:
+                continue
+            body_open = content.find('{', _skip_return_type(content, params_end + 1))
+        else:
+            # export const GET = wrapper(async (request) => { ... }, options)
+            arrow = content.find('=>', params_start)
+            function = _FUNCTION_EXPRESSION_RE.search(content, params_start)
+            if function is not None and (arrow < 0 or function.start() < arrow):
+                params_end = match_bracket(content, function.end() - 1)
+                if params_end < 0:
+                    continue
+                body_open = content.find('{', _skip_return_type(content, params_end + 1))
+            elif arrow < 0:
+                continue
+            else:
+                body_open = content.find('{', arrow)
+        if body_open < 0:
+            continue
+        body_end = match_bracket(content, body_open)
+        if body_end < 0:
+            continue
+        handlers.append(Handler(method, match.start(), params_start, body_open + 1, body_end))
+    return handlers
+
+
+def _skip_return_type(content, position):
+    """Saute une annotation `: Promise<NextResponse>` après les paramètres"""
+    match = re.compile(r'\s*:\s*[\w.<>\[\]|, ]+').match(content, position)
+    return match.end() if match else position
+
+
+def strip_comments(text):
+    """Retire les commentaires JS (les chaînes sont conservées)"""
+    chunks = []
+    position = 0
+    for token in _SPLIT_TOKEN_RE.finditer(text):
+        if token.start() < position:
+            continue
+        value = token.group()
+        if value.startswith(('//', '/*')):
+            chunks.append(text[position:token.start()])
+            position = token.end()
+        elif value == '`':
+            end = _skip_template(text, token.end())
+            if end < 0:
+                break
+            chunks.append(text[position:end])
+            position = end
+    chunks.append(text[position:])
+    return ''.join(chunks)
+
+
+def split_top_level(text):
+    """Découpe `a, b: { c, d }, ...e` sur les virgules de premier niveau"""
+    parts = []
+    depth = 0
+    start = 0
+    position = 0
+    while True:
+        token = _SPLIT_TOKEN_RE.search(text, position)
+        if token is None:
+            break
+        value = token.group()
+        position = token.end()
+        if value == '`':
+            position = _skip_template(text, position)
+            if position < 0:
+                break
+        elif value in ('{', '(', '['):
+            depth += 1
+        elif value in ('}', ')', ']'):
+            depth -= 1
+        elif value == ',' and depth == 0:
+            parts.append(text[start:token.start()])
+            start = position
+    parts.append(text[start:])
+    return [part.strip() for part in parts if part.strip()]
+
+
+def object_entries(literal):
+    """
+    Entrées de premier niveau d'un objet littéral `{ ... }` : [(clé, valeur)].
+    Un spread `...x` donne (None, 'x'), un raccourci `where` donne ('where', 'where').
+    """
+    literal = strip_comments(literal).strip()
+    if not (literal.startswith('{') and literal.endswith('}')):
+        return []
+    entries = []
+    for part in split_top_level(literal[1:-1]):
+        if part.startswith('...'):
+            entries.append((None, part[3:].strip()))
+            continue
+        match = _ENTRY_RE.match(part)
+        if match:
+            entries.append((match.group('key'), match.group('value').strip()))
+        elif re.fullmatch(r'\w+', part):
+            entries.append((part, part))
+    return entries
+
+
+def array_items(literal):
+    """Éléments de premier niveau d'un tableau littéral `[ ... ]`"""
+    literal = strip_comments(literal).strip()
+    if not (literal.startswith('[') and literal.endswith(']')):
+        return []
+    return split_top_level(literal[1:-1])
+
+
+def statement_start(text, position):
+    """
+    Début (premier caractère non blanc, commentaire compris) de l'instruction
+    du bloc `{}` le plus interne qui contient `position`
+    """
+    stack = [['{', 0]]
+    cursor = 0
+    while True:
+        token = _STATEMENT_TOKEN_RE.search(text, cursor, position)
+        if token is None:
+            break
+        value = token.group()
+        cursor = token.end()
+        if value == '`':
+            cursor = _skip_template(text, cursor)
+            if cursor < 0 or cursor > position:
+                break
+        elif value in ('{', '(', '['):
+            if value == '{' and _EXPRESSION_BEFORE_RE.search(text, max(0, token.start() - 64), token.start()):
+                value = 'object'      # objet littéral: pas un bloc d'instructions
+            stack.append([value, cursor if value == '{' else None])
+        elif value in ('}', ')', ']'):
+            if len(stack) > 1 and _CLOSERS[stack[-1][0]] == value:
+                stack.pop()
+            if value == '}' and stack[-1][0] == '{':
+                stack[-1][1] = cursor
+        elif value == ';' and stack[-1][0] == '{':
+            stack[-1][1] = cursor
+    boundary = next(entry[1] for entry in reversed(stack) if entry[0] == '{')
+    return re.compile(r'\s*').match(text, boundary).end()
+
+
+_BLOCK_OPEN_RE = re.compile(
+    r'\s*(?:(?P<cond>(?:else\s+)?if|catch)\s*(?=\()|(?:else|try|finally)\s*(?=\{))'
+)
+_CONTROL_RE = re.compile(r'(?:if|else|for|while|do|try|switch|function|async\s+function)\b')
+_CONTINUATION_RE = re.compile(r'\s*(?:else|catch|finally)\b')
+
+
+def block_statements(text, start, end):
+    """
+    Instructions de premier niveau de text[start:end] (intérieur d'un bloc) :
+    [(début, fin)], commentaires précédents compris, `;` final inclus.
+    Un if/try/for... se termine à son `}` (sauf else/catch/finally qui suit).
+    """
+    statements = []
+    cursor = start
+    while True:
+        begin = re.compile(r'\s*').match(text, cursor).end()
+        if begin >= end:
+            break
+        code = begin
+        while text.startswith(('//', '/*'), code):
+            close = text.find('\n', code) if text.startswith('//', code) else text.find('*/', code) + 2
+            code = re.compile(r'\s*').match(text, close if close > 1 else end).end()
+        control = _CONTROL_RE.match(text, code) is not None
+        depth = 0
+        position = code
+        stop = end
+        while True:
+            token = _STATEMENT_TOKEN_RE.search(text, position, end)
+            if token is None:
+                break
+            value = token.group()
+            position = token.end()
+            if value == '`':
+                position = _skip_template(text, position)
+                if position < 0:
+                    break
+            elif value in ('{', '(', '['):
+                depth += 1
+            elif value in ('}', ')', ']'):
+                depth -= 1
+                if value == '}' and depth == 0 and control and not _CONTINUATION_RE.match(text, position):
+                    stop = position
+                    break
+            elif value == ';' and depth == 0:
+                stop = position
+                break
+        if position < 0 or token is None:
+            stop = end
+        # Commentaire de fin de ligne: rattaché à l'instruction qu'il suit
+        trailing = re.compile(r'[ \t]*//[^\n]*').match(text, stop, end)
+        if trailing is not None:
+            stop = trailing.end()
+        statements.append((begin, stop))
+        cursor = stop
+    return statements
+
+
+def code_start(body, start, end):
+    """Début du code d'une instruction, commentaires de tête sautés"""
+    position = start
+    while body.startswith(('//', '/*'), position):
+        close = body.find('\n' if body.startswith('//', position) else '*/', position)
+        if close < 0:
+            return end
+        position = re.compile(r'\s*').match(body, close + (1 if body[close] == '\n' else 2)).end()
+    return min(position, end)
+
+
+def control_blocks(body, start, end):
+    """Blocs d'instructions imbriqués (try/catch/finally/if/else) de body[start:end], celui-ci compris"""
+    blocks = [(start, end)]
+    for statement_start, statement_end in block_statements(body, start, end):
+        position = code_start(body, statement_start, statement_end)
+        if not re.match(r'(?:if|try)\b', body[position:position + 3]):
+            continue
+        while position < statement_end:
+            opener = _BLOCK_OPEN_RE.match(body, position)
+            if opener is None:
+                break
+            position = opener.end()
+            if opener.group('cond'):
+                close = match_bracket(body, position)
+                if close < 0:
+                    break
+                position = re.compile(r'\s*').match(body, close + 1).end()
+            if not body.startswith('{', position):
+                break
+            close = match_bracket(body, position)
+            if close < 0:
+                break
+            blocks.extend(control_blocks(body, position + 1, close))
+            position = close + 1
+    return blocks
+
+
+def line_indent(text, position):
+    """Indentation de la ligne contenant `position`"""
+    start = text.rfind('\n', 0, position) + 1
+    match = re.compile(r'[ \t]*').match(text, start)
+    return match.group()
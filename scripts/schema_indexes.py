@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Index du schema Prisma : colonnes, couverture et index redondants
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Un @@index est redondant quand une autre clé du modèle sert déjà toutes
+ses requêtes :
+
+    - une contrainte unique (@id, @unique, @@id, @@unique) dont il est un
+      préfixe gauche (ex. `slug @unique` + `@@index([slug])`) ;
+    - un index composite dont il est un préfixe gauche
+      (ex. `@@index([tenantId])` + `@@index([tenantId, createdAt])`) ;
+    - un doublon exact d'un index déclaré avant lui.
+
+Chaque index redondant coûte une écriture supplémentaire par INSERT/UPDATE
+et des pages en cache sans servir aucune requête.
+
+Usage:
+    from schema_indexes import prune_redundant_indexes
+
+    for model, index, cover in prune_redundant_indexes(schema):
+        print(f'{model}: {index} (couvert par {cover})')
+"""
+
+import re
+
+from prisma_schema import split_top_level
+
+_COLUMN_RE = re.compile(r'(?P<name>\w+)(?:\((?P<args>.*)\))?$', re.DOTALL)
+
+
+class IndexKey:
+    """Clé d'index d'un modèle : colonnes ordonnées + membre qui la déclare"""
+
+    def __init__(self, kind, columns, member, index_type=None):
+        self.kind = kind            # 'id' | 'unique' | 'index'
+        self.columns = columns      # [(nom, 'asc' | 'desc')], None si non comparable
+        self.member = member
+        self.index_type = index_type
+
+    def __repr__(self):
+        return f'IndexKey({self.kind}, {self.names})'
+
+    @property
+    def names(self):
+        return tuple(name for name, _ in self.columns or ())
+
+    @property
+    def is_unique(self):
+        return self.kind in ('id', 'unique')
+
+    def covers(self, other):
+        """Vrai si cette clé sert toutes les requêtes de `other` (préfixe gauche)"""
+        if self.columns is None or other.columns is None:
+            return False
+        if self.index_type != other.index_type:
+            return False
+        width = len(other.columns)
+        if self.names[:width] != other.names:
+            return False
+        if width == 1:
+            # Une colonne: le B-tree se parcourt dans les deux sens
+            return True
+        directions = [direction for _, direction in self.columns[:width]]
+        wanted = [direction for _, direction in other.columns]
+        reverse = ['desc' if d == 'asc' else 'asc' for d in wanted]
+        return directions in (wanted, reverse)
+
+
+def _columns(value):
+    """`[a, b(sort: Desc)]` → [('a', 'asc'), ('b', 'desc')], None si length/ops"""
+    value = (value or '').strip()
+    if value.startswith('[') and value.endswith(']'):
+        value = value[1:-1]
+    columns = []
+    for part in split_top_level(value):
+        match = _COLUMN_RE.match(part)
+        if match is None:
+            return None
+        direction = 'asc'
+        for argument in split_top_level(match.group('args') or ''):
+            key, _, setting = argument.partition(':')
+            if key.strip() != 'sort':
+                return None
+            direction = 'desc' if setting.strip() == 'Desc' else 'asc'
+        columns.append((match.group('name'), direction))
+    return columns or None
+
+
+def model_index_keys(model):
+    """Toutes les clés indexées d'un modèle, dans l'ordre du bloc"""
+    keys = []
+    for member in model.members:
+        if member.kind == 'field':
+            for name in ('id', 'unique'):
+                if member.has_attribute(name):
+                    keys.append(IndexKey(name, [(member.name, 'asc')], member))
+        elif member.kind == 'block_attribute' and member.name in ('id', 'unique', 'index'):
+            index_type = member.argument('type')
+            if index_type == 'BTree':
+                index_type = None
+            keys.append(IndexKey(member.name, _columns(member.argument('fields', 0)), member, index_type))
+    return keys
+
+
+def unique_keys(model):
+    """Colonnes des clés uniques du modèle (@id, @unique, @@id, @@unique)"""
+    return [key.names for key in model_index_keys(model) if key.is_unique and key.columns]
+
+
+def find_redundant_indexes(model):
+    """[(IndexKey redondant, IndexKey qui le couvre)] pour un modèle"""
+    keys = model_index_keys(model)
+    redundant = []
+    for position, key in enumerate(keys):
+        if key.kind != 'index':
+            continue
+        for other_position, other in enumerate(keys):
+            if other is key or other in (r for r, _ in redundant):
+                continue
+            longer = len(other.columns or ()) > len(key.columns or ())
+            # Doublon exact: on garde le premier déclaré (ou la contrainte unique)
+            if other.covers(key) and (longer or other.is_unique or other_position < position):
+                redundant.append((key, other))
+                break
+    return redundant
+
+
+def _render(key):
+    if key.member.kind == 'block_attribute':
+        return key.member.attribute.render()
+    return f'{key.member.name} @{key.kind}'
+
+
+def prune_redundant_indexes(schema, models=None):
+    """
+    Supprime les @@index redondants des modèles (tous par défaut).
+    Retourne [(modèle, index supprimé, clé qui le couvre)].
+    """
+    report = []
+    for model in schema.blocks('model'):
+        if models is not None and model.name not in models:
+            continue
+        for key, cover in find_redundant_indexes(model):
+            model.remove(key.member)
+            report.append((model.name, _render(key), _render(cover)))
+    return report
+
+
+def render_index(columns):
+    """[('tenantId', 'asc'), ('date', 'desc')] → `@@index([tenantId, date(sort: Desc)])`"""
+    names = [name if direction == 'asc' else f'{name}(sort: Desc)' for name, direction in columns]
+    return f"@@index([{', '.join(names)}])"
+
+
+def add_index(model, columns):
+    """
+    Ajoute `@@index(columns)` après le dernier attribut de bloc du modèle,
+    sauf si une clé existante le couvre. Retourne l'index rendu ou None.
+    """
+    candidate = IndexKey('index', list(columns), None)
+    if any(key.covers(candidate) for key in model_index_keys(model)):
+        return None
+    attributes = model.block_attributes()
+    indent = attributes[-1].indent if attributes else '  '
+    rendered = render_index(columns)
+    if attributes:
+        model.insert_after(attributes[-1], indent + rendered)
+    else:
+        model.append(indent + rendered)
+    return rendered
@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+Agrégats journaliers par tenant pour les tableaux de bord de statistiques
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Les routes /api/admin/stats* agrègent à chaque requête toutes les lignes
+de la période (groupBy, count, findMany sur un intervalle de dates) : leur
+latence grandit avec l'historique du tenant. Ce module relève ces requêtes
+et génère, pour chaque (modèle, champ date) :
+
+    - un modèle Prisma `<Modèle>DailyRollup` : tenantId, day (@db.Date),
+      les dimensions filtrées / groupées par les routes, `count` et une
+      colonne `<champ>Sum` par champ de `_sum` ;
+    - le SQL compagnon : trigger qui marque (tenant, jour) dans
+      "RollupDirtyDay" à chaque écriture sur la table source, fonction de
+      rafraîchissement incrémental par lots, backfill initial (tous les
+      jours existants marqués) ;
+    - la migration Prisma qui livre ce SQL avec `prisma migrate deploy`
+      et calcule le backfill avant de rendre la main : les routes qui
+      lisent les agrégats ne voient ni table absente ni jours à zéro.
+
+    from prisma_schema import load_schema
+    from stats_rollups import discover_rollups, add_rollup_models, render_rollup_sql
+
+    specs = discover_rollups(schema, discover_routes())
+    add_rollup_models(schema, specs)
+    sql = render_rollup_sql(schema, specs)
+
+Les jours sont des jours UTC (`date::date` sur un TIMESTAMP sans fuseau,
+comme les écrit Prisma). La lecture côté routes passe par la passe
+`rollup-reads` (scripts/api_codemods/rollup_reads.py) et le rafraîchissement
+par src/lib/stats-rollups.ts.
+"""
+
+import re
+
+from online_migration import TENANT_COLUMN, column_name, quote, sql_type, table_name
+from prisma_schema import parse_schema
+from route_analysis import array_items, find_handlers, match_bracket, object_entries
+
+ROLLUP_SUFFIX = 'DailyRollup'
+DIRTY_MODEL = 'RollupDirtyDay'
+DAY_FIELD = 'day'
+COUNT_FIELD = 'count'
+SUM_SUFFIX = 'Sum'
+REFRESH_FUNCTION = 'kairo_refresh_daily_rollups'
+MIGRATION_NAME = 'stats_daily_rollups'
+STATS_ROUTE_RE = re.compile(r'/app/api/admin/stats[^/]*/')
+
+# Première ligne d'un modèle généré: modèle et champ date sources
+SOURCE_COMMENT_RE = re.compile(r'//\s*Source:\s*(?P<model>\w+)\.(?P<field>\w+)')
+DIMENSION_TYPES = {'String', 'Int', 'BigInt', 'Boolean'}
+# Type Prisma de la somme d'un champ (somme d'Int: dépassement possible en Int)
+SUM_TYPES = {'Int': 'Float', 'Float': 'Float', 'BigInt': 'BigInt', 'Decimal': 'Decimal'}
+_SUM_SQL_TYPES = {'Float': 'DOUBLE PRECISION', 'BigInt': 'BIGINT', 'Decimal': 'DECIMAL(65,30)'}
+
+_CALL_RE = re.compile(r'(?<![\w$.])prisma\.(?P<delegate>\w+)\.(?P<op>groupBy|count|aggregate|findMany)\(')
+_RANGE_KEYS = {'gt', 'gte', 'lt', 'lte'}
+_QUOTED_RE = re.compile(r'''^["'](\w+)["']$''')
+
+
+class RollupSpec:
+    """Agrégat journalier d'un modèle sur un champ date, et les requêtes qu'il sert"""
+
+    def __init__(self, model, date_field):
+        self.model = model
+        self.date_field = date_field
+        self.dimensions = []
+        self.sums = []
+        self.endpoints = set()
+        self.queries = 0
+
+    def __repr__(self):
+        return f'RollupSpec({self.name}, dims={self.dimensions}, sums={self.sums})'
+
+    @property
+    def name(self):
+        return self.model.name + ROLLUP_SUFFIX
+
+    def add(self, bucket, name):
+        if name not in bucket:
+            bucket.append(name)
+
+
+# --- Découverte ------------------------------------------------------------
+
+def _is_tenant_scoped(entries):
+    return any(
+        key == TENANT_COLUMN or key is None and value.endswith('tenantFilter')
+        for key, value in entries
+    )
+
+
+def _date_range(model, entries):
+    """Champ DateTime filtré par un intervalle (gte / lte...), ou None"""
+    for key, value in entries:
+        field = model.field(key) if key else None
+        if field is None or field.type != 'DateTime' or not value.startswith('{'):
+            continue
+        keys = {name for name, _ in object_entries(value)}
+        if keys and keys <= _RANGE_KEYS:
+            return key
+    return None
+
+
+def _dimension(schema, model, name):
+    field = model.field(name)
+    if field is None or field.is_list or name in (TENANT_COLUMN, 'id'):
+        return None
+    if field.type in DIMENSION_TYPES or field.type in schema.enums:
+        return field
+    return None
+
+
+def _existing_spec(schema, model, date_field):
+    """Spec vide, ou reprise de l'agrégat déjà généré (colonnes et ordre conservés)"""
+    spec = RollupSpec(model, date_field)
+    existing = schema.model(spec.name)
+    for field in existing.fields if existing is not None else []:
+        if field.name.endswith(SUM_SUFFIX) and model.has_field(field.name[:-len(SUM_SUFFIX)]):
+            spec.add(spec.sums, field.name[:-len(SUM_SUFFIX)])
+        elif _dimension(schema, model, field.name) is not None:
+            spec.add(spec.dimensions, field.name)
+    return spec
+
+
+def discover_rollups(schema, routes, route_re=STATS_ROUTE_RE):
+    """
+    Agrégats à générer pour les requêtes scopées par tenant et filtrées par
+    intervalle de dates des routes de statistiques, {(modèle, champ): RollupSpec}
+    """
+    specs = {}
+    for path in routes:
+        if route_re.search(path) is None:
+            continue
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        for handler in find_handlers(content):
+            body = handler.body(content)
+            for call in _CALL_RE.finditer(body):
+                model = schema.model(call.group('delegate')[0].upper() + call.group('delegate')[1:])
+                close = match_bracket(body, call.end() - 1)
+                if model is None or close < 0:
+                    continue
+                arguments = dict(object_entries(body[call.end():close]))
+                where = object_entries(arguments.get('where', ''))
+                # Lecture déjà réécrite: ses dimensions restent dans l'agrégat régénéré
+                source = rollup_source(model)
+                if source is not None:
+                    model, date_field = schema.model(source[0]), source[1]
+                    if model is None:
+                        continue
+                else:
+                    date_field = _date_range(model, where) if _is_tenant_scoped(where) else None
+                if date_field is None:
+                    continue
+                spec = specs.get((model.name, date_field))
+                if spec is None:
+                    spec = specs[(model.name, date_field)] = _existing_spec(schema, model, date_field)
+                spec.endpoints.add(f'{handler.method} {path}')
+                spec.queries += 1
+                grouped = [_QUOTED_RE.match(item.strip()) for item in array_items(arguments.get('by', ''))]
+                filtered = [key for key, _ in where if key and key != date_field]
+                for name in [match.group(1) for match in grouped if match] + filtered:
+                    if _dimension(schema, model, name) is not None:
+                        spec.add(spec.dimensions, name)
+                for name, _ in object_entries(arguments.get('_sum', '')):
+                    field = model.field(name) if name else None
+                    if field is not None and field.type in SUM_TYPES:
+                        spec.add(spec.sums, name)
+    return specs
+
+
+# --- Schema ------------------------------------------------------------------
+
+def _render_block(header, rows, attributes):
+    """Bloc model aligné comme `prisma format` (nom, type, attributs)"""
+    fields = [row for row in rows if not isinstance(row, str)]
+    name_width = max(len(name) for name, _, _ in fields)
+    type_width = max(len(type_) for _, type_, _ in fields)
+    lines = [header]
+    for row in rows:
+        if isinstance(row, str):
+            lines.append(f'  {row}')
+            continue
+        name, type_, attrs = row
+        lines.append(f'  {name.ljust(name_width)} {type_.ljust(type_width)} {attrs}'.rstrip())
+    lines.append('')
+    lines += [f'  {attribute}' for attribute in attributes]
+    lines.append('}')
+    return '\n'.join(lines)
+
+
+def _field_row(field, name=None, optional=None):
+    native = field.native_type
+    optional = field.is_optional if optional is None else optional
+    return (name or field.name, field.type + ('?' if optional else ''), native.render() if native else '')
+
+
+def render_rollup_model(spec):
+    model = spec.model
+    rows = [
+        f'// Source: {model.name}.{spec.date_field}, agrégats journaliers par tenant',
+        '// Généré par scripts/generate-rollups.py, rafraîchi par src/lib/stats-rollups.ts',
+        ('id', 'BigInt', '@id @default(autoincrement())'),
+        _field_row(model.field(TENANT_COLUMN), optional=False),
+        (DAY_FIELD, 'DateTime', '@db.Date'),
+    ]
+    rows += [_field_row(model.field(name)) for name in spec.dimensions]
+    rows.append((COUNT_FIELD, 'Int', ''))
+    rows += [(name + SUM_SUFFIX, SUM_TYPES[model.field(name).type] + '?', '') for name in spec.sums]
+    rows.append(('updatedAt', 'DateTime', '@default(now()) @updatedAt'))
+    return _render_block(f'model {spec.name} {{', rows, [f'@@index([{TENANT_COLUMN}, {DAY_FIELD}])'])
+
+
+def render_dirty_model():
+    rows = [
+        '// Jours (tenant, jour) à recalculer, marqués par trigger sur les tables sources',
+        ('rollup', 'String', ''),
+        (TENANT_COLUMN, 'String', ''),
+        (DAY_FIELD, 'DateTime', '@db.Date'),
+        ('markedAt', 'DateTime', '@default(now())'),
+    ]
+    return _render_block(f'model {DIRTY_MODEL} {{', rows, [f'@@id([rollup, {TENANT_COLUMN}, {DAY_FIELD}])'])
+
+
+def add_rollup_models(schema, specs):
+    """
+    Ajoute (ou régénère) les modèles d'agrégats après leur modèle source, et
+    RollupDirtyDay en fin de schema. Retourne les noms des modèles écrits.
+    """
+    written = []
+    for spec in specs:
+        block = parse_schema(render_rollup_model(spec) + '\n').blocks('model')[0]
+        existing = schema.model(spec.name)
+        if existing is not None:
+            schema.insert_after(existing, [block])
+            schema.remove(existing)
+        else:
+            schema.insert_after(schema.model(spec.model.name), ['\n\n', block])
+        written.append(spec.name)
+    if specs and schema.model(DIRTY_MODEL) is None:
+        schema.append(parse_schema('\n' + render_dirty_model() + '\n'))
+        written.append(DIRTY_MODEL)
+    return written
+
+
+def rollup_source(rollup_model):
+    """(modèle source, champ date) d'un modèle d'agrégats généré, ou None"""
+    for member in rollup_model.members:
+        if member.kind == 'comment':
+            match = SOURCE_COMMENT_RE.match(member.text)
+            if match:
+                return match.group('model'), match.group('field')
+    return None
+
+
+def existing_rollups(schema):
+    """Specs des agrégats déjà générés dans le schema (colonnes et ordre conservés)"""
+    specs = []
+    for model in schema.blocks('model'):
+        source = rollup_source(model)
+        source_model = schema.model(source[0]) if source is not None else None
+        if source_model is not None and source_model.has_field(source[1]):
+            specs.append(_existing_spec(schema, source_model, source[1]))
+    return specs
+
+
+# --- SQL -------------------------------------------------------------------
+
+_HEADER = '''-- PostgreSQL
+-- Agrégats journaliers par tenant des tableaux de bord (générés par scripts/generate-rollups.py)
+--
+-- Tables {models} et "{dirty}", livrées par la migration
+-- prisma/migrations/*_{migration} (npx prisma migrate deploy). Rejouable à la main:
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f {path}
+--
+-- Chaque écriture sur une table source marque (tenant, jour) dans "{dirty}"
+-- (trigger par ligne, ON CONFLICT DO NOTHING). {refresh}(lot, tenant)
+-- recalcule au plus `lot` jours marqués par agrégat (DELETE + INSERT ... GROUP BY
+-- du seul jour) et retourne le nombre de jours traités. Rejouable.
+
+SET lock_timeout = '{lock_timeout}';
+
+CREATE TABLE IF NOT EXISTS {dirty_table} (
+  "rollup" TEXT NOT NULL,
+  "{tenant}" TEXT NOT NULL,
+  "{day}" DATE NOT NULL,
+  "markedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP,
+  CONSTRAINT "{dirty}_pkey" PRIMARY KEY ("rollup", "{tenant}", "{day}")
+);
+'''
+
+_MARK_FUNCTION = '''
+CREATE OR REPLACE FUNCTION {function}() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP <> 'INSERT' AND OLD.{tenant} IS NOT NULL AND OLD.{date} IS NOT NULL THEN
+    INSERT INTO {dirty_table} ("rollup", "{tenant_name}", "{day}")
+    VALUES ('{rollup}', OLD.{tenant}::text, OLD.{date}::date)
+    ON CONFLICT DO NOTHING;
+  END IF;
+  IF TG_OP <> 'DELETE' AND NEW.{tenant} IS NOT NULL AND NEW.{date} IS NOT NULL THEN
+    INSERT INTO {dirty_table} ("rollup", "{tenant_name}", "{day}")
+    VALUES ('{rollup}', NEW.{tenant}::text, NEW.{date}::date)
+    ON CONFLICT DO NOTHING;
+  END IF;
+  RETURN NULL;
+END $$;
+'''
+
+_MARK_TRIGGER = '''DROP TRIGGER IF EXISTS {trigger} ON {source};
+CREATE TRIGGER {trigger}
+AFTER INSERT OR DELETE OR UPDATE OF {watched} ON {source}
+FOR EACH ROW EXECUTE FUNCTION {function}();
+'''
+
+_REFRESH_FUNCTION = '''
+CREATE OR REPLACE FUNCTION {function}(batch_size integer, only_tenant text)
+RETURNS integer LANGUAGE plpgsql AS $$
+DECLARE
+  tenants text[];
+  days date[];
+BEGIN
+  -- Jours réclamés (SKIP LOCKED: deux rafraîchissements concurrents se partagent le travail).
+  -- Une écriture pendant le calcul re-marque son jour pour le passage suivant.
+  WITH claimed AS (
+    DELETE FROM {dirty_table} dirty
+    USING (
+      SELECT "{tenant_name}", "{day}" FROM {dirty_table}
+      WHERE "rollup" = '{rollup}' AND (only_tenant IS NULL OR "{tenant_name}" = only_tenant)
+      LIMIT batch_size
+      FOR UPDATE SKIP LOCKED
+    ) picked
+    WHERE dirty."rollup" = '{rollup}' AND dirty."{tenant_name}" = picked."{tenant_name}" AND dirty."{day}" = picked."{day}"
+    RETURNING dirty."{tenant_name}", dirty."{day}"
+  )
+  SELECT array_agg("{tenant_name}"), array_agg("{day}") INTO tenants, days FROM claimed;
+  IF tenants IS NULL THEN
+    RETURN 0;
+  END IF;
+
+  DELETE FROM {rollup_table} r
+  USING unnest(tenants, days) AS c("{tenant_name}", "{day}")
+  WHERE r.{rollup_tenant} = c."{tenant_name}"::{tenant_type} AND r."{day}" = c."{day}";
+
+  INSERT INTO {rollup_table} ({columns})
+  SELECT {selected}
+  FROM unnest(tenants, days) AS c("{tenant_name}", "{day}")
+  JOIN {source} s
+    ON s.{tenant} = c."{tenant_name}"::{tenant_type} AND s.{date} >= c."{day}" AND s.{date} < c."{day}" + 1
+  GROUP BY {grouped};
+
+  RETURN cardinality(tenants);
+END $$;
+'''
+
+
+def _column_type(schema, field):
+    if field.type in schema.enums:
+        return quote(field.type)
+    return sql_type(field)
+
+
+def _rollup_table(schema, spec):
+    model = spec.model
+    tenant = model.field(TENANT_COLUMN)
+    columns = [
+        '"id" BIGSERIAL NOT NULL',
+        f'{quote(TENANT_COLUMN)} {sql_type(tenant)} NOT NULL',
+        f'{quote(DAY_FIELD)} DATE NOT NULL',
+    ]
+    for name in spec.dimensions:
+        field = model.field(name)
+        columns.append(f'{quote(name)} {_column_type(schema, field)}{"" if field.is_optional else " NOT NULL"}')
+    columns.append(f'{quote(COUNT_FIELD)} INTEGER NOT NULL')
+    columns += [
+        f'{quote(name + SUM_SUFFIX)} {_SUM_SQL_TYPES[SUM_TYPES[model.field(name).type]]}'
+        for name in spec.sums
+    ]
+    columns.append('"updatedAt" TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP')
+    columns.append(f'CONSTRAINT {quote(spec.name + "_pkey")} PRIMARY KEY ("id")')
+    body = ',\n  '.join(columns)
+    return (
+        f'CREATE TABLE IF NOT EXISTS {quote(spec.name)} (\n  {body}\n);\n'
+        f'CREATE INDEX IF NOT EXISTS {quote(f"{spec.name}_{TENANT_COLUMN}_{DAY_FIELD}_idx")} '
+        f'ON {quote(spec.name)}({quote(TENANT_COLUMN)}, {quote(DAY_FIELD)});\n'
+    )
+
+
+def _template_values(spec):
+    model = spec.model
+    return {
+        'dirty_table': quote(DIRTY_MODEL),
+        'tenant_name': TENANT_COLUMN,
+        'day': DAY_FIELD,
+        'rollup': spec.name,
+        'source': quote(table_name(model)),
+        'tenant': quote(column_name(model.field(TENANT_COLUMN))),
+        'date': quote(column_name(model.field(spec.date_field))),
+    }
+
+
+def render_mark_trigger(spec, old_table=None):
+    """
+    Trigger de marquage sur la table source. `old_table`: table dont il est
+    retiré, quand la source est remplacée sous le même nom (bascule du
+    partitionnement, scripts/tenant_partitioning.py)
+    """
+    model = spec.model
+    common = _template_values(spec)
+    tenant, date = common['tenant'], common['date']
+    dimensions = [quote(column_name(model.field(name))) for name in spec.dimensions]
+    watched = [tenant, date] + [d for d in dimensions if d not in (tenant, date)]
+    watched += [quote(column_name(model.field(name))) for name in spec.sums]
+    trigger = quote(f'{spec.name}_mark')
+    removed = f'DROP TRIGGER IF EXISTS {trigger} ON {quote(old_table)};\n' if old_table else ''
+    return removed + _MARK_TRIGGER.format(
+        function=quote(f'kairo_mark_{spec.name}'),
+        trigger=trigger,
+        watched=', '.join(dict.fromkeys(watched)),
+        **common,
+    )
+
+
+def render_refresh_function(spec):
+    """
+    Fonction de rafraîchissement d'un agrégat. Les jours marqués sont lus en
+    TEXT et convertis au type courant de tenantId : à régénérer quand ce
+    type change (conversion des clés en UUID, scripts/uuid_keys.py)
+    """
+    model = spec.model
+    common = _template_values(spec)
+    tenant = common['tenant']
+    dimensions = [quote(column_name(model.field(name))) for name in spec.dimensions]
+    selected = [f's.{tenant}', f'c."{DAY_FIELD}"'] + [f's.{d}' for d in dimensions] + ['count(*)::integer']
+    selected += [
+        f'sum(s.{quote(column_name(model.field(name)))})::{_SUM_SQL_TYPES[SUM_TYPES[model.field(name).type]]}'
+        for name in spec.sums
+    ]
+    selected.append('now()')
+    columns = [TENANT_COLUMN, DAY_FIELD] + spec.dimensions + [COUNT_FIELD]
+    columns += [name + SUM_SUFFIX for name in spec.sums] + ['updatedAt']
+    return _REFRESH_FUNCTION.format(
+        function=quote(f'kairo_refresh_{spec.name}'),
+        rollup_table=quote(spec.name),
+        rollup_tenant=quote(TENANT_COLUMN),
+        tenant_type=sql_type(model.field(TENANT_COLUMN)),
+        columns=', '.join(quote(column) for column in columns),
+        selected=', '.join(selected),
+        grouped=', '.join([f's.{tenant}', f'c."{DAY_FIELD}"'] + [f's.{d}' for d in dimensions]),
+        **common,
+    )
+
+
+def render_rollup_section(schema, spec):
+    model = spec.model
+    common = _template_values(spec)
+    source, tenant, date = common['source'], common['tenant'], common['date']
+    dimensions = [quote(column_name(model.field(name))) for name in spec.dimensions]
+    parts = [
+        f'\n-- === {spec.name}: {model.name} par tenant et jour de "{spec.date_field}" ===\n',
+        f'-- Routes servies: {", ".join(sorted(spec.endpoints)) or "-"}\n\n',
+        _rollup_table(schema, spec),
+    ]
+    parts.append(_MARK_FUNCTION.format(function=quote(f'kairo_mark_{spec.name}'), **common))
+    parts.append('\n' + render_mark_trigger(spec))
+
+    parts.append(render_refresh_function(spec))
+    parts.append(
+        f"\n-- Backfill: tous les jours existants à calculer (vidés par {REFRESH_FUNCTION})\n"
+        f'INSERT INTO {quote(DIRTY_MODEL)} ("rollup", "{TENANT_COLUMN}", "{DAY_FIELD}")\n'
+        f"SELECT DISTINCT '{spec.name}', {tenant}::text, {date}::date FROM {source}\n"
+        f'WHERE {tenant} IS NOT NULL AND {date} IS NOT NULL\n'
+        'ON CONFLICT DO NOTHING;\n'
+    )
+    return ''.join(parts)
+
+
+def render_rollup_sql(schema, specs, path='prisma/online-migrations/stats-rollups.sql', lock_timeout='5s'):
+    """Migration SQL complète (tables, triggers, rafraîchissement, backfill)"""
+    parts = [_HEADER.format(
+        models=', '.join(quote(spec.name) for spec in specs),
+        dirty=DIRTY_MODEL,
+        dirty_table=quote(DIRTY_MODEL),
+        refresh=REFRESH_FUNCTION,
+        migration=MIGRATION_NAME,
+        tenant=TENANT_COLUMN,
+        day=DAY_FIELD,
+        path=path,
+        lock_timeout=lock_timeout,
+    )]
+    parts += [render_rollup_section(schema, spec) for spec in specs]
+    calls = '\n       + '.join(f'{quote(f"kairo_refresh_{spec.name}")}(batch_size, only_tenant)' for spec in specs)
+    parts.append(
+        f'\n-- Point d\'entrée du job (src/lib/stats-rollups.ts): jours recalculés, tous agrégats confondus\n'
+        f'CREATE OR REPLACE FUNCTION {REFRESH_FUNCTION}(batch_size integer DEFAULT 500, only_tenant text DEFAULT NULL)\n'
+        f'RETURNS integer LANGUAGE plpgsql AS $$\n'
+        f'BEGIN\n'
+        f'  RETURN {calls or "0"};\n'
+        f'END $$;\n'
+    )
+    return ''.join(parts)
+
+
+def render_rollup_migration(schema, specs, path='prisma/online-migrations/stats-rollups.sql', lock_timeout='5s'):
+    """
+    migration.sql de prisma/migrations/<horodatage>_stats_daily_rollups : le
+    SQL compagnon puis le calcul de tous les jours marqués par le backfill
+    """
+    return (
+        f'-- Migration Prisma: SQL compagnon ({path}) puis backfill calculé.\n'
+        f'-- À déployer avant les routes qui lisent les agrégats (npx prisma migrate deploy).\n'
+        + render_rollup_sql(schema, specs, path=path, lock_timeout=lock_timeout)
+        + '\n-- Backfill calculé ici: les agrégats sont complets dès la fin de la migration\n'
+        f'SELECT {REFRESH_FUNCTION}(2147483647);\n'
+    )
@@ -0,0 +1,398 @@
+#!/usr/bin/env python3
+"""
+Jeu de données multi-tenant synthétique à partir du schema Prisma
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Crée, dans un schéma PostgreSQL isolé (DATASET_NAMESPACE), une table par
+modèle demandé (colonnes, clé primaire, index @@index/@@unique du schema)
+puis la remplit côté serveur par `generate_series` : la ligne g appartient
+au tenant `tenant-<g % tenants>`. Chaque valeur est une expression de g,
+déterministe : value_sql(..., g='1') est la valeur de la ligne 1, ce qui
+permet d'écrire des requêtes qui touchent réellement des lignes.
+
+Pour le volume (millions de lignes, tenants répartis selon Zipf), la
+seconde partie écrit des fichiers COPY en flux (voir plan_dataset,
+stream_copy et scripts/generate-tenant-dataset.py).
+
+Usage:
+    from synthetic_dataset import dataset_sql, plan_dataset, stream_copy
+
+    sql = dataset_sql(schema, ['Order', 'Product'], rows=20000, tenants=20)
+    for plan in plan_dataset(schema, ['Tenant', 'Order'], rows=10**6, tenants=5000):
+        with open(f'{plan.name}.copy', 'w') as out:
+            stream_copy(schema, plan, out)
+"""
+
+import random
+import re
+import time
+import zlib
+
+from online_migration import column_name, quote, sql_type, table_name
+from schema_indexes import model_index_keys
+
+DATASET_NAMESPACE = 'explain_regression'
+TENANT_FIELD = 'tenantId'
+DEFAULT_ROWS = 20000
+DEFAULT_TENANTS = 20
+
+# Cardinalité des colonnes non uniques (valeurs distinctes par colonne)
+STRING_CARDINALITY = 50
+INT_CARDINALITY = 100
+DATE_ORIGIN = "TIMESTAMP '2026-01-01'"
+DATE_DAYS = 365
+
+
+def qualified(model, namespace=DATASET_NAMESPACE):
+    return f'{quote(namespace)}.{quote(table_name(model))}'
+
+
+def column_fields(schema, model):
+    """Champs stockés en colonne (scalaires, enums, listes de scalaires)"""
+    return [
+        field for field in model.fields
+        if not field.type.startswith('Unsupported(')
+        and (field.is_scalar or field.type in schema.enums)
+    ]
+
+
+def column_type(schema, field):
+    """Type PostgreSQL de la colonne (enum → TEXT, Json → JSONB)"""
+    if field.type in schema.enums:
+        base = 'TEXT'
+    elif field.type == 'Json':
+        base = 'JSONB'
+    elif field.type == 'Bytes':
+        base = 'BYTEA'
+    else:
+        base = sql_type(field)
+    return base + '[]' if field.is_list else base
+
+
+def distinct_fields(model):
+    """
+    Champs qui prennent une valeur propre à chaque ligne : première colonne
+    hors tenant de chaque clé unique (les index UNIQUE restent valides)
+    """
+    names = set()
+    for key in model_index_keys(model):
+        if not key.is_unique or not key.columns:
+            continue
+        columns = [name for name in key.names if name != TENANT_FIELD] or list(key.names)
+        names.add(columns[0])
+    return names
+
+
+def value_sql(schema, model, field, g, tenants=DEFAULT_TENANTS):
+    """Expression SQL de la valeur de `field` pour la ligne `g` (elle-même une expression SQL)"""
+    distinct = field.name in distinct_fields(model)
+    if field.is_list:
+        return "'{}'"
+    if field.name == TENANT_FIELD:
+        return f"'tenant-' || (({g}) % {tenants})"
+    if field.type in schema.enums:
+        values = ', '.join(f"'{value.name}'" for value in schema.enums[field.type].values)
+        return f'(ARRAY[{values}])[1 + ({g}) % {len(schema.enums[field.type].values)}]'
+    if field.type == 'String':
+        cycle = f'({g})' if distinct else f'(({g}) % {STRING_CARDINALITY})'
+        return f"'{field.name}-' || {cycle}"
+    if field.type in ('Int', 'BigInt'):
+        return f'({g})' if distinct else f'(({g}) % {INT_CARDINALITY})'
+    if field.type in ('Float', 'Decimal'):
+        return f'((({g}) % 1000) / 10.0)'
+    if field.type == 'Boolean':
+        return f'(({g}) % 2 = 0)'
+    if field.type == 'DateTime':
+        offset = f'({g})' if distinct else f'(({g}) % {DATE_DAYS})'
+        return f"({DATE_ORIGIN} + {offset} * INTERVAL '1 day' + (({g}) % 86400) * INTERVAL '1 second')"
+    if field.type == 'Json':
+        return "'{}'::jsonb"
+    return 'NULL'
+
+
+def _index_sql(model, key, namespace):
+    columns = ', '.join(
+        quote(column_name(model.field(name))) + (' DESC' if direction == 'desc' else '')
+        for name, direction in key.columns
+    )
+    unique = 'UNIQUE ' if key.is_unique else ''
+    return f'CREATE {unique}INDEX ON {qualified(model, namespace)} ({columns});\n'
+
+
+def table_sql(schema, model, namespace=DATASET_NAMESPACE):
+    """CREATE TABLE (colonnes + clé primaire), sans index secondaires"""
+    fields = column_fields(schema, model)
+    columns = [f'  {quote(column_name(field))} {column_type(schema, field)}' for field in fields]
+    primary = [key for key in model_index_keys(model) if key.kind == 'id' and key.columns]
+    if primary:
+        names = ', '.join(quote(column_name(model.field(name))) for name in primary[0].names)
+        columns.append(f'  PRIMARY KEY ({names})')
+    body = ',\n'.join(columns)
+    return f'CREATE TABLE {qualified(model, namespace)} (\n{body}\n);\n'
+
+
+def load_sql(schema, model, rows=DEFAULT_ROWS, tenants=DEFAULT_TENANTS, namespace=DATASET_NAMESPACE):
+    """INSERT ... SELECT generate_series des `rows` lignes du modèle"""
+    fields = column_fields(schema, model)
+    names = ', '.join(quote(column_name(field)) for field in fields)
+    values = ',\n  '.join(value_sql(schema, model, field, 'g', tenants) for field in fields)
+    return (
+        f'INSERT INTO {qualified(model, namespace)} ({names})\n'
+        f'SELECT\n  {values}\nFROM generate_series(1, {rows}) AS g;\n'
+    )
+
+
+def indexes_sql(model, namespace=DATASET_NAMESPACE):
+    """Index secondaires du schema (créés après le chargement: plus rapide)"""
+    return ''.join(
+        _index_sql(model, key, namespace)
+        for key in model_index_keys(model)
+        if key.kind != 'id' and key.columns and key.index_type is None
+        and all(model.has_field(name) for name in key.names)
+    )
+
+
+def dataset_sql(schema, model_names, rows=DEFAULT_ROWS, tenants=DEFAULT_TENANTS, namespace=DATASET_NAMESPACE):
+    """Script psql complet: schéma isolé recréé, tables, données, index, statistiques"""
+    chunks = [
+        f'DROP SCHEMA IF EXISTS {quote(namespace)} CASCADE;\n',
+        f'CREATE SCHEMA {quote(namespace)};\n',
+    ]
+    models = [schema.model(name) for name in sorted(model_names)]
+    for model in models:
+        chunks.append(table_sql(schema, model, namespace))
+        chunks.append(load_sql(schema, model, rows, tenants, namespace))
+        chunks.append(indexes_sql(model, namespace))
+    # VACUUM: carte de visibilité à jour (index-only scans possibles), ANALYZE: statistiques
+    chunks += [f'VACUUM ANALYZE {qualified(model, namespace)};\n' for model in models]
+    return ''.join(chunks)
+
+
+# ===== Fichiers COPY en flux (volume: millions de lignes) =====
+#
+# Le tenant de rang k (0 = le plus gros) reçoit une part 1/(k+1)^s des lignes
+# de chaque modèle (Zipf). Les identifiants sont calculés, jamais stockés :
+# row_id(modèle, tenant, i) au format UUID. Une ligne enfant désigne un
+# parent du même tenant par un indice tiré dans [0, lignes du parent pour ce
+# tenant) : clés étrangères cohérentes en mémoire constante.
+
+TENANT_MODEL = 'Tenant'
+DEFAULT_ZIPF = 1.1
+DEFAULT_GLOBAL_ROWS = 10
+COPY_NULL = '\\N'
+NULL_RATE = 0.1             # champs optionnels laissés NULL
+DATE_BASE = 1735689600      # 2025-01-01 UTC
+DATE_SPAN = 2 * 365 * 86400
+
+_ENUM_MAP_RE = re.compile(r'@map\(\s*"(?P<name>[^"]+)"\s*\)')
+
+
+def zipf_counts(total, tenants, exponent=DEFAULT_ZIPF):
+    """Lignes par tenant (rang 0 = le plus gros), au moins une par tenant"""
+    weights = [1.0 / (rank + 1) ** exponent for rank in range(tenants)]
+    scale = total / sum(weights)
+    return [max(1, int(weight * scale)) for weight in weights]
+
+
+def model_tag(seed, model_name):
+    """32 bits propres au modèle et à la graine (préfixe des identifiants)"""
+    return zlib.crc32(f'{seed}:{model_name}'.encode('utf-8'))
+
+
+def row_id(tag, tenant, index):
+    """Identifiant déterministe au format UUID v4 (valide pour @db.Uuid)"""
+    return (f'{tag:08x}-{tenant >> 12 & 0xffff:04x}-4{tenant & 0xfff:03x}-'
+            f'8{index >> 48 & 0xfff:03x}-{index & 0xffffffffffff:012x}')
+
+
+class ModelPlan:
+    """Modèle à générer: lignes par tenant (ou globales), colonnes, parents"""
+
+    def __init__(self, model, tag, scoped, counts):
+        self.model = model
+        self.tag = tag
+        self.scoped = scoped        # une série de lignes par tenant
+        self.counts = counts        # [lignes du tenant k] ou [lignes globales]
+        self.columns = []           # [(champ, ModelPlan du parent ou None, clé étrangère ?)]
+
+    @property
+    def name(self):
+        return self.model.name
+
+    @property
+    def total(self):
+        return sum(self.counts)
+
+
+def _is_scoped(schema, model):
+    return model.name == TENANT_MODEL or any(
+        field.type == TENANT_MODEL for field in model.fields if field.relation_fields
+    )
+
+
+def generation_order(schema, model_names):
+    """
+    Modèles demandés + parents obligatoires (fermeture), triés pour que
+    chaque parent obligatoire soit chargé avant ses enfants
+    """
+    wanted = set()
+    pending = list(model_names)
+    while pending:
+        name = pending.pop()
+        if name in wanted:
+            continue
+        model = schema.model(name)
+        if model is None:
+            raise ValueError(f'Modèle {name} absent du schema')
+        wanted.add(name)
+        pending += [
+            field.type for field in model.fields
+            if field.relation_fields and not field.is_optional and field.type != name
+        ]
+    ordered = []
+    while len(ordered) < len(wanted):
+        ready = sorted(
+            name for name in wanted - set(ordered)
+            if all(
+                field.type in ordered or field.type == name
+                for field in schema.model(name).fields
+                if field.relation_fields and not field.is_optional
+            )
+        )
+        if not ready:
+            raise ValueError(f'Cycle de relations obligatoires: {sorted(wanted - set(ordered))}')
+        ordered += ready
+    return [schema.model(name) for name in ordered]
+
+
+def plan_dataset(schema, model_names, rows, tenants, exponent=DEFAULT_ZIPF,
+                 global_rows=DEFAULT_GLOBAL_ROWS, seed=0):
+    """[ModelPlan] dans l'ordre de chargement"""
+    plans = {}
+    for model in generation_order(schema, model_names):
+        scoped = _is_scoped(schema, model)
+        if model.name == TENANT_MODEL:
+            counts = [1] * tenants
+        elif scoped:
+            counts = zipf_counts(rows, tenants, exponent)
+        else:
+            counts = [global_rows]
+        plan = ModelPlan(model, model_tag(seed, model.name), scoped, counts)
+        relations = {name: field.type for field in model.fields for name in field.relation_fields}
+        distinct = distinct_fields(model)
+        for field in column_fields(schema, model):
+            target = relations.get(field.name)
+            parent = plan if target == model.name else plans.get(target)
+            if parent is not None and parent is not plan and field.name in distinct:
+                # Clé étrangère unique (1-1): au plus une ligne par parent
+                plan.counts = [
+                    min(count, parent.counts[tenant] if parent.scoped else parent.counts[0])
+                    for tenant, count in enumerate(plan.counts)
+                ]
+            plan.columns.append((field, parent, target is not None))
+        plans[model.name] = plan
+    return list(plans.values())
+
+
+def _enum_values(schema, field):
+    values = []
+    for value in schema.enums[field.type].values:
+        mapped = _ENUM_MAP_RE.search(value.raw)
+        values.append(mapped.group('name') if mapped else value.name)
+    return values
+
+
+def _value_maker(schema, plan, field, parent, foreign_key, distinct):
+    """fonction(rng, tenant, index, number) -> texte COPY de la colonne (number: rang dans le modèle)"""
+    name = field.name
+
+    def nullable(make):
+        if not field.is_optional:
+            return make
+        return lambda rng, *row: COPY_NULL if rng.random() < NULL_RATE else make(rng, *row)
+
+    if parent is plan:
+        # Auto-relation: la première ligne du même tenant
+        return lambda rng, tenant, index, number: row_id(plan.tag, tenant, 0)
+    if parent is not None:
+        if name in distinct:
+            # Clé étrangère unique (1-1): la ligne i vise le parent i
+            parent_tenant = (lambda tenant: tenant) if parent.scoped else (lambda tenant: 0)
+            return lambda rng, tenant, index, number: row_id(parent.tag, parent_tenant(tenant), index)
+        counts = parent.counts
+        if parent.scoped:
+            return nullable(lambda rng, tenant, index, number: row_id(
+                parent.tag, tenant, int(rng.random() * counts[tenant])))
+        return nullable(lambda rng, tenant, index, number: row_id(
+            parent.tag, 0, int(rng.random() * counts[0])))
+    if foreign_key or field.type == 'Bytes':
+        # Parent optionnel non généré
+        return lambda rng, tenant, index, number: COPY_NULL
+    if field.is_list:
+        return lambda rng, tenant, index, number: '{}'
+    if field.has_attribute('id') and field.type == 'String':
+        return lambda rng, tenant, index, number: row_id(plan.tag, tenant, index)
+    if field.type in schema.enums:
+        return nullable(_pick(_enum_values(schema, field)))
+    if field.type == 'String':
+        if name in distinct:
+            return lambda rng, tenant, index, number: f'{name}-{tenant}-{index}'
+        return nullable(_pick([f'{name}-{value}' for value in range(STRING_CARDINALITY)]))
+    if field.type in ('Int', 'BigInt'):
+        if name in distinct or field.has_attribute('id'):
+            return lambda rng, tenant, index, number: str(number + 1)
+        return nullable(_pick([str(value) for value in range(INT_CARDINALITY)]))
+    if field.type in ('Float', 'Decimal'):
+        return nullable(lambda rng, tenant, index, number: f'{rng.random() * 500:.2f}')
+    if field.type == 'Boolean':
+        return nullable(lambda rng, tenant, index, number: 't' if rng.random() < 0.5 else 'f')
+    if field.type == 'DateTime':
+        if name in distinct:
+            return lambda rng, tenant, index, number: _timestamp(DATE_BASE + number)
+        return nullable(_pick(_TIMESTAMPS))
+    if field.type == 'Json':
+        return nullable(lambda rng, tenant, index, number: '{}')
+    return lambda rng, tenant, index, number: COPY_NULL
+
+
+def _timestamp(seconds):
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(seconds))
+
+
+def _pick(values):
+    """Tirage uniforme dans des valeurs déjà formatées (randrange/strftime par ligne: trop lents)"""
+    size = len(values)
+    return lambda rng, tenant, index, number: values[int(rng.random() * size)]
+
+
+# Horodatages répartis sur DATE_SPAN, formatés une fois pour toutes
+_TIMESTAMPS = [_timestamp(DATE_BASE + offset) for offset in range(0, DATE_SPAN, DATE_SPAN // 8192)]
+
+
+def copy_columns(plan):
+    """Liste `"a", "b", ...` des colonnes du fichier COPY"""
+    return ', '.join(quote(column_name(field)) for field, _, _ in plan.columns)
+
+
+def stream_copy(schema, plan, out, seed=0, batch=10000):
+    """Écrit les lignes du modèle au format COPY texte, par lots; retourne le nombre de lignes"""
+    distinct = distinct_fields(plan.model)
+    makers = [
+        _value_maker(schema, plan, field, parent, foreign_key, distinct)
+        for field, parent, foreign_key in plan.columns
+    ]
+    number = 0
+    for tenant, count in enumerate(plan.counts):
+        # Une graine par (modèle, tenant): chaque lot est reproductible isolément
+        rng = random.Random(f'{seed}:{plan.name}:{tenant}')
+        lines = []
+        for index in range(count):
+            lines.append('\t'.join([make(rng, tenant, index, number) for make in makers]))
+            number += 1
+            if len(lines) >= batch:
+                out.write('\n'.join(lines) + '\n')
+                lines = []
+        if lines:
+            out.write('\n'.join(lines) + '\n')
+    return number
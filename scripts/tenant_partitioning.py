@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+"""
+Partitionnement par tenant des plus grosses tables (SQL compagnon du schema)
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Après la migration multi-tenant, `Order`, `BeautyAppointment`... restent un
+seul tas partagé par tous les tenants : l'index tenantId grossit avec la
+table et VACUUM / REINDEX parcourent les lignes de tout le monde. Ce module
+génère le SQL qui partitionne les modèles choisis par tenantId :
+
+    - hash: MODULUS n fixe, partitions de taille ~1/n (milliers de tenants) ;
+    - list: une partition par tenant (+ DEFAULT), créée automatiquement à
+      l'insertion d'un Tenant (trigger).
+
+La table existante est migrée EN LIGNE, comme online_migration :
+
+    1. table partitionnée fantôme `<Table>_part` (LIKE l'existante), clé
+       primaire (id, tenantId), clés étrangères sortantes
+    2. table par table (parents d'abord): trigger de synchronisation sur
+       l'ancienne table (INSERT/UPDATE/DELETE), puis copie par lots en
+       keyset sur la clé primaire (lignes du lot en FOR KEY SHARE : un
+       DELETE concurrent attend le COMMIT du lot, son trigger retire
+       ensuite la copie), COMMIT et pause
+    3. index: ON ONLY sur la table mère, CONCURRENTLY sur chaque
+       partition puis ATTACH; ANALYZE
+    4. bascule en une transaction courte: rapprochement sous le verrou
+       (lignes fantômes absentes de la source supprimées, nombres de
+       lignes comparés, ROLLBACK si écart), renommages, clés étrangères
+       entrantes composites (colonne, tenantId) NOT VALID, triggers de
+       marquage des agrégats journaliers (stats_rollups) déplacés sur la
+       table partitionnée
+    5. VALIDATE hors verrou fort; l'ancienne table reste en
+       `<Table>_unpartitioned` pour un retour arrière
+
+PostgreSQL exige la clé de partition dans toute contrainte unique: la clé
+primaire devient (id, tenantId) et chaque @unique devient unique PAR
+tenant. Le schema Prisma ne change pas (les id restent uniques par
+génération uuid/cuid).
+
+Usage:
+    from stats_rollups import existing_rollups
+    from tenant_partitioning import plan_partitions, render_partitioning
+
+    plans = plan_partitions(schema, ['Order', 'BeautyAppointment'], strategy='hash', partitions=16)
+    sql = render_partitioning(plans, rollups=existing_rollups(schema))
+"""
+
+from online_migration import (
+    TENANT_COLUMN, TENANT_TABLE, _REFERENTIAL_ACTIONS, IndexPlan, column_name, quote, sql_type, table_name,
+)
+from prisma_schema import parse_field_list
+from schema_indexes import model_index_keys
+from stats_rollups import render_mark_trigger
+
+STRATEGIES = ('hash', 'list')
+DEFAULT_PARTITIONS = 16
+SHADOW_SUFFIX = '_part'
+OLD_SUFFIX = '_unpartitioned'
+TENANT_PARTITIONS_FUNCTION = 'kairo_create_tenant_partitions'
+
+
+class ForeignKeyPlan:
+    """Clé étrangère à (re)créer: (colonnes) → table cible (colonnes)"""
+
+    def __init__(self, name, table, columns, target, target_columns, on_delete):
+        self.name = name
+        self.table = table
+        self.columns = columns
+        self.target = target
+        self.target_columns = target_columns
+        self.on_delete = on_delete
+
+    def statement(self, table=None, target=None, not_valid=False):
+        # SET NULL sur une clé composite: seules les colonnes de la relation (PostgreSQL 15+)
+        on_delete = self.on_delete
+        if on_delete in ('SET NULL', 'SET DEFAULT') and TENANT_COLUMN in self.columns:
+            on_delete += ' (' + ', '.join(quote(c) for c in self.columns if c != TENANT_COLUMN) + ')'
+        return (
+            f'ALTER TABLE {quote(table or self.table)} ADD CONSTRAINT {quote(self.name)} '
+            f"FOREIGN KEY ({', '.join(quote(c) for c in self.columns)}) "
+            f"REFERENCES {quote(target or self.target)}({', '.join(quote(c) for c in self.target_columns)}) "
+            f"ON DELETE {on_delete} ON UPDATE CASCADE{' NOT VALID' if not_valid else ''};\n"
+        )
+
+
+class PartitionPlan:
+    """Passage d'une table existante à une table partitionnée par tenant"""
+
+    def __init__(self, model, table, id_column, id_type, strategy, partitions):
+        self.model = model
+        self.table = table
+        self.id_column = id_column
+        self.id_type = id_type
+        self.strategy = strategy
+        self.partitions = partitions
+        self.columns = []           # colonnes SQL, ordre du schema
+        self.indexes = []           # IndexPlan (online_migration), clé de partition incluse
+        self.widened = []           # uniques globaux devenus uniques par tenant
+        self.outgoing = []          # ForeignKeyPlan de la table
+        self.incoming = []          # ForeignKeyPlan des autres tables vers celle-ci
+
+    def __repr__(self):
+        return f'PartitionPlan({self.table}, {self.strategy}, {len(self.indexes)} index)'
+
+    @property
+    def shadow(self):
+        return self.table + SHADOW_SUFFIX
+
+    @property
+    def old(self):
+        return self.table + OLD_SUFFIX
+
+    @property
+    def key(self):
+        return [self.id_column, TENANT_COLUMN]
+
+
+def _columns(schema, model):
+    """Colonnes SQL (scalaires, enums, Unsupported), ordre du schema"""
+    return [column_name(field) for field in model.fields if schema.model(field.type) is None]
+
+
+def _column(model, name):
+    field = model.field(name)
+    return column_name(field) if field is not None else name
+
+
+def _foreign_key(model, relation, target):
+    """ForeignKeyPlan d'un champ relationnel porteur de `fields: [...]`"""
+    references = parse_field_list(relation.relation.argument('references') or '[id]')
+    columns = [_column(model, name) for name in relation.relation_fields]
+    target_columns = [_column(target, name) for name in references]
+    table = table_name(model)
+    name = relation.relation.argument('map')
+    name = name.strip('"') if name else f"{table}_{'_'.join(columns)}_fkey"
+    on_delete = relation.relation.argument('onDelete')
+    if on_delete is None:
+        on_delete = 'SetNull' if relation.is_optional else 'Restrict'
+    return ForeignKeyPlan(name, table, columns, table_name(target), target_columns,
+                          _REFERENTIAL_ACTIONS.get(on_delete, 'RESTRICT'))
+
+
+def _tenant_scoped(foreign_key):
+    """Clé composite (colonnes, tenantId): la ligne référencée est du même tenant"""
+    if TENANT_COLUMN not in foreign_key.columns:
+        foreign_key.columns = foreign_key.columns + [TENANT_COLUMN]
+        foreign_key.target_columns = foreign_key.target_columns + [TENANT_COLUMN]
+    return foreign_key
+
+
+def partition_order(schema, model_names):
+    """Modèles triés parents d'abord (une FK vers un modèle partitionné est composite)"""
+    selected = set(model_names)
+    ordered = []
+    pending = list(model_names)
+    while pending:
+        for name in pending:
+            parents = {
+                target.name for relation, target in schema.relations(name)
+                if relation.relation_fields and target.name in selected and target.name != name
+            }
+            if parents <= set(ordered):
+                ordered.append(name)
+                pending.remove(name)
+                break
+        else:
+            raise ValueError(f"relations circulaires entre {', '.join(pending)}")
+    return ordered
+
+
+def plan_partitions(schema, model_names, strategy='hash', partitions=DEFAULT_PARTITIONS):
+    """PartitionPlan de chaque modèle (schema multi-tenant), parents d'abord"""
+    if strategy not in STRATEGIES:
+        raise ValueError(f"stratégie inconnue: {strategy} (attendu: {', '.join(STRATEGIES)})")
+    for name in model_names:
+        model = schema.model(name)
+        if model is None:
+            raise ValueError(f'{name}: modèle absent du schema')
+        tenant = model.field(TENANT_COLUMN)
+        if tenant is None or tenant.is_optional:
+            raise ValueError(f'{name}: {TENANT_COLUMN} obligatoire requis comme clé de partition')
+        if model.id_field is None:
+            raise ValueError(f'{name}: clé primaire simple requise pour la copie par lots')
+
+    ordered = partition_order(schema, model_names)
+    selected = set(ordered)
+    plans = []
+    for name in ordered:
+        model = schema.model(name)
+        table = table_name(model)
+        plan = PartitionPlan(name, table, column_name(model.id_field), sql_type(model.id_field),
+                             strategy, partitions)
+        plan.columns = _columns(schema, model)
+
+        for key in model_index_keys(model):
+            if key.kind == 'id' or key.columns is None:
+                continue
+            fields = [model.field(field_name) for field_name in key.names]
+            if None in fields:
+                continue
+            columns = [(column_name(f), direction) for f, (_, direction) in zip(fields, key.columns)]
+            if key.is_unique and TENANT_COLUMN not in key.names:
+                columns.append((TENANT_COLUMN, 'asc'))
+                plan.widened.append(', '.join(key.names))
+            index_name = key.member.argument('map') if key.member.kind == 'block_attribute' else None
+            if index_name:
+                index_name = index_name.strip('"')
+            else:
+                suffix = 'key' if key.is_unique else 'idx'
+                index_name = '_'.join([table] + [column for column, _ in columns[:len(key.names)]] + [suffix])
+            plan.indexes.append(IndexPlan(index_name, columns, key.is_unique))
+
+        for relation, target in schema.relations(model):
+            if not relation.relation_fields:
+                continue
+            foreign_key = _foreign_key(model, relation, target)
+            if target.name in selected:
+                _tenant_scoped(foreign_key)
+            plan.outgoing.append(foreign_key)
+
+        for other in schema.models.values():
+            if other.name == name:
+                continue
+            for relation, target in schema.relations(other):
+                if target.name != name or not relation.relation_fields:
+                    continue
+                if not other.has_field(TENANT_COLUMN):
+                    raise ValueError(
+                        f'{other.name}.{relation.name} référence {name} sans {TENANT_COLUMN}: '
+                        f'clé étrangère composite impossible'
+                    )
+                plan.incoming.append(_tenant_scoped(_foreign_key(other, relation, target)))
+        plans.append(plan)
+    return plans
+
+
+# --- Rendu SQL -------------------------------------------------------------
+
+_HEADER = '''-- PostgreSQL 12+ (15+ pour ON DELETE SET NULL sur clé composite)
+-- Partitionnement par {column} (généré par scripts/add-multi-tenant-to-schema-v2.py --partition)
+-- Tables: {tables}
+--
+-- À exécuter APRÈS la migration multi-tenant ({column} NOT NULL), avec psql (\\gexec),
+-- HORS transaction (COMMIT par lot de copie, CREATE INDEX CONCURRENTLY):
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f {path}
+--
+-- Les requêtes filtrées par {column} n'ouvrent qu'une partition; celles sans
+-- {column} (findUnique par id seul) parcourent un index par partition.
+-- La clé primaire devient (id, {column}) et chaque @unique devient unique PAR tenant:
+-- `prisma migrate diff` signalera cet écart, volontaire.
+-- Étapes 1 à 3 rejouables; l'ancienne table est conservée (voir la fin du fichier).
+-- Les triggers de marquage des agrégats journaliers (stats-rollups.sql, à appliquer
+-- avant) suivent la table à la bascule: {rollups}.
+
+SET lock_timeout = '{lock_timeout}';
+'''
+
+_COPY = '''
+-- {table}: lots de {batch_size} lignes, pause {sleep_ms} ms
+DO $$
+DECLARE
+  last_id {id_type};
+  batch_last {id_type};
+  total BIGINT := 0;
+  copied BIGINT;
+BEGIN
+  LOOP
+    SELECT max(b.{id_column}), count(*) INTO batch_last, copied FROM (
+      SELECT {id_column} FROM {old}
+      WHERE last_id IS NULL OR {id_column} > last_id
+      ORDER BY {id_column}
+      LIMIT {batch_size}
+    ) b;
+    EXIT WHEN copied = 0;
+
+    INSERT INTO {shadow} ({columns})
+    SELECT {columns} FROM {old}
+    WHERE (last_id IS NULL OR {id_column} > last_id) AND {id_column} <= batch_last
+    FOR KEY SHARE
+    ON CONFLICT DO NOTHING;
+
+    total := total + copied;
+    last_id := batch_last;
+    COMMIT;
+    PERFORM pg_sleep({sleep_seconds});
+  END LOOP;
+  RAISE NOTICE '{table}: % ligne(s) copiée(s)', total;
+END $$;
+'''
+
+_SYNC = '''
+-- Écritures sur {table} répercutées dans {shadow_label} pendant la copie
+CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    DELETE FROM {shadow} WHERE {old_match};
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    INSERT INTO {shadow} ({columns}) VALUES ({values})
+    ON CONFLICT ({key}) DO UPDATE SET {updates};
+  END IF;
+  RETURN NULL;
+END $$;
+DROP TRIGGER IF EXISTS {trigger} ON {quoted_table};
+CREATE TRIGGER {trigger} AFTER INSERT OR UPDATE OR DELETE ON {quoted_table}
+  FOR EACH ROW EXECUTE FUNCTION {function}();
+'''
+
+
+def _list(columns):
+    return ', '.join(quote(column) for column in columns)
+
+
+def _partition_statements(plan):
+    """Partitions de la table fantôme (hash: MODULUS fixe, list: une par tenant + DEFAULT)"""
+    shadow = quote(plan.shadow)
+    if plan.strategy == 'hash':
+        width = len(str(plan.partitions - 1))
+        return ''.join(
+            f'CREATE TABLE IF NOT EXISTS {quote(f"{plan.table}_p{remainder:0{width}d}")} PARTITION OF {shadow} '
+            f'FOR VALUES WITH (MODULUS {plan.partitions}, REMAINDER {remainder});\n'
+            for remainder in range(plan.partitions)
+        )
+    return (
+        f'CREATE TABLE IF NOT EXISTS {quote(plan.table + "_default")} PARTITION OF {shadow} DEFAULT;\n'
+        'DO $$\nDECLARE tenant RECORD;\nBEGIN\n'
+        f'  FOR tenant IN SELECT {quote("id")} AS id FROM {quote(TENANT_TABLE)} LOOP\n'
+        "    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES IN (%L)',\n"
+        f"                   '{plan.table}_' || tenant.id, '{plan.shadow}', tenant.id);\n"
+        '  END LOOP;\nEND $$;\n'
+    )
+
+
+def _tenant_partitions_function(plans):
+    """Partitions des tables `list` pour chaque nouveau Tenant (trigger AFTER INSERT)"""
+    tables = ', '.join(f"'{plan.table}'" for plan in plans if plan.strategy == 'list')
+    if not tables:
+        return ''
+    tenant = quote(TENANT_TABLE)
+    return (
+        '\n-- ===== Nouveaux tenants: leurs partitions sont créées à l\'insertion =====\n'
+        f'CREATE OR REPLACE FUNCTION {TENANT_PARTITIONS_FUNCTION}() RETURNS trigger LANGUAGE plpgsql AS $$\n'
+        'DECLARE\n  base TEXT;\n  parent TEXT;\nBEGIN\n'
+        f'  FOREACH base IN ARRAY ARRAY[{tables}] LOOP\n'
+        '    -- Avant la bascule, la table partitionnée est encore la table fantôme\n'
+        f"    parent := CASE WHEN to_regclass(format('%I', base || '{SHADOW_SUFFIX}')) IS NOT NULL\n"
+        f"                   THEN base || '{SHADOW_SUFFIX}' ELSE base END;\n"
+        "    EXECUTE format('CREATE TABLE IF NOT EXISTS %I PARTITION OF %I FOR VALUES IN (%L)',\n"
+        "                   base || '_' || NEW.id, parent, NEW.id);\n"
+        '  END LOOP;\n  RETURN NULL;\nEND $$;\n'
+        f'DROP TRIGGER IF EXISTS {TENANT_PARTITIONS_FUNCTION} ON {tenant};\n'
+        f'CREATE TRIGGER {TENANT_PARTITIONS_FUNCTION} AFTER INSERT ON {tenant}\n'
+        f'  FOR EACH ROW EXECUTE FUNCTION {TENANT_PARTITIONS_FUNCTION}();\n'
+    )
+
+
+_PARTITION_INDEXES = '''
+-- {name}: index de la table mère (ON ONLY) puis un index CONCURRENTLY par partition
+CREATE {unique}INDEX IF NOT EXISTS {parent_index} ON ONLY {shadow} ({columns});
+SELECT format('CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS %I ON %I ({literal_columns})',
+              partition.relname || '_{suffix}', partition.relname)
+{partitions}\\gexec
+SELECT format('ALTER INDEX %I ATTACH PARTITION %I', '{parent_name}', partition.relname || '_{suffix}')
+{partitions}\\gexec
+'''
+
+# Partitions de la table fantôme dont l'index n'est pas encore rattaché
+_UNINDEXED_PARTITIONS = '''FROM pg_inherits inheritance
+JOIN pg_class partition ON partition.oid = inheritance.inhrelid
+WHERE inheritance.inhparent = '{shadow}'::regclass AND NOT EXISTS (
+  SELECT 1 FROM pg_inherits attached JOIN pg_index child ON child.indexrelid = attached.inhrelid
+  WHERE attached.inhparent = '{parent_index}'::regclass AND child.indrelid = partition.oid
+)'''
+
+
+def _index_statement(plan, index):
+    """
+    Index sans bloquer les écritures du trigger: CREATE INDEX sur la table
+    mère prendrait un verrou SHARE le temps de tout construire
+    """
+    columns = ', '.join(
+        quote(column) + (' DESC' if direction == 'desc' else '') for column, direction in index.columns
+    )
+    # Nom définitif libre seulement après la bascule (l'ancienne table porte encore le sien)
+    parent_name = index.name + SHADOW_SUFFIX
+    prefix = plan.table + '_'
+    suffix = index.name[len(prefix):] if index.name.startswith(prefix) else index.name
+    return _PARTITION_INDEXES.format(
+        name=index.name,
+        unique='UNIQUE ' if index.unique else '',
+        parent_index=quote(parent_name),
+        parent_name=parent_name,
+        shadow=quote(plan.shadow),
+        columns=columns,
+        literal_columns=columns.replace("'", "''"),
+        suffix=suffix,
+        partitions=_UNINDEXED_PARTITIONS.format(shadow=quote(plan.shadow), parent_index=quote(parent_name)),
+    )
+
+
+def _reconcile(plan):
+    """
+    Sous le verrou de la bascule: retire de la table fantôme les lignes
+    supprimées de la source pendant un lot, puis exige le même nombre de
+    lignes (l'exception annule la transaction, la table reste en place)
+    """
+    table, shadow = quote(plan.table), quote(plan.shadow)
+    match = ' AND '.join(f'source_row.{quote(column)} = shadow_row.{quote(column)}' for column in plan.key)
+    return (
+        f'DELETE FROM {shadow} shadow_row WHERE NOT EXISTS (SELECT 1 FROM {table} source_row WHERE {match});\n'
+        'DO $$\nDECLARE\n  source_rows BIGINT;\n  copied_rows BIGINT;\nBEGIN\n'
+        f'  SELECT count(*) INTO source_rows FROM {table};\n'
+        f'  SELECT count(*) INTO copied_rows FROM {shadow};\n'
+        '  IF source_rows <> copied_rows THEN\n'
+        f"    RAISE EXCEPTION '{plan.table}: % ligne(s) source, % dans {plan.shadow}', source_rows, copied_rows;\n"
+        '  END IF;\nEND $$;\n'
+    )
+
+
+def _swap(plan, rollups=()):
+    table, shadow, old = quote(plan.table), quote(plan.shadow), quote(plan.old)
+    chunks = [
+        f'\n-- {plan.table}\nBEGIN;\n',
+        f'LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE;\n',
+        _reconcile(plan),
+        f'DROP TRIGGER {quote(plan.table + "_partition_sync")} ON {table};\n',
+        f'ALTER TABLE {table} RENAME TO {old};\n',
+        f'ALTER TABLE {old} RENAME CONSTRAINT {quote(plan.table + "_pkey")} TO {quote(plan.old + "_pkey")};\n',
+    ]
+    for index in plan.indexes:
+        chunks.append(f'ALTER INDEX IF EXISTS {quote(index.name)} RENAME TO {quote(index.name + OLD_SUFFIX)};\n')
+    chunks.append(f'ALTER TABLE {shadow} RENAME TO {table};\n')
+    chunks.append(
+        f'ALTER TABLE {table} RENAME CONSTRAINT {quote(plan.shadow + "_pkey")} TO {quote(plan.table + "_pkey")};\n'
+    )
+    for index in plan.indexes:
+        chunks.append(f'ALTER INDEX {quote(index.name + SHADOW_SUFFIX)} RENAME TO {quote(index.name)};\n')
+    # Séquence d'un id autoincrement: suit la nouvelle table (DROP de l'ancienne sans effet)
+    chunks.append(
+        'DO $$\nDECLARE sequence_name TEXT := '
+        f"pg_get_serial_sequence('{old}', '{plan.id_column}');\nBEGIN\n"
+        '  IF sequence_name IS NOT NULL THEN\n'
+        "    EXECUTE format('ALTER SEQUENCE %s OWNED BY %I.%I', sequence_name, "
+        f"'{plan.table}', '{plan.id_column}');\n"
+        '  END IF;\nEND $$;\n'
+    )
+    for foreign_key in plan.incoming:
+        chunks.append(f'ALTER TABLE {quote(foreign_key.table)} DROP CONSTRAINT IF EXISTS {quote(foreign_key.name)};\n')
+        chunks.append(foreign_key.statement(not_valid=True))
+    # Triggers posés sur l'ancienne table: ils y resteraient après le renommage
+    for spec in rollups:
+        if table_name(spec.model) == plan.table:
+            chunks.append(render_mark_trigger(spec, old_table=plan.old))
+    chunks.append('COMMIT;\n')
+    return ''.join(chunks)
+
+
+def render_partitioning(plans, batch_size=5000, sleep_ms=100, lock_timeout='5s',
+                        path='prisma/online-migrations/tenant-partitioning.sql', rollups=()):
+    """
+    Script SQL complet (5 étapes) pour une liste de PartitionPlan ; `rollups` :
+    agrégats journaliers du schema (stats_rollups.existing_rollups)
+    """
+    tables = {plan.table for plan in plans}
+    rollups = [spec for spec in rollups if table_name(spec.model) in tables]
+    chunks = [_HEADER.format(
+        column=TENANT_COLUMN,
+        rollups=', '.join(f'{spec.name}_mark' for spec in rollups) or 'aucun',
+        tables=', '.join(f'{plan.table} ({plan.strategy})' for plan in plans),
+        path=path,
+        lock_timeout=lock_timeout,
+    )]
+
+    chunks.append('\n-- ===== ÉTAPE 1: tables partitionnées fantômes =====\n')
+    partitioned = {plan.table for plan in plans}
+    for plan in plans:
+        shadow = quote(plan.shadow)
+        chunks.append(f'\n-- {plan.table}\n')
+        chunks.append(
+            f'CREATE TABLE IF NOT EXISTS {shadow} (LIKE {quote(plan.table)} '
+            f'INCLUDING DEFAULTS INCLUDING GENERATED INCLUDING STORAGE INCLUDING COMMENTS)\n'
+            f'  PARTITION BY {plan.strategy.upper()} ({quote(TENANT_COLUMN)});\n'
+        )
+        chunks.append(
+            'DO $$ BEGIN\n'
+            f'  ALTER TABLE {shadow} ADD CONSTRAINT {quote(plan.shadow + "_pkey")} PRIMARY KEY ({_list(plan.key)});\n'
+            'EXCEPTION WHEN invalid_table_definition THEN NULL;\nEND $$;\n'
+        )
+        chunks.append(_partition_statements(plan))
+        # Table fantôme vide: clés étrangères posées (et validées) instantanément.
+        # Une cible partitionnée elle aussi est référencée par sa table fantôme
+        # (la clé suit la table au renommage de l'étape 5).
+        for foreign_key in plan.outgoing:
+            target = foreign_key.target
+            if target in partitioned:
+                target += SHADOW_SUFFIX
+            chunks.append(f'ALTER TABLE {shadow} DROP CONSTRAINT IF EXISTS {quote(foreign_key.name)};\n')
+            chunks.append(foreign_key.statement(table=plan.shadow, target=target))
+    chunks.append(_tenant_partitions_function(plans))
+
+    # Table par table, parents d'abord: quand le trigger d'une table enfant
+    # s'active, la table fantôme parente est complète et tenue à jour
+    chunks.append('\n-- ===== ÉTAPE 2: synchronisation des écritures puis copie par lots =====\n')
+    for plan in plans:
+        columns = plan.columns
+        chunks.append(_SYNC.format(
+            table=plan.table,
+            shadow_label=plan.shadow,
+            shadow=quote(plan.shadow),
+            quoted_table=quote(plan.table),
+            function=quote(plan.table + '_partition_sync'),
+            trigger=quote(plan.table + '_partition_sync'),
+            old_match=' AND '.join(f'{quote(column)} = OLD.{quote(column)}' for column in plan.key),
+            columns=_list(columns),
+            values=', '.join(f'NEW.{quote(column)}' for column in columns),
+            key=_list(plan.key),
+            updates=', '.join(
+                f'{quote(column)} = EXCLUDED.{quote(column)}' for column in columns if column not in plan.key
+            ) or f'{quote(plan.id_column)} = EXCLUDED.{quote(plan.id_column)}',
+        ))
+        chunks.append(_COPY.format(
+            table=plan.table,
+            old=quote(plan.table),
+            shadow=quote(plan.shadow),
+            columns=_list(plan.columns),
+            id_column=quote(plan.id_column),
+            id_type=plan.id_type,
+            batch_size=batch_size,
+            sleep_ms=sleep_ms,
+            sleep_seconds=f'{sleep_ms / 1000:g}',
+        ))
+
+    chunks.append('\n-- ===== ÉTAPE 3: index (un par partition) et statistiques =====\n')
+    for plan in plans:
+        for index in plan.indexes:
+            chunks.append(_index_statement(plan, index))
+        chunks.append(f'ANALYZE {quote(plan.shadow)};\n')
+
+    chunks.append('\n-- ===== ÉTAPE 4: bascule (transaction courte par table) =====\n')
+    for plan in plans:
+        chunks.append(_swap(plan, rollups))
+
+    chunks.append('\n-- ===== ÉTAPE 5: validation en ligne des clés étrangères entrantes =====\n')
+    for plan in plans:
+        # Une table enfant partitionnée ici a déjà sa clé valide (posée à l'étape 1)
+        for foreign_key in plan.incoming:
+            if foreign_key.table in partitioned:
+                continue
+            chunks.append(
+                f'ALTER TABLE {quote(foreign_key.table)} VALIDATE CONSTRAINT {quote(foreign_key.name)};\n'
+            )
+
+    chunks.append('\nRESET lock_timeout;\n')
+    chunks.append('\n-- Une fois l\'application vérifiée, libérer l\'espace des anciennes tables:\n')
+    for plan in plans:
+        chunks.append(f'-- DROP TABLE {quote(plan.old)};\n')
+    return ''.join(chunks)
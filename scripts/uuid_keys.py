@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+Clés UUID natives (@db.Uuid): id, tenantId et clés étrangères
+Auteur: KAIRO Digital
+Date: 18 Octobre 2026
+
+Les clés du schema sont des `String @id @default(uuid())` : PostgreSQL les
+stocke en TEXT, 36 caractères + 1 octet d'en-tête, dans chaque ligne et
+dans chaque entrée d'index qui les contient (`@@index([tenantId])`,
+`@@index([tenantId, date])`...). Le type natif UUID tient en 16 octets :
+une entrée B-tree (tenantId) passe de 52 à 28 octets, deux fois plus
+d'entrées par page, donc plus d'index en cache sur les grosses tables.
+Les valeurs ne changent pas (Prisma génère déjà des UUID) ; un substitut
+entier imposerait de réécrire les id exposés par l'API et les URL.
+
+Ce module :
+    - convertit le schema : @db.Uuid sur les clés primaires
+      `String @id @default(uuid())`, sur les clés étrangères qui les
+      référencent et sur toutes les colonnes tenantId (copies dénormalisées
+      des agrégats comprises, sauf la file RollupDirtyDay, lue en TEXT par
+      le SQL compagnon des agrégats) ;
+    - estime le gain par modèle (tas et index) à partir des lignes par table ;
+    - génère la migration de conversion EN LIGNE :
+        0. contrôle : toutes les valeurs existantes sont des UUID
+        1. colonne fantôme `<colonne>__uuid` + trigger de synchronisation
+        2. backfill par lots (keyset sur la clé primaire)
+        3. index fantômes CONCURRENTLY, CHECK NOT NULL validés
+        4. bascule en une transaction courte : clés étrangères retirées,
+           anciennes colonnes supprimées (leurs index avec elles),
+           renommages, PRIMARY KEY USING INDEX, clés étrangères NOT VALID
+        5. VALIDATE hors verrou fort
+
+Les fonctions de rafraîchissement des agrégats journaliers (SQL compagnon
+de stats_rollups) comparent tenantId au type de la génération précédente
+(`c."tenantId"::TEXT`) : celles des tables converties sont régénérées avec
+le type UUID dans la transaction de bascule (sinon `uuid = text` à chaque
+rafraîchissement). Le trigger de marquage écrit `tenantId::text` dans
+RollupDirtyDay, qui reste TEXT, et n'a pas à changer.
+
+Le gain sur les index est immédiat (index reconstruits) ; sur le tas,
+l'espace des anciennes colonnes n'est rendu qu'à la réécriture des lignes
+(pg_repack ou VACUUM FULL en fenêtre de maintenance).
+
+Usage:
+    from stats_rollups import existing_rollups
+    from uuid_keys import apply_uuid_keys, estimate_savings, plan_uuid_keys, render_uuid_migration
+
+    text_schema = parse_schema(schema.render())
+    converted = apply_uuid_keys(schema)
+    sql = render_uuid_migration(plan_uuid_keys(text_schema, schema), rollups=existing_rollups(schema))
+"""
+
+from online_migration import TENANT_COLUMN, IndexPlan, column_name, drop_invalid_index, quote, sql_type, table_name
+from prisma_schema import parse_field_list
+from schema_indexes import model_index_keys
+from stats_rollups import DIRTY_MODEL, render_refresh_function
+from tenant_partitioning import _foreign_key
+
+KEY_TYPES = ('text', 'uuid')
+UUID_ATTRIBUTE = '@db.Uuid'
+UUID_TYPE = 'UUID'
+SHADOW_SUFFIX = '__uuid'
+
+# Modèles dont les colonnes restent TEXT (clé lue telle quelle par du SQL généré)
+TEXT_KEY_MODELS = {DIRTY_MODEL}
+
+# Empreinte (octets) d'une clé: texte 36 caractères + en-tête varlena court, UUID natif
+TEXT_KEY_WIDTH = 37
+UUID_WIDTH = 16
+INDEX_TUPLE_HEADER = 8      # IndexTupleData
+LINE_POINTER = 4            # ItemIdData
+MAXALIGN = 8
+INDEX_FILL = 0.9            # fillfactor des feuilles B-tree par défaut
+_ALIGNMENTS = {'Int': 4, 'BigInt': 8, 'DateTime': 8, 'Float': 8}
+ENUM_ALIGNMENT = 4
+
+MAX_IDENTIFIER = 63         # NAMEDATALEN - 1
+_UUID_PATTERN = '^[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}$'
+
+
+def _is_uuid(field):
+    native = field.native_type
+    return native is not None and native.name == 'db.Uuid'
+
+
+def _generated_uuid(field):
+    default = field.attribute('default')
+    return default is not None and (default.argument('value', 0) or '').replace(' ', '') == 'uuid()'
+
+
+def uuid_key_fields(schema):
+    """
+    Champs String à passer en UUID : {(modèle, champ)}. Une clé étrangère
+    suit toujours le type de la colonne qu'elle référence.
+    """
+    keys = set()
+    uuid_targets = set()
+    for model in schema.models.values():
+        if model.name in TEXT_KEY_MODELS:
+            continue
+        for field in model.fields:
+            if field.type != 'String' or field.is_list:
+                continue
+            if _is_uuid(field):
+                uuid_targets.add((model.name, field.name))
+            elif field.has_attribute('id') and _generated_uuid(field) or field.name == TENANT_COLUMN:
+                keys.add((model.name, field.name))
+
+    # Point fixe: une clé étrangère peut référencer une colonne elle-même convertie
+    changed = True
+    while changed:
+        changed = False
+        for model in schema.models.values():
+            if model.name in TEXT_KEY_MODELS:
+                continue
+            for relation, target in schema.relations(model):
+                references = parse_field_list(relation.relation.argument('references') or '[id]') \
+                    if relation.relation_fields else []
+                for name, reference in zip(relation.relation_fields, references):
+                    field = model.field(name)
+                    if field is None or field.type != 'String' or field.native_type is not None:
+                        continue
+                    if (model.name, name) in keys:
+                        continue
+                    if (target.name, reference) in keys or (target.name, reference) in uuid_targets:
+                        keys.add((model.name, name))
+                        changed = True
+    return keys
+
+
+def apply_uuid_keys(schema):
+    """Ajoute @db.Uuid aux clés (en place). Retourne [(modèle, champ)], ordre du schema"""
+    keys = uuid_key_fields(schema)
+    converted = []
+    for model in schema.models.values():
+        for field in list(model.fields):
+            if (model.name, field.name) in keys:
+                model.replace(field, field.with_attribute(UUID_ATTRIBUTE))
+                converted.append((model.name, field.name))
+    return converted
+
+
+# --- Estimation du gain ------------------------------------------------------
+
+def _align(offset, alignment):
+    return -(-offset // alignment) * alignment
+
+
+def index_entry_size(widths):
+    """Octets d'une entrée B-tree feuille: en-tête, colonnes alignées, MAXALIGN, pointeur"""
+    offset = INDEX_TUPLE_HEADER
+    for width, alignment in widths:
+        offset = _align(offset, alignment) + width
+    return _align(offset, MAXALIGN) + LINE_POINTER
+
+
+def _column_width(schema, stats, model, field, uuid_key):
+    """(largeur, alignement) d'une colonne d'index; une clé convertie vaut TEXT ou UUID"""
+    if uuid_key is not None:
+        return (UUID_WIDTH if uuid_key else TEXT_KEY_WIDTH), 1
+    alignment = ENUM_ALIGNMENT if field.type in schema.enums else _ALIGNMENTS.get(field.type, 1)
+    return stats.width(schema, model, field), alignment
+
+
+class KeySavings:
+    """Gain estimé pour un modèle: colonnes converties, octets de tas et d'index"""
+
+    def __init__(self, model, table, rows, columns):
+        self.model = model
+        self.table = table
+        self.rows = rows
+        self.columns = columns
+        self.heap_bytes = 0
+        self.indexes = []           # [(index, octets par entrée TEXT, octets par entrée UUID)]
+
+    def __repr__(self):
+        return f'KeySavings({self.model}, {len(self.columns)} colonne(s))'
+
+    @property
+    def index_before(self):
+        return sum(self.rows * before / INDEX_FILL for _, before, _ in self.indexes)
+
+    @property
+    def index_after(self):
+        return sum(self.rows * after / INDEX_FILL for _, _, after in self.indexes)
+
+    @property
+    def index_bytes(self):
+        return self.index_before - self.index_after
+
+    @property
+    def total_bytes(self):
+        return self.heap_bytes + self.index_bytes
+
+
+def _render_key(key):
+    if key.member.kind == 'block_attribute':
+        return key.member.attribute.render()
+    return f'{key.member.name} @{key.kind}'
+
+
+def estimate_savings(schema, converted, stats):
+    """
+    KeySavings par modèle converti (schema après apply_uuid_keys), du plus
+    gros gain au plus petit. `stats`: include_fanout.RowStats. Tas: colonnes
+    supposées renseignées (borne haute), alignement des lignes ignoré.
+    """
+    by_model = {}
+    for model_name, field_name in converted:
+        by_model.setdefault(model_name, []).append(field_name)
+
+    report = []
+    for model_name, columns in by_model.items():
+        model = schema.model(model_name)
+        rows = stats.rows(model_name)
+        savings = KeySavings(model_name, table_name(model), rows, columns)
+        savings.heap_bytes = rows * len(columns) * (TEXT_KEY_WIDTH - UUID_WIDTH)
+        for key in model_index_keys(model):
+            if key.columns is None or not set(key.names) & set(columns):
+                continue
+            fields = [model.field(name) for name in key.names]
+            if None in fields:
+                continue
+            sizes = [
+                index_entry_size([
+                    _column_width(schema, stats, model, field, native if field.name in columns else None)
+                    for field in fields
+                ])
+                for native in (False, True)
+            ]
+            savings.indexes.append((_render_key(key), sizes[0], sizes[1]))
+        report.append(savings)
+    return sorted(report, key=lambda savings: -savings.total_bytes)
+
+
+# --- Migration de conversion -------------------------------------------------
+
+def _identifier(name, suffix):
+    """`name` + `suffix` tronqué à la longueur maximale d'un identifiant PostgreSQL"""
+    return name[:MAX_IDENTIFIER - len(suffix)] + suffix
+
+
+class KeyPlan:
+    """Conversion en ligne des colonnes clés TEXT → UUID d'une table"""
+
+    def __init__(self, model, table, id_column, id_type):
+        self.model = model
+        self.table = table
+        self.id_column = id_column
+        self.id_type = id_type
+        self.columns = []           # [(colonne SQL, NOT NULL)]
+        self.indexes = []           # IndexPlan des index touchés (colonnes finales)
+        self.primary_key = None     # nom de la contrainte si elle porte une colonne convertie
+        self.foreign_keys = []      # ForeignKeyPlan sortants qui portent une colonne convertie
+
+    def __repr__(self):
+        return f'KeyPlan({self.table}, {len(self.columns)} colonne(s), {len(self.indexes)} index)'
+
+    @property
+    def converted(self):
+        return [column for column, _ in self.columns]
+
+    def shadow(self, column):
+        return _identifier(column, SHADOW_SUFFIX) if column in self.converted else column
+
+
+def plan_uuid_keys(old_schema, new_schema):
+    """Tables dont des colonnes passent de TEXT à UUID entre les deux schemas"""
+    plans = []
+    for model in new_schema.models.values():
+        old_model = old_schema.model(model.name)
+        if old_model is None:
+            continue
+        columns = []
+        for field in model.fields:
+            old_field = old_model.field(field.name)
+            if old_field is None or not old_field.is_scalar:
+                continue
+            if sql_type(field) == UUID_TYPE and sql_type(old_field) == 'TEXT':
+                columns.append((column_name(field), not field.is_optional))
+        if not columns:
+            continue
+        id_field = old_model.id_field
+        if id_field is None:
+            raise ValueError(f'{model.name}: clé primaire simple requise pour le backfill par lots')
+
+        table = table_name(model)
+        plan = KeyPlan(model.name, table, column_name(id_field), sql_type(id_field))
+        plan.columns = columns
+        converted = set(plan.converted)
+
+        for key in model_index_keys(model):
+            if key.columns is None:
+                continue
+            fields = [model.field(name) for name in key.names]
+            if None in fields:
+                continue
+            index_columns = [(column_name(f), direction) for f, (_, direction) in zip(fields, key.columns)]
+            if not converted & {column for column, _ in index_columns}:
+                continue
+            name = key.member.argument('map') if key.member.kind == 'block_attribute' else None
+            if name:
+                name = name.strip('"')
+            elif key.kind == 'id':
+                name = f'{table}_pkey'
+            else:
+                suffix = 'key' if key.is_unique else 'idx'
+                name = '_'.join([table] + [column for column, _ in index_columns] + [suffix])
+            if key.kind == 'id':
+                plan.primary_key = name
+            plan.indexes.append(IndexPlan(name, index_columns, key.is_unique))
+
+        for relation, target in new_schema.relations(model):
+            if not relation.relation_fields:
+                continue
+            foreign_key = _foreign_key(model, relation, target)
+            if converted & set(foreign_key.columns):
+                plan.foreign_keys.append(foreign_key)
+        plans.append(plan)
+    return plans
+
+
+# --- Rendu SQL -------------------------------------------------------------
+
+_HEADER = '''-- PostgreSQL 12+
+-- Conversion en ligne des clés TEXT → UUID natif (générée par
+-- scripts/add-multi-tenant-to-schema-v2.py --key-type uuid)
+-- Tables: {tables}
+--
+-- À exécuter APRÈS la migration multi-tenant, avant un éventuel partitionnement,
+-- avec psql, HORS transaction (COMMIT par lot, CREATE INDEX CONCURRENTLY):
+--   psql "$DATABASE_URL" -v ON_ERROR_STOP=1 -f {path}
+--
+-- Étapes 0 à 3 rejouables; la bascule (étape 4) est une seule transaction.
+-- Elle régénère aussi le rafraîchissement des agrégats journaliers ({rollups})
+-- avec tenantId en UUID : à appliquer après stats-rollups.sql, sans le rejouer ensuite
+-- (le régénérer plutôt avec generate-rollups.py sur le schema converti).
+-- Index reconstruits en UUID dès la bascule; l'espace des anciennes colonnes
+-- dans le tas n'est rendu qu'à la réécriture des lignes (pg_repack, VACUUM FULL).
+
+SET lock_timeout = '{lock_timeout}';
+'''
+
+_CHECK = '''DO $$
+DECLARE invalid BIGINT;
+BEGIN
+  SELECT count(*) INTO invalid FROM {table} WHERE {column} IS NOT NULL AND {column} !~ '{pattern}';
+  IF invalid > 0 THEN
+    RAISE EXCEPTION '{label}: % valeur(s) qui ne sont pas des UUID', invalid;
+  END IF;
+END $$;
+'''
+
+_SYNC = '''
+-- {label}: colonnes UUID tenues à jour par les écritures de l'application
+{columns}CREATE OR REPLACE FUNCTION {function}() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+{assignments}
+  RETURN NEW;
+END $$;
+DROP TRIGGER IF EXISTS {function} ON {table};
+CREATE TRIGGER {function} BEFORE INSERT OR UPDATE ON {table}
+  FOR EACH ROW EXECUTE FUNCTION {function}();
+'''
+
+_BACKFILL = '''
+-- {label}: lots de {batch_size} lignes, pause {sleep_ms} ms
+DO $$
+DECLARE
+  last_id {id_type};
+  batch_ids {id_type}[];
+  total BIGINT := 0;
+BEGIN
+  LOOP
+    SELECT array_agg(b.{id_column} ORDER BY b.{id_column}) INTO batch_ids
+    FROM (
+      SELECT {id_column} FROM {table}
+      WHERE last_id IS NULL OR {id_column} > last_id
+      ORDER BY {id_column}
+      LIMIT {batch_size}
+    ) b;
+    EXIT WHEN batch_ids IS NULL;
+
+    UPDATE {table} SET {updates}
+    WHERE {id_column} = ANY(batch_ids) AND ({pending});
+
+    total := total + array_length(batch_ids, 1);
+    last_id := batch_ids[array_length(batch_ids, 1)];
+    COMMIT;
+    PERFORM pg_sleep({sleep_seconds});
+  END LOOP;
+  RAISE NOTICE '{label}: % ligne(s) parcourue(s)', total;
+END $$;
+'''
+
+
+def _sync_function(plan):
+    return quote(_identifier(plan.table, '_uuid_sync'))
+
+
+def _check_name(plan, column):
+    return quote(_identifier(f'{plan.table}_{column}', '_uuid_not_null'))
+
+
+def _shadow_index(index):
+    return _identifier(index.name, SHADOW_SUFFIX)
+
+
+def _index_statement(plan, index):
+    columns = ', '.join(
+        quote(plan.shadow(column)) + (' DESC' if direction == 'desc' else '') for column, direction in index.columns
+    )
+    unique = 'UNIQUE ' if index.unique else ''
+    return drop_invalid_index(_shadow_index(index)) + (
+        f'CREATE {unique}INDEX CONCURRENTLY IF NOT EXISTS {quote(_shadow_index(index))} '
+        f'ON {quote(plan.table)} ({columns});\n'
+    )
+
+
+def converted_rollups(plans, rollups):
+    """Agrégats (RollupSpec du schema converti) dont la table source ou la table d'agrégats change de type"""
+    tables = {plan.table for plan in plans}
+    return [
+        spec for spec in rollups
+        if table_name(spec.model) in tables or spec.name in tables
+    ]
+
+
+def _swap(plans, rollups=()):
+    chunks = ['BEGIN;\n']
+    for plan in plans:
+        chunks.append(f'LOCK TABLE {quote(plan.table)} IN ACCESS EXCLUSIVE MODE;\n')
+    # Clés étrangères d'abord: les deux côtés changent de type dans la même transaction
+    for plan in plans:
+        for foreign_key in plan.foreign_keys:
+            chunks.append(
+                f'ALTER TABLE {quote(foreign_key.table)} DROP CONSTRAINT IF EXISTS {quote(foreign_key.name)};\n'
+            )
+    for plan in plans:
+        table = quote(plan.table)
+        chunks.append(f'\n-- {plan.table}\n')
+        chunks.append(f'DROP TRIGGER {_sync_function(plan)} ON {table};\n')
+        for column, not_null in plan.columns:
+            # Supprime aussi les index et la clé primaire qui portent l'ancienne colonne
+            chunks.append(f'ALTER TABLE {table} DROP COLUMN {quote(column)};\n')
+            chunks.append(f'ALTER TABLE {table} RENAME COLUMN {quote(plan.shadow(column))} TO {quote(column)};\n')
+            if not_null:
+                # PostgreSQL 12+: le CHECK validé évite le scan complet sous ACCESS EXCLUSIVE
+                chunks.append(f'ALTER TABLE {table} ALTER COLUMN {quote(column)} SET NOT NULL;\n')
+                chunks.append(f'ALTER TABLE {table} DROP CONSTRAINT {_check_name(plan, column)};\n')
+        for index in plan.indexes:
+            chunks.append(f'ALTER INDEX {quote(_shadow_index(index))} RENAME TO {quote(index.name)};\n')
+        if plan.primary_key is not None:
+            chunks.append(
+                f'ALTER TABLE {table} ADD CONSTRAINT {quote(plan.primary_key)} '
+                f'PRIMARY KEY USING INDEX {quote(plan.primary_key)};\n'
+            )
+    chunks.append('\n')
+    for plan in plans:
+        for foreign_key in plan.foreign_keys:
+            chunks.append(foreign_key.statement(not_valid=True))
+    if rollups:
+        chunks.append('\n-- Agrégats journaliers: rafraîchissement régénéré avec tenantId en UUID\n')
+    for spec in rollups:
+        chunks.append(render_refresh_function(spec))
+    chunks.append('COMMIT;\n')
+    return ''.join(chunks)
+
+
+def render_uuid_migration(plans, batch_size=5000, sleep_ms=100, lock_timeout='5s',
+                          path='prisma/online-migrations/uuid-keys.sql', rollups=()):
+    """
+    Script SQL complet (6 étapes) pour une liste de KeyPlan ; `rollups` :
+    agrégats du schema converti (stats_rollups.existing_rollups)
+    """
+    rollups = converted_rollups(plans, rollups)
+    chunks = [_HEADER.format(
+        tables=', '.join(plan.table for plan in plans),
+        rollups=', '.join(spec.name for spec in rollups) or 'aucun',
+        path=path,
+        lock_timeout=lock_timeout,
+    )]
+
+    chunks.append('\n-- ===== ÉTAPE 0: contrôle des valeurs existantes (lecture seule) =====\n')
+    for plan in plans:
+        for column in plan.converted:
+            chunks.append(_CHECK.format(
+                table=quote(plan.table),
+                column=quote(column),
+                pattern=_UUID_PATTERN,
+                label=f'{plan.table}.{column}',
+            ))
+
+    chunks.append('\n-- ===== ÉTAPE 1: colonnes UUID fantômes et synchronisation des écritures =====\n')
+    for plan in plans:
+        table = quote(plan.table)
+        chunks.append(_SYNC.format(
+            label=plan.table,
+            table=table,
+            columns=''.join(
+                f'ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {quote(plan.shadow(column))} {UUID_TYPE};\n'
+                for column in plan.converted
+            ),
+            function=_sync_function(plan),
+            assignments='\n'.join(
+                f'  NEW.{quote(plan.shadow(column))} := NEW.{quote(column)}::uuid;' for column in plan.converted
+            ),
+        ))
+
+    chunks.append('\n-- ===== ÉTAPE 2: backfill par lots (keyset sur la clé primaire) =====\n')
+    for plan in plans:
+        chunks.append(_BACKFILL.format(
+            label=plan.table,
+            table=quote(plan.table),
+            id_column=quote(plan.id_column),
+            id_type=plan.id_type,
+            updates=', '.join(
+                f'{quote(plan.shadow(column))} = {quote(column)}::uuid' for column in plan.converted
+            ),
+            pending=' OR '.join(
+                f'({quote(plan.shadow(column))} IS NULL AND {quote(column)} IS NOT NULL)'
+                for column in plan.converted
+            ),
+            batch_size=batch_size,
+            sleep_ms=sleep_ms,
+            sleep_seconds=f'{sleep_ms / 1000:g}',
+        ))
+
+    chunks.append('\n-- ===== ÉTAPE 3: index UUID construits sans bloquer les écritures, CHECK NOT NULL =====\n')
+    for plan in plans:
+        table = quote(plan.table)
+        chunks.append(f'\n-- {plan.table}\n')
+        for index in plan.indexes:
+            chunks.append(_index_statement(plan, index))
+        for column, not_null in plan.columns:
+            if not not_null:
+                continue
+            check = _check_name(plan, column)
+            chunks.append(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check};\n')
+            chunks.append(
+                f'ALTER TABLE {table} ADD CONSTRAINT {check} '
+                f'CHECK ({quote(plan.shadow(column))} IS NOT NULL) NOT VALID;\n'
+            )
+            chunks.append(f'ALTER TABLE {table} VALIDATE CONSTRAINT {check};\n')
+        chunks.append(f'ANALYZE {table};\n')
+
+    chunks.append('\n-- ===== ÉTAPE 4: bascule (une transaction courte pour toutes les tables) =====\n')
+    chunks.append(_swap(plans, rollups))
+
+    chunks.append('\n-- ===== ÉTAPE 5: validation en ligne des clés étrangères =====\n')
+    for plan in plans:
+        for foreign_key in plan.foreign_keys:
+            chunks.append(
+                f'ALTER TABLE {quote(foreign_key.table)} VALIDATE CONSTRAINT {quote(foreign_key.name)};\n'
+            )
+    for plan in plans:
+        chunks.append(f'DROP FUNCTION IF EXISTS {_sync_function(plan)}();\n')
+
+    chunks.append('\nRESET lock_timeout;\n')
+    return ''.join(chunks)
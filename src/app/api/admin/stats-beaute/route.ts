@@ -3,12 +3,18 @@
  * =======================================
  * Multi-tenant ready ✅
  * Multi-métiers ready ✅
+ *
+ * Les rendez-vous sont lus dans BeautyAppointmentDailyRollup (agrégats
+ * journaliers). Ordre de déploiement: `npx prisma migrate deploy` d'abord
+ * (migration *_stats_daily_rollups: tables, triggers, backfill calculé),
+ * puis cette route ; `npm run rollups:refresh` en tâche planifiée.
  */
 
 import { NextRequest, NextResponse } from "next/server";
 import { prisma } from "@/lib/prisma";
 import { ensureAuthenticated } from "@/lib/tenant-auth";
 import { getTenantFilter } from "@/middleware/tenant-context";
+import { refreshDailyRollups, rollupDays } from "@/lib/stats-rollups";
 
 export async function GET(request: NextRequest) {
   try {
@@ -19,6 +25,9 @@ export async function GET(request: NextRequest) {
     // 🔒 Isolation multi-tenant
     const { tenantFilter } = await getTenantFilter(request);
 
+    // ⚡ Jours modifiés de ce tenant recalculés avant lecture des agrégats (lot borné)
+    await refreshDailyRollups(tenantFilter);
+
     const { searchParams } = new URL(request.url);
     const period = searchParams.get("period") || "month"; // week, month, year
     const startDate = searchParams.get("startDate");
@@ -54,17 +63,17 @@ export async function GET(request: NextRequest) {
       totalClients,
       totalProfessionals,
       totalProducts,
-      appointmentsThisPeriod,
-      revenueThisPeriod,
+      billedByTreatment,
       topTreatments,
       appointmentsByStatus,
       appointmentsByProfessional,
       stockAlerts,
     ] = await Promise.all([
-      // Total des rendez-vous
-      prisma.beautyAppointment.count({
+      // Total des rendez-vous (somme des agrégats journaliers)
+      prisma.beautyAppointmentDailyRollup.aggregate({
         where: { ...tenantFilter },
-      }),
+        _sum: { count: true },
+      }).then((result) => result._sum.count ?? 0),
 
       // Total des clients
       prisma.beautyClient.count({
@@ -81,89 +90,52 @@ export async function GET(request: NextRequest) {
         where: { ...tenantFilter },
       }),
 
-      // Rendez-vous de la période
-      prisma.beautyAppointment.findMany({
-        where: {
-          ...tenantFilter,
-          date: {
-            gte: dateFrom,
-            lte: dateTo,
-          },
-        },
-        include: {
-          treatment: true,
-          professional: true, // Au lieu de esthetician
-          client: true,
-        },
-      }),
-
-      // Calcul du chiffre d'affaires (basé sur les prix des soins)
-      prisma.beautyAppointment.findMany({
+      // Rendez-vous confirmés / terminés par soin (chiffre d'affaires)
+      prisma.beautyAppointmentDailyRollup.groupBy({
+        by: ["treatmentId"],
         where: {
           ...tenantFilter,
-          date: {
-            gte: dateFrom,
-            lte: dateTo,
-          },
+          day: rollupDays(dateFrom, dateTo),
           status: {
             in: ["CONFIRMED", "COMPLETED"],
           },
         },
-        include: {
-          treatment: true,
-        },
+        _sum: { count: true },
       }),
 
       // Top 5 des soins les plus demandés
-      prisma.beautyAppointment.groupBy({
+      prisma.beautyAppointmentDailyRollup.groupBy({
         by: ["treatmentId"],
         where: {
           ...tenantFilter,
-          date: {
-            gte: dateFrom,
-            lte: dateTo,
-          },
-        },
-        _count: {
-          treatmentId: true,
+          day: rollupDays(dateFrom, dateTo),
         },
+        _sum: { count: true },
         orderBy: {
-          _count: {
-            treatmentId: "desc",
-          },
+          _sum: { count: "desc" },
         },
         take: 5,
-      }),
+      }).then((rows) => rows.map((row) => ({ ...row, _count: { treatmentId: row._sum.count ?? 0 } }))),
 
       // Répartition par statut
-      prisma.beautyAppointment.groupBy({
+      prisma.beautyAppointmentDailyRollup.groupBy({
         by: ["status"],
         where: {
           ...tenantFilter,
-          date: {
-            gte: dateFrom,
-            lte: dateTo,
-          },
-        },
-        _count: {
-          status: true,
+          day: rollupDays(dateFrom, dateTo),
         },
-      }),
+        _sum: { count: true },
+      }).then((rows) => rows.map((row) => ({ ...row, _count: { status: row._sum.count ?? 0 } }))),
 
       // Répartition par professionnel
-      prisma.beautyAppointment.groupBy({
+      prisma.beautyAppointmentDailyRollup.groupBy({
         by: ["professionalId"],
         where: {
           ...tenantFilter,
-          date: {
-            gte: dateFrom,
-            lte: dateTo,
-          },
-        },
-        _count: {
-          professionalId: true,
+          day: rollupDays(dateFrom, dateTo),
         },
-      }),
+        _sum: { count: true },
+      }).then((rows) => rows.map((row) => ({ ...row, _count: { professionalId: row.professionalId === null ? 0 : row._sum.count ?? 0 } }))),
 
       // Alertes de stock
       prisma.beautyProduct.findMany({
@@ -216,31 +188,39 @@ export async function GET(request: NextRequest) {
       })
     );
 
-    // Calculer le chiffre d'affaires
-    const totalRevenue = revenueThisPeriod.reduce((sum, appointment) => {
-      return sum + (appointment.treatment?.price || 0);
+    // Calculer le chiffre d'affaires (prix actuel des soins × rendez-vous)
+    const billedTreatments = await prisma.beautyTreatment.findMany({
+      where: {
+        ...tenantFilter,
+        id: { in: billedByTreatment.map((item) => item.treatmentId) },
+      },
+      select: { id: true, price: true },
+    });
+    const prices = new Map(billedTreatments.map((treatment) => [treatment.id, treatment.price]));
+    const totalRevenue = billedByTreatment.reduce((sum, item) => {
+      return sum + (prices.get(item.treatmentId) || 0) * (item._sum.count ?? 0);
     }, 0);
 
-    // Statistiques de performance
-    const completedAppointments = appointmentsThisPeriod.filter(
-      (apt) => apt.status === "COMPLETED"
-    ).length;
-    const cancelledAppointments = appointmentsThisPeriod.filter(
-      (apt) => apt.status === "CANCELLED"
-    ).length;
-    const noShowAppointments = appointmentsThisPeriod.filter(
-      (apt) => apt.status === "NO_SHOW"
-    ).length;
+    // Statistiques de performance (depuis la répartition par statut)
+    const countByStatus = (status: string) =>
+      appointmentsByStatus.find((item) => item.status === status)?._count.status ?? 0;
+    const periodAppointments = appointmentsByStatus.reduce(
+      (sum, item) => sum + item._count.status,
+      0
+    );
+    const completedAppointments = countByStatus("COMPLETED");
+    const cancelledAppointments = countByStatus("CANCELLED");
+    const noShowAppointments = countByStatus("NO_SHOW");
 
     const completionRate =
-      appointmentsThisPeriod.length > 0
-        ? (completedAppointments / appointmentsThisPeriod.length) * 100
+      periodAppointments > 0
+        ? (completedAppointments / periodAppointments) * 100
         : 0;
 
     const cancellationRate =
-      appointmentsThisPeriod.length > 0
+      periodAppointments > 0
         ? ((cancelledAppointments + noShowAppointments) /
-            appointmentsThisPeriod.length) *
+            periodAppointments) *
           100
         : 0;
 
@@ -249,7 +229,7 @@ export async function GET(request: NextRequest) {
       (dateTo.getTime() - dateFrom.getTime()) / (1000 * 60 * 60 * 24)
     );
     const avgAppointmentsPerDay =
-      daysDiff > 0 ? appointmentsThisPeriod.length / daysDiff : 0;
+      daysDiff > 0 ? periodAppointments / daysDiff : 0;
 
     const stats = {
       // Totaux généraux
@@ -262,7 +242,7 @@ export async function GET(request: NextRequest) {
 
       // Période sélectionnée
       period: {
-        appointments: appointmentsThisPeriod.length,
+        appointments: periodAppointments,
         revenue: totalRevenue,
         completedAppointments,
         cancelledAppointments,
@@ -278,9 +258,9 @@ export async function GET(request: NextRequest) {
         status: item.status,
         count: item._count.status,
         percentage:
-          appointmentsThisPeriod.length > 0
+          periodAppointments > 0
             ? Math.round(
-                (item._count.status / appointmentsThisPeriod.length) * 100 * 100
+                (item._count.status / periodAppointments) * 100 * 100
               ) / 100
             : 0,
       })),
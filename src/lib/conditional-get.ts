@@ -0,0 +1,143 @@
+/**
+ * GET conditionnels (ETag / Last-Modified / 304) pour les routes de contenu
+ * Généré par scripts/migrate-apis-multi-tenant.py --pass conditional-get
+ *
+ * - visibility "public": le validateur vient des sources (updatedAt + nombre
+ *   de lignes des modèles lus, date du fichier JSON) et la requête reçoit un
+ *   304 AVANT l'exécution du handler
+ * - visibility "private" (routes authentifiées): le handler s'exécute
+ *   (contrôle d'accès compris), l'ETag est le hash du corps, le 304 évite
+ *   seulement l'envoi
+ *
+ * L'URL complète (hôte du tenant, chemin, query string) et l'identifiant de
+ * déploiement entrent dans l'ETag: un tenant ne reçoit jamais le validateur
+ * d'un autre, un déploiement invalide les réponses en cache.
+ */
+
+import { createHash } from "crypto";
+import { promises as fs } from "fs";
+import path from "path";
+import { NextResponse } from "next/server";
+
+export interface SourceVersion {
+  updatedAt: Date | null;
+  count: number;
+}
+
+export interface ConditionalGetOptions {
+  route: string;
+  visibility: "public" | "private";
+  sources?: () => Array<Promise<SourceVersion>>;
+}
+
+const CACHE_CONTROL = {
+  public: "public, max-age=60, stale-while-revalidate=300",
+  private: "private, no-cache",
+};
+
+const DEPLOYMENT_ID = process.env.NEXT_DEPLOYMENT_ID || process.env.VERCEL_GIT_COMMIT_SHA || "";
+
+/**
+ * Version d'un modèle Prisma: dernier updatedAt et nombre de lignes
+ * (le nombre détecte les suppressions)
+ */
+export async function modelVersion(
+  delegate: { aggregate: (args: any) => PromiseLike<any> },
+  where?: Record<string, unknown>
+): Promise<SourceVersion> {
+  const result = await delegate.aggregate({
+    where,
+    _max: { updatedAt: true },
+    _count: { _all: true },
+  });
+  return { updatedAt: result._max.updatedAt ?? null, count: result._count._all };
+}
+
+/**
+ * Version d'un fichier de contenu (chemin relatif à la racine du projet)
+ */
+export async function fileVersion(relativePath: string): Promise<SourceVersion> {
+  const stats = await fs.stat(path.join(process.cwd(), relativePath));
+  return { updatedAt: stats.mtime, count: stats.size };
+}
+
+function weakETag(...parts: Array<string | Buffer>): string {
+  const hash = createHash("sha1");
+  for (const part of parts) hash.update(part).update("|");
+  return `W/"${hash.digest("base64url")}"`;
+}
+
+// Comparaison faible (RFC 9110): W/"x" et "x" sont équivalents
+function matchesETag(request: Request, etag: string): boolean {
+  const ifNoneMatch = request.headers.get("if-none-match");
+  if (!ifNoneMatch) return false;
+  const opaque = etag.replace(/^W\//, "");
+  return ifNoneMatch
+    .split(",")
+    .some((tag) => tag.trim() === "*" || tag.trim().replace(/^W\//, "") === opaque);
+}
+
+function validatorHeaders(etag: string, lastModified: Date | null, cacheControl: string): Record<string, string> {
+  const headers: Record<string, string> = { etag, "cache-control": cacheControl };
+  if (lastModified) headers["last-modified"] = lastModified.toUTCString();
+  return headers;
+}
+
+/**
+ * Enveloppe un GET: ETag + Last-Modified + Cache-Control sur les 200, 304
+ * si If-None-Match correspond. If-Modified-Since n'est pas utilisé: une
+ * suppression ne change pas le dernier updatedAt, seul l'ETag la voit.
+ */
+export function conditionalGet<A extends unknown[], R extends Response>(
+  options: ConditionalGetOptions,
+  handler: (...args: A) => R | Promise<R>
+): (...args: A) => Promise<Response> {
+  const cacheControl = CACHE_CONTROL[options.visibility];
+
+  return async (...args: A) => {
+    // Next.js passe toujours la requête, même à un `GET()` sans paramètre
+    const request = args[0] as unknown as Request;
+    let etag: string | null = null;
+    let lastModified: Date | null = null;
+
+    if (options.sources) {
+      try {
+        const versions = await Promise.all(options.sources());
+        etag = weakETag(
+          DEPLOYMENT_ID,
+          request.url,
+          ...versions.map((version) => `${version.updatedAt?.getTime() ?? 0}:${version.count}`)
+        );
+        lastModified = versions.reduce<Date | null>(
+          (latest, version) =>
+            version.updatedAt && (!latest || version.updatedAt > latest) ? version.updatedAt : latest,
+          null
+        );
+        if (matchesETag(request, etag)) {
+          return new NextResponse(null, { status: 304, headers: validatorHeaders(etag, lastModified, cacheControl) });
+        }
+      } catch (error) {
+        // Source indisponible (BD, fichier): réponse complète, sans validateur
+        etag = null;
+        lastModified = null;
+      }
+    }
+
+    const response = await handler(...args);
+    if (response.status !== 200) return response;
+
+    if (!etag) {
+      const body = Buffer.from(await response.clone().arrayBuffer());
+      etag = weakETag(DEPLOYMENT_ID, request.url, body);
+      if (matchesETag(request, etag)) {
+        return new NextResponse(null, { status: 304, headers: validatorHeaders(etag, null, cacheControl) });
+      }
+    }
+
+    response.headers.set("etag", etag);
+    if (lastModified) response.headers.set("last-modified", lastModified.toUTCString());
+    // Un Cache-Control posé par le handler reste prioritaire
+    if (!response.headers.has("cache-control")) response.headers.set("cache-control", cacheControl);
+    return response;
+  };
+}
@@ -4,38 +4,119 @@ interface CacheEntry<T> {
   expiresAt: number;
 }
 
+export interface CacheStats {
+  hits: number;
+  misses: number;
+  evictions: number;
+  invalidations: number;
+  size: number;
+  maxEntries: number;
+  hitRate: number;
+}
+
+// Portée tenant d'une clé: tenantId, tenantFilter ({ tenantId } ou {} pour
+// le super admin) ou null (requête non scopée, partagée par tous les tenants)
+export type TenantScope = string | { tenantId?: string | null } | null | undefined;
+
+const ALL_TENANTS = "*";
+
+function tenantSegment(scope: TenantScope): string {
+  const tenantId = typeof scope === "string" ? scope : scope?.tenantId;
+  return tenantId || ALL_TENANTS;
+}
+
+/**
+ * Clé de cache d'une lecture: tenant:<tenantId|*>:<Modèle>:<parties>
+ * (invalidée par modèle, voir invalidateTenantModel)
+ */
+export function tenantCacheKey(scope: TenantScope, model: string, ...parts: Array<string | number>): string {
+  return [`tenant:${tenantSegment(scope)}`, model, ...parts].join(":");
+}
+
 class ContentCache {
   private cache: Map<string, CacheEntry<any>> = new Map();
+  private pending: Map<string, Promise<any>> = new Map();
   private readonly TTL = 5 * 60 * 1000; // 5 minutes par défaut
+  // Lectures Prisma mises en cache par scripts/api_codemods/read_cache.py:
+  // invalidées par les écritures des routes, la TTL borne le reste
+  private readonly READ_THROUGH_TTL = 60 * 1000;
+  private hits = 0;
+  private misses = 0;
+  private evictions = 0;
+  private invalidations = 0;
+
+  constructor(private readonly maxEntries = Number(process.env.CONTENT_CACHE_MAX_ENTRIES) || 1000) {}
 
   /**
-   * Stocker des données dans le cache
+   * Stocker des données dans le cache (évince les moins récemment utilisées
+   * au-delà de maxEntries)
    */
   set<T>(key: string, data: T, ttl?: number): void {
     const expiresAt = Date.now() + (ttl || this.TTL);
 
+    // Réinsérer pour placer la clé en fin d'ordre LRU
+    this.cache.delete(key);
     this.cache.set(key, {
       data,
       timestamp: Date.now(),
       expiresAt,
     });
+
+    while (this.cache.size > this.maxEntries) {
+      const oldest = this.cache.keys().next().value as string;
+      this.cache.delete(oldest);
+      this.evictions++;
+    }
+  }
+
+  /**
+   * Entrée valide (promue en fin d'ordre LRU), compte hits et misses
+   */
+  private lookup<T>(key: string): CacheEntry<T> | undefined {
+    const entry = this.cache.get(key);
+
+    if (!entry || Date.now() > entry.expiresAt) {
+      if (entry) this.cache.delete(key);
+      this.misses++;
+      return undefined;
+    }
+
+    this.cache.delete(key);
+    this.cache.set(key, entry);
+    this.hits++;
+    return entry;
   }
 
   /**
    * Récupérer des données du cache
    */
   get<T>(key: string): T | null {
-    const entry = this.cache.get(key);
+    const entry = this.lookup<T>(key);
+    return entry ? entry.data : null;
+  }
 
-    if (!entry) return null;
+  /**
+   * Lecture à travers le cache: `loader` n'est appelé qu'en cas d'absence,
+   * une seule fois pour des requêtes concurrentes sur la même clé
+   */
+  async read<T>(key: string, loader: () => PromiseLike<T>, ttl: number = this.READ_THROUGH_TTL): Promise<T> {
+    const entry = this.lookup<T>(key);
+    if (entry) return entry.data;
 
-    // Vérifier si le cache a expiré
-    if (Date.now() > entry.expiresAt) {
-      this.cache.delete(key);
-      return null;
-    }
+    const inFlight = this.pending.get(key);
+    if (inFlight) return inFlight;
 
-    return entry.data as T;
+    const load = Promise.resolve(loader())
+      .then((data) => {
+        // Une invalidation pendant le chargement retire la clé de `pending`
+        if (this.pending.get(key) === load) this.set(key, data, ttl);
+        return data;
+      })
+      .finally(() => {
+        if (this.pending.get(key) === load) this.pending.delete(key);
+      });
+    this.pending.set(key, load);
+    return load;
   }
 
   /**
@@ -75,11 +156,50 @@ class ContentCache {
     }
   }
 
+  /**
+   * Invalider les lectures d'un modèle pour un tenant (et les lectures
+   * tous tenants), ou pour tous les tenants si la portée est vide
+   */
+  invalidateTenantModel(scope: TenantScope, model: string): void {
+    const tenant = tenantSegment(scope);
+    const matches = (key: string) => {
+      const [prefix, keyTenant, keyModel] = key.split(":", 3);
+      return (
+        prefix === "tenant" &&
+        keyModel === model &&
+        (tenant === ALL_TENANTS || keyTenant === tenant || keyTenant === ALL_TENANTS)
+      );
+    };
+
+    for (const key of this.cache.keys()) {
+      if (matches(key)) {
+        this.cache.delete(key);
+        this.invalidations++;
+      }
+    }
+    for (const key of this.pending.keys()) {
+      if (matches(key)) this.pending.delete(key);
+    }
+  }
+
+  /**
+   * Attendre une écriture Prisma (ou une $transaction) puis invalider les
+   * lectures du ou des modèles écrits
+   */
+  async invalidateAfter<T>(scope: TenantScope, models: string | string[], write: PromiseLike<T>): Promise<T> {
+    const result = await write;
+    for (const model of Array.isArray(models) ? models : [models]) {
+      this.invalidateTenantModel(scope, model);
+    }
+    return result;
+  }
+
   /**
    * Vider tout le cache
    */
   clear(): void {
     this.cache.clear();
+    this.pending.clear();
   }
 
   /**
@@ -96,6 +216,22 @@ class ContentCache {
     return Array.from(this.cache.keys());
   }
 
+  /**
+   * Compteurs depuis le démarrage du process
+   */
+  stats(): CacheStats {
+    const lookups = this.hits + this.misses;
+    return {
+      hits: this.hits,
+      misses: this.misses,
+      evictions: this.evictions,
+      invalidations: this.invalidations,
+      size: this.cache.size,
+      maxEntries: this.maxEntries,
+      hitRate: lookups ? this.hits / lookups : 0,
+    };
+  }
+
   /**
    * Nettoyer les entrées expirées
    */
@@ -14,6 +14,12 @@ const isEdgeRuntime = typeof process === "undefined" || process.env.NEXT_RUNTIME
 
 // Import conditionnel de prom-client (uniquement en Node.js Runtime)
 let Counter: any, Histogram: any, register: any;
+// Contexte route/méthode des handlers instrumentés (async_hooks: Node.js uniquement)
+type RouteLabels = { route: string; method: string };
+let routeContext: { run: <T>(store: RouteLabels, fn: () => T) => T; getStore: () => RouteLabels | undefined } = {
+  run: (_store, fn) => fn(),
+  getStore: () => undefined,
+};
 
 if (!isEdgeRuntime) {
   try {
@@ -24,6 +30,12 @@ if (!isEdgeRuntime) {
   } catch (error) {
     console.warn("prom-client not available:", error);
   }
+  try {
+    const { AsyncLocalStorage } = require("async_hooks");
+    routeContext = new AsyncLocalStorage();
+  } catch (error) {
+    console.warn("async_hooks not available:", error);
+  }
 } else {
   // Créer des stubs pour Edge Runtime
   Counter = class {
@@ -83,6 +95,60 @@ export const apiErrorsTotal = new Counter({
   labelNames: ["route", "error_type", "tenant_id"],
 });
 
+// Durée des handlers instrumentés (scripts/migrate-apis-multi-tenant.py --pass instrument)
+export const routeHandlerDuration = new Histogram({
+  name: "route_handler_duration_seconds",
+  help: "Duration of instrumented route handlers in seconds",
+  labelNames: ["route", "method", "status"],
+  buckets: [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+});
+
+// Durée de chaque appel Prisma instrumenté, rattaché à sa route
+export const routeQueryDuration = new Histogram({
+  name: "route_query_duration_seconds",
+  help: "Duration of instrumented Prisma calls per route in seconds",
+  labelNames: ["route", "method", "model", "operation"],
+  buckets: [0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1],
+});
+
+/**
+ * Enveloppe un handler de route: durée par route/méthode/statut et contexte
+ * pour les appels instrumentQuery du même traitement.
+ * Code généré: retiré par `--pass instrument --strip`.
+ */
+export function instrumentRoute<A extends unknown[], R extends Response>(
+  route: string,
+  method: string,
+  handler: (...args: A) => R | Promise<R>
+): (...args: A) => Promise<R> {
+  return (...args: A) =>
+    routeContext.run({ route, method }, async () => {
+      const startTime = performance.now();
+      let status = "500";
+      try {
+        const response = await handler(...args);
+        status = String(response.status);
+        return response;
+      } finally {
+        routeHandlerDuration.observe({ route, method, status }, (performance.now() - startTime) / 1000);
+      }
+    });
+}
+
+/**
+ * Mesure un appel Prisma (la requête part au premier `then`).
+ * Code généré: retiré par `--pass instrument --strip`.
+ */
+export async function instrumentQuery<T>(model: string, operation: string, query: PromiseLike<T>): Promise<T> {
+  const { route, method } = routeContext.getStore() ?? { route: "unknown", method: "unknown" };
+  const startTime = performance.now();
+  try {
+    return await query;
+  } finally {
+    routeQueryDuration.observe({ route, method, model, operation }, (performance.now() - startTime) / 1000);
+  }
+}
+
 /**
  * Middleware Prisma pour tracer les queries lentes
  */
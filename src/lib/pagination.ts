@@ -0,0 +1,90 @@
+/**
+ * PAGINATION PAR CURSEUR (KEYSET)
+ * ===============================
+ *
+ * Les listes scopées par tenant (commandes, rendez-vous, galerie...) ne
+ * renvoient plus toutes les lignes du tenant : une page de `limit` lignes
+ * et un `nextCursor` (id de la dernière ligne) pour demander la suivante.
+ *
+ * Le curseur porte sur `id` avec un tri stable (colonne de tri + id) : la
+ * page suivante reprend après la dernière ligne vue, sans OFFSET, en
+ * s'appuyant sur l'index `(tenantId, <tri>, id)` du schema.
+ *
+ * La pagination est opt-in : sans `limit` ni `cursor` dans l'URL, la liste
+ * complète est renvoyée (`nextCursor: null`), comme avant, pour les pages
+ * clientes qui ne lisent pas encore `nextCursor`.
+ *
+ * Usage:
+ * ```typescript
+ * const cursorPage = parseCursorParams(request); // ?limit=50&cursor=<id>
+ * const orders = await prisma.order.findMany({
+ *   where,
+ *   orderBy: [{ createdAt: "desc" }, { id: "desc" }],
+ *   ...cursorArgs(cursorPage),
+ * });
+ * return NextResponse.json({ success: true, ...paginate(orders, cursorPage.take) });
+ * ```
+ *
+ * @author KAIRO Digital
+ * @date 18 Octobre 2026
+ */
+
+import { NextRequest } from "next/server";
+
+export const DEFAULT_PAGE_SIZE = 100;
+export const MAX_PAGE_SIZE = 500;
+
+export interface CursorPage {
+  /** null : ni `limit` ni `cursor` demandés, liste complète */
+  take: number | null;
+  cursor: string | null;
+}
+
+/**
+ * LIRE `limit` ET `cursor` DANS L'URL
+ */
+export function parseCursorParams(
+  request: NextRequest,
+  defaultSize: number = DEFAULT_PAGE_SIZE
+): CursorPage {
+  const { searchParams } = new URL(request.url);
+  const cursor = searchParams.get("cursor") || null;
+  const limit = Number.parseInt(searchParams.get("limit") ?? "", 10);
+
+  if (Number.isFinite(limit) && limit > 0) {
+    return { take: Math.min(limit, MAX_PAGE_SIZE), cursor };
+  }
+  // Pas de limite demandée : toutes les lignes, sauf reprise sur curseur
+  return { take: cursor ? defaultSize : null, cursor };
+}
+
+/**
+ * ARGUMENTS PRISMA DE LA PAGE (une ligne de plus pour savoir s'il en reste)
+ */
+export function cursorArgs(page: CursorPage): {
+  take?: number;
+  cursor?: { id: string };
+  skip?: number;
+} {
+  if (page.take === null) {
+    return {};
+  }
+  if (!page.cursor) {
+    return { take: page.take + 1 };
+  }
+  return { take: page.take + 1, cursor: { id: page.cursor }, skip: 1 };
+}
+
+/**
+ * DÉCOUPER LE RÉSULTAT EN PAGE + CURSEUR SUIVANT
+ */
+export function paginate<T extends { id: string }>(
+  rows: T[],
+  take: number | null
+): { data: T[]; nextCursor: string | null } {
+  if (take === null || rows.length <= take) {
+    return { data: rows, nextCursor: null };
+  }
+  const data = rows.slice(0, take);
+  return { data, nextCursor: data[data.length - 1].id };
+}
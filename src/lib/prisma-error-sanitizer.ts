@@ -132,6 +132,28 @@ export function sanitizePrismaError(
   };
 }
 
+/**
+ * Transformer l'erreur "enregistrement introuvable" (P2025) en `null`,
+ * ainsi qu'un id mal formé sur une clé @db.Uuid (P2023): aucune ligne ne peut correspondre
+ * 
+ * Usage pour une écriture scopée par tenant (un seul aller-retour):
+ * ```typescript
+ * const project = await prisma.project
+ *   .update({ where: { id, ...tenantFilter }, data })
+ *   .catch(nullIfNotFound);
+ * if (!project) return NextResponse.json({ error: "..." }, { status: 404 });
+ * ```
+ */
+export function nullIfNotFound(error: unknown): null {
+  if (
+    error instanceof Prisma.PrismaClientKnownRequestError &&
+    (error.code === "P2025" || error.code === "P2023")
+  ) {
+    return null;
+  }
+  throw error;
+}
+
 /**
  * Wrapper pour exécuter une opération Prisma avec gestion d'erreurs sanitisée
  */
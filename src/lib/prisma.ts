@@ -1,18 +1,43 @@
-import { PrismaClient } from "@prisma/client";
+import { Prisma, PrismaClient } from "@prisma/client";
 import { initializePrismaMiddleware } from "./prisma-middleware";
 
 // PrismaClient est attaché au scope global en développement pour éviter
 // d'épuiser les connexions pendant les hot-reloads
 const globalForPrisma = global as unknown as { prisma: PrismaClient };
 
-export const prisma =
-  globalForPrisma.prisma ||
-  new PrismaClient({
-    log:
-      process.env.NODE_ENV === "development"
-        ? ["query", "error", "warn"]
-        : ["error"],
+// Une ligne JSON par requête (durée, paramètres) sur stdout, lue par
+// scripts/analyze-query-logs.py
+const queryEvents = process.env.PRISMA_QUERY_EVENTS === "true";
+
+function createPrismaClient(): PrismaClient {
+  if (!queryEvents) {
+    return new PrismaClient({
+      log:
+        process.env.NODE_ENV === "development"
+          ? ["query", "error", "warn"]
+          : ["error"],
+    });
+  }
+
+  const client = new PrismaClient({
+    log: [{ emit: "event", level: "query" }, "error", "warn"],
   });
+  client.$on("query", (event: Prisma.QueryEvent) => {
+    console.log(
+      JSON.stringify({
+        prisma: "query",
+        timestamp: event.timestamp,
+        duration: event.duration,
+        query: event.query,
+        params: event.params,
+        target: event.target,
+      })
+    );
+  });
+  return client as unknown as PrismaClient;
+}
+
+export const prisma = globalForPrisma.prisma || createPrismaClient();
 
 if (process.env.NODE_ENV !== "production") globalForPrisma.prisma = prisma;
 
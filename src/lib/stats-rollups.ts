@@ -0,0 +1,70 @@
+/**
+ * Agrégats journaliers par tenant des tableaux de bord (modèles *DailyRollup)
+ * Générés par scripts/generate-rollups.py, lus par la passe rollup-reads
+ *
+ * Un trigger marque (tenant, jour) dans RollupDirtyDay à chaque écriture sur
+ * la table source ; kairo_refresh_daily_rollups (migration Prisma
+ * *_stats_daily_rollups, qui calcule aussi le backfill) recalcule les jours
+ * marqués.
+ * - refreshDailyRollups(tenantFilter): jours du tenant, avant lecture (lot borné)
+ * - drainDailyRollups(): tous les tenants, par lots (npm run rollups:refresh)
+ */
+
+import { prisma } from "@/lib/prisma";
+
+// Jours recalculés au plus avant une lecture: la latence du tableau de bord reste bornée
+const READ_BATCH = 50;
+const JOB_BATCH = 500;
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+/**
+ * Jour UTC (minuit) d'une date, granularité des colonnes `day` (@db.Date)
+ */
+function utcDay(date: Date): Date {
+  return new Date(Math.floor(date.getTime() / DAY_MS) * DAY_MS);
+}
+
+/**
+ * Filtre `day` d'une période: jours UTC de `from` à `to` inclus (les jours
+ * partiels aux bornes comptent en entier)
+ */
+export function rollupDays(from?: Date, to?: Date): { gte?: Date; lte?: Date } {
+  return {
+    ...(from ? { gte: utcDay(from) } : {}),
+    ...(to ? { lte: utcDay(to) } : {}),
+  };
+}
+
+async function refreshBatch(batchSize: number, tenantId: string | null): Promise<number> {
+  const [result] = await prisma.$queryRaw<Array<{ refreshed: number }>>`
+    SELECT kairo_refresh_daily_rollups(${batchSize}::integer, ${tenantId}::text) AS refreshed
+  `;
+  return Number(result?.refreshed ?? 0);
+}
+
+/**
+ * Recalcule les jours modifiés d'un tenant (sans effet pour une portée tous
+ * tenants: le job s'en charge). Une erreur n'empêche pas la lecture.
+ */
+export async function refreshDailyRollups(scope: { tenantId?: string | null } | null | undefined): Promise<number> {
+  if (!scope?.tenantId) return 0;
+  try {
+    return await refreshBatch(READ_BATCH, scope.tenantId);
+  } catch (error) {
+    console.error("⚠️ Rafraîchissement des agrégats journaliers:", error);
+    return 0;
+  }
+}
+
+/**
+ * Vide la file des jours marqués, tous tenants, lot par lot (job planifié)
+ */
+export async function drainDailyRollups(batchSize = JOB_BATCH): Promise<number> {
+  let total = 0;
+  for (;;) {
+    const refreshed = await refreshBatch(batchSize, null);
+    total += refreshed;
+    if (refreshed < batchSize) return total;
+  }
+}
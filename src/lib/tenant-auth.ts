@@ -97,11 +97,16 @@ export async function getAuthenticatedUser(
  * 
  * - Si SuperAdmin: Peut spécifier un tenant via query param ?tenantId=xxx
  * - Si TenantUser: Retourne automatiquement son tenantId
+ * 
+ * `knownUser` évite une seconde lecture de session quand l'appelant a déjà
+ * l'utilisateur (ex: retour de ensureAuthenticated)
  */
 export async function getTenantContext(
-  request: NextRequest
+  request: NextRequest,
+  knownUser?: AuthenticatedUser | null
 ): Promise<{ tenantId: string | null; tenantSlug: string | null }> {
-  const user = await getAuthenticatedUser(request);
+  const user =
+    knownUser !== undefined ? knownUser : await getAuthenticatedUser(request);
 
   if (!user) {
     return { tenantId: null, tenantSlug: null };
@@ -10,7 +10,11 @@
  */
 
 import { NextRequest } from "next/server";
-import { getTenantContext, getAuthenticatedUser } from "@/lib/tenant-auth";
+import {
+  getTenantContext,
+  getAuthenticatedUser,
+  type AuthenticatedUser,
+} from "@/lib/tenant-auth";
 
 /**
  * Helper pour construire les filtres Prisma avec isolation tenant
@@ -112,6 +116,101 @@ export async function requireTenant(request: NextRequest): Promise<{
   throw new Error("Type d'utilisateur inconnu");
 }
 
+/**
+ * Contexte tenant complet, résolu UNE seule fois par requête
+ */
+export interface TenantScope {
+  tenantId: string | null;
+  tenantSlug: string | null;
+  tenantFilter: { tenantId?: string } | {};
+  isSuperAdmin: boolean;
+}
+
+/**
+ * Helper pour résoudre tenantId ET tenantFilter en une seule fois
+ * 
+ * Remplace `getTenantFilter` et réutilise l'utilisateur déjà retourné par
+ * ensureAuthenticated (aucune relecture de session).
+ * 
+ * Usage:
+ * ```typescript
+ * const authResult = await ensureAuthenticated(request);
+ * if (authResult instanceof NextResponse) return authResult;
+ * 
+ * const { tenantId, tenantFilter } = await getTenantScope(request, authResult);
+ * ```
+ */
+export async function getTenantScope(
+  request: NextRequest,
+  knownUser?: AuthenticatedUser | null
+): Promise<TenantScope> {
+  const user =
+    knownUser !== undefined ? knownUser : await getAuthenticatedUser(request);
+  const { tenantId, tenantSlug } = await getTenantContext(request, user);
+
+  const isSuperAdmin = user?.type === "SUPER_ADMIN";
+
+  // SuperAdmin sans tenant spécifié = accès global (pas de filtre)
+  // Utilisateur non authentifié ou sans tenant = pas de filtre non plus
+  if (!tenantId) {
+    return {
+      tenantFilter: {},
+      tenantId: null,
+      tenantSlug: null,
+      isSuperAdmin,
+    };
+  }
+
+  return {
+    tenantFilter: { tenantId },
+    tenantId,
+    tenantSlug,
+    isSuperAdmin,
+  };
+}
+
+/**
+ * Variante de getTenantScope qui exige un tenant (mêmes erreurs que requireTenant)
+ * 
+ * Remplace la séquence `requireTenant` + `getTenantFilter`:
+ * ```typescript
+ * const { tenantId, tenantFilter } = await requireTenantScope(request, authResult);
+ * ```
+ */
+export async function requireTenantScope(
+  request: NextRequest,
+  knownUser?: AuthenticatedUser | null
+): Promise<TenantScope & { tenantId: string; tenantSlug: string }> {
+  const user =
+    knownUser !== undefined ? knownUser : await getAuthenticatedUser(request);
+
+  if (!user) {
+    throw new Error("Authentification requise");
+  }
+
+  if (user.type === "TENANT_USER") {
+    if (!user.tenantId || !user.tenantSlug) {
+      throw new Error("Tenant non trouvé pour cet utilisateur");
+    }
+  } else if (user.type !== "SUPER_ADMIN") {
+    throw new Error("Type d'utilisateur inconnu");
+  }
+
+  const scope = await getTenantScope(request, user);
+
+  if (!scope.tenantId || !scope.tenantSlug) {
+    throw new Error(
+      "SuperAdmin doit spécifier un tenant via ?tenantId=xxx ou ?tenantSlug=xxx"
+    );
+  }
+
+  return {
+    ...scope,
+    tenantId: scope.tenantId,
+    tenantSlug: scope.tenantSlug,
+  };
+}
+
 /**
  * Helper pour vérifier qu'un tenant peut accéder à une ressource
  * 